@@ -433,7 +433,7 @@ class DataLoader:
         """Load stock data for screening"""
         global stockDictPrimary, stockDictSecondary, loadedStockData
         
-        loadedStockData = loadedStockData and stockDictPrimary is not None and len(stockDictPrimary) > 0
+        loadedStockData = loadedStockData and stockDictPrimary is not None and len(stockDictPrimary) > 0 and AssetsManager.PKAssetsManager.hasLoadedUniverse(stockDictPrimary, listStockCodes)
         
         if (menuOption in ["X", "B", "G", "S", "F"] and not loadedStockData) or (
             self.configManager.cacheEnabled and not loadedStockData and not self.app_state.testing
@@ -647,7 +647,8 @@ class MainApplication:
                         insideBarToLookback, respChartPattern, daysForLowestVolume, 
                         backtestPeriod, reversalOption, maLength, listStockCodes, 
                         menuOption, exchangeName, executeOption, volumeRatio, items, 
-                        daysInPast, runOption=f"{userPassedArgs.options} =>{runOptionName} => {menuChoiceHierarchy}"
+                        daysInPast, runOption=f"{userPassedArgs.options} =>{runOptionName} => {menuChoiceHierarchy}",
+                        stockDict=stockDictPrimary
                     )
                 
                 if savedStocksCount > 0:
@@ -33,4 +33,7 @@ Imports = {
     "keras": find_spec("keras") is not None,
     # "yfinance": find_spec("yfinance") is not None,
     "vectorbt": find_spec("vectorbt") is not None,
+    "zstandard": find_spec("zstandard") is not None,
+    "lz4": find_spec("lz4") is not None,
+    "numba": find_spec("numba") is not None,
 }
@@ -47,6 +47,8 @@ from PKDevTools.classes.PKBackupRestore import start_backup
 import pkscreener.classes.Fetcher as Fetcher
 from pkscreener.classes.PKTask import PKTask
 from pkscreener.classes import Utility, ImageUtility
+from pkscreener.classes import PKCacheMetadata, PKCandleLog, PKChunkedCache, PKColumnarCache, StockDataSchema
+from pkscreener.classes.StockDataPacker import packStockDict
 import pkscreener.classes.ConfigManager as ConfigManager
 from pkscreener.classes.PKScheduler import PKScheduler
 
@@ -54,6 +56,9 @@ class PKAssetsManager:
     fetcher = Fetcher.screenerStockDataFetcher()
     configManager = ConfigManager.tools()
     configManager.getConfig(ConfigManager.parser)
+    # The candle log is folded back into the cache once it grows beyond
+    # this fraction of the cache file size
+    CANDLE_LOG_COMPACTION_RATIO = 0.1
 
     @staticmethod
     def is_data_fresh(stock_data, max_stale_trading_days=1):
@@ -178,7 +183,7 @@ class PKAssetsManager:
         return fresh_count, stale_count, oldest_date
 
     @staticmethod
-    def _apply_fresh_ticks_to_data(stockDict):
+    def _apply_fresh_ticks_to_data(stockDict, updatedCandles=None):
         """
         Apply fresh tick data from PKBrokers to update stale stock data.
         
@@ -187,6 +192,8 @@ class PKAssetsManager:
         
         Args:
             stockDict: Dictionary of stock data (symbol -> dict with 'data', 'columns', 'index')
+            updatedCandles: Optional dictionary that receives only the new or
+                updated candles (symbol -> split-dict), for PKCandleLog
             
         Returns:
             dict: Updated stockDict with fresh tick data merged
@@ -272,6 +279,8 @@ class PKAssetsManager:
                                         stock_data['index'] = new_index
                                         stockDict[symbol] = stock_data
                                         updated_count += 1
+                                        if updatedCandles is not None:
+                                            updatedCandles[symbol] = {"columns": list(stock_data.get('columns', [])), "index": [market_close_time], "data": [list(stock_data.get('data', [])[-1])]}
                         except:
                             pass
                 
@@ -463,6 +472,8 @@ class PKAssetsManager:
                     stock_data['index'] = new_index
                     stockDict[symbol] = stock_data
                     updated_count += 1
+                    if updatedCandles is not None:
+                        updatedCandles[symbol] = {"columns": list(columns), "index": [timestamp_str], "data": [today_row]}
                     
                 except Exception as e:
                     default_logger().debug(f"Error applying tick for {symbol}: {e}", exc_info=True)
@@ -539,6 +550,24 @@ class PKAssetsManager:
             ])
             
             output_path = os.path.join(data_dir, "stock_data_github.pkl")
+
+            # A chunked copy is judged by its small manifest before its chunks
+            # are downloaded (in parallel)
+            session = requests.Session()
+            chunkedBaseUrl = "https://raw.githubusercontent.com/pkjmesra/PKScreener/actions-data-download/actions-data-download"
+            for days_ago in range(0, 10):
+                cacheFileName = f"stock_data_{(today - timedelta(days=days_ago)).strftime('%d%m%Y')}.pkl"
+                try:
+                    manifest = PKChunkedCache.fetchManifest(chunkedBaseUrl, cacheFileName, session=session)
+                    if manifest is None or PKCacheMetadata.medianRowCount(manifest["cache"]) < 100:
+                        continue
+                    data = PKChunkedCache.downloadChunks(chunkedBaseUrl, manifest, session=session)
+                    with open(output_path, "wb") as f:
+                        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    default_logger().info(f"Downloaded chunked cache from GitHub: {cacheFileName} ({len(data)} instruments)")
+                    return True, output_path, len(data)
+                except Exception as e:
+                    default_logger().debug(f"Failed to download the chunked cache {cacheFileName}: {e}")
             
             # Track best file (most rows per stock)
             best_file = None
@@ -882,12 +911,19 @@ class PKAssetsManager:
                 except: # pragma: no cover
                     pass
             configManager.deleteFileWithPattern(rootDir=outputFolder)
+            for extension in [PKChunkedCache.MANIFEST_EXTENSION, PKChunkedCache.CHUNK_EXTENSION]:
+                configManager.deleteFileWithPattern(
+                    pattern=f"{'intraday_' if configManager.isIntradayConfig() else ''}stock_data_*{extension}",
+                    rootDir=outputFolder)
         cache_file = os.path.join(outputFolder, fileName)
         if not os.path.exists(cache_file) or forceSave or (loadCount >= 0 and len(stockDict) > (loadCount + 1)):
             try:
-                with open(cache_file, "wb") as f:
-                    pickle.dump(stockDict.copy(), f, protocol=pickle.HIGHEST_PROTOCOL)
-                    OutputControls().printOutput(colorText.GREEN + "=> Done." + colorText.END)
+                stockDataToSave = PKAssetsManager.mergeWithCachedStockData(stockDict.copy(), cache_file)
+                PKAssetsManager.writeStockDataFiles(stockDataToSave, cache_file)
+                if downloadOnly:
+                    # The compressed chunks are what users download from the server
+                    PKAssetsManager.saveChunkedStockData(stockDataToSave, cache_file)
+                OutputControls().printOutput(colorText.GREEN + "=> Done." + colorText.END)
                 if downloadOnly:
                     # if "RUNNER" not in os.environ.keys():
                         # copyFilePath = os.path.join(Archiver.get_user_data_dir(), f"copy_{fileName}")
@@ -896,7 +932,7 @@ class PKAssetsManager:
                         #     shutil.copy(cache_file,copyFilePath) # copy is the saved source of truth
 
                     rootDirs = [Archiver.get_user_data_dir(),Archiver.get_user_indices_dir(),outputFolder]
-                    patterns = ["*.csv","*.pkl"]
+                    patterns = ["*.csv","*.pkl",f"*{PKChunkedCache.MANIFEST_EXTENSION}",f"*{PKChunkedCache.CHUNK_EXTENSION}"]
                     for dir in rootDirs:
                         for pattern in patterns:
                             for f in glob.glob(pattern, root_dir=dir, recursive=True):
@@ -923,6 +959,246 @@ class PKAssetsManager:
                 OutputControls().printOutput(colorText.GREEN + f"=> {cache_file}" + colorText.END)
         return cache_file
 
+    def mergeWithCachedStockData(stockDict, cache_file):
+        """
+        Adds the symbols of the cache at cache_file that stockDict doesn't
+        have, so that saving a partially loaded universe (see
+        loadDataFromLocalPickle) writes its updated symbols into the cache
+        instead of dropping every other symbol from it.
+        """
+        if not os.path.exists(cache_file):
+            return stockDict
+        metadata = PKCacheMetadata.readCacheMetadata(cache_file)
+        if metadata is not None and set(metadata.get("symbols", [])).issubset(stockDict.keys()):
+            return stockDict
+        try:
+            cachedData = PKAssetsManager.readCachedStockData(cache_file) or {}
+        except (pickle.UnpicklingError, EOFError) as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            return stockDict
+        missingSymbols = [symbol for symbol in cachedData.keys() if symbol not in stockDict]
+        if len(missingSymbols) == 0:
+            return stockDict
+        default_logger().debug(f"Merging {len(stockDict)} symbols into the {len(cachedData)} symbols of {cache_file}")
+        for symbol in missingSymbols:
+            stockDict[symbol] = cachedData[symbol]
+        return stockDict
+
+    def writeStockDataFiles(stockDict, cache_file):
+        """
+        Writes the stock data cache (pickle) and everything derived from it:
+        the sidecar metadata and the columnar copy. Entries are normalized
+        into the canonical schema (see StockDataSchema) first. The candle log
+        of the cache is removed because its candles are part of stockDict now.
+        """
+        StockDataSchema.normalizeStockDict(stockDict)
+        with open(cache_file, "wb") as f:
+            writer = PKCacheMetadata.HashingWriter(f)
+            pickle.dump(stockDict, writer, protocol=pickle.HIGHEST_PROTOCOL)
+        PKCandleLog.clearCandleLog(cache_file)
+        PKAssetsManager.saveCacheMetadata(stockDict, cache_file, writer.hexdigest())
+        PKAssetsManager.saveColumnarStockData(stockDict, cache_file)
+
+    def stockDataCacheFilePath(configManager, intraday=False, downloadOnly=False):
+        """Path of the stock data cache that saveStockData writes to."""
+        _, fileName = PKAssetsManager.afterMarketStockDataExists(
+            configManager.isIntradayConfig() or intraday
+        )
+        outputFolder = Archiver.get_user_data_dir()
+        if downloadOnly:
+            outputFolder = outputFolder.replace(f"results{os.sep}Data","actions-data-download")
+        return os.path.join(outputFolder, fileName)
+
+    def appendStockData(updatedCandles, configManager, intraday=False, downloadOnly=False):
+        """
+        Appends only the new or updated candles (symbol -> split-dict) to the
+        candle log of the existing cache instead of rewriting all of it.
+        Returns False if there is no cache to append to, in which case the
+        caller has to save the stock data with saveStockData.
+        """
+        cache_file = PKAssetsManager.stockDataCacheFilePath(configManager, intraday, downloadOnly)
+        if not os.path.isfile(cache_file):
+            return False
+        try:
+            isIntraday = configManager.isIntradayConfig() or intraday
+            rowCount = PKCandleLog.appendCandles(cache_file, updatedCandles, daily=not isIntraday)
+            if rowCount == 0:
+                return True
+            PKCacheMetadata.recordAppendedCandles(cache_file, updatedCandles, daily=not isIntraday)
+            default_logger().debug(f"Appended {rowCount} candles to {PKCandleLog.candleLogFilePath(cache_file)}")
+            if PKCandleLog.candleLogSize(cache_file) > os.path.getsize(cache_file) * PKAssetsManager.CANDLE_LOG_COMPACTION_RATIO:
+                PKAssetsManager.compactStockData(configManager, cache_file=cache_file)
+            elif "RUNNER" in os.environ.keys():
+                Committer.execOSCommand(f"git add {PKCandleLog.candleLogFilePath(cache_file)} -f >/dev/null 2>&1")
+            return True
+        except KeyboardInterrupt: # pragma: no cover
+            raise KeyboardInterrupt
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            return False
+
+    def compactStockData(configManager, intraday=False, downloadOnly=False, cache_file=None):
+        """
+        Folds the candle log back into the stock data cache and removes it.
+        Returns the number of symbols written (0 if there was nothing to compact).
+        """
+        if cache_file is None:
+            cache_file = PKAssetsManager.stockDataCacheFilePath(configManager, intraday, downloadOnly)
+        if not os.path.isfile(cache_file) or PKCandleLog.candleLogSize(cache_file) == 0:
+            OutputControls().printOutput(colorText.GREEN + "  [+] Nothing to compact." + colorText.END)
+            return 0
+        stockData = PKAssetsManager.readCachedStockData(cache_file)
+        PKAssetsManager.writeStockDataFiles(stockData, cache_file)
+        OutputControls().printOutput(
+            colorText.GREEN
+            + f"  [+] Compacted the candle log into {cache_file} ({len(stockData)} stocks)."
+            + colorText.END
+        )
+        if "RUNNER" in os.environ.keys():
+            Committer.execOSCommand(f"git add {cache_file} -f >/dev/null 2>&1")
+        return len(stockData)
+
+    def saveColumnarStockData(stockDict, cache_file):
+        """
+        Writes the memory-mapped columnar copy (.pkc) of the stock data next to
+        the pickle. Written after the pickle so that it's never older than it.
+        """
+        try:
+            packed = packStockDict(stockDict)
+            if len(packed) > 0:
+                PKColumnarCache.writeColumnarCache(packed, PKColumnarCache.columnarFilePath(cache_file))
+        except KeyboardInterrupt: # pragma: no cover
+            raise KeyboardInterrupt
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+
+    def saveChunkedStockData(stockDict, cache_file):
+        """
+        Writes the compressed, chunked copy (manifest + .pkz chunks) of the
+        stock data next to the pickle for parallel downloads from the server.
+        """
+        try:
+            if len(stockDict) > 0:
+                PKChunkedCache.writeChunkedCache(stockDict, cache_file)
+        except KeyboardInterrupt: # pragma: no cover
+            raise KeyboardInterrupt
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+
+    def downloadChunkedStockData(cache_file, branchName="actions-data-download", repoOwner="pkjmesra", repoName="PKScreener"):
+        """
+        Downloads the compressed, chunked copy of cache_file from the server
+        (chunks are fetched, verified and decompressed in parallel) and writes
+        the local stock data cache from it. Returns True if the local cache
+        was written, False if the server has no chunked copy of it.
+        """
+        srcFilePath = os.path.join(Archiver.get_user_data_dir(), cache_file)
+        for directory in ["actions-data-download", "results/Data"]:
+            baseUrl = f"https://raw.githubusercontent.com/{repoOwner}/{repoName}/{branchName}/{directory}"
+            try:
+                manifest, stockData = PKChunkedCache.downloadChunkedCache(baseUrl, cache_file)
+                if manifest is None or not stockData:
+                    continue
+                OutputControls().printOutput(
+                    colorText.GREEN
+                    + f"  [+] Downloaded [{len(stockData)}] Tickers' Stock Data in {len(manifest['chunks'])} chunks from server"
+                    + colorText.END
+                )
+                PKAssetsManager.writeStockDataFiles(stockData, srcFilePath)
+                PKAssetsManager.downloadCandleLogFromServer(cache_file, branchName=branchName)
+                return True
+            except KeyboardInterrupt: # pragma: no cover
+                raise KeyboardInterrupt
+            except Exception as e: # pragma: no cover
+                default_logger().debug(f"Failed to fetch the chunked cache from {baseUrl}: {e}")
+        return False
+
+    def saveCacheMetadata(stockDict, cache_file, contentHash=None):
+        """Writes the sidecar metadata record (stock_data_*.meta.json) of the cache."""
+        try:
+            if contentHash is None:
+                contentHash = PKCacheMetadata.fileHash(cache_file)
+            PKCacheMetadata.writeCacheMetadata(cache_file, stockDict, contentHash=contentHash)
+        except KeyboardInterrupt: # pragma: no cover
+            raise KeyboardInterrupt
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+
+    def cacheSymbolsFor(stockCodes, exchangeSuffix=".NS"):
+        """
+        The cache keys to materialize for a scan over stockCodes, or None to
+        load everything (no universe requested).
+        """
+        if stockCodes is None or len(stockCodes) == 0:
+            return None
+        symbols = set()
+        for code in stockCodes:
+            code = str(code)
+            symbols.add(code)
+            if exchangeSuffix:
+                symbols.add(code.replace(exchangeSuffix, ""))
+                symbols.add(f"{code.replace(exchangeSuffix, '')}{exchangeSuffix}")
+        return symbols
+
+    def hasLoadedUniverse(stockDict, stockCodes):
+        """
+        True if stockDict covers stockCodes, allowing for the same share of
+        symbols missing from the cache as loadStockData does.
+        """
+        if stockDict is None or stockCodes is None or len(stockCodes) == 0:
+            return False
+        loadedSymbols = set(stockDict.keys())
+        missingStocks = [code for code in stockCodes if str(code) not in loadedSymbols]
+        return len(missingStocks) <= int(len(stockCodes)*0.05)
+
+    def readCachedStockData(srcFilePath, sampleOnly=False, symbols=None):
+        """
+        Reads the stock data cache at srcFilePath (a stock_data_*.pkl), preferring
+        the memory-mapped columnar file next to it. When the columnar file is
+        missing or older than the pickle, the pickle is read and converted so
+        that subsequent loads can use the columnar file.
+        With sampleOnly=True, only the first symbol is returned. With symbols,
+        only those symbols are materialized from the columnar file (the rest
+        of it is never read).
+        Candles appended to the candle log of the cache are merged in.
+        """
+        stockData = None
+        if PKColumnarCache.isColumnarCacheCurrent(srcFilePath):
+            try:
+                columnarPath = PKColumnarCache.columnarFilePath(srcFilePath)
+                if sampleOnly:
+                    packed = PKColumnarCache.openColumnarCache(columnarPath)
+                    symbols = packed.keys()[:1]
+                    stockData = {symbol: packed.toSplitDict(symbol, asLists=True) for symbol in symbols}
+                else:
+                    stockData = PKColumnarCache.readColumnarCache(columnarPath, symbols=symbols)
+            except Exception as e: # pragma: no cover
+                default_logger().debug(e, exc_info=True)
+        if stockData is None:
+            with open(srcFilePath, "rb") as f:
+                stockData = pickle.load(f)
+            if stockData and not sampleOnly and StockDataSchema.normalizeStockDict(stockData) > 0:
+                # One-time migration of a cache written with an older schema
+                PKCandleLog.applyCandleLog(stockData, srcFilePath)
+                try:
+                    PKAssetsManager.writeStockDataFiles(stockData, srcFilePath)
+                except KeyboardInterrupt: # pragma: no cover
+                    raise KeyboardInterrupt
+                except Exception as e: # pragma: no cover
+                    default_logger().debug(e, exc_info=True)
+                if symbols is not None:
+                    stockData = {symbol: entry for symbol, entry in stockData.items() if symbol in symbols}
+                return stockData
+            if stockData and not sampleOnly:
+                if PKCacheMetadata.readCacheMetadata(srcFilePath) is None:
+                    PKAssetsManager.saveCacheMetadata(stockData, srcFilePath)
+                PKAssetsManager.saveColumnarStockData(stockData, srcFilePath)
+            if stockData and symbols is not None:
+                stockData = {symbol: entry for symbol, entry in stockData.items() if symbol in symbols}
+        if stockData:
+            PKCandleLog.applyCandleLog(stockData, srcFilePath, symbols=list(stockData.keys()) if sampleOnly else symbols)
+        return stockData
+
     def had_rate_limit_errors():
         return False
         """Checks if any stored errors are YFRateLimitError."""
@@ -1030,6 +1306,9 @@ class PKAssetsManager:
         # Check if NSEI data is requested
         if configManager.baseIndex not in stockCodes:
             stockCodes.insert(0,configManager.baseIndex)
+        # A scan only needs its own universe out of the local cache. The whole
+        # cache is loaded if it's going to be written back.
+        universe = None if downloadOnly or ("RUNNER" in os.environ.keys()) else stockCodes
         # stockCodes is not None mandates that we start our work based on the downloaded data from yesterday
         if (stockCodes is not None and len(stockCodes) > 0) and (isTrading or downloadOnly):
             recentDownloadFromOriginAttempted = True
@@ -1058,22 +1337,25 @@ class PKAssetsManager:
             has_insufficient_data = False
             MIN_ROWS_REQUIRED = 20  # Minimum rows needed for technical indicators (SMA20)
             try:
-                with open(srcFilePath, "rb") as f:
-                    sample_data = pickle.load(f)
+                cacheMetadata = PKCacheMetadata.readCacheMetadata(srcFilePath)
+                sample_stock_data = None
+                if cacheMetadata is not None and "lastCandles" in cacheMetadata:
+                    # Only the small sidecar record needs to be read. Freshness
+                    # is that of the requested symbols, not of the freshest one.
+                    lastCandle = PKCacheMetadata.lastCandleOf(cacheMetadata, stockCodes)
+                    sample_stock_data = {"index": [lastCandle] if lastCandle is not None else []}
+                    row_count = PKCacheMetadata.medianRowCount(cacheMetadata)
+                    missingStocks = PKCacheMetadata.missingSymbols(cacheMetadata, [stock for stock in stockCodes if stock != configManager.baseIndex])
+                    if len(missingStocks) > int(len(stockCodes)*0.05):
+                        # More than 5 % of the requested stocks aren't cached
+                        is_local_stale = True
+                        default_logger().info(f"Local cache does not have {len(missingStocks)} of the {len(stockCodes)} requested symbols, will download fresh data")
+                else:
+                    sample_data = PKAssetsManager.readCachedStockData(srcFilePath, sampleOnly=True)
                     if sample_data and len(sample_data) > 0:
                         # Check freshness of first available stock
                         sample_stock = list(sample_data.keys())[0]
                         sample_stock_data = sample_data[sample_stock]
-                        is_fresh, data_date, trading_days_old = PKAssetsManager.is_data_fresh(sample_stock_data, max_stale_trading_days=1)
-                        if not is_fresh:
-                            is_local_stale = True
-                            default_logger().info(f"Local cache is stale (data_date={data_date}, trading_days_old={trading_days_old}), will download fresh data")
-                            OutputControls().printOutput(
-                                colorText.WARN
-                                + f"  [!] Local cache is stale (data from {data_date}), downloading fresh data..."
-                                + colorText.END
-                            )
-                        
                         # Check data quality (minimum rows per stock)
                         row_count = 0
                         if isinstance(sample_stock_data, pd.DataFrame):
@@ -1082,22 +1364,32 @@ class PKAssetsManager:
                             row_count = len(sample_stock_data.get('data', []))
                         elif isinstance(sample_stock_data, dict) and 'index' in sample_stock_data:
                             row_count = len(sample_stock_data.get('index', []))
-                        
-                        if row_count < MIN_ROWS_REQUIRED:
-                            has_insufficient_data = True
-                            default_logger().info(f"Local cache has insufficient data ({row_count} rows < {MIN_ROWS_REQUIRED} required), will download fresh data")
-                            OutputControls().printOutput(
-                                colorText.WARN
-                                + f"  [!] Local cache has insufficient data ({row_count} rows), downloading fresh data..."
-                                + colorText.END
-                            )
+                if sample_stock_data is not None:
+                    is_fresh, data_date, trading_days_old = PKAssetsManager.is_data_fresh(sample_stock_data, max_stale_trading_days=1)
+                    if not is_fresh:
+                        is_local_stale = True
+                        default_logger().info(f"Local cache is stale (data_date={data_date}, trading_days_old={trading_days_old}), will download fresh data")
+                        OutputControls().printOutput(
+                            colorText.WARN
+                            + f"  [!] Local cache is stale (data from {data_date}), downloading fresh data..."
+                            + colorText.END
+                        )
+                    
+                    if row_count < MIN_ROWS_REQUIRED:
+                        has_insufficient_data = True
+                        default_logger().info(f"Local cache has insufficient data ({row_count} rows < {MIN_ROWS_REQUIRED} required), will download fresh data")
+                        OutputControls().printOutput(
+                            colorText.WARN
+                            + f"  [!] Local cache has insufficient data ({row_count} rows), downloading fresh data..."
+                            + colorText.END
+                        )
             except Exception as e:
                 default_logger().debug(f"Error checking local cache freshness: {e}")
                 # If we can't check, assume it's OK and try loading
             
             # Only load from local cache if it's fresh AND has sufficient data
             if not is_local_stale and not has_insufficient_data:
-                stockDict, stockDataLoaded = PKAssetsManager.loadDataFromLocalPickle(stockDict,configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading)
+                stockDict, stockDataLoaded = PKAssetsManager.loadDataFromLocalPickle(stockDict,configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading, stockCodes=universe)
             else:
                 # Try to download fresh data from GitHub first
                 success, github_path, num_instruments = PKAssetsManager.download_fresh_pkl_from_github()
@@ -1112,11 +1404,11 @@ class PKAssetsManager:
                         + colorText.END
                     )
                     # Now load from the updated local cache
-                    stockDict, stockDataLoaded = PKAssetsManager.loadDataFromLocalPickle(stockDict,configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading)
+                    stockDict, stockDataLoaded = PKAssetsManager.loadDataFromLocalPickle(stockDict,configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading, stockCodes=universe)
                 else:
                     # If GitHub download failed, still try to load from local (might be better than nothing)
                     default_logger().warning("Failed to download fresh data from GitHub, using stale/insufficient local cache")
-                    stockDict, stockDataLoaded = PKAssetsManager.loadDataFromLocalPickle(stockDict,configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading)
+                    stockDict, stockDataLoaded = PKAssetsManager.loadDataFromLocalPickle(stockDict,configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading, stockCodes=universe)
         if (
             not stockDataLoaded
             and ("1d" if isIntraday else ConfigManager.default_period)
@@ -1124,7 +1416,11 @@ class PKAssetsManager:
             and ("1m" if isIntraday else ConfigManager.default_duration)
             == configManager.duration
         ) or forceRedownload:
-            stockDict, stockDataLoaded = PKAssetsManager.downloadSavedDataFromServer(stockDict,configManager, downloadOnly, defaultAnswer, retrial, forceLoad, stockCodes, exchangeSuffix, isIntraday, forceRedownload, cache_file, isTrading)
+            # The chunked copy is downloaded and decompressed in parallel
+            if PKAssetsManager.downloadChunkedStockData(cache_file):
+                stockDict, stockDataLoaded = PKAssetsManager.loadDataFromLocalPickle(stockDict,configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading, stockCodes=universe)
+            if not stockDataLoaded:
+                stockDict, stockDataLoaded = PKAssetsManager.downloadSavedDataFromServer(stockDict,configManager, downloadOnly, defaultAnswer, retrial, forceLoad, stockCodes, exchangeSuffix, isIntraday, forceRedownload, cache_file, isTrading)
         if not stockDataLoaded:
             OutputControls().printOutput(
                 colorText.FAIL
@@ -1145,7 +1441,12 @@ class PKAssetsManager:
         return stockDict
 
     @Halo(text='  [+] Loading data from local cache...', spinner='dots')
-    def loadDataFromLocalPickle(stockDict, configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading):
+    def loadDataFromLocalPickle(stockDict, configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading, stockCodes=None):
+        """
+        Loads the local stock data cache into stockDict. With stockCodes, only
+        those symbols are materialized (lazily, from the columnar cache), so
+        that a scan over a small index doesn't load all of the cache.
+        """
         # #region agent log
         import json
         log_path = '/Users/praveen.jha1/Downloads/codes/PKScreener-main/.cursor/debug.log'
@@ -1158,8 +1459,8 @@ class PKAssetsManager:
         srcFilePath = os.path.join(Archiver.get_user_data_dir(), cache_file)
 
         try:
-            with open(srcFilePath, "rb") as f:
-                stockData = pickle.load(f)
+            symbols = PKAssetsManager.cacheSymbolsFor(stockCodes, exchangeSuffix)
+            stockData = PKAssetsManager.readCachedStockData(srcFilePath, symbols=symbols)
             if not stockData:
                 return stockDict, stockDataLoaded
             if not downloadOnly:
@@ -1180,31 +1481,8 @@ class PKAssetsManager:
             # and the same stocks exist with proper symbol keys with fresh data
             listStockCodes = [code for code in listStockCodes if not str(code).isdigit()]
             for stock in listStockCodes:
+                # Already in the canonical schema (see readCachedStockData)
                 df_or_dict = stockData.get(stock)
-                # Handle DataFrame with duplicate lowercase/uppercase columns
-                if isinstance(df_or_dict, pd.DataFrame):
-                    # Merge lowercase and uppercase OHLCV columns
-                    ohlcv_cols = ['open', 'high', 'low', 'close', 'volume']
-                    clean_df = pd.DataFrame(index=df_or_dict.index)
-                    for col in ohlcv_cols:
-                        lower_col = col
-                        upper_col = col.capitalize()
-                        has_lower = lower_col in df_or_dict.columns
-                        has_upper = upper_col in df_or_dict.columns
-                        if has_lower and has_upper:
-                            # Both exist - merge (fillna from lowercase with uppercase)
-                            lower_data = df_or_dict[lower_col].iloc[:, 0] if isinstance(df_or_dict[lower_col], pd.DataFrame) else df_or_dict[lower_col]
-                            upper_data = df_or_dict[upper_col].iloc[:, 0] if isinstance(df_or_dict[upper_col], pd.DataFrame) else df_or_dict[upper_col]
-                            clean_df[col] = lower_data.fillna(upper_data)
-                        elif has_lower:
-                            clean_df[col] = df_or_dict[lower_col].iloc[:, 0] if isinstance(df_or_dict[lower_col], pd.DataFrame) else df_or_dict[lower_col]
-                        elif has_upper:
-                            clean_df[col] = df_or_dict[upper_col].iloc[:, 0] if isinstance(df_or_dict[upper_col], pd.DataFrame) else df_or_dict[upper_col]
-                    # Copy other non-OHLCV columns
-                    for col in df_or_dict.columns:
-                        if col.lower() not in ohlcv_cols and col not in clean_df.columns:
-                            clean_df[col] = df_or_dict[col]
-                    df_or_dict = clean_df.to_dict("split")
                 existingPreLoadedData = stockDict.get(stock)
                 if existingPreLoadedData:
                     if isTrading:
@@ -1240,7 +1518,8 @@ class PKAssetsManager:
                 except: pass
                 # #endregion
                 # Always apply fresh ticks to update timestamps (during trading: current time, after hours: market close time)
-                stockDict = PKAssetsManager._apply_fresh_ticks_to_data(stockDict)
+                updatedCandles = {}
+                stockDict = PKAssetsManager._apply_fresh_ticks_to_data(stockDict, updatedCandles=updatedCandles)
                 # #region agent log
                 try:
                     sample_stock = list(stockDict.keys())[0] if stockDict else None
@@ -1259,9 +1538,11 @@ class PKAssetsManager:
                             f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"AssetsManager.py:loadDataFromLocalPickle:1040","message":"Saving updated stockDict with fresh ticks to PKL","data":{"downloadOnly":downloadOnly,"hasRUNNER":"RUNNER" in os.environ.keys(),"stockDict_len":len(stockDict) if stockDict else 0},"timestamp":int(__import__('time').time()*1000)}) + '\n')
                     except: pass
                     # #endregion
-                    # Force save the updated data with fresh ticks
+                    # Only the fresh candles need to be written if the cache exists already.
+                    # Otherwise, force save the updated data with fresh ticks.
                     isIntraday = configManager.isIntradayConfig()
-                    PKAssetsManager.saveStockData(stockDict, configManager, len(stockDict) if stockDict else 0, isIntraday, downloadOnly, forceSave=True)
+                    if not PKAssetsManager.appendStockData(updatedCandles, configManager, isIntraday, downloadOnly):
+                        PKAssetsManager.saveStockData(stockDict, configManager, len(stockDict) if stockDict else 0, isIntraday, downloadOnly, forceSave=True)
                 
                 # Also validate and warn if still stale
                 fresh_count, stale_count, oldest_date = PKAssetsManager.validate_data_freshness(
@@ -1344,6 +1625,9 @@ class PKAssetsManager:
                         ) as f:
                         stockData = pickle.load(f)
                     if len(stockData) > 0:
+                        StockDataSchema.normalizeStockDict(stockData)
+                        if PKAssetsManager.downloadCandleLogFromServer(cache_file):
+                            PKCandleLog.applyCandleLog(stockData, os.path.join(Archiver.get_user_data_dir(), cache_file))
                         multiIndex = stockData.keys()
                         if isinstance(multiIndex, pd.MultiIndex):
                                 # If we requested for multiple stocks from yfinance
@@ -1444,7 +1728,34 @@ class PKAssetsManager:
         # #endregion
         return stockDict,stockDataLoaded
 
-    # Save screened results to excel
+    def downloadCandleLogFromServer(cache_file, branchName="actions-data-download", repoOwner="pkjmesra", repoName="PKScreener"):
+        """
+        Replaces the local candle log of cache_file (which was just downloaded
+        from the server) with the one published next to it, if any. Download
+        runs publish it into actions-data-download (see stockDataCacheFilePath).
+        Returns True if a candle log was downloaded.
+        """
+        import requests
+        srcFilePath = os.path.join(Archiver.get_user_data_dir(), cache_file)
+        # A local log belongs to the cache file that was just overwritten
+        PKCandleLog.clearCandleLog(srcFilePath)
+        logFileName = os.path.basename(PKCandleLog.candleLogFilePath(cache_file))
+        for directory in ["actions-data-download", "results/Data"]:
+            url = f"https://raw.githubusercontent.com/{repoOwner}/{repoName}/{branchName}/{directory}/{logFileName}"
+            try:
+                response = requests.get(url, timeout=30)
+                content = response.content if response.status_code == 200 else None
+                if not isinstance(content, bytes) or not content.startswith(PKCandleLog.MAGIC):
+                    continue
+                with open(PKCandleLog.candleLogFilePath(srcFilePath), "wb") as f:
+                    f.write(content)
+                return True
+            except KeyboardInterrupt: # pragma: no cover
+                raise KeyboardInterrupt
+            except Exception as e: # pragma: no cover
+                default_logger().debug(f"Failed to fetch the candle log from {url}: {e}")
+        return False
+
     def promptFileExists(cache_file="stock_data_*.pkl", defaultAnswer=None):
         try:
             if defaultAnswer is None:
@@ -23,11 +23,151 @@
 
 """
 
+import numpy as np
+import pandas as pd
 from PKDevTools.classes.ColorText import colorText
 
+from pkscreener import Imports
 from pkscreener.classes.Pktalib import pktalib
 # from PKDevTools.classes.log import measure_time
 
+# One bit per pattern (and direction), in the order findPattern reports them:
+# (pktalib function, signal, screen label, saved label, colour) where signal
+# is 0 for any non-zero result, 1 for bullish (> 0) and -1 for bearish (< 0).
+PATTERN_BITS = [
+    ("CDLDOJI", 0, "Doji", "Doji", colorText.GREEN),
+    ("CDLMORNINGSTAR", 0, "Morning Star", "Morning Star", colorText.GREEN),
+    ("CDLCUPANDHANDLE", 0, "Cup and Handle", "Cup and Handle", colorText.GREEN),
+    ("CDLMORNINGDOJISTAR", 0, "Morning Doji Star", "Morning Doji Star", colorText.GREEN),
+    ("CDLEVENINGSTAR", 0, "Evening Star", "Evening Star", colorText.FAIL),
+    ("CDLEVENINGDOJISTAR", 0, "Evening Doji Star", "Evening Doji Star", colorText.FAIL),
+    ("CDLLADDERBOTTOM", 1, "Bullish Ladder Bottom", "Bullish Ladder Bottom", colorText.GREEN),
+    ("CDLLADDERBOTTOM", -1, "Bearish Ladder Bottom", "Bearish Ladder Bottom", colorText.FAIL),
+    ("CDL3LINESTRIKE", 1, "3 Line Strike", "3 Line Strike", colorText.GREEN),
+    ("CDL3LINESTRIKE", -1, "3 Line Strike", "3 Line Strike", colorText.FAIL),
+    ("CDL3BLACKCROWS", 0, "3 Black Crows", "3 Black Crows", colorText.FAIL),
+    # Saved as "3 Outside Up" since the beginning, the saved results depend on it
+    ("CDL3INSIDE", 1, "3 Inside Up", "3 Outside Up", colorText.GREEN),
+    ("CDL3INSIDE", -1, "3 Inside Down", "3 Inside Down", colorText.FAIL),
+    ("CDL3OUTSIDE", 1, "3 Outside Up", "3 Outside Up", colorText.GREEN),
+    ("CDL3OUTSIDE", -1, "3 Outside Down", "3 Outside Down", colorText.FAIL),
+    ("CDL3WHITESOLDIERS", 0, "3 White Soldiers", "3 White Soldiers", colorText.GREEN),
+    ("CDLHARAMI", 1, "Bullish Harami", "Bullish Harami", colorText.GREEN),
+    ("CDLHARAMI", -1, "Bearish Harami", "Bearish Harami", colorText.FAIL),
+    ("CDLHARAMICROSS", 1, "Bullish Harami Cross", "Bullish Harami Cross", colorText.GREEN),
+    ("CDLHARAMICROSS", -1, "Bearish Harami Cross", "Bearish Harami Cross", colorText.FAIL),
+    ("CDLMARUBOZU", 1, "Bullish Marubozu", "Bullish Marubozu", colorText.GREEN),
+    ("CDLMARUBOZU", -1, "Bearish Marubozu", "Bearish Marubozu", colorText.FAIL),
+    ("CDLHANGINGMAN", 0, "Hanging Man", "Hanging Man", colorText.FAIL),
+    ("CDLHAMMER", 0, "Hammer", "Hammer", colorText.GREEN),
+    ("CDLINVERTEDHAMMER", 0, "Inverted Hammer", "Inverted Hammer", colorText.GREEN),
+    ("CDLSHOOTINGSTAR", 0, "Shooting Star", "Shooting Star", colorText.FAIL),
+    ("CDLDRAGONFLYDOJI", 0, "Dragonfly Doji", "Dragonfly Doji", colorText.GREEN),
+    ("CDLGRAVESTONEDOJI", 0, "Gravestone Doji", "Gravestone Doji", colorText.FAIL),
+    ("CDLENGULFING", 1, "Bullish Engulfing", "Bullish Engulfing", colorText.GREEN),
+    ("CDLENGULFING", -1, "Bearish Engulfing", "Bearish Engulfing", colorText.FAIL),
+]
+# The pktalib functions, each evaluated once for all of its bits
+PATTERN_FUNCTIONS = list(dict.fromkeys(function for function, _, _, _, _ in PATTERN_BITS))
+# Candles findPattern looks at (the cup and handle needs 8 of them)
+PATTERN_CANDLES = 4
+CUP_AND_HANDLE_CANDLES = 8
+
+
+def _setBits(function, signal):
+    """Mask of the bits of function that its (scalar or array) signal sets."""
+    mask = 0 if np.ndim(signal) == 0 else np.zeros(np.shape(signal), dtype=np.int64)
+    for bit, (name, direction, _, _, _) in enumerate(PATTERN_BITS):
+        if name != function:
+            continue
+        if direction == 0:
+            hit = signal != 0
+        else:
+            hit = signal > 0 if direction > 0 else signal < 0
+        mask = mask | (np.int64(1) << bit) * hit
+    return mask
+
+
+def _lookbacks():
+    """TA-Lib lookback (candles needed before the first result) per pattern function, if known."""
+    global _LOOKBACKS
+    if _LOOKBACKS is None:
+        _LOOKBACKS = {}
+        try:
+            from talib import abstract
+            for function in PATTERN_FUNCTIONS:
+                if function != "CDLCUPANDHANDLE":
+                    _LOOKBACKS[function] = abstract.Function(function).lookback
+        except Exception:  # pragma: no cover
+            # Without TA-Lib, every pattern gets evaluated
+            _LOOKBACKS = {}
+    return _LOOKBACKS
+
+
+_LOOKBACKS = None
+
+
+def _candleInputs(*columns):
+    # TA-Lib takes plain arrays (much cheaper than Series),
+    # the pandas_ta_classic fallback needs Series.
+    if Imports["talib"]:
+        return [np.ascontiguousarray(column, dtype=np.float64) for column in columns]
+    return [pd.Series(column, dtype=np.float64) for column in columns]
+
+
+def cupAndHandleSignals(high):
+    """
+    pktalib.CDLCUPANDHANDLE for every candle of a (symbols x candles) panel
+    of highs in chronological order: 1 where the 8 candles up to and
+    including the candle form the pattern, else 0.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    signals = np.zeros(high.shape, dtype=np.int64)
+    if high.shape[-1] < CUP_AND_HANDLE_CANDLES:
+        return signals
+    # h[k]: the high k candles before the candle (high.iloc[k] of the latest-first rows)
+    end = high.shape[-1]
+    h = [high[..., CUP_AND_HANDLE_CANDLES - 1 - k:end - k] for k in range(CUP_AND_HANDLE_CANDLES)]
+    found = ((h[7] < h[6]) & (h[7] < h[5]) & (h[5] < h[4]) &
+             (h[5] < h[3]) & (h[3] > h[2]) & (h[0] > h[6]))
+    signals[..., CUP_AND_HANDLE_CANDLES - 1:] = found
+    return signals
+
+
+def patternMasks(open, high, low, close, window=None, lengths=None):
+    """
+    Candle pattern bitmasks (see PATTERN_BITS) of many symbols at once.
+
+    open/high/low/close are (symbols x candles) panels in chronological
+    order. Symbols with shorter histories are padded with NaN at the end
+    and their lengths given in lengths. Returns a (symbols x candles) int64
+    array with the patterns found at each candle.
+
+    With window, a pattern is only looked for if window candles are enough
+    for it, like findPattern does with its last PATTERN_CANDLES candles.
+    TA-Lib patterns that need more candles before the candle (lookback)
+    can never be found on such a window and are not computed at all.
+    """
+    panels = [np.atleast_2d(np.asarray(values, dtype=np.float64)) for values in (open, high, low, close)]
+    symbols, candles = panels[0].shape
+    lengths = np.full(symbols, candles) if lengths is None else np.asarray(lengths)
+    lookbacks = _lookbacks() if window is not None else {}
+    masks = np.zeros((symbols, candles), dtype=np.int64)
+    functions = [function for function in PATTERN_FUNCTIONS
+                 if function != "CDLCUPANDHANDLE" and (window is None or lookbacks.get(function, -1) < window)]
+    for row in range(symbols):
+        length = int(lengths[row])
+        if length == 0:
+            continue
+        inputs = _candleInputs(*(panel[row, :length] for panel in panels))
+        for function in functions:
+            signal = getattr(pktalib, function)(*inputs)
+            if signal is not None:
+                masks[row, :length] |= _setBits(function, np.asarray(signal))
+    # The NaN padding never completes a cup and handle (comparisons with NaN are False)
+    return masks | _setBits("CDLCUPANDHANDLE", cupAndHandleSignals(panels[1]))
+
+
 class CandlePatterns:
     reversalPatternsBullish = [
         "Morning Star",
@@ -63,291 +203,64 @@ class CandlePatterns:
         existingSave = f"{existingSave}, " if (existingSave is not None and len(existingSave) > 0) else ""
         return existingScreen, existingSave
 
+    def patternMask(self, processedData):
+        """
+        Bitmask (see PATTERN_BITS) of the candle patterns of the latest candle
+        of processedData (latest first), looked for in its last
+        PATTERN_CANDLES candles (the cup and handle in all of processedData).
+        """
+        columns = [processedData[col] for col in ["open", "high", "low", "close"]]
+        inputs = _candleInputs(*(column.to_numpy()[:PATTERN_CANDLES][::-1] for column in columns))
+        mask = 0
+        for function in PATTERN_FUNCTIONS:
+            if function == "CDLCUPANDHANDLE":
+                signal = 1 if pktalib.CDLCUPANDHANDLE(*columns) else 0
+            else:
+                check = getattr(pktalib, function)(*inputs)
+                if check is None:
+                    continue
+                signal = np.asarray(check)[-1]
+            if signal != 0:
+                mask |= int(_setBits(function, signal))
+        return mask
+
+    def patternBits(self, filterPattern):
+        """Mask of the patterns whose saved label contains filterPattern (e.g. "Hammer" also matches "Inverted Hammer")."""
+        mask = 0
+        for bit, (_, _, _, saveLabel, _) in enumerate(PATTERN_BITS):
+            if filterPattern in saveLabel:
+                mask |= 1 << bit
+        return mask
+
+    def patternLabels(self, mask):
+        """The (screen label, saved label, colour) of every pattern in mask, in the order of PATTERN_BITS."""
+        return [(screenLabel, saveLabel, colour)
+                for bit, (_, _, screenLabel, saveLabel, colour) in enumerate(PATTERN_BITS)
+                if mask & (1 << bit)]
+
+    def renderPatterns(self, mask, screenDict, saveDict):
+        """Appends the labels of the patterns in mask to the "Pattern" of screenDict and saveDict."""
+        labels = self.patternLabels(mask)
+        if len(labels) == 0:
+            return
+        existingScreen, existingSave = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
+        screenDict["Pattern"] = existingScreen + ", ".join(colour + screenLabel + colorText.END for screenLabel, _, colour in labels)
+        saveDict["Pattern"] = existingSave + ", ".join(saveLabel for _, saveLabel, _ in labels)
+
     #@measure_time
     # Find candle-stick patterns
-    # Arrange if statements with max priority from top to bottom
+    # The order of PATTERN_BITS is the order they're reported in
     def findPattern(self, processedData, dict, saveDict,filterPattern=None):
-        data = processedData.head(4)
-        data = data[::-1]
-        hasCandleStickPattern = False
         if "Pattern" not in saveDict.keys():
             saveDict["Pattern"] = ""
             dict["Pattern"] = ""
         # Only 'doji' and 'inside' is internally implemented by pandas_ta_classic.
         # Otherwise, for the rest of the candle patterns, they also need
         # TA-Lib.
-        check = pktalib.CDLDOJI(data["open"], data["high"], data["low"], data["close"])
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + colorText.GREEN + f"Doji" + colorText.END 
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Doji"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLMORNINGSTAR(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Morning Star" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Morning Star"
-            hasCandleStickPattern = True
-        
-        check = pktalib.CDLCUPANDHANDLE(
-            processedData["open"], processedData["high"], processedData["low"], processedData["close"]
-        )
-        if check:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Cup and Handle" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Cup and Handle"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLMORNINGDOJISTAR(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Morning Doji Star" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Morning Doji Star"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLEVENINGSTAR(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"Evening Star" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Evening Star"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLEVENINGDOJISTAR(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"Evening Doji Star" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Evening Doji Star"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLLADDERBOTTOM(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN + f"Bullish Ladder Bottom" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bullish Ladder Bottom"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL + f"Bearish Ladder Bottom" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bearish Ladder Bottom"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDL3LINESTRIKE(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN + f"3 Line Strike" + colorText.END 
-                )
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL + f"3 Line Strike" + colorText.END 
-                )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Line Strike"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDL3BLACKCROWS(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"3 Black Crows" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Black Crows"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDL3INSIDE(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN + f"3 Inside Up" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Outside Up"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL + f"3 Inside Down" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Inside Down"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDL3OUTSIDE(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN + f"3 Outside Up" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Outside Up"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL + f"3 Outside Down" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Outside Down"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDL3WHITESOLDIERS(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"3 White Soldiers" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 White Soldiers"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLHARAMI(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN + f"Bullish Harami" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bullish Harami"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL + f"Bearish Harami" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bearish Harami"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLHARAMICROSS(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN
-                    + f"Bullish Harami Cross" 
-                    + colorText.END
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bullish Harami Cross"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL
-                    + f"Bearish Harami Cross" 
-                    + colorText.END
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bearish Harami Cross"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLMARUBOZU(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN
-                    + f"Bullish Marubozu" 
-                    + colorText.END
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bullish Marubozu"
-            else:
-                dict["Pattern"] = (
-                    colorText.FAIL + f"Bearish Marubozu" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bearish Marubozu"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLHANGINGMAN(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"Hanging Man" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Hanging Man"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLHAMMER(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Hammer" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Hammer"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLINVERTEDHAMMER(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Inverted Hammer" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Inverted Hammer"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLSHOOTINGSTAR(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"Shooting Star" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Shooting Star"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLDRAGONFLYDOJI(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Dragonfly Doji" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Dragonfly Doji"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLGRAVESTONEDOJI(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"Gravestone Doji" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Gravestone Doji"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLENGULFING(
-            data["open"], data["high"], data["low"], data["close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN
-                    + f"Bullish Engulfing" 
-                    + colorText.END
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bullish Engulfing"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL
-                    + f"Bearish Engulfing" 
-                    + colorText.END
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bearish Engulfing"
-            hasCandleStickPattern = True
-        if hasCandleStickPattern:
-            return filterPattern in saveDict["Pattern"] if filterPattern is not None else hasCandleStickPattern
-        return False
+        mask = self.patternMask(processedData)
+        if mask == 0:
+            return False
+        self.renderPatterns(mask, dict, saveDict)
+        if filterPattern is not None:
+            return (mask & self.patternBits(filterPattern)) != 0
+        return True
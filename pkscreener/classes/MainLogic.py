@@ -73,6 +73,9 @@ class MenuOptionHandler:
             return self._handle_download_nse_indices(launcher, m1, m2)
         elif selDownloadOption.upper() == "S":
             return self._handle_download_sector_info(m1, m2)
+        elif selDownloadOption.upper() == "C":
+            _handle_compact_stock_data(self.gs.configManager)
+            return None, None
         elif selDownloadOption.upper() == "M":
             PKAnalyticsService().send_event("D_M")
             return None, None
@@ -505,6 +508,9 @@ def _handle_download_menu(launcher, m0, m1, m2, configManager, fetcher) -> bool:
     elif selDownloadOption.upper() == "S":
         return _handle_download_sector_info(m1, m2, configManager, fetcher)
     
+    elif selDownloadOption.upper() == "C":
+        return _handle_compact_stock_data(configManager)
+    
     elif selDownloadOption.upper() == "M":
         PKAnalyticsService().send_event("D_M")
         return True
@@ -512,6 +518,15 @@ def _handle_download_menu(launcher, m0, m1, m2, configManager, fetcher) -> bool:
     return True
 
 
+def _handle_compact_stock_data(configManager) -> bool:
+    """Fold the appended daily candle updates back into the stock data cache"""
+    from pkscreener.classes.AssetsManager import PKAssetsManager
+    
+    PKAnalyticsService().send_event("D_C")
+    PKAssetsManager.compactStockData(configManager)
+    return True
+
+
 def _handle_download_nse_indices(launcher, m1, m2, configManager, fetcher) -> bool:
     """Handle NSE indices download"""
     from PKNSETools.Nasdaq.PKNasdaqIndex import PKNasdaqIndexFetcher
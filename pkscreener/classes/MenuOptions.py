@@ -133,6 +133,7 @@ LEVEL_1_DATA_DOWNLOADS = {
     "I": "Download Intraday OHLCV Data for the Last Trading Day",
     "N": "NSE Equity Symbols",
     "S": "NSE Symbols with Sector/Industry Details",
+    "C": "Compact the Daily OHLCV Data Updates into the Cache",
     "M": "Back to the Top/Main menu",
 }
 PREDEFINED_SCAN_ALERT_MENU_KEYS = ["2","5","6","18","25","27","29","30","31","32","33","34"]
@@ -0,0 +1,119 @@
+"""
+PKBarAggregator - Materialized bars of derived timeframes (5m, 15m, 1h, 1wk, 1mo)
+
+This module handles:
+- Mapping the configured candle duration (candleDurationInt and
+  candleDurationFrequency) to a resample rule
+- Aggregating base candles into bars of that timeframe (OHLCV: first, max,
+  min, last, sum)
+- Keeping the bars of every (symbol, rule) materialized and updating them
+  incrementally when new base candles are appended or the forming candle
+  is updated: only the last bar and the new candles are re-aggregated
+
+Repeated scans on a derived timeframe (e.g. the 5m and 15m monitor
+dashboards) then don't resample the whole history of every stock again.
+"""
+
+import numpy as np
+import pandas as pd
+
+OHLC_AGGREGATION = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "Adj Close": "last",
+    "volume": "sum",
+}
+# Bars start at the market open (09:15)
+RESAMPLE_OFFSET = "15min"
+
+
+def resampleRule(candleDuration, candleDurationFrequency):
+    """The resample rule for a candle duration (e.g. 5, "m" -> "5T"), or None for base candles."""
+    if int(candleDuration) < 1 or candleDurationFrequency not in ["m", "h", "mo", "wk"]:
+        return None
+    durationFrequency = "T" if candleDurationFrequency == "m" else ("H" if candleDurationFrequency == "h" else ("M" if candleDurationFrequency == "mo" else "W"))
+    return f"{candleDuration}{durationFrequency}"
+
+
+def resampleBars(data, rule):
+    """
+    Aggregates data (any order) into ascending bars of rule. Empty periods
+    (non-market hours) are dropped.
+    """
+    aggregation = {col: how for col, how in OHLC_AGGREGATION.items() if col in data.columns}
+    bars = data.resample(rule, offset=RESAMPLE_OFFSET).agg(aggregation)
+    # resampling can introduce 0 value rows for non-market hours
+    return bars[bars["high"] > 0]
+
+
+def _lastBar(base, rule):
+    """(label, position of its first candle in base) of the last bar of the ascending base."""
+    positions = pd.Series(np.arange(len(base)), index=base.index).resample(rule, offset=RESAMPLE_OFFSET).min().dropna()
+    return positions.index[-1], int(positions.iloc[-1])
+
+
+class PKBarAggregator:
+    """
+    Materialized bars per (symbol, rule).
+
+    Usage:
+        aggregator = PKBarAggregator()
+        bars = aggregator.bars("SBIN", data, "5T")   # data: 1m candles, any order
+
+    The base candles of a symbol are expected to grow at the end (new
+    candles), with at most the candles of the last bar updated in place
+    (the forming candle). If anything else changed (e.g. a backtest slice or a reload),
+    the bars are aggregated from scratch.
+    """
+
+    def __init__(self, maxEntries=5000):
+        self.maxEntries = maxEntries
+        self._bars = {}
+
+    def __len__(self):
+        return len(self._bars)
+
+    def clear(self):
+        self._bars = {}
+
+    def bars(self, symbol, data, rule):
+        if data is None or len(data) == 0 or symbol is None:
+            return resampleBars(data, rule)
+        base = data
+        if not base.index.is_monotonic_increasing:
+            base = base.iloc[::-1] if base.index.is_monotonic_decreasing else base.sort_index()
+        key = (symbol, rule)
+        state = self._bars.get(key)
+        baseIndex = base.index
+        if state is not None and state["first"] == baseIndex[0]:
+            rows = state["rows"]
+            if len(base) >= rows and baseIndex[rows - 1] == state["last"]:
+                # Only the last (possibly partial) bar and the new candles change.
+                # The last bar is always re-aggregated: its forming candle may
+                # have been updated in place by a live feed.
+                start = state["lastBarStart"]
+                tail = base.iloc[start:]
+                previousBars = state["bars"]
+                bars = pd.concat([previousBars[previousBars.index < state["lastBarLabel"]], resampleBars(tail, rule)])
+                lastBarLabel, lastBarStart = _lastBar(tail, rule)
+                self._remember(key, base, bars, lastBarLabel, start + lastBarStart)
+                return bars
+        bars = resampleBars(base, rule)
+        self._remember(key, base, bars, *_lastBar(base, rule))
+        return bars
+
+    def _remember(self, key, base, bars, lastBarLabel, lastBarStart):
+        if key not in self._bars and len(self._bars) >= self.maxEntries:
+            # Oldest first (dicts keep the insertion order)
+            self._bars.pop(next(iter(self._bars)))
+        self._bars[key] = {
+            "first": base.index[0],
+            "last": base.index[-1],
+            "rows": len(base),
+            "bars": bars,
+            "lastBarStart": lastBarStart,
+            "lastBarLabel": lastBarLabel,
+        }
+
@@ -0,0 +1,219 @@
+"""
+PKCacheMetadata - Sidecar metadata record for the stock data cache
+
+This module handles:
+- Building a small summary of a stock data dictionary (symbols, row counts,
+  last candle timestamp of the cache and of every symbol)
+- Writing it next to the cache file (stock_data_*.meta.json) together with
+  the size, modification time and content hash of the cache file
+- Reading it back only if it still describes the cache file on disk
+
+Freshness, data quality and missing symbol checks can then be answered
+without unpickling the (multi-hundred MB) cache.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from PKDevTools.classes.log import default_logger
+
+from pkscreener.classes.PKCandleLog import candleKeys
+from pkscreener.classes.StockDataPacker import toEpochNanos
+from pkscreener.classes.StockDataSchema import SCHEMA_VERSION
+
+METADATA_VERSION = 1
+METADATA_EXTENSION = ".meta.json"
+# Quantile of the requested symbols' last candles that decides freshness, so
+# that neither one fresh symbol nor one suspended symbol decides it alone
+FRESHNESS_QUANTILE = 0.1
+
+
+def metadataFilePath(cacheFilePath):
+    """stock_data_23102025.pkl -> stock_data_23102025.meta.json"""
+    root, _ = os.path.splitext(cacheFilePath)
+    return f"{root}{METADATA_EXTENSION}"
+
+
+class HashingWriter:
+    """
+    File-like wrapper that hashes everything written through it, so that
+    pickle.dump can produce the content hash without reading the file back.
+    """
+
+    def __init__(self, fileObject):
+        self.fileObject = fileObject
+        self.hasher = hashlib.sha256()
+
+    def write(self, data):
+        self.hasher.update(data)
+        return self.fileObject.write(data)
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+def fileHash(filePath, chunkSize=1024 * 1024):
+    hasher = hashlib.sha256()
+    with open(filePath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunkSize), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def buildCacheMetadata(stockDict, contentHash=None):
+    """
+    Summarizes a {symbol: split-dict} mapping. Only the last index value of
+    every symbol is parsed.
+    """
+    symbols = []
+    rowCounts = {}
+    lastCandles = {}
+    for symbol, entry in stockDict.items():
+        if isinstance(entry, pd.DataFrame):
+            index = entry.index
+        elif isinstance(entry, dict):
+            index = entry.get("index")
+            index = [] if index is None else index
+        else:
+            continue
+        symbols.append(symbol)
+        rowCounts[symbol] = len(index)
+        if len(index) > 0:
+            lastCandles[symbol] = str(index[-1])
+    return {
+        "version": METADATA_VERSION,
+        "schemaVersion": SCHEMA_VERSION,
+        "symbols": symbols,
+        "rowCounts": rowCounts,
+        "lastCandle": _latest(list(lastCandles.values())),
+        "lastCandles": lastCandles,
+        "contentHash": contentHash,
+    }
+
+
+def _latest(values):
+    if len(values) == 0:
+        return None
+    try:
+        # NaT is the smallest int64, so argmax skips unparseable values
+        return values[int(np.argmax(toEpochNanos(values)))]
+    except Exception as e:  # pragma: no cover
+        default_logger().debug(e, exc_info=True)
+        return None
+
+
+def _writeMetadataFile(cacheFilePath, metadata):
+    metaPath = metadataFilePath(cacheFilePath)
+    tempPath = f"{metaPath}.tmp"
+    with open(tempPath, "w") as f:
+        json.dump(metadata, f)
+    os.replace(tempPath, metaPath)
+
+
+def writeCacheMetadata(cacheFilePath, stockDict, contentHash=None):
+    """
+    Writes the sidecar record for cacheFilePath, which must already be
+    completely written. Returns the metadata dictionary.
+    """
+    metadata = buildCacheMetadata(stockDict, contentHash=contentHash)
+    stat = os.stat(cacheFilePath)
+    metadata["cacheBytes"] = stat.st_size
+    metadata["cacheModified"] = stat.st_mtime_ns
+    _writeMetadataFile(cacheFilePath, metadata)
+    return metadata
+
+
+def readCacheMetadata(cacheFilePath, verifyHash=False):
+    """
+    Returns the sidecar record of cacheFilePath, or None if there is none or
+    it no longer matches the cache file (size, modification time and, with
+    verifyHash=True, the content hash).
+    """
+    metaPath = metadataFilePath(cacheFilePath)
+    try:
+        with open(metaPath, "r") as f:
+            metadata = json.load(f)
+        stat = os.stat(cacheFilePath)
+    except (OSError, ValueError) as e:
+        default_logger().debug(e, exc_info=True)
+        return None
+    if not isinstance(metadata, dict) or metadata.get("version", 0) > METADATA_VERSION:
+        return None
+    if metadata.get("cacheBytes") != stat.st_size or metadata.get("cacheModified") != stat.st_mtime_ns:
+        return None
+    if verifyHash and metadata.get("contentHash") != fileHash(cacheFilePath):
+        return None
+    return metadata
+
+
+def recordAppendedCandles(cacheFilePath, candles, daily=True):
+    """
+    Updates the sidecar record of cacheFilePath with candles that were
+    appended to its candle log (see PKCandleLog), so that freshness checks
+    see the latest candle and the row counts match the merged data. A candle
+    adds a row only if it is later (by day for daily=True) than the last
+    recorded candle of its symbol; otherwise it replaces one. Returns the
+    updated metadata or None.
+    """
+    metadata = readCacheMetadata(cacheFilePath)
+    if metadata is None:
+        return None
+    appended = buildCacheMetadata(candles)
+    lastCandles = metadata.get("lastCandles")
+    rowCounts = metadata.setdefault("rowCounts", {})
+    known = set(metadata.get("symbols", []))
+    for symbol in appended["symbols"]:
+        entry = candles[symbol]
+        index = entry.index if isinstance(entry, pd.DataFrame) else entry["index"]
+        previous = None if lastCandles is None else lastCandles.get(symbol)
+        if symbol not in known:
+            metadata.setdefault("symbols", []).append(symbol)
+            rowCounts[symbol] = len(index)
+        elif previous is not None and len(index) > 0:
+            keys = candleKeys(index, daily)
+            newRows = len(np.unique(keys[keys > candleKeys([previous], daily)[0]]))
+            rowCounts[symbol] = rowCounts.get(symbol, 0) + newRows
+        if lastCandles is not None and symbol in appended["lastCandles"]:
+            lastCandles[symbol] = _latest([value for value in [previous, appended["lastCandles"][symbol]] if value is not None])
+    metadata["lastCandle"] = _latest([value for value in [metadata.get("lastCandle"), appended.get("lastCandle")] if value is not None])
+    _writeMetadataFile(cacheFilePath, metadata)
+    return metadata
+
+
+def medianRowCount(metadata):
+    rowCounts = list(metadata.get("rowCounts", {}).values())
+    return int(np.median(rowCounts)) if len(rowCounts) > 0 else 0
+
+
+def missingSymbols(metadata, symbols):
+    """Symbols from the given list that the cache doesn't have."""
+    cached = set(metadata.get("symbols", []))
+    return [symbol for symbol in symbols if symbol not in cached]
+
+
+def lastCandleOf(metadata, symbols, quantile=FRESHNESS_QUANTILE):
+    """
+    The last candle that the given quantile of the requested (and cached)
+    symbols have reached, e.g. with 0.1, 90% of them have a candle at least
+    this recent. None if the record has no per-symbol last candles (written
+    by an older version) or none of the symbols are cached.
+    """
+    lastCandles = metadata.get("lastCandles")
+    if lastCandles is None:
+        return None
+    values = [lastCandles[symbol] for symbol in symbols if symbol in lastCandles]
+    if len(values) == 0:
+        return None
+    try:
+        nanos = toEpochNanos(values)
+    except Exception as e:  # pragma: no cover
+        default_logger().debug(e, exc_info=True)
+        return None
+    parsed = [n for n in np.argsort(nanos, kind="stable") if nanos[n] != np.iinfo(np.int64).min]
+    if len(parsed) == 0:
+        return None
+    return values[int(parsed[int(quantile * (len(parsed) - 1))])]
@@ -0,0 +1,225 @@
+"""
+PKCandleLog - Append-only log of new or updated candles for the stock data cache
+
+This module handles:
+- Appending new or updated candles, keyed by (symbol, timestamp), to a log
+  file next to the cache (stock_data_*.candles.log)
+- Merging the logged candles into a stock data dictionary on read
+- Removing the log once it has been compacted into the cache file
+
+Adding one daily candle per symbol then costs O(new rows) instead of
+rewriting the whole (multi-hundred MB) pickle.
+
+File layout: the magic b"PKSCLG01" followed by records, each of them a
+little-endian int64 length and a pickled dictionary
+{"daily": bool, "candles": {symbol: split-dict of the new rows}}.
+A record that was not completely written (e.g. the process was killed
+while appending) is ignored.
+"""
+
+import os
+import pickle
+import struct
+
+import numpy as np
+import pandas as pd
+
+from PKDevTools.classes.log import default_logger
+
+from pkscreener.classes.StockDataPacker import EXCHANGE_TIMEZONES, toEpochNanos
+
+MAGIC = b"PKSCLG01"
+CANDLE_LOG_EXTENSION = ".candles.log"
+RECORD_HEADER = struct.Struct("<q")
+DAY_NANOS = 24 * 60 * 60 * 1_000_000_000
+
+
+def candleLogFilePath(cacheFilePath):
+    """stock_data_23102025.pkl -> stock_data_23102025.candles.log"""
+    root, _ = os.path.splitext(cacheFilePath)
+    return f"{root}{CANDLE_LOG_EXTENSION}"
+
+
+def candleLogSize(cacheFilePath):
+    try:
+        return os.path.getsize(candleLogFilePath(cacheFilePath))
+    except OSError:
+        return 0
+
+
+def candleKeys(indexValues, daily=True, timezone=EXCHANGE_TIMEZONES["INDIA"]):
+    """Epoch keys by which candles replace each other: the day for daily=True."""
+    keys = toEpochNanos(list(indexValues), timezone)
+    if daily:
+        # The wall time is in exchange time, so this is the trading day
+        keys = keys - keys % DAY_NANOS
+    return keys
+
+
+def _asSplitDict(entry):
+    if isinstance(entry, pd.DataFrame):
+        return entry.to_dict("split")
+    return entry
+
+
+def _alignRows(candles, columns):
+    """Re-orders the rows of candles to the given columns (NaN where missing)."""
+    candleColumns = list(candles.get("columns", []))
+    rows = list(candles.get("data", []))
+    if candleColumns == list(columns):
+        return rows
+    positions = {col: pos for pos, col in enumerate(candleColumns)}
+    return [[row[positions[col]] if col in positions else np.nan for col in columns] for row in rows]
+
+
+def mergeCandles(entry, candles, daily=True, timezone=EXCHANGE_TIMEZONES["INDIA"]):
+    """
+    Returns a copy of the split-dict entry with the rows of candles merged in.
+    A candle replaces the row with the same key (the timestamp, or the trading
+    day for daily=True) and is appended otherwise. Rows stay in ascending order.
+    """
+    candles = _asSplitDict(candles)
+    if entry is None:
+        return dict(candles)
+    entry = _asSplitDict(entry)
+    columns = list(entry.get("columns", candles.get("columns", [])))
+    index = list(entry.get("index", []))
+    rows = list(entry.get("data", []))
+    newIndex = list(candles.get("index", []))
+    newRows = _alignRows(candles, columns)
+    if len(newIndex) == 0:
+        return entry
+    newKeys = candleKeys(newIndex, daily, timezone)
+    if len(index) > 0 and newKeys.min() > candleKeys(index[-1:], daily, timezone)[0]:
+        # New candles only (the usual case): nothing to parse but the last row
+        index.extend(newIndex)
+        rows.extend(newRows)
+    else:
+        keys = candleKeys(index, daily, timezone)
+        keep = ~np.isin(keys, newKeys)
+        index = [value for value, kept in zip(index, keep) if kept] + newIndex
+        rows = [row for row, kept in zip(rows, keep) if kept] + newRows
+        keys = np.concatenate([keys[keep], newKeys])
+        if len(keys) > 1 and (np.diff(keys) < 0).any():
+            order = np.argsort(keys, kind="stable")
+            index = [index[pos] for pos in order]
+            rows = [rows[pos] for pos in order]
+    merged = dict(entry)
+    merged["columns"] = columns
+    merged["index"] = index
+    merged["data"] = rows
+    return merged
+
+
+def appendCandles(cacheFilePath, candles, daily=True):
+    """
+    Appends {symbol: split-dict of new/updated rows} to the log of
+    cacheFilePath. Returns the number of rows appended.
+    """
+    candles = {symbol: _asSplitDict(entry) for symbol, entry in candles.items() if entry is not None}
+    rowCount = sum(len(entry.get("index", [])) for entry in candles.values())
+    if rowCount == 0:
+        return 0
+    payload = pickle.dumps({"daily": daily, "candles": candles}, protocol=pickle.HIGHEST_PROTOCOL)
+    logPath = candleLogFilePath(cacheFilePath)
+    validBytes = _validLength(logPath)
+    with open(logPath, "r+b" if validBytes > 0 else "wb") as f:
+        if validBytes == 0:
+            f.write(MAGIC)
+        else:
+            # Drop whatever a previously interrupted append left behind
+            f.seek(validBytes)
+            f.truncate()
+        f.write(RECORD_HEADER.pack(len(payload)))
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    return rowCount
+
+
+def _readRecords(logPath):
+    """Yields every complete record of the log."""
+    with open(logPath, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            (length,) = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if length < 0 or len(payload) < length:
+                return
+            try:
+                record = pickle.loads(payload)
+            except Exception as e:  # pragma: no cover
+                default_logger().debug(e, exc_info=True)
+                return
+            yield record
+
+
+def _validLength(logPath):
+    """Size of the log up to the end of its last complete record (0 if unusable)."""
+    try:
+        fileSize = os.path.getsize(logPath)
+        with open(logPath, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return 0
+            offset = len(MAGIC)
+            # Only the record headers are read
+            while offset + RECORD_HEADER.size <= fileSize:
+                f.seek(offset)
+                (length,) = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+                if length < 0 or offset + RECORD_HEADER.size + length > fileSize:
+                    break
+                offset += RECORD_HEADER.size + length
+            return offset
+    except OSError:
+        return 0
+
+
+def readCandleLog(cacheFilePath, symbols=None):
+    """
+    Returns (daily, {symbol: split-dict}) with all logged candles of
+    cacheFilePath. Later records win for the same (symbol, key).
+    """
+    logPath = candleLogFilePath(cacheFilePath)
+    daily = True
+    merged = {}
+    if not os.path.isfile(logPath):
+        return daily, merged
+    try:
+        for record in _readRecords(logPath):
+            daily = record.get("daily", True)
+            for symbol, candles in record.get("candles", {}).items():
+                if symbols is not None and symbol not in symbols:
+                    continue
+                merged[symbol] = mergeCandles(merged.get(symbol), candles, daily=daily)
+    except OSError as e:  # pragma: no cover
+        default_logger().debug(e, exc_info=True)
+    return daily, merged
+
+
+def applyCandles(stockDict, candles, daily=True):
+    """Merges {symbol: split-dict} into stockDict (in place). Returns the number of symbols updated."""
+    for symbol, entry in candles.items():
+        stockDict[symbol] = mergeCandles(stockDict.get(symbol), entry, daily=daily)
+    return len(candles)
+
+
+def applyCandleLog(stockDict, cacheFilePath, symbols=None):
+    """Merges the log of cacheFilePath into stockDict (in place). Returns the number of symbols updated."""
+    daily, candles = readCandleLog(cacheFilePath, symbols=symbols)
+    return applyCandles(stockDict, candles, daily=daily)
+
+
+def clearCandleLog(cacheFilePath):
+    """Removes the log of cacheFilePath, e.g. after the cache was rewritten."""
+    logPath = candleLogFilePath(cacheFilePath)
+    try:
+        if os.path.isfile(logPath):
+            os.remove(logPath)
+            return True
+    except OSError as e:  # pragma: no cover
+        default_logger().debug(e, exc_info=True)
+    return False
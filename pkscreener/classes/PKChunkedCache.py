@@ -0,0 +1,246 @@
+"""
+PKChunkedCache - Compressed, chunked container of the stock data cache
+
+This module handles:
+- Splitting a stock data dictionary into chunks of symbols (in sorted symbol
+  order) and compressing every chunk independently (zstd or lz4 if
+  installed, zlib otherwise)
+- A manifest (stock_data_*.manifest.json) describing every chunk (file name,
+  symbol range, sizes, sha256) and the cache summary of PKCacheMetadata
+- Downloading, verifying and decompressing the chunks in parallel, either
+  from a server (e.g. the actions-data-download branch) or from local files
+
+The codec libraries and hashlib release the GIL, so a thread pool downloads,
+verifies and decompresses several chunks at the same time. Only the final
+unpickling of each (small) chunk happens under the GIL.
+
+Files next to stock_data_23102025.pkl:
+
+    stock_data_23102025.manifest.json
+    stock_data_23102025.c000.pkz, stock_data_23102025.c001.pkz, ...
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from PKDevTools.classes.log import default_logger
+
+from pkscreener import Imports
+from pkscreener.classes import PKCacheMetadata
+
+if Imports["zstandard"]:
+    import zstandard
+if Imports["lz4"]:
+    import lz4.frame
+
+FORMAT_VERSION = 1
+MANIFEST_EXTENSION = ".manifest.json"
+CHUNK_EXTENSION = ".pkz"
+DEFAULT_SYMBOLS_PER_CHUNK = 200
+
+
+class ChunkedCacheError(Exception):
+    pass
+
+
+def _zstdCompress(raw):
+    return zstandard.ZstdCompressor(level=3).compress(raw)
+
+
+def _zstdDecompress(payload):
+    return zstandard.ZstdDecompressor().decompress(payload)
+
+
+# name -> (compress, decompress). zlib is always available.
+CODECS = {"zlib": (lambda raw: zlib.compress(raw, 1), zlib.decompress)}
+if Imports["zstandard"]:
+    CODECS["zstd"] = (_zstdCompress, _zstdDecompress)
+if Imports["lz4"]:
+    CODECS["lz4"] = (lz4.frame.compress, lz4.frame.decompress)
+
+
+def defaultCodec():
+    for codec in ["zstd", "lz4", "zlib"]:
+        if codec in CODECS:
+            return codec
+
+
+def manifestFilePath(cacheFilePath):
+    """stock_data_23102025.pkl -> stock_data_23102025.manifest.json"""
+    root, _ = os.path.splitext(cacheFilePath)
+    return f"{root}{MANIFEST_EXTENSION}"
+
+
+def chunkFilePath(cacheFilePath, chunkNumber):
+    """stock_data_23102025.pkl, 1 -> stock_data_23102025.c001.pkz"""
+    root, _ = os.path.splitext(cacheFilePath)
+    return f"{root}.c{chunkNumber:03d}{CHUNK_EXTENSION}"
+
+
+def _maxWorkers(maxWorkers, chunkCount):
+    if maxWorkers is None:
+        maxWorkers = min(8, os.cpu_count() or 1)
+    return max(1, min(maxWorkers, chunkCount))
+
+
+def _encodeChunk(chunk, codec):
+    raw = pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL)
+    payload = CODECS[codec][0](raw)
+    return payload, len(raw)
+
+
+def writeChunkedCache(stockDict, cacheFilePath, symbolsPerChunk=DEFAULT_SYMBOLS_PER_CHUNK, codec=None, maxWorkers=None):
+    """
+    Writes stockDict as compressed chunks plus the manifest next to
+    cacheFilePath. The manifest is written last, so a reader never sees a
+    manifest without its chunks. Returns the manifest.
+    """
+    codec = defaultCodec() if codec is None else codec
+    if codec not in CODECS:
+        raise ChunkedCacheError(f"Codec {codec} is not available")
+    symbols = sorted(stockDict.keys(), key=str)
+    batches = [symbols[start:start + symbolsPerChunk] for start in range(0, len(symbols), symbolsPerChunk)]
+    chunks = [{symbol: stockDict[symbol] for symbol in batch} for batch in batches]
+    with ThreadPoolExecutor(max_workers=_maxWorkers(maxWorkers, len(chunks))) as executor:
+        encoded = list(executor.map(lambda chunk: _encodeChunk(chunk, codec), chunks))
+    chunkInfos = []
+    for chunkNumber, (batch, (payload, rawBytes)) in enumerate(zip(batches, encoded)):
+        chunkPath = chunkFilePath(cacheFilePath, chunkNumber)
+        with open(chunkPath, "wb") as f:
+            f.write(payload)
+        chunkInfos.append({
+            "file": os.path.basename(chunkPath),
+            "firstSymbol": str(batch[0]),
+            "lastSymbol": str(batch[-1]),
+            "symbols": len(batch),
+            "bytes": len(payload),
+            "rawBytes": rawBytes,
+            "sha256": hashlib.sha256(payload).hexdigest(),
+        })
+    manifest = {
+        "version": FORMAT_VERSION,
+        "codec": codec,
+        "chunks": chunkInfos,
+        "cache": PKCacheMetadata.buildCacheMetadata(stockDict),
+    }
+    manifestPath = manifestFilePath(cacheFilePath)
+    tempPath = f"{manifestPath}.tmp"
+    with open(tempPath, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tempPath, manifestPath)
+    return manifest
+
+
+def parseManifest(content):
+    manifest = json.loads(content)
+    if not isinstance(manifest, dict) or manifest.get("version") != FORMAT_VERSION:
+        raise ChunkedCacheError("Unsupported chunked cache manifest")
+    if manifest.get("codec") not in CODECS:
+        raise ChunkedCacheError(f"Codec {manifest.get('codec')} is not available")
+    return manifest
+
+
+def readManifest(manifestPath):
+    with open(manifestPath, "r") as f:
+        return parseManifest(f.read())
+
+
+def decodeChunk(payload, chunkInfo, codec):
+    """Verifies and decompresses one chunk. Returns {symbol: split-dict}."""
+    if len(payload) != chunkInfo["bytes"] or hashlib.sha256(payload).hexdigest() != chunkInfo["sha256"]:
+        raise ChunkedCacheError(f"Checksum mismatch for {chunkInfo['file']}")
+    raw = CODECS[codec][1](payload)
+    if len(raw) != chunkInfo["rawBytes"]:
+        raise ChunkedCacheError(f"Unexpected size of {chunkInfo['file']}")
+    return pickle.loads(raw)
+
+
+def chunksFor(manifest, symbols=None):
+    """The chunks of manifest that may hold any of symbols (all chunks if None)."""
+    if symbols is None:
+        return list(manifest["chunks"])
+    symbols = sorted(str(symbol) for symbol in symbols)
+    return [chunk for chunk in manifest["chunks"]
+            if any(chunk["firstSymbol"] <= symbol <= chunk["lastSymbol"] for symbol in symbols)]
+
+
+def _loadChunks(manifest, chunks, readPayload, symbols=None, maxWorkers=None):
+    codec = manifest["codec"]
+    wanted = None if symbols is None else set(str(symbol) for symbol in symbols)
+
+    def loadChunk(chunkInfo):
+        stockData = decodeChunk(readPayload(chunkInfo), chunkInfo, codec)
+        if wanted is not None:
+            stockData = {symbol: entry for symbol, entry in stockData.items() if str(symbol) in wanted}
+        return stockData
+
+    stockDict = {}
+    if len(chunks) == 0:
+        return stockDict
+    with ThreadPoolExecutor(max_workers=_maxWorkers(maxWorkers, len(chunks))) as executor:
+        # Results come back in chunk (i.e. symbol) order
+        for stockData in executor.map(loadChunk, chunks):
+            stockDict.update(stockData)
+    return stockDict
+
+
+def readChunkedCache(cacheFilePath, symbols=None, maxWorkers=None):
+    """Reads all or the requested symbols from the local chunk files of cacheFilePath."""
+    manifestPath = manifestFilePath(cacheFilePath)
+    manifest = readManifest(manifestPath)
+    directory = os.path.dirname(manifestPath)
+
+    def readPayload(chunkInfo):
+        with open(os.path.join(directory, chunkInfo["file"]), "rb") as f:
+            return f.read()
+
+    return _loadChunks(manifest, chunksFor(manifest, symbols), readPayload, symbols=symbols, maxWorkers=maxWorkers)
+
+
+def fetchManifest(baseUrl, cacheFileName, session=None, timeout=60):
+    """The manifest of cacheFileName on the server, or None if there is none."""
+    import requests
+    session = requests if session is None else session
+    manifestUrl = f"{baseUrl.rstrip('/')}/{os.path.basename(manifestFilePath(cacheFileName))}"
+    response = session.get(manifestUrl, timeout=timeout)
+    if response.status_code != 200:
+        default_logger().debug(f"No chunked cache at {manifestUrl} ({response.status_code})")
+        return None
+    return parseManifest(response.content)
+
+
+def downloadChunks(baseUrl, manifest, symbols=None, maxWorkers=None, session=None, timeout=60):
+    """
+    Downloads all (or only the chunks holding the requested symbols) chunks
+    of manifest in parallel. Raises ChunkedCacheError if a chunk is missing
+    or corrupt.
+    """
+    import requests
+    session = requests.Session() if session is None else session
+    baseUrl = baseUrl.rstrip("/")
+
+    def readPayload(chunkInfo):
+        response = session.get(f"{baseUrl}/{chunkInfo['file']}", timeout=timeout)
+        if response.status_code != 200:
+            raise ChunkedCacheError(f"Could not download {chunkInfo['file']} ({response.status_code})")
+        return response.content
+
+    return _loadChunks(manifest, chunksFor(manifest, symbols), readPayload, symbols=symbols, maxWorkers=maxWorkers)
+
+
+def downloadChunkedCache(baseUrl, cacheFileName, symbols=None, maxWorkers=None, session=None, timeout=60):
+    """
+    Downloads the manifest of cacheFileName from baseUrl and then its chunks.
+    Returns (manifest, stockDict) or (None, None) if the server doesn't have
+    a chunked copy.
+    """
+    import requests
+    session = requests.Session() if session is None else session
+    manifest = fetchManifest(baseUrl, cacheFileName, session=session, timeout=timeout)
+    if manifest is None:
+        return None, None
+    return manifest, downloadChunks(baseUrl, manifest, symbols=symbols, maxWorkers=maxWorkers, session=session, timeout=timeout)
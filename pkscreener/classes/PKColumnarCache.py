@@ -0,0 +1,161 @@
+"""
+PKColumnarCache - Memory-mapped columnar snapshot of the stock data cache
+
+This module handles:
+- Writing a stock data dictionary as a single columnar file (.pkc)
+- Opening such a file with np.memmap (no unpickling, shared OS page cache)
+- Converting existing stock_data_*.pkl pickles into the columnar format
+
+File layout (all integers little-endian int64):
+
+    [0:8]     magic b"PKSCOL01"
+    [8:72]    header: version, rows, cols, indexRows,
+                      valuesOffset, indexOffset, metadataOffset, metadataBytes
+    values    float64 (rows, cols) in column-major order, i.e. one
+              contiguous block per OHLCV column
+    index     int64 (indexRows,) candle timestamps as epoch nanoseconds of the
+              exchange wall time, ascending per symbol
+    metadata  pickled symbol index (symbols, offsets, columns, extras...)
+
+Every block starts on a 64-byte boundary.
+"""
+
+import os
+import pickle
+
+import numpy as np
+
+from PKDevTools.classes.log import default_logger
+
+from pkscreener.classes.StockDataPacker import PackedStockData, packStockDict
+
+MAGIC = b"PKSCOL01"
+# 2: index holds exchange wall times, ascending per symbol
+# 3: entries are in the canonical schema (see StockDataSchema)
+FORMAT_VERSION = 3
+HEADER_OFFSET = len(MAGIC)
+HEADER_FIELDS = 8
+COLUMNAR_EXTENSION = ".pkc"
+
+
+class ColumnarCacheError(Exception):
+    pass
+
+
+def _alignedSize(nbytes, alignment=64):
+    return int((nbytes + alignment - 1) // alignment * alignment)
+
+
+def columnarFilePath(cacheFilePath):
+    """stock_data_23102025.pkl -> stock_data_23102025.pkc"""
+    root, _ = os.path.splitext(cacheFilePath)
+    return f"{root}{COLUMNAR_EXTENSION}"
+
+
+def isColumnarCacheCurrent(cacheFilePath):
+    """
+    True if the columnar file for cacheFilePath exists and is not older than
+    the pickle (which may have been replaced by a fresh download).
+    """
+    columnarPath = columnarFilePath(cacheFilePath)
+    try:
+        if not os.path.isfile(columnarPath):
+            return False
+        if not os.path.isfile(cacheFilePath):
+            return True
+        return os.path.getmtime(columnarPath) >= os.path.getmtime(cacheFilePath)
+    except OSError:  # pragma: no cover
+        return False
+
+
+def writeColumnarCache(stockDict, filePath):
+    """
+    Packs stockDict (a dict, manager dict or PackedStockData) and writes it
+    to filePath atomically. Returns the number of symbols written.
+    """
+    packed = stockDict if isinstance(stockDict, PackedStockData) else packStockDict(stockDict)
+    metadata = pickle.dumps(packed.metadata(), protocol=pickle.HIGHEST_PROTOCOL)
+    rows, cols = packed.values.shape
+    valuesOffset = _alignedSize(HEADER_OFFSET + HEADER_FIELDS * 8)
+    indexOffset = valuesOffset + _alignedSize(packed.values.nbytes)
+    metadataOffset = indexOffset + _alignedSize(packed.index.nbytes)
+    header = np.array(
+        [FORMAT_VERSION, rows, cols, packed.index.shape[0], valuesOffset, indexOffset, metadataOffset, len(metadata)],
+        dtype="<i8",
+    )
+    tempPath = f"{filePath}.tmp"
+    with open(tempPath, "wb") as f:
+        f.write(MAGIC)
+        f.write(header.tobytes())
+        f.seek(valuesOffset)
+        # Column-major: the transpose in C order is one block per column
+        f.write(np.ascontiguousarray(packed.values.T, dtype="<f8").tobytes())
+        f.seek(indexOffset)
+        f.write(np.ascontiguousarray(packed.index, dtype="<i8").tobytes())
+        f.seek(metadataOffset)
+        f.write(metadata)
+    os.replace(tempPath, filePath)
+    return len(packed)
+
+
+def _readHeader(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ColumnarCacheError("Not a columnar stock data file")
+    header = np.frombuffer(f.read(HEADER_FIELDS * 8), dtype="<i8")
+    if len(header) != HEADER_FIELDS:
+        raise ColumnarCacheError("Truncated columnar stock data file")
+    if int(header[0]) != FORMAT_VERSION:
+        raise ColumnarCacheError(f"Unsupported columnar format version {int(header[0])}")
+    return [int(x) for x in header]
+
+
+def openColumnarCache(filePath):
+    """
+    Opens a columnar file and returns a PackedStockData whose values and
+    index are read-only memory maps. Nothing but the small symbol index
+    is read until a symbol is actually accessed.
+    """
+    with open(filePath, "rb") as f:
+        _, rows, cols, indexRows, valuesOffset, indexOffset, metadataOffset, metadataBytes = _readHeader(f)
+        f.seek(metadataOffset)
+        metadataRaw = f.read(metadataBytes)
+    if len(metadataRaw) != metadataBytes:
+        raise ColumnarCacheError("Truncated columnar stock data file")
+    metadata = pickle.loads(metadataRaw)
+    if rows * cols > 0:
+        values = np.memmap(filePath, dtype="<f8", mode="r", offset=valuesOffset, shape=(rows, cols), order="F")
+    else:
+        values = np.empty((rows, cols), dtype=np.float64)
+    if indexRows > 0:
+        index = np.memmap(filePath, dtype="<i8", mode="r", offset=indexOffset, shape=(indexRows,))
+    else:
+        index = np.empty(0, dtype=np.int64)
+    return PackedStockData.fromMetadata(metadata, values, index)
+
+
+def readColumnarCache(filePath, symbols=None):
+    """
+    Returns {symbol: split-dict} (lists, as produced by DataFrame.to_dict("split"))
+    for all or the requested symbols of a columnar file.
+    """
+    packed = openColumnarCache(filePath)
+    symbols = packed.keys() if symbols is None else [symbol for symbol in symbols if symbol in packed]
+    return {symbol: packed.toSplitDict(symbol, asLists=True) for symbol in symbols}
+
+
+def convertPickleToColumnar(pickleFilePath, columnarPath=None):
+    """
+    Converts an existing stock_data_*.pkl into the columnar format.
+    Returns the path of the columnar file or None if the pickle is unusable.
+    """
+    columnarPath = columnarFilePath(pickleFilePath) if columnarPath is None else columnarPath
+    try:
+        with open(pickleFilePath, "rb") as f:
+            stockData = pickle.load(f)
+    except (pickle.UnpicklingError, EOFError, FileNotFoundError) as e:
+        default_logger().debug(e, exc_info=True)
+        return None
+    if not stockData:
+        return None
+    writeColumnarCache(stockData, columnarPath)
+    return columnarPath
@@ -0,0 +1,105 @@
+"""
+PKFilterChain - Staged, early-exit eligibility checks of screenStocks
+
+This module handles:
+- Running the eligibility predicates of a stock in stages: raw last-bar
+  predicates (before any preprocessing), indicator predicates (on the
+  preprocessed frames) and the option's validators
+- Ordering the predicates of a stage by their measured cost per
+  elimination, so the cheapest and most selective ones run first
+- Counting, per stage and predicate, the symbols evaluated and eliminated
+  and the time spent
+
+A predicate eliminates a symbol by raising (the ScreeningStatistics
+exceptions, e.g. LTPNotInConfiguredRange). One chain is shared by all
+scans of a process (see sharedChain).
+"""
+
+import time
+
+from PKDevTools.classes.log import default_logger
+
+RAW_STAGE = "raw"
+INDICATOR_STAGE = "indicators"
+VALIDATOR_STAGE = "validators"
+STAGES = [RAW_STAGE, INDICATOR_STAGE, VALIDATOR_STAGE]
+# Log the counters every so many symbols entering the first stage
+REPORT_EVERY_SYMBOLS = 1000
+
+
+class PKFilterChain:
+    """
+    Per stage counters and the cost-ordering of the predicates.
+
+    Usage:
+        chain = PKFilterChain.sharedChain()
+        results = chain.run(RAW_STAGE, [
+            ("LTP", lambda: checkLTP(data)),
+            ("Volume", lambda: checkVolume(data)),
+        ])
+
+    run returns the predicates' return values by name, and re-raises the
+    exception of the predicate that eliminated the symbol.
+    """
+
+    _shared = None
+
+    def __init__(self):
+        self.stages = {stage: {"symbols": 0, "eliminated": 0} for stage in STAGES}
+        self.predicates = {}
+
+    @staticmethod
+    def sharedChain():
+        if PKFilterChain._shared is None:
+            PKFilterChain._shared = PKFilterChain()
+        return PKFilterChain._shared
+
+    def _counters(self, stage, name):
+        key = (stage, name)
+        if key not in self.predicates:
+            self.predicates[key] = {"evaluated": 0, "eliminated": 0, "seconds": 0.0}
+        return self.predicates[key]
+
+    def rank(self, stage, name):
+        """Expected seconds spent per symbol eliminated (smoothed, so unseen predicates run by cost alone)."""
+        counters = self._counters(stage, name)
+        costPerCall = counters["seconds"] / counters["evaluated"] if counters["evaluated"] > 0 else 0.0
+        eliminationRate = (counters["eliminated"] + 1) / (counters["evaluated"] + 2)
+        return costPerCall / eliminationRate
+
+    def ordered(self, stage, predicates):
+        # sorted is stable: predicates without measurements keep the caller's order
+        return sorted(predicates, key=lambda predicate: self.rank(stage, predicate[0]))
+
+    def run(self, stage, predicates):
+        stageCounters = self.stages.setdefault(stage, {"symbols": 0, "eliminated": 0})
+        stageCounters["symbols"] += 1
+        if stage == STAGES[0] and stageCounters["symbols"] % REPORT_EVERY_SYMBOLS == 0:
+            default_logger().debug(f"Filter chain: {self.stats()}")
+        results = {}
+        for name, predicate in self.ordered(stage, predicates):
+            counters = self._counters(stage, name)
+            counters["evaluated"] += 1
+            start = time.perf_counter()
+            try:
+                results[name] = predicate()
+            except KeyboardInterrupt: # pragma: no cover
+                raise KeyboardInterrupt
+            except Exception:
+                counters["eliminated"] += 1
+                stageCounters["eliminated"] += 1
+                raise
+            finally:
+                counters["seconds"] += time.perf_counter() - start
+        return results
+
+    def stats(self):
+        stats = {}
+        for stage, stageCounters in self.stages.items():
+            stats[stage] = dict(stageCounters)
+            stats[stage]["predicates"] = {
+                name: {"evaluated": counters["evaluated"], "eliminated": counters["eliminated"],
+                       "seconds": round(counters["seconds"], 4)}
+                for (predicateStage, name), counters in self.predicates.items() if predicateStage == stage
+            }
+        return stats
@@ -0,0 +1,142 @@
+"""
+PKIndicatorCache - Memoized preprocessed (indicator) frames of the screens
+
+This module handles:
+- Caching the (fullData, processedData) frames of
+  ScreeningStatistics.preprocessData, keyed by the symbol, a hash of the candles
+  of its data, useEMA, daysToLookback and the timeframe
+- Evicting the least recently used frames once a memory budget is exceeded
+- Counting hits, misses and evictions
+
+One cache is shared by all scans of a process (see sharedCache), so the
+~40 piped monitor options preprocess every symbol of a snapshot once.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import pandas as pd
+
+from PKDevTools.classes.log import default_logger
+
+DEFAULT_MEMORY_BUDGET_BYTES = 256 * 1024 * 1024
+# Log the counters every so many lookups
+REPORT_EVERY_LOOKUPS = 5000
+# The columns the indicators are computed from
+FINGERPRINT_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def dataFingerprint(data):
+    """
+    Identifies the candles of data: its length and a hash of its index and
+    candle (OHLCV) columns, the ones the indicators are computed from. A
+    candle still being formed, a backtest slice or a corrected candle
+    anywhere in the history changes it.
+    """
+    if data is None or len(data) == 0:
+        return None
+    columns = [col for col in FINGERPRINT_COLUMNS if col in data.columns]
+    rowHashes = pd.util.hash_pandas_object(data[columns], index=True).to_numpy()
+    return (len(data), hashlib.sha1(rowHashes.tobytes()).hexdigest())
+
+
+def _frameBytes(frame):
+    try:
+        return int(frame.memory_usage(index=True, deep=False).sum())
+    except Exception:  # pragma: no cover
+        return 0
+
+
+class PKIndicatorCache:
+    """
+    LRU cache of preprocessed frames under a memory budget.
+
+    Usage:
+        cache = PKIndicatorCache.sharedCache()
+        key = cache.keyFor("SBIN", data, useEMA=False, daysToLookback=22, timeframe="1d")
+        frames = cache.get(key)
+        if frames is None:
+            frames = cache.put(key, preprocess(data))
+
+    get returns copies, so callers may add columns (e.g. RSIi) to the frames.
+    """
+
+    _shared = None
+
+    def __init__(self, memoryBudgetBytes=DEFAULT_MEMORY_BUDGET_BYTES):
+        self.memoryBudgetBytes = memoryBudgetBytes
+        self._entries = OrderedDict()
+        self.sizeBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def sharedCache():
+        if PKIndicatorCache._shared is None:
+            PKIndicatorCache._shared = PKIndicatorCache()
+        return PKIndicatorCache._shared
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @staticmethod
+    def keyFor(symbol, data, useEMA, daysToLookback, timeframe=None):
+        fingerprint = dataFingerprint(data)
+        if symbol is None or fingerprint is None:
+            return None
+        return (symbol, fingerprint, bool(useEMA), int(daysToLookback), timeframe)
+
+    def get(self, key):
+        if key is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            self._report()
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self._report()
+        fullData, processedData, _ = entry
+        return fullData.copy(), processedData.copy()
+
+    def put(self, key, frames):
+        """Remembers frames (fullData, processedData) under key and returns copies of them."""
+        fullData, processedData = frames
+        if key is None:
+            return frames
+        entryBytes = _frameBytes(fullData) + _frameBytes(processedData)
+        if entryBytes > self.memoryBudgetBytes:
+            return frames
+        if key in self._entries:
+            self.sizeBytes -= self._entries.pop(key)[2]
+        self._entries[key] = (fullData, processedData, entryBytes)
+        self.sizeBytes += entryBytes
+        while self.sizeBytes > self.memoryBudgetBytes and len(self._entries) > 1:
+            _, (_, _, evictedBytes) = self._entries.popitem(last=False)
+            self.sizeBytes -= evictedBytes
+            self.evictions += 1
+        return fullData.copy(), processedData.copy()
+
+    def clear(self):
+        self._entries = OrderedDict()
+        self.sizeBytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.sizeBytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": round(self.hits / lookups, 4) if lookups > 0 else 0,
+        }
+
+    def _report(self):
+        if (self.hits + self.misses) % REPORT_EVERY_LOOKUPS == 0:
+            default_logger().debug(f"Indicator cache: {self.stats()}")
@@ -0,0 +1,121 @@
+"""
+PKIntradayStore - Intraday candles of all symbols, sliceable by session and time
+
+This module handles:
+- Packing the intraday (e.g. 1-minute) candle dictionary once into sorted
+  int64 timestamps (exchange wall time) and a float64 block per symbol
+  (see StockDataPacker)
+- Partitioning the candles of every symbol by trading session
+- Answering "all candles up to 09:30 on date D" for a symbol with two binary
+  searches and returning views into the packed block (no DataFrame is built
+  and no index is parsed per query)
+
+The morning-alert simulations (sliceWindowDatetime) and the --slicewindow
+replay of PKMarketOpenCloseAnalyser read their candles from it.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pkscreener.classes.StockDataPacker import EXCHANGE_TIMEZONES, buildDataFrame, packStockDict, toEpochNanos
+
+DAY_NANOS = 24 * 60 * 60 * 1_000_000_000
+
+
+class PKIntradayStore:
+    """
+    Read-only, time-sliceable view of an intraday stock data dictionary.
+
+    Usage:
+        store = PKIntradayStore.fromStockDict(stockDictInt)
+        start, end = store.sessionWindow("SBIN", "2024-01-02 09:30:00+05:30")
+        values, columns, index = store.candlesUpTo("SBIN", "2024-01-02 09:30:00+05:30")
+
+    Every window is [start, end) into the rows of the symbol. Timestamps may
+    be strings, datetimes or Timestamps. tz-aware values are converted to
+    the exchange wall time, naive ones are taken as already being in it.
+    """
+
+    def __init__(self, packed):
+        self.packed = packed
+        self.timezone = packed.exchangeTimezone
+        self._sessions = {}
+
+    @staticmethod
+    def fromStockDict(stockDict, timezone=EXCHANGE_TIMEZONES["INDIA"]):
+        return PKIntradayStore(packStockDict(stockDict, timezone=timezone))
+
+    def __len__(self):
+        return len(self.packed.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.packed.positions
+
+    def keys(self):
+        """Symbols with numeric candles (the others stay in packed.fallback)."""
+        return list(self.packed.symbols)
+
+    def timestampNanos(self, timestamp):
+        return int(toEpochNanos([timestamp], self.timezone)[0])
+
+    def symbolIndex(self, symbol):
+        """The sorted int64 timestamps of the symbol (a view)."""
+        pos = self.packed.positions[symbol]
+        return self.packed.index[int(self.packed.offsets[pos]):int(self.packed.offsets[pos + 1])]
+
+    def sessions(self, symbol):
+        """
+        Returns (days, starts) for the symbol: the trading days (epoch nanos
+        of their midnight) and the row each of them starts at. Computed once
+        per symbol.
+        """
+        if symbol not in self._sessions:
+            index = self.symbolIndex(symbol)
+            days = index - index % DAY_NANOS
+            starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) if len(days) > 0 else np.empty(0, dtype=np.int64)
+            self._sessions[symbol] = (days[starts], starts)
+        return self._sessions[symbol]
+
+    def sessionDays(self, symbol):
+        days, _ = self.sessions(symbol)
+        return list(pd.DatetimeIndex(days.view("M8[ns]")))
+
+    def sessionWindow(self, symbol, until, maxCandles=None):
+        """
+        Rows [start, end) of the session that until falls into, up to and
+        including until. With maxCandles, at most that many candles from the
+        start of the session.
+        """
+        untilNanos = self.timestampNanos(until)
+        days, starts = self.sessions(symbol)
+        index = self.symbolIndex(symbol)
+        session = np.searchsorted(days, untilNanos - untilNanos % DAY_NANOS, side="left")
+        if session >= len(days) or days[session] != untilNanos - untilNanos % DAY_NANOS:
+            return 0, 0
+        start = int(starts[session])
+        end = int(np.searchsorted(index, untilNanos, side="right"))
+        if maxCandles is not None:
+            end = min(end, start + maxCandles)
+        return start, max(start, end)
+
+    def windowUpTo(self, symbol, until, maxCandles=None):
+        """Rows [0, end) up to and including until (across sessions)."""
+        end = int(np.searchsorted(self.symbolIndex(symbol), self.timestampNanos(until), side="right"))
+        if maxCandles is not None:
+            end = min(end, maxCandles)
+        return 0, end
+
+    def candles(self, symbol, start, end):
+        """(values, columns, index) of rows [start, end) of the symbol, all views."""
+        values, columns, index = self.packed.symbolValues(symbol)
+        return values[start:end], columns, index[start:end]
+
+    def candlesUpTo(self, symbol, until, maxCandles=None):
+        """The session's candles of the symbol up to and including until."""
+        start, end = self.sessionWindow(symbol, until, maxCandles=maxCandles)
+        return self.candles(symbol, start, end)
+
+    def toDataFrame(self, symbol, start, end):
+        """An ascending DataFrame over rows [start, end) that shares the packed block."""
+        values, columns, index = self.candles(symbol, start, end)
+        return buildDataFrame(values, columns, index, intColumns=self.packed.intColumns.get(symbol, ()))
@@ -0,0 +1,311 @@
+"""
+PKLorentzianClassifier - Approximate nearest neighbours classification with Lorentzian distance
+
+This module handles:
+- The features of the Lorentzian classification (normalized RSI, WaveTrend,
+  CCI, ADX and an extra raw feature such as the MFI) as NumPy arrays
+- The approximate nearest neighbours predictions over a bounded lookback
+  (maxBarsBack candles), with the distances of a batch of candles to all
+  others computed at once
+- The volatility and regime filters and the resulting new buy/sell signal
+  of the last candle
+- Remembering the last candle's signal per symbol and candles (see
+  PKLorentzianClassifier.sharedClassifier), so the signal is classified once
+  per symbol and day even when several scans ask for it
+
+The features, filters and neighbour selection follow advanced_ta's
+LorentzianClassification (the settings used by
+ScreeningStatistics.validateLorentzian) step by step, so the signals are the
+same as those of the library.
+"""
+
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from pkscreener.classes.PKIndicatorCache import dataFingerprint
+from pkscreener.classes.Pktalib import pktalib
+
+# Candles of which the distances to all others are computed at once
+DISTANCE_BATCH_SIZE = 128
+# Candles of a distance row compared at once while looking for neighbours
+NEIGHBOUR_SEARCH_BLOCK = 64
+
+
+def _ema(values, period):
+    return pd.Series(values).ewm(span=period, min_periods=period, adjust=False).mean().to_numpy()
+
+
+def _sma(values, period):
+    return pd.Series(values).rolling(window=period, min_periods=period).mean().to_numpy()
+
+
+def _rescale(values, oldMin, oldMax, newMin=0, newMax=1):
+    return newMin + (newMax - newMin) * (values - oldMin) / max(oldMax - oldMin, 10e-10)
+
+
+def _normalize(values):
+    """Min-max scales values to [0, 1] ignoring missing values, like sklearn's MinMaxScaler."""
+    values = np.asarray(values, dtype=float)
+    if np.isinf(values).any():
+        raise ValueError("Input contains infinity")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        dataMin = np.nanmin(values)
+        dataRange = np.nanmax(values) - dataMin
+    if dataRange < 10 * np.finfo(float).eps:
+        dataRange = 1.0
+    scale = 1 / dataRange
+    return values * scale + (0 - dataMin * scale)
+
+
+def _rsi(close, period):
+    """Wilder's RSI seeded with the first change (like the ta package)."""
+    diff = pd.Series(close).diff(1)
+    up = diff.where(diff > 0, 0.0).ewm(alpha=1 / period, min_periods=period, adjust=False).mean()
+    down = (-diff.where(diff < 0, 0.0)).ewm(alpha=1 / period, min_periods=period, adjust=False).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(down == 0, 100, 100 - (100 / (1 + (up / down))))
+
+
+def _cci(high, low, close, period, constant=0.015):
+    typicalPrice = (high + low + close) / 3.0
+    mean = _sma(typicalPrice, period)
+    meanDeviation = np.full(len(typicalPrice), np.nan)
+    if len(typicalPrice) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(typicalPrice, period)
+        meanDeviation[period - 1:] = np.mean(np.abs(windows - np.mean(windows, axis=1)[:, None]), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (typicalPrice - mean) / (constant * meanDeviation)
+
+
+def _smoothedSums(values, period, length):
+    """Wilder's running sums of values[1:] as the ta package's ADX keeps them (the last one stays 0)."""
+    sums = [0.0] * length
+    finite = values[~np.isnan(values)]
+    sums[0] = float(np.sum(finite[0:period]))
+    for i in range(1, length - 1):
+        sums[i] = sums[i - 1] - (sums[i - 1] / float(period)) + values[period + i]
+    return np.array(sums)
+
+
+def _adx(high, low, close, period):
+    """ADX like the ta package (including its zero padding of the first candles)."""
+    closeShift = np.concatenate(([np.nan], close[:-1]))
+    directionalMovement = np.amax([high, closeShift], axis=0) - np.amin([low, closeShift], axis=0)
+    length = len(close) - (period - 1)
+    trueRanges = _smoothedSums(directionalMovement, period, length)
+    diffUp = high - np.concatenate(([np.nan], high[:-1]))
+    diffDown = np.concatenate(([np.nan], low[:-1])) - low
+    with np.errstate(invalid="ignore"):
+        positive = np.abs(((diffUp > diffDown) & (diffUp > 0)) * diffUp)
+        negative = np.abs(((diffDown > diffUp) & (diffDown > 0)) * diffDown)
+    positive[0], negative[0] = np.nan, np.nan
+    positive = _smoothedSums(positive, period, length)
+    negative = _smoothedSums(negative, period, length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        positive = np.where(trueRanges != 0, 100 * (positive / trueRanges), 0)
+        negative = np.where(trueRanges != 0, 100 * (negative / trueRanges), 0)
+        total = positive + negative
+        directionalIndex = np.where(total != 0, 100 * np.abs((positive - negative) / total), 0)
+    adx = [0.0] * length
+    adx[period] = np.mean(directionalIndex[0:period])
+    for i in range(period + 1, length):
+        adx[i] = ((adx[i - 1] * (period - 1)) + directionalIndex[i - 1]) / float(period)
+    return np.concatenate((np.zeros(period - 1), adx))
+
+
+def _atr(high, low, close, period):
+    """Wilder's ATR like the ta package (0 for the first period-1 candles)."""
+    closeShift = np.concatenate(([np.nan], close[:-1]))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        trueRange = np.nanmax([high - low, np.abs(high - closeShift), np.abs(low - closeShift)], axis=0)
+    atr = [0.0] * len(close)
+    atr[period - 1] = np.mean(trueRange[0:period])
+    for i in range(period, len(atr)):
+        atr[i] = (atr[i - 1] * (period - 1) + trueRange[i]) / float(period)
+    return np.array(atr)
+
+
+def _waveTrend(source, channelLength=10, averageLength=11):
+    ema1 = _ema(source, channelLength)
+    ema2 = _ema(np.abs(source - ema1), channelLength)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ci = (source - ema1) / (0.015 * ema2)
+    wt1 = _ema(ci, averageLength)
+    return wt1 - _sma(wt1, 4)
+
+
+def lorentzianFeatures(high, low, close, extraFeature=None):
+    """
+    The feature matrix (features x candles) of the classification:
+    RSI(14), WaveTrend(10, 11), CCI(20), ADX(20), RSI(9) and, if given, the
+    extraFeature (e.g. the MFI) as it is.
+    """
+    hlc3 = (high + low + close) / 3
+    features = [
+        _rescale(_ema(_rsi(close, 14), 2), 0, 100),
+        _normalize(_waveTrend(hlc3, 10, 11)),
+        _normalize(_ema(_cci(high, low, close, 20), 2)),
+        _rescale(_adx(high, low, close, 20), 0, 100),
+        _rescale(_ema(_rsi(close, 9), 2), 0, 100),
+    ]
+    if extraFeature is not None:
+        features.append(np.asarray(extraFeature, dtype=float))
+    return np.vstack(features)
+
+
+def lorentzianPredictions(features, labels, neighborsCount=8, maxBarsBack=2000):
+    """
+    The sum of the labels of the approximate nearest neighbours of every
+    candle. Like the reference implementation, the neighbours are looked up
+    among (at most maxBarsBack of) the first candles, every 4th candle is
+    skipped and the kept neighbours carry over from candle to candle.
+    """
+    candles = features.shape[1]
+    maxBarsBackIndex = (candles - maxBarsBack) if candles >= maxBarsBack else 0
+    size = candles - maxBarsBackIndex
+    predictions = np.zeros(candles, dtype=int)
+    labels = [int(label) for label in labels]
+    # Every 4th candle is never a neighbour
+    skipped = (np.arange(size) % 4) == 0
+    neighbourDistances = []
+    neighbourLabels = []
+    refreshAt = round(neighborsCount * 3 / 4)
+    for batchStart in range(maxBarsBackIndex, candles, DISTANCE_BATCH_SIZE):
+        batchEnd = min(batchStart + DISTANCE_BATCH_SIZE, candles)
+        # A candle only looks at the candles up to itself
+        width = min(size, batchEnd)
+        distances = np.zeros((batchEnd - batchStart, width))
+        with np.errstate(invalid="ignore"):
+            for feature in features:
+                distances += np.log(1 + np.abs(feature[batchStart:batchEnd].reshape(-1, 1) - feature[:width].reshape(1, -1)))
+        distances[:, skipped[:width]] = -np.inf
+        distances[np.arange(width)[None, :] > np.arange(batchStart, batchEnd)[:, None]] = -np.inf
+        # The largest distance from any candle on, to stop looking once none qualifies
+        remainingMax = np.fmax.accumulate(distances[:, ::-1], axis=1)[:, ::-1]
+        for row in range(batchEnd - batchStart):
+            distanceRow = distances[row]
+            rowMax = remainingMax[row]
+            lastDistance = -1.0
+            position = 0
+            while position < width and rowMax[position] >= lastDistance:
+                qualifies = distanceRow[position:position + NEIGHBOUR_SEARCH_BLOCK] >= lastDistance
+                found = int(qualifies.argmax())
+                if not qualifies[found]:
+                    position += NEIGHBOUR_SEARCH_BLOCK
+                    continue
+                position += found
+                lastDistance = float(distanceRow[position])
+                neighbourDistances.append(lastDistance)
+                neighbourLabels.append(labels[position])
+                if len(neighbourLabels) > neighborsCount:
+                    lastDistance = neighbourDistances[refreshAt]
+                    neighbourDistances.pop(0)
+                    neighbourLabels.pop(0)
+                position += 1
+            predictions[batchStart + row] = sum(neighbourLabels)
+    return predictions
+
+
+def _kaufmanSlope(source, high, low):
+    """The absolute slope of the Kaufman-style adaptive filter used by the regime filter."""
+    value1 = [0.0] * len(source)
+    value2 = [0.0] * len(source)
+    for i in range(len(source)):
+        if (high[i] - low[i]) == 0:
+            continue
+        previous = i - 1 if i >= 1 else 0
+        value1[i] = 0.2 * (source[i] - source[previous]) + 0.8 * value1[previous]
+        value2[i] = 0.1 * (high[i] - low[i]) + 0.8 * value2[previous]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        omega = np.nan_to_num(np.abs(np.divide(value1, value2)))
+    alpha = (-(omega ** 2) + np.sqrt((omega ** 4) + 16 * (omega ** 2))) / 8
+    klmf = [0.0] * len(source)
+    for i in range(len(source)):
+        klmf[i] = alpha[i] * source[i] + (1 - alpha[i]) * klmf[i - 1 if i >= 1 else 0]
+    return np.abs(np.diff(klmf, prepend=0.0))
+
+
+def regimeFilter(openPrice, high, low, close, threshold=-0.1):
+    ohlc4 = (openPrice + high + low + close) / 4
+    slope = _kaufmanSlope(ohlc4, high, low)
+    averageSlope = _ema(slope, 200)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ((slope - averageSlope) / averageSlope) >= threshold
+
+
+def volatilityFilter(high, low, close, minLength=1, maxLength=10):
+    return _atr(high, low, close, minLength) > _atr(high, low, close, maxLength)
+
+
+def lorentzianSignal(data, extraFeature=None, neighborsCount=8, maxBarsBack=2000, regimeThreshold=-0.1):
+    """
+    The new signal of the last candle of data (oldest candle first):
+    1 for a new buy signal, -1 for a new sell signal and 0 otherwise.
+    """
+    openPrice, high, low, close = [data[col].to_numpy(dtype=float) for col in ["open", "high", "low", "close"]]
+    features = lorentzianFeatures(high, low, close, extraFeature)
+    # The label is the direction of the close 4 candles later
+    with np.errstate(invalid="ignore"):
+        closeBefore = np.concatenate((np.full(min(4, len(close)), np.nan), close[:-4]))
+        labels = np.where(closeBefore < close, -1, np.where(closeBefore > close, 1, 0))
+    predictions = lorentzianPredictions(features, labels, neighborsCount=neighborsCount, maxBarsBack=maxBarsBack)
+    filtered = volatilityFilter(high, low, close) & regimeFilter(openPrice, high, low, close, regimeThreshold)
+    signal = pd.Series(np.where((predictions > 0) & filtered, 1, np.where((predictions < 0) & filtered, -1, np.nan)))
+    if np.isnan(signal.iloc[0]):
+        signal.iloc[0] = 0
+    signal = signal.ffill().to_numpy()
+    if len(signal) < 2 or signal[-1] == signal[-2]:
+        return 0
+    return int(signal[-1])
+
+
+class PKLorentzianClassifier:
+    """
+    Remembers the Lorentzian signal of the last candle per symbol.
+
+    Usage:
+        classifier = PKLorentzianClassifier.sharedClassifier()
+        signal = classifier.lastSignal("SBIN", data)  # 1: buy, -1: sell, 0: none
+
+    data is oldest candle first. The MFI(14) is the sixth feature. The
+    signal is remembered for the candles of data (the last candle's date,
+    close and volume), so a forming candle is classified again once it
+    changes. Without a symbol nothing is remembered.
+    """
+
+    _shared = None
+
+    def __init__(self, maxEntries=5000):
+        self.maxEntries = maxEntries
+        self._signals = OrderedDict()
+
+    @staticmethod
+    def sharedClassifier():
+        if PKLorentzianClassifier._shared is None:
+            PKLorentzianClassifier._shared = PKLorentzianClassifier()
+        return PKLorentzianClassifier._shared
+
+    def __len__(self):
+        return len(self._signals)
+
+    def clear(self):
+        self._signals = OrderedDict()
+
+    def lastSignal(self, symbol, data):
+        fingerprint = dataFingerprint(data)
+        key = (symbol, fingerprint) if symbol is not None and fingerprint is not None else None
+        if key is not None and key in self._signals:
+            self._signals.move_to_end(key)
+            return self._signals[key]
+        mfi = pktalib.MFI(data["high"], data["low"], data["close"], data["volume"], 14)
+        signal = lorentzianSignal(data, extraFeature=mfi)
+        if key is not None:
+            self._signals[key] = signal
+            while len(self._signals) > self.maxEntries:
+                self._signals.popitem(last=False)
+        return signal
@@ -34,6 +34,8 @@ import pkscreener.classes.Utility as Utility
 from pkscreener.classes.ConfigManager import parser, tools
 from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
 from pkscreener.classes import AssetsManager
+from pkscreener.classes.PKIntradayStore import PKIntradayStore
+from pkscreener.classes.PKSharedMemoryStore import PKSharedMemoryStore
 
 from PKDevTools.classes.ColorText import colorText
 from PKDevTools.classes import Archiver
@@ -81,6 +83,10 @@ class PKMarketOpenCloseAnalyser:
     updatedCandleData = None
     allDailyCandles = None
     allIntradayCandles = None
+    # Packed copy of allIntradayCandles, reused for every sliceWindowDatetime
+    intradayStore = None
+    intradayStoreFingerprint = None
+    sliceWindowDatetime = None
     
     def getStockDataForSimulation(sliceWindowDatetime=None,listStockCodes=[]):
         int_exists, int_cache_file, stockDictInt = PKMarketOpenCloseAnalyser.ensureIntradayStockDataExists(listStockCodes=listStockCodes)
@@ -91,12 +97,16 @@ class PKMarketOpenCloseAnalyser:
             updatedCandleData = None
         if allDailyCandles is not None and len(allDailyCandles) < 1:
             allDailyCandles = None
+        # A different time window (e.g. the --slicewindow replay) needs a fresh simulation
+        if sliceWindowDatetime != PKMarketOpenCloseAnalyser.sliceWindowDatetime:
+            updatedCandleData = None
         if  ((int_exists or len(stockDictInt) > 0) and (daily_exists or len(stockDict) > 0)) and (updatedCandleData is None or allDailyCandles is None):
             allDailyCandles = PKMarketOpenCloseAnalyser.getLatestDailyCandleData(daily_cache_file,stockDict)
             morningIntradayCandle = PKMarketOpenCloseAnalyser.getIntradayCandleFromMorning(int_cache_file,sliceWindowDatetime=sliceWindowDatetime,stockDictInt=stockDictInt)
             updatedCandleData = PKMarketOpenCloseAnalyser.combineDailyStockDataWithMorningSimulation(allDailyCandles,morningIntradayCandle)
             PKMarketOpenCloseAnalyser.updatedCandleData = updatedCandleData
             PKMarketOpenCloseAnalyser.allDailyCandles = allDailyCandles
+            PKMarketOpenCloseAnalyser.sliceWindowDatetime = sliceWindowDatetime
             AssetsManager.PKAssetsManager.saveStockData(updatedCandleData,PKMarketOpenCloseAnalyser.configManager,1,False,False, True)
         return updatedCandleData, allDailyCandles
 
@@ -247,6 +257,17 @@ class PKMarketOpenCloseAnalyser:
         #         continue
         return allDailyCandles
     
+    def getIntradayStore(allDailyIntradayCandles):
+        """
+        Packs the intraday candles into a PKIntradayStore, or returns the one
+        packed earlier if the candles did not change since.
+        """
+        fingerprint = PKSharedMemoryStore.fingerprint(allDailyIntradayCandles)
+        if PKMarketOpenCloseAnalyser.intradayStore is None or fingerprint is None or fingerprint != PKMarketOpenCloseAnalyser.intradayStoreFingerprint:
+            PKMarketOpenCloseAnalyser.intradayStore = PKIntradayStore.fromStockDict(allDailyIntradayCandles)
+            PKMarketOpenCloseAnalyser.intradayStoreFingerprint = fingerprint
+        return PKMarketOpenCloseAnalyser.intradayStore
+
     @Halo(text='  [+] Simulating morning alert...', spinner='dots')
     def getIntradayCandleFromMorning(int_cache_file=None,candle1MinuteNumberSinceMarketStarted=0,sliceWindowDatetime=None,stockDictInt=None):
         if candle1MinuteNumberSinceMarketStarted <= 0:
@@ -263,6 +284,9 @@ class PKMarketOpenCloseAnalyser:
         numOfCandles = PKMarketOpenCloseAnalyser.configManager.morninganalysiscandlenumber
         duration = PKMarketOpenCloseAnalyser.configManager.morninganalysiscandleduration
         numOfCandles = numOfCandles * int(duration.replace("m",""))
+        intradayStore = PKMarketOpenCloseAnalyser.getIntradayStore(allDailyIntradayCandles)
+        if sliceWindowDatetime is None:
+            morningAlertTime = pd.Timestamp(f'{PKDateUtilities.tradingDate().strftime("%Y-%m-%d")} {MarketHours().openHour:02}:{MarketHours().openMinute:02}:00') + pd.Timedelta(minutes=candle1MinuteNumberSinceMarketStarted)
         for stock in stocks:
             try:
                 # Let's get the saved data from the DB. Then we need to only
@@ -271,18 +295,27 @@ class PKMarketOpenCloseAnalyser:
                 # We'd then combine the data from 9:15 to 9:57 as a single candle of 
                 # OHLCV and replace the last daily candle with this one candle to
                 # simulate the scan outcome from morning.
-                df = pd.DataFrame(data=allDailyIntradayCandles[stock]["data"],
-                                columns=allDailyIntradayCandles[stock]["columns"],
-                                index=allDailyIntradayCandles[stock]["index"])
-                if sliceWindowDatetime is None:
-                    df = df.head(numOfCandles)
-                try:
-                    alertCandleTimestamp = sliceWindowDatetime if sliceWindowDatetime is not None else f'{PKDateUtilities.tradingDate().strftime(f"%Y-%m-%d")} {MarketHours().openHour:02}:{MarketHours().openMinute+candle1MinuteNumberSinceMarketStarted}:00+05:30'
-                    df = df[df.index <=  pd.to_datetime(alertCandleTimestamp).to_datetime64()]
-                except: # pragma: no cover
-                    alertCandleTimestamp = sliceWindowDatetime if sliceWindowDatetime is not None else f'{PKDateUtilities.tradingDate().strftime(f"%Y-%m-%d")} {MarketHours().openHour:02}:{MarketHours().openMinute+candle1MinuteNumberSinceMarketStarted}:00+05:30'
-                    df = df[df.index <=  pd.to_datetime(alertCandleTimestamp, utc=True)]
-                    pass
+                if stock in intradayStore:
+                    # Binary searches over the sorted timestamps of the stock
+                    # instead of filtering a DataFrame of all of its candles
+                    if sliceWindowDatetime is None:
+                        start, end = intradayStore.windowUpTo(stock, morningAlertTime, maxCandles=numOfCandles)
+                    else:
+                        start, end = intradayStore.sessionWindow(stock, sliceWindowDatetime)
+                    df = intradayStore.toDataFrame(stock, start, end)
+                else:
+                    df = pd.DataFrame(data=allDailyIntradayCandles[stock]["data"],
+                                    columns=allDailyIntradayCandles[stock]["columns"],
+                                    index=allDailyIntradayCandles[stock]["index"])
+                    if sliceWindowDatetime is None:
+                        df = df.head(numOfCandles)
+                    try:
+                        alertCandleTimestamp = sliceWindowDatetime if sliceWindowDatetime is not None else f'{PKDateUtilities.tradingDate().strftime(f"%Y-%m-%d")} {MarketHours().openHour:02}:{MarketHours().openMinute+candle1MinuteNumberSinceMarketStarted}:00+05:30'
+                        df = df[df.index <=  pd.to_datetime(alertCandleTimestamp).to_datetime64()]
+                    except: # pragma: no cover
+                        alertCandleTimestamp = sliceWindowDatetime if sliceWindowDatetime is not None else f'{PKDateUtilities.tradingDate().strftime(f"%Y-%m-%d")} {MarketHours().openHour:02}:{MarketHours().openMinute+candle1MinuteNumberSinceMarketStarted}:00+05:30'
+                        df = df[df.index <=  pd.to_datetime(alertCandleTimestamp, utc=True)]
+                        pass
                 with pd.option_context('mode.chained_assignment', None):
                     df.dropna(axis=0, how="all", inplace=True)
                 if df is not None and len(df) > 0:
@@ -0,0 +1,311 @@
+"""
+PKPanelIndicators - Indicators of preprocessData for the whole universe at once
+
+This module handles:
+- Aligning the candles of all symbols into 2D (symbols x candles) float64
+  panels. Every symbol starts at column 0 (in the row order the screens see
+  it), shorter histories are padded with NaN at the end
+- Computing the indicators of ScreeningStatistics.preprocessData (SMA/EMA
+  9/20/50/200, 20-period volatility, VolMA, RSI, CCI, STOCHRSI) on those
+  panels with vectorized NumPy, matching the TA-Lib/pandas results
+- Building the preprocessed frames of a symbol from its slice of the panel
+- Packing the indicators of a published stock data snapshot (see
+  PKSharedMemoryStore) so that the parent computes them once per snapshot
+  and the scan workers only slice them
+
+Recursive indicators (EMA, RSI) walk the candles once for all symbols
+together, so the cost is a few NumPy operations per candle instead of a
+TA-Lib call per symbol and indicator.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pkscreener.classes.StockDataPacker import PackedStockData
+
+# In the order preprocessData inserts them
+INDICATOR_COLUMNS = ["SMA", "LMA", "SSMA", "SSMA20", "Volatility", "VolMA", "RSI", "CCI", "FASTK", "FASTD"]
+PANEL_INPUT_COLUMNS = ["high", "low", "close", "volume"]
+# Published per candle: close (to verify the worker has the same candles) and the indicators
+PUBLISHED_COLUMNS = ["close"] + INDICATOR_COLUMNS
+# Symbols per block for the windowed (sliding window) computations
+WINDOW_BLOCK_SYMBOLS = 256
+
+
+def rollingSum(panel, timeperiod):
+    """Sums over the last timeperiod candles. NaN wherever the window holds a NaN."""
+    total = np.full_like(panel, np.nan)
+    if timeperiod > panel.shape[1]:
+        return total
+    missing = np.isnan(panel)
+    cumulative = np.cumsum(np.where(missing, 0.0, panel), axis=1)
+    total[:, timeperiod - 1:] = cumulative[:, timeperiod - 1:]
+    total[:, timeperiod:] -= cumulative[:, :panel.shape[1] - timeperiod]
+    if missing.any():
+        missingCount = np.cumsum(missing, axis=1)
+        missingCount[:, timeperiod:] -= missingCount[:, :panel.shape[1] - timeperiod].copy()
+        total[missingCount > 0] = np.nan
+    return total
+
+
+def sma(panel, timeperiod):
+    return rollingSum(panel, timeperiod) / timeperiod
+
+
+def ema(panel, timeperiod):
+    """TA-Lib EMA: seeded with the SMA of the first timeperiod candles."""
+    out = np.full_like(panel, np.nan)
+    if timeperiod > panel.shape[1]:
+        return out
+    k = 2.0 / (timeperiod + 1)
+    current = panel[:, :timeperiod].mean(axis=1)
+    out[:, timeperiod - 1] = current
+    for t in range(timeperiod, panel.shape[1]):
+        current = current + k * (panel[:, t] - current)
+        out[:, t] = current
+    return out
+
+
+def rsi(panel, timeperiod=14):
+    """TA-Lib (Wilder) RSI."""
+    out = np.full_like(panel, np.nan)
+    if timeperiod >= panel.shape[1]:
+        return out
+    change = np.diff(panel, axis=1)
+    gains = np.where(change > 0, change, 0.0)
+    losses = np.where(change < 0, -change, 0.0)
+    avgGain = gains[:, :timeperiod].sum(axis=1) / timeperiod
+    avgLoss = losses[:, :timeperiod].sum(axis=1) / timeperiod
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = avgGain + avgLoss
+        out[:, timeperiod] = np.where(total != 0, 100 * avgGain / total, 0.0)
+        for t in range(timeperiod + 1, panel.shape[1]):
+            avgGain = (avgGain * (timeperiod - 1) + gains[:, t - 1]) / timeperiod
+            avgLoss = (avgLoss * (timeperiod - 1) + losses[:, t - 1]) / timeperiod
+            total = avgGain + avgLoss
+            out[:, t] = np.where(total != 0, 100 * avgGain / total, 0.0)
+    # Padding (NaN candles) must stay NaN
+    out[np.isnan(panel)] = np.nan
+    return out
+
+
+def cci(high, low, close, timeperiod=14):
+    """TA-Lib CCI (mean deviation around the current average)."""
+    typical = (high + low + close) / 3
+    average = sma(typical, timeperiod)
+    width = typical.shape[1]
+    deviation = np.zeros_like(typical)
+    for k in range(min(timeperiod, width)):
+        deviation[:, k:] += np.abs(typical[:, :width - k] - average[:, k:])
+    deviation /= timeperiod
+    distance = typical - average
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.where((distance != 0) & (deviation != 0), distance / (0.015 * deviation), 0.0)
+    out[np.isnan(average)] = np.nan
+    return out
+
+
+def _rollingExtreme(panel, timeperiod, extreme):
+    """Rolling min/max (extreme: np.minimum/np.maximum), NaN until the window is full."""
+    width = panel.shape[1]
+    out = panel.copy()
+    out[:, :min(timeperiod - 1, width)] = np.nan
+    for k in range(1, min(timeperiod, width)):
+        extreme(out[:, k:], panel[:, :width - k], out=out[:, k:])
+    return out
+
+
+def stochRsi(close, timeperiod=14, fastk_period=5, fastd_period=3, rsiValues=None):
+    """
+    TA-Lib STOCHRSI (fastd as SMA): both outputs start at the same candle.
+    rsiValues: the RSI(timeperiod) of close, if already computed.
+    """
+    values = rsi(close, timeperiod) if rsiValues is None else rsiValues
+    lowest = _rollingExtreme(values, fastk_period, np.minimum)
+    highest = _rollingExtreme(values, fastk_period, np.maximum)
+    spread = highest - lowest
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fastk = np.where(spread != 0, 100 * (values - lowest) / spread, 0.0)
+    fastk[np.isnan(spread)] = np.nan
+    fastd = sma(fastk, fastd_period)
+    fastk[np.isnan(fastd)] = np.nan
+    return fastk, fastd
+
+
+def rollingStd(panel, timeperiod=20):
+    """pandas rolling(timeperiod).std() (ddof=1), in blocks of symbols."""
+    out = np.full_like(panel, np.nan)
+    if timeperiod > panel.shape[1]:
+        return out
+    for start in range(0, panel.shape[0], WINDOW_BLOCK_SYMBOLS):
+        windows = np.lib.stride_tricks.sliding_window_view(panel[start:start + WINDOW_BLOCK_SYMBOLS], timeperiod, axis=1)
+        out[start:start + WINDOW_BLOCK_SYMBOLS, timeperiod - 1:] = windows.std(axis=-1, ddof=1)
+    return out
+
+
+class PKIndicatorPanel:
+    """
+    The preprocessData indicators of many symbols, computed together.
+
+    Usage:
+        panel = PKIndicatorPanel.fromFrames({"SBIN": data, ...})
+        panel.compute(useEMA=False)
+        fullData, processedData = panel.preprocessedFrames("SBIN", data, daysToLookback=22)
+
+    Rows are used in the order of the given frames (the order preprocessData
+    sees them in). Symbols with missing or infinite values are left out,
+    preprocessData handles those one at a time.
+    """
+
+    def __init__(self, symbols, lengths, inputs):
+        self.symbols = list(symbols)
+        self.positions = {symbol: pos for pos, symbol in enumerate(self.symbols)}
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.inputs = inputs
+        self.indicators = None
+        self.useEMA = None
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.positions
+
+    @staticmethod
+    def fromArrays(arraysBySymbol):
+        """arraysBySymbol: symbol -> {"high": 1D array, "low": ..., "close": ..., "volume": ...}"""
+        usable = {}
+        for symbol, arrays in arraysBySymbol.items():
+            try:
+                columns = [np.asarray(arrays[col], dtype=np.float64) for col in PANEL_INPUT_COLUMNS]
+            except (KeyError, TypeError, ValueError):
+                continue
+            if len(columns[0]) == 0 or not all(np.isfinite(column).all() for column in columns):
+                continue
+            usable[symbol] = columns
+        symbols = list(usable.keys())
+        lengths = [len(usable[symbol][0]) for symbol in symbols]
+        width = max(lengths) if lengths else 0
+        inputs = {}
+        for pos, col in enumerate(PANEL_INPUT_COLUMNS):
+            panel = np.full((len(symbols), width), np.nan)
+            for row, symbol in enumerate(symbols):
+                panel[row, :lengths[row]] = usable[symbol][pos]
+            inputs[col] = panel
+        return PKIndicatorPanel(symbols, lengths, inputs)
+
+    @staticmethod
+    def fromFrames(framesBySymbol):
+        arrays = {}
+        for symbol, frame in framesBySymbol.items():
+            if frame is None or not all(col in frame.columns for col in PANEL_INPUT_COLUMNS):
+                continue
+            arrays[symbol] = {col: frame[col].to_numpy() for col in PANEL_INPUT_COLUMNS}
+        return PKIndicatorPanel.fromArrays(arrays)
+
+    def compute(self, useEMA=False):
+        close = self.inputs["close"]
+        movingAverage = ema if useEMA else sma
+        rsiValues = rsi(close, 14)
+        fastk, fastd = stochRsi(close, timeperiod=14, fastk_period=5, fastd_period=3, rsiValues=rsiValues)
+        self.indicators = {
+            "SMA": movingAverage(close, 50),
+            "LMA": movingAverage(close, 200),
+            "SSMA": movingAverage(close, 9),
+            "SSMA20": movingAverage(close, 20),
+            "Volatility": rollingStd(close, 20),
+            "VolMA": sma(self.inputs["volume"], 20),
+            "RSI": rsiValues,
+            "CCI": cci(self.inputs["high"], self.inputs["low"], close, 14),
+            "FASTK": fastk,
+            "FASTD": fastd,
+        }
+        self.useEMA = useEMA
+        return self
+
+    def indicatorValues(self, symbol):
+        """(candles, len(INDICATOR_COLUMNS)) array of the symbol's indicators."""
+        row = self.positions[symbol]
+        length = int(self.lengths[row])
+        return np.column_stack([self.indicators[col][row, :length] for col in INDICATOR_COLUMNS])
+
+    def matches(self, symbol, data):
+        """True if data holds the very candles the symbol's row was computed from."""
+        if self.indicators is None or symbol not in self.positions or data is None:
+            return False
+        row = self.positions[symbol]
+        if len(data) != int(self.lengths[row]) or "close" not in data.columns:
+            return False
+        return np.array_equal(data["close"].to_numpy(dtype=np.float64), self.inputs["close"][row, :len(data)])
+
+    def preprocessedFrames(self, symbol, data, daysToLookback):
+        """What preprocessData(data, daysToLookback) returns, from the panel."""
+        return preprocessedFrames(data, self.indicatorValues(symbol), daysToLookback)
+
+
+def preprocessedFrames(data, indicatorValues, daysToLookback):
+    """
+    Builds (fullData, trimmedData) like preprocessData does: data with the
+    indicator columns appended, reversed, and its first daysToLookback rows.
+    """
+    columns = {col: data[col].to_numpy() for col in data.columns}
+    columns.update({col: indicatorValues[:, pos] for pos, col in enumerate(INDICATOR_COLUMNS)})
+    # One block per column instead of an insert (and consolidation) per indicator
+    fullData = pd.DataFrame(columns, index=data.index)[::-1]
+    return fullData, fullData.head(daysToLookback)
+
+
+def indicatorStorePrefix(dataStorePrefix, useEMA):
+    """Name of the shared memory store holding the indicators of the data store dataStorePrefix."""
+    return f"{dataStorePrefix}_ind{'e' if useEMA else 's'}"
+
+
+def packIndicators(packed, useEMA=False):
+    """
+    Computes the indicators of every symbol of a PackedStockData and returns
+    them as a PackedStockData (PUBLISHED_COLUMNS) with the same index. The
+    indicators are computed over the latest-first rows, which is what
+    preprocessData gets from getRelevantDataForStock.
+    """
+    arrays = {}
+    for symbol in packed.symbols:
+        values, columns, _ = packed.symbolValues(symbol)
+        if not all(col in columns for col in PANEL_INPUT_COLUMNS):
+            continue
+        arrays[symbol] = {col: values[::-1, columns.index(col)] for col in PANEL_INPUT_COLUMNS}
+    panel = PKIndicatorPanel.fromArrays(arrays).compute(useEMA=useEMA)
+    blocks = []
+    indexBlocks = []
+    offsets = [0]
+    for symbol in panel.symbols:
+        row = panel.positions[symbol]
+        length = int(panel.lengths[row])
+        block = np.column_stack([panel.inputs["close"][row, :length], panel.indicatorValues(symbol)])
+        # Back to the ascending order of the packed index
+        blocks.append(block[::-1])
+        indexBlocks.append(packed.symbolValues(symbol)[2])
+        offsets.append(offsets[-1] + length)
+    return PackedStockData(
+        values=np.ascontiguousarray(np.vstack(blocks)) if blocks else np.empty((0, len(PUBLISHED_COLUMNS))),
+        index=np.concatenate(indexBlocks).astype(np.int64) if indexBlocks else np.empty(0, dtype=np.int64),
+        symbols=panel.symbols,
+        offsets=np.asarray(offsets, dtype=np.int64),
+        columns=PUBLISHED_COLUMNS,
+        symbolColumns={symbol: tuple(range(len(PUBLISHED_COLUMNS))) for symbol in panel.symbols},
+        timezones={symbol: packed.timezones[symbol] for symbol in panel.symbols if symbol in packed.timezones},
+        exchangeTimezone=packed.exchangeTimezone,
+    )
+
+
+def publishedIndicatorValues(indicators, data):
+    """
+    The indicator values (INDICATOR_COLUMNS) of a published indicator frame
+    if it belongs to exactly the candles of data, otherwise None.
+    """
+    if indicators is None or data is None or len(indicators) != len(data) or "close" not in data.columns:
+        return None
+    if not indicators.index.equals(data.index):
+        return None
+    if not np.array_equal(indicators["close"].to_numpy(), data["close"].to_numpy(dtype=np.float64)):
+        return None
+    return indicators[INDICATOR_COLUMNS].to_numpy()
@@ -0,0 +1,139 @@
+"""
+PKScanBatch - Batched scan tasks for the PKScanRunner queues
+
+This module handles:
+- Grouping the per-stock scan items of PKScanRunner.addStocksToItemList
+  (the screenStocks arguments) into batches: the scan-wide context (every
+  argument but the stock) pickled once in the parent, and chunks of stocks
+- Sizing the chunks by the universe size and the number of workers
+- Rebuilding the per-stock screenStocks arguments in the workers, which
+  unpickle every context once (see contextFor)
+- Counting the queue traffic of a scan (messages, and the seconds spent
+  putting them on the tasks queue, which pickles them and takes its lock)
+
+PKMultiProcessorClient hands every task to whichever worker is free, so
+the (already pickled) context travels once per chunk rather than once per
+stock, and each chunk is answered with one results_queue message.
+"""
+
+import hashlib
+import math
+import pickle
+from collections import OrderedDict
+
+# Position of the stock in a scan item (see PKScanRunner.addStocksToItemList)
+ITEM_STOCK_POSITION = 13
+ITEM_FIELDS = 24
+# Chunks per worker (so that faster workers pick up more) and stocks per chunk
+CHUNKS_PER_WORKER = 4
+MAX_CHUNK_SIZE = 64
+# Unpickled contexts kept per worker process
+MAX_CACHED_CONTEXTS = 8
+
+_contexts = OrderedDict()
+
+
+def chunkSizeFor(numItems, numWorkers):
+    """Stocks per batch: about CHUNKS_PER_WORKER batches per worker, at most MAX_CHUNK_SIZE stocks."""
+    if numItems <= 0:
+        return 1
+    return max(1, min(MAX_CHUNK_SIZE, math.ceil(numItems / (max(1, numWorkers) * CHUNKS_PER_WORKER))))
+
+
+def _contextKey(item):
+    # Simple values by value, everything else (userArgs, test data) by identity
+    return tuple(
+        value if isinstance(value, (str, int, float, bool, type(None))) else ("id", id(value))
+        for pos, value in enumerate(item) if pos != ITEM_STOCK_POSITION
+    )
+
+
+def contextFor(contextId, contextBytes):
+    """The unpickled context of contextId, unpickled once per process."""
+    context = _contexts.get(contextId)
+    if context is None:
+        context = pickle.loads(contextBytes)
+        _contexts[contextId] = context
+        while len(_contexts) > MAX_CACHED_CONTEXTS:
+            _contexts.popitem(last=False)
+    else:
+        _contexts.move_to_end(contextId)
+    return context
+
+
+class PKScanBatch:
+    """
+    A chunk of stocks sharing one scan context.
+
+    Usage:
+        tasks = PKScanBatch.batchItems(items, chunkSize=32)
+        # in the worker
+        for item in batch.items():
+            screenStocks(*item, hostRef=hostRef)
+    """
+
+    def __init__(self, contextId, contextBytes, stocks):
+        self.contextId = contextId
+        self.contextBytes = contextBytes
+        self.stocks = list(stocks)
+
+    def __len__(self):
+        return len(self.stocks)
+
+    def items(self):
+        """The per-stock scan items (screenStocks arguments) of the batch."""
+        context = contextFor(self.contextId, self.contextBytes)
+        return [context[:ITEM_STOCK_POSITION] + (stock,) + context[ITEM_STOCK_POSITION:] for stock in self.stocks]
+
+    @staticmethod
+    def batchItems(items, chunkSize):
+        """
+        Tasks for the tasks queue: a (PKScanBatch,) per chunk of consecutive
+        scan items sharing a context. Anything that isn't a scan item is
+        passed on as-is.
+        """
+        tasks = []
+        contexts = {}
+        pending = None
+        for item in items:
+            if not isinstance(item, tuple) or len(item) != ITEM_FIELDS:
+                if pending is not None:
+                    tasks.append((pending,))
+                    pending = None
+                tasks.append(item)
+                continue
+            key = _contextKey(item)
+            if key not in contexts:
+                context = item[:ITEM_STOCK_POSITION] + item[ITEM_STOCK_POSITION + 1:]
+                contextBytes = pickle.dumps(context, protocol=pickle.HIGHEST_PROTOCOL)
+                contexts[key] = (hashlib.sha1(contextBytes).hexdigest(), contextBytes)
+            contextId, contextBytes = contexts[key]
+            if pending is None or pending.contextId != contextId or len(pending) >= chunkSize:
+                if pending is not None:
+                    tasks.append((pending,))
+                pending = PKScanBatch(contextId, contextBytes, [])
+            pending.stocks.append(item[ITEM_STOCK_POSITION])
+        if pending is not None:
+            tasks.append((pending,))
+        return tasks
+
+
+class PKQueueStats:
+    """Queue traffic of a scan: task messages put (and the seconds it took), result messages and stocks screened."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.taskMessages = 0
+        self.putSeconds = 0.0
+        self.resultMessages = 0
+        self.stocks = 0
+
+    def stats(self):
+        return {
+            "taskMessages": self.taskMessages,
+            "putSeconds": round(self.putSeconds, 4),
+            "resultMessages": self.resultMessages,
+            "stocks": self.stocks,
+        }
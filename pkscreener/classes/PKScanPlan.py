@@ -0,0 +1,216 @@
+"""
+PKScanPlan - The indicators and validators a scan option needs
+
+This module handles:
+- A declarative map of the preprocessData indicator columns that each
+  ScreeningStatistics validator reads
+- The validators each level2_X_MenuDict execute option (and its
+  sub-options) runs, next to the ones screenStocks runs for every option
+  (LTP/volume checks, trend, 52 week high/low and the result columns)
+- Compiling a run option into a per-stock plan: the indicator columns
+  preprocessData has to compute, and a report of the ones it skips
+
+Options that aren't mapped (or can't be parsed) get every indicator
+column, so an incomplete map never costs a result, only the saving.
+"""
+
+from pkscreener.classes.PKPanelIndicators import INDICATOR_COLUMNS
+
+# Indicator columns (of preprocessData) each validator reads. Validators
+# not listed here only read the candles.
+VALIDATOR_COLUMNS = {
+    "validateVolume": ["VolMA"],
+    "validateMovingAverages": ["SMA", "LMA"],
+    "validateRSI": ["RSI"],
+    "validateCCI": ["CCI"],
+    "validateConfluence": ["SMA", "LMA", "SSMA20"],
+    "validateShortTermBullish": ["SMA", "LMA", "SSMA", "RSI", "FASTK", "FASTD"],
+    "validateVolumeSpreadAnalysis": ["VolMA"],
+    "validateVCPMarkMinervini": ["VolMA"],
+    "validateHigherHighsHigherLowsHigherClose": ["RSI"],
+    "validateLowerHighsLowerLows": ["RSI"],
+    "validatePriceActionCrosses": ["SMA"],
+    "findATRCross": ["RSI"],
+    "findHighMomentum": ["RSI"],
+    "findPSARReversalWithRSI": ["RSI"],
+    "findRisingRSI": ["RSI"],
+    "findRSICrossingMA": ["RSI"],
+    "findPotentialProfitableEntriesFrequentHighsBullishMAs": ["SMA", "LMA"],
+    "findPotentialProfitableEntriesForFnOTradesAbove50MAAbove200MA5Min": ["SMA"],
+    # get_dynamic_order, when no order is given
+    "find_cup_and_handle": ["Volatility"],
+}
+
+# Run by screenStocks for every option (the result columns), in this order
+COMMON_VALIDATORS = [
+    "validateLTP",
+    "validateVolume",
+    "findPattern",
+    "findTrend",
+    "validateMovingAverages",
+    "validateMomentum",
+    "validateRSI",
+    "find52WeekHighLow",
+]
+# Also run for every option, except on the monitoring dashboard
+NON_DASHBOARD_VALIDATORS = [
+    "validateLorentzian",
+    "findBreakoutValue",
+    "validateConsolidation",
+    "validateCCI",
+    "findUptrend",
+]
+
+# executeOption -> validators, or executeOption -> {sub-option -> validators}
+# for the options whose sub-option (reversalOption/respChartPattern) picks
+# the validator.
+OPTION_VALIDATORS = {
+    0: [],
+    1: ["findBreakoutValue", "findPotentialBreakout"],
+    2: ["findBreakoutValue"],
+    3: ["validateConsolidation"],
+    4: ["validateLowestVolume"],
+    5: ["validateRSI"],
+    6: {
+        1: [],
+        2: [],
+        3: ["validateMomentum"],
+        4: ["findReversalMA"],
+        5: ["validateVolumeSpreadAnalysis"],
+        6: ["validateNarrowRange"],
+        7: ["validateLorentzian"],
+        8: ["findPSARReversalWithRSI"],
+        9: ["findRisingRSI"],
+        10: ["findRSICrossingMA"],
+    },
+    7: {
+        1: ["validateInsideBar"],
+        2: ["validateInsideBar"],
+        3: ["validateConfluence"],
+        4: ["validateVCP", "findRSRating", "findRVM"],
+        5: ["findTrendlines"],
+        6: ["findBbandsSqueeze"],
+        7: ["find_cup_and_handle"],
+        8: ["validateVCPMarkMinervini", "findRSRating", "findRVM"],
+        9: ["validateMovingAverages"],
+    },
+    8: ["validateCCI"],
+    9: ["validateVolume"],
+    10: ["validatePriceRisingByAtLeast2Percent"],
+    11: ["validateShortTermBullish"],
+    12: ["validate15MinutePriceVolumeBreakout"],
+    13: ["findBullishIntradayRSIMACD"],
+    14: ["findNR4Day"],
+    15: ["find52WeekLowBreakout"],
+    16: ["find10DaysLowBreakout"],
+    17: ["find52WeekHighBreakout"],
+    18: ["findAroonBullishCrossover"],
+    19: ["validateMACDHistogramBelow0"],
+    20: ["validateBullishForTomorrow"],
+    21: ["findUptrend"],
+    23: ["findBreakingoutNow"],
+    24: ["validateHigherHighsHigherLowsHigherClose"],
+    25: ["validateLowerHighsLowerLows"],
+    26: [],
+    27: ["findATRCross"],
+    28: ["findHigherBullishOpens"],
+    29: [],
+    30: ["findATRTrailingStops"],
+    31: ["findHighMomentum"],
+    32: ["findIntradayOpenSetup"],
+    33: [
+        "findPotentialProfitableEntriesFrequentHighsBullishMAs",
+        "findPotentialProfitableEntriesBullishTodayForPDOPDC",
+        "findPotentialProfitableEntriesForFnOTradesAbove50MAAbove200MA5Min",
+    ],
+    34: ["findBullishAVWAP"],
+    35: ["findPerfectShortSellsFutures"],
+    36: ["findProbableShortSellsFutures"],
+    37: ["findShortSellCandidatesForVolumeSMA"],
+    38: ["findIntradayShortSellWithPSARVolumeSMA"],
+    39: ["findIPOLifetimeFirstDayBullishBreak"],
+    40: ["validatePriceActionCrosses"],
+    41: ["validatePriceActionCrossesForPivotPoint"],
+    42: ["findSuperGainersLosers"],
+    43: ["findSuperGainersLosers"],
+    44: ["findStrongBuySignals"],
+    45: ["findStrongSellSignals"],
+    46: ["findAllBuySignals"],
+    47: ["findAllSellSignals"],
+}
+
+
+class PKScanPlan:
+    """
+    What screenStocks needs for one scan option.
+
+    Usage:
+        plan = PKScanPlan.compile(executeOption=9)
+        fullData, processedData = screener.preprocessData(data, columns=plan.columns)
+        plan.report()
+
+    columns is None when every indicator column is needed (or the option
+    isn't mapped), otherwise the needed ones in the order of
+    INDICATOR_COLUMNS.
+    """
+
+    def __init__(self, option, validators, columns):
+        self.option = option
+        self.validators = validators
+        self.columns = columns
+
+    @property
+    def skippedColumns(self):
+        if self.columns is None:
+            return []
+        return [col for col in INDICATOR_COLUMNS if col not in self.columns]
+
+    @staticmethod
+    def optionValidators(executeOption, subOption=None):
+        """The validators specific to the option, or None if the option isn't mapped."""
+        validators = OPTION_VALIDATORS.get(executeOption)
+        if isinstance(validators, dict):
+            validators = validators.get(subOption)
+        return None if validators is None else list(validators)
+
+    @staticmethod
+    def compile(executeOption, subOption=None, monitoringDashboard=False):
+        """
+        Plan of the option executeOption. subOption is the reversalOption
+        (option 6) or respChartPattern (option 7).
+        """
+        option = str(executeOption) if subOption is None else f"{executeOption}:{subOption}"
+        try:
+            executeOption = int(executeOption)
+            subOption = None if subOption is None else int(subOption)
+        except (TypeError, ValueError):
+            return PKScanPlan(option, None, None)
+        validators = PKScanPlan.optionValidators(executeOption, subOption)
+        if validators is None:
+            return PKScanPlan(option, None, None)
+        common = COMMON_VALIDATORS + ([] if monitoringDashboard else NON_DASHBOARD_VALIDATORS)
+        validators = list(dict.fromkeys(validators + common))
+        needed = set()
+        for validator in validators:
+            needed.update(VALIDATOR_COLUMNS.get(validator, []))
+        columns = [col for col in INDICATOR_COLUMNS if col in needed]
+        return PKScanPlan(option, validators, None if len(columns) == len(INDICATOR_COLUMNS) else columns)
+
+    @staticmethod
+    def compileRunOption(runOption, monitoringDashboard=False):
+        """Plan of a run option like "X:12:9:2.5" or "X:12:6:3:>|X:12:7:4"."""
+        parts = str(runOption).split("=>")[0].split("|")[0].strip().split(":")
+        if len(parts) < 3:
+            return PKScanPlan(str(runOption), None, None)
+        executeOption = parts[2]
+        subOption = parts[3] if len(parts) > 3 and str(executeOption) in ["6", "7"] else None
+        return PKScanPlan.compile(executeOption, subOption, monitoringDashboard=monitoringDashboard)
+
+    def report(self):
+        """What the plan computes and skips, for the logs."""
+        if self.columns is None:
+            reason = "computes every indicator" if self.validators is not None else "isn't mapped, computes every indicator"
+            return f"Scan plan {self.option}: {reason}"
+        return (f"Scan plan {self.option}: computes {', '.join(self.columns)}; "
+                f"skips {', '.join(self.skippedColumns)} "
+                f"(validators: {', '.join(self.validators)})")
@@ -22,6 +22,7 @@
     SOFTWARE.
 
 """
+import atexit
 import os
 import sys
 import time
@@ -41,6 +42,12 @@ from PKDevTools.classes.SuppressOutput import SuppressOutput
 from PKDevTools.classes.FunctionTimeouts import exit_after
 
 from pkscreener.classes.StockScreener import StockScreener
+from pkscreener.classes.PKSharedMemoryStore import PKSharedMemoryStore
+from pkscreener.classes.PKBarAggregator import resampleRule
+from pkscreener.classes.PKScanBatch import PKQueueStats, PKScanBatch, chunkSizeFor
+from pkscreener.classes.PKUniversePrefilter import ineligibleMask, lastRowSnapshot
+from pkscreener.classes.StockDataPacker import PackedStockData, exchangeTimezone, packStockDict
+from pkscreener.classes.PKPanelIndicators import indicatorStorePrefix, packIndicators
 from pkscreener.classes.CandlePatterns import CandlePatterns
 from pkscreener.classes.ConfigManager import parser, tools
 from PKDevTools.classes.OutputControls import OutputControls
@@ -60,6 +67,13 @@ class PKScanRunner:
     results_queue = None
     scr = None
     consumers = None
+    sharedStorePrimary = None
+    sharedStoreSecondary = None
+    # preprocessData indicators of the primary store, computed once per generation
+    sharedStoreIndicators = None
+    indicatorStoreGeneration = 0
+    # Task/result queue traffic of the current scan
+    queueStats = PKQueueStats()
 
     def initDataframes():
         screenResults = pd.DataFrame(
@@ -114,8 +128,11 @@ class PKScanRunner:
 
     def populateQueues(items, tasks_queue, exit=False,userPassedArgs=None):
         # default_logger().debug(f"Unfinished items in task_queue: {tasks_queue.qsize()}")
+        start = time.perf_counter()
         for item in items:
             tasks_queue.put(item)
+        PKScanRunner.queueStats.putSeconds += time.perf_counter() - start
+        PKScanRunner.queueStats.taskMessages += len(items)
         mayBePiped = userPassedArgs is not None and (userPassedArgs.monitor is not None or "|" in userPassedArgs.options)
         if exit and not mayBePiped:
             # Append exit signal for each process indicated by None
@@ -168,7 +185,9 @@ class PKScanRunner:
                                                      runOption=scanOption)
         return items
     
-    def addStocksToItemList(userArgs, testing, testBuild, newlyListedOnly, downloadOnly, minRSI, maxRSI, insideBarToLookback, respChartPattern, daysForLowestVolume, backtestPeriod, reversalOption, maLength, listStockCodes, menuOption, exchangeName,executeOption, volumeRatio, items, daysInPast,runOption=""):
+    def addStocksToItemList(userArgs, testing, testBuild, newlyListedOnly, downloadOnly, minRSI, maxRSI, insideBarToLookback, respChartPattern, daysForLowestVolume, backtestPeriod, reversalOption, maLength, listStockCodes, menuOption, exchangeName,executeOption, volumeRatio, items, daysInPast,runOption="",stockDict=None):
+        if stockDict is not None and not testing and not downloadOnly and menuOption in ["X"] and daysInPast == 0:
+            listStockCodes = PKScanRunner.prefilterStockCodes(listStockCodes, stockDict, exchangeName, executeOption, volumeRatio)
         moreItems = [
                         (
                             runOption,
@@ -208,6 +227,49 @@ class PKScanRunner:
         items.extend(moreItems)
         return items
 
+    def prefilterStockCodes(listStockCodes, stockDict, exchangeName, executeOption, volumeRatio):
+        """
+        Drops the symbols that the basic LTP/%change/volume/stage two checks of
+        screenStocks would certainly reject, using a snapshot of the last
+        rows of the whole universe (PKUniversePrefilter). Symbols without
+        loaded data are kept: the workers decide for those.
+        """
+        configManager = PKScanRunner.configManager
+        if not configManager.cacheEnabled or resampleRule(configManager.candleDurationInt, configManager.candleDurationFrequency) is not None:
+            # Workers fetch or resample the candles themselves
+            return listStockCodes
+        try:
+            if isinstance(stockDict, PKSharedMemoryStore):
+                packed = stockDict.packedData()
+            elif isinstance(stockDict, PackedStockData):
+                packed = stockDict
+            else:
+                symbols = [symbol for symbol in listStockCodes if symbol in stockDict]
+                packed = packStockDict(stockDict, symbols=symbols, timezone=exchangeTimezone(exchangeName))
+            if packed is None or len(packed.symbols) == 0:
+                return listStockCodes
+            snapshot = lastRowSnapshot(packed)
+            rejected = ineligibleMask(
+                snapshot,
+                executeOption,
+                minLTP=configManager.minLTP if exchangeName == "INDIA" else configManager.minLTP/80,
+                maxLTP=configManager.maxLTP,
+                minChange=configManager.minimumChangePercentage,
+                minVolume=configManager.minVolume / (100 if configManager.isIntradayConfig() else 1),
+                volumeRatio=volumeRatio if volumeRatio > 0 else configManager.volumeRatio,
+                stageTwo=configManager.stageTwo,
+                # screenStocks trims fullData to the intraday candles (RSIi) before the LTP checks
+                checkLTP=("RUNNER" in os.environ.keys() or not configManager.calculatersiintraday),
+            )
+            ineligible = set(snapshot.index[rejected])
+            if len(ineligible) == 0:
+                return listStockCodes
+            default_logger().debug(f"Prefilter dropped {len(ineligible)} of {len(listStockCodes)} stocks before queueing")
+            return [symbol for symbol in listStockCodes if symbol not in ineligible]
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            return listStockCodes
+
     def getStocksListForScan(userArgs, menuOption, totalStocksInReview, downloadedRecently, daysInPast):
         savedStocksCount = 0
         pastDate, savedListResp = PKScanRunner.downloadSavedResults(daysInPast,downloadedRecently=downloadedRecently)
@@ -295,10 +357,74 @@ class PKScanRunner:
                 f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"C","location":"PKScanRunner.py:refreshDatabase:287","message":"refreshDatabase - copying stockDictPrimary to workers","data":{"stockDictPrimary_len":len(stockDictPrimary) if stockDictPrimary else 0,"num_consumers":len(consumers) if consumers else 0,"sample_stock":sample_stock,"sample_index_last":str(sample_index) if sample_index else None},"timestamp":int(__import__('time').time()*1000)}) + '\n')
         except: pass
         # #endregion
+        if PKScanRunner.sharedStorePrimary is not None or PKScanRunner.sharedStoreSecondary is not None:
+            # Running workers pick up the new generation on their next lookup
+            stockDictPrimary, stockDictSecondary = PKScanRunner.publishSharedStores(None, stockDictPrimary, stockDictSecondary)
         for worker in consumers:
             worker.objectDictionaryPrimary = stockDictPrimary
             worker.objectDictionarySecondary = stockDictSecondary
             worker.refreshDatabase = True
+
+    def publishSharedStore(store, stockDict):
+        if stockDict is None or isinstance(stockDict, PKSharedMemoryStore) or len(stockDict) == 0:
+            return store, stockDict
+        try:
+            if store is None:
+                store = PKSharedMemoryStore()
+                atexit.register(store.release)
+            store.publish(stockDict)
+            return store, store
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            return store, stockDict
+
+    def publishSharedStores(menuOption, stockDictPrimary, stockDictSecondary, userPassedArgs=None):
+        """
+        Publishes the loaded stock data into shared memory and returns what the
+        workers should use as their object dictionaries. Workers then slice
+        zero-copy views per symbol instead of pulling every entry through the
+        multiprocessing manager. The original dictionaries are returned when
+        workers need to write back into them (download-only runs) or when
+        they're not used at all (menu option C).
+        """
+        if menuOption in ["C"] or (userPassedArgs is not None and userPassedArgs.download):
+            return stockDictPrimary, stockDictSecondary
+        PKScanRunner.sharedStorePrimary, stockDictPrimary = PKScanRunner.publishSharedStore(PKScanRunner.sharedStorePrimary, stockDictPrimary)
+        PKScanRunner.sharedStoreSecondary, stockDictSecondary = PKScanRunner.publishSharedStore(PKScanRunner.sharedStoreSecondary, stockDictSecondary)
+        PKScanRunner.publishIndicatorStore(PKScanRunner.sharedStorePrimary)
+        return stockDictPrimary, stockDictSecondary
+
+    def publishIndicatorStore(dataStore):
+        """
+        Computes the preprocessData indicators of the whole published universe
+        in one vectorized pass (PKPanelIndicators) and publishes them next to
+        the data store. Workers then slice them instead of computing them
+        stock by stock. Only done when the data store has a new generation.
+        """
+        if dataStore is None or not dataStore.isOwner:
+            return
+        try:
+            useEMA = PKScanRunner.configManager.useEMA
+            prefix = indicatorStorePrefix(dataStore.prefix, useEMA)
+            store = PKScanRunner.sharedStoreIndicators
+            if store is not None and store.prefix == prefix and PKScanRunner.indicatorStoreGeneration == dataStore.generation:
+                return
+            if store is not None and store.prefix != prefix:
+                store.release()
+                store = None
+            if store is None:
+                store = PKSharedMemoryStore(prefix=prefix)
+                atexit.register(store.release)
+            store.publish(packIndicators(dataStore.packedData(), useEMA=useEMA))
+            PKScanRunner.sharedStoreIndicators = store
+            PKScanRunner.indicatorStoreGeneration = dataStore.generation
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+
+    def releaseSharedStores():
+        for store in [PKScanRunner.sharedStorePrimary, PKScanRunner.sharedStoreSecondary, PKScanRunner.sharedStoreIndicators]:
+            if store is not None:
+                store.release()
     
     # @Halo(text='', spinner='dots')
     def runScanWithParams(userPassedArgs,keyboardInterruptEvent,screenCounter,screenResultsCounter,stockDictPrimary,stockDictSecondary,testing, backtestPeriod, menuOption, executeOption, samplingDuration, items,screenResults, saveResults, backtest_df,scanningCb,tasks_queue, results_queue, consumers,logging_queue):
@@ -324,6 +450,9 @@ class PKScanRunner:
         # else:
         #     # Restart the workers because the run method may have exited from a previous run
         #     PKScanRunner.startWorkers(consumers)
+        else:
+            # Workers are being reused (monitor/piped scans). Re-publish only if the data changed.
+            PKScanRunner.publishSharedStores(menuOption, stockDictPrimary, stockDictSecondary, userPassedArgs)
         PKScanRunner.tasks_queue = tasks_queue
         PKScanRunner.results_queue = results_queue
         PKScanRunner.consumers = consumers
@@ -368,9 +497,10 @@ class PKScanRunner:
         PKScanRunner.configManager.getConfig(parser)
         if nsei_df is not None:
             rs_score_index = scr.calc_relative_strength(nsei_df[::-1])
+        stockDictPrimary, stockDictSecondary = PKScanRunner.publishSharedStores(menuOption, stockDictPrimary, stockDictSecondary, userPassedArgs)
         consumers = [
                     PKMultiProcessorClient(
-                        StockScreener().screenStocks,
+                        StockScreener().screenTask,
                         tasks_queue,
                         results_queue,
                         logging_queue,
@@ -474,6 +604,7 @@ class PKScanRunner:
         PKScanRunner.results_queue = None
         PKScanRunner.scr = None
         PKScanRunner.consumers = None
+        PKScanRunner.releaseSharedStores()
 
     def shutdown(frame, signum):
         OutputControls().printOutput("Shutting down for test coverage")
@@ -484,39 +615,51 @@ class PKScanRunner:
         counter = 0
         shouldContinue = True
         lastNonNoneResult = None
+        # Scan-wide arguments go once per chunk of stocks (see PKScanBatch)
+        numWorkers = len(PKScanRunner.consumers) if PKScanRunner.consumers is not None else multiprocessing.cpu_count()
+        chunkSize = chunkSizeFor(len(items), numWorkers)
+        queueStats = PKScanRunner.queueStats
+        queueStats.reset()
         while numStocks:
             if counter == 0 and numStocks > 0:
                 if queueCounter < int(iterations):
                     PKScanRunner.populateQueues(
-                        items[
+                        PKScanBatch.batchItems(items[
                             numStocksPerIteration
                             * queueCounter : numStocksPerIteration
                             * (queueCounter + 1)
-                        ],
+                        ], chunkSize),
                         tasks_queue,
                         (queueCounter + 1 == int(iterations)) and ((queueCounter + 1)*int(iterations) == originalNumberOfStocks),
                         userPassedArgs
                     )
                 else:
                     PKScanRunner.populateQueues(
-                        items[
+                        PKScanBatch.batchItems(items[
                             numStocksPerIteration
                             * queueCounter :
-                        ],
+                        ], chunkSize),
                         tasks_queue,
                         True,
                         userPassedArgs
                     )
-            numStocks -= 1
-            result = results_queue.get()
-            if result is not None:
-                lastNonNoneResult = result
-            
-            if resultsReceivedCb is not None:
-                shouldContinue, backtest_df = resultsReceivedCb(result, numStocks, backtest_df,*otherArgs)
-            counter += 1
-            # If it's being run under unit testing, let's wrap up if we find at least 1
-            # stock or if we've already tried screening through 5% of the list.
+            message = results_queue.get()
+            queueStats.resultMessages += 1
+            # A batch is answered with the list of its stocks' results
+            results = message if isinstance(message, list) else [message]
+            for result in results:
+                numStocks -= 1
+                queueStats.stocks += 1
+                if result is not None:
+                    lastNonNoneResult = result
+                
+                if resultsReceivedCb is not None:
+                    shouldContinue, backtest_df = resultsReceivedCb(result, numStocks, backtest_df,*otherArgs)
+                counter += 1
+                # If it's being run under unit testing, let's wrap up if we find at least 1
+                # stock or if we've already tried screening through 5% of the list.
+                if (not shouldContinue) or (testing and counter >= int(numStocksPerIteration * 0.05)) or numStocks <= 0:
+                    break
             if (not shouldContinue) or (testing and counter >= int(numStocksPerIteration * 0.05)):
                 if PKScanRunner.consumers is not None:
                     consumers = PKScanRunner.consumers
@@ -528,5 +671,6 @@ class PKScanRunner:
             if counter >= numStocksPerIteration: #int(numStocksPerIteration * 0.75):
                 queueCounter += 1
                 counter = 0
+        default_logger().debug(f"Scan queues: {queueStats.stats()}")
         
         return backtest_df, lastNonNoneResult
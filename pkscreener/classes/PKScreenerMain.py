@@ -249,7 +249,7 @@ class PKScreenerMain:
         respChartPattern = None
         
         # Load or fetch stock data
-        if not self.data_manager.loaded_stock_data:
+        if not self.data_manager.loaded_stock_data or not PKAssetsManager.hasLoadedUniverse(self.data_manager.stock_dict_primary, self.data_manager.list_stock_codes):
             try:
                 import tensorflow as tf
                 with tf.device("/device:GPU:0"):
@@ -465,7 +465,7 @@ class PKScreenerMain:
         # ... handle other execute options
         
         # Load or fetch stock data
-        if not self.data_manager.loaded_stock_data:
+        if not self.data_manager.loaded_stock_data or not PKAssetsManager.hasLoadedUniverse(self.data_manager.stock_dict_primary, self.data_manager.list_stock_codes):
             try:
                 import tensorflow as tf
                 with tf.device("/device:GPU:0"):
@@ -604,6 +604,9 @@ class PKScreenerMain:
             self.handle_nasdaq_download_option(selectedMenu, selDownloadOption)
         elif selDownloadOption.upper() == "S":
             self.handle_sector_download_option(selectedMenu, selDownloadOption)
+        elif selDownloadOption.upper() == "C":
+            PKAnalyticsService().send_event(f"D_{selDownloadOption.upper()}")
+            PKAssetsManager.compactStockData(self.config_manager)
 
     def handle_nasdaq_download_option(self, selectedMenu, selDownloadOption):
         """
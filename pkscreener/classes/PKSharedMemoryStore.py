@@ -0,0 +1,299 @@
+"""
+PKSharedMemoryStore - Read-only shared-memory OHLCV store for scan workers
+
+This module handles:
+- Publishing a packed snapshot of the stock data dictionary into shared memory
+- Attaching scan workers (PKMultiProcessorClient) to the latest snapshot
+- Zero-copy, per-symbol slicing of the published snapshot inside workers
+
+The store replaces the multiprocessing.Manager().dict() lookups that were
+otherwise needed for every objectDictionary.get(stock) call in the workers.
+Writes into the store are never shared: they stay in the writing process
+(see PKSharedMemoryStore.__setitem__).
+"""
+
+import hashlib
+import os
+import pickle
+import uuid
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from PKDevTools.classes.log import default_logger
+
+from pkscreener.classes.StockDataPacker import packStockDict, PackedStockData
+
+# Each data segment starts with a header of 8 int64 values:
+# [valuesRows, valuesCols, indexRows, metadataBytes, 0, 0, 0, 0]
+HEADER_SIZE = 64
+# The control segment only holds the current generation number
+CONTROL_SIZE = 8
+
+
+def _alignedSize(nbytes, alignment=64):
+    return int((nbytes + alignment - 1) // alignment * alignment)
+
+
+def _attachSegment(name):
+    try:
+        # Python 3.13+: don't let the resource tracker of a worker
+        # unlink a segment owned by the parent process.
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class PKSharedMemoryStore:
+    """
+    A read-only, dictionary-like view of the stock data published into
+    shared memory by the parent process.
+
+    Usage (parent):
+        store = PKSharedMemoryStore()
+        store.publish(stockDictPrimary)
+        ... pass store to the PKMultiProcessorClient workers ...
+        store.release()
+
+    Usage (worker):
+        df = store.getDataFrame("SBIN")   # zero-copy slice
+        splitDict = store.get("SBIN")     # split-dict with ndarray/DatetimeIndex
+
+    Every publish() creates a new generation. Workers compare the generation
+    in the control segment with the one they are attached to and re-attach
+    transparently when the parent publishes a new snapshot.
+    """
+
+    def __init__(self, prefix=None):
+        self.prefix = prefix if prefix is not None else f"pks_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self._ownerPid = None
+        self._control = None
+        self._segment = None
+        self._generation = 0
+        self._packed = None
+        self._fingerprint = None
+        # Writes from workers (e.g. freshly fetched data) stay process-local
+        self._overlay = {}
+
+    def __getstate__(self):
+        # Only the name travels to other processes. Segments are attached lazily.
+        return {"prefix": self.prefix}
+
+    def __setstate__(self, state):
+        self.__init__(prefix=state["prefix"])
+
+    @staticmethod
+    def fingerprint(stockDict):
+        """
+        A signature of the contents of a stock dictionary, used to decide if
+        a re-publish is required: every symbol with its number of candles and
+        its last candle (the one a live feed updates in place). Manager dicts
+        would need a round trip per symbol for that, so they get None and
+        are always re-published.
+        """
+        if not isinstance(stockDict, dict):
+            return None
+        try:
+            digest = hashlib.sha1()
+            for symbol, entry in stockDict.items():
+                lastIndex = lastRow = None
+                rows = 0
+                if isinstance(entry, dict):
+                    index = entry.get("index")
+                    data = entry.get("data")
+                    rows = 0 if index is None else len(index)
+                    lastIndex = index[-1] if rows > 0 else None
+                    lastRow = data[-1] if data is not None and len(data) > 0 else None
+                    lastRow = list(lastRow) if lastRow is not None else None
+                digest.update(repr((symbol, rows, str(lastIndex), lastRow)).encode())
+            return (len(stockDict), digest.hexdigest())
+        except Exception as e:  # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            return None
+
+    def _segmentName(self, generation):
+        return f"{self.prefix}_g{generation}"
+
+    def publish(self, stockDict, force=False):
+        """
+        Packs stockDict (or takes an already packed PackedStockData) and
+        publishes it as a new generation. Returns the number of symbols
+        published. Skips the work if the snapshot did not change since the
+        last publish, unless force is True.
+        """
+        isPacked = isinstance(stockDict, PackedStockData)
+        fingerprint = None if isPacked else PKSharedMemoryStore.fingerprint(stockDict)
+        if not force and fingerprint is not None and fingerprint == self._fingerprint and self._packed is not None:
+            return len(self._packed)
+        packed = stockDict if isPacked else packStockDict(stockDict)
+        metadata = pickle.dumps(packed.metadata(), protocol=pickle.HIGHEST_PROTOCOL)
+        valuesBytes = _alignedSize(packed.values.nbytes)
+        indexBytes = _alignedSize(packed.index.nbytes)
+        totalBytes = HEADER_SIZE + valuesBytes + indexBytes + len(metadata)
+        if self._control is None:
+            self._control = shared_memory.SharedMemory(name=self.prefix, create=True, size=CONTROL_SIZE)
+            np.ndarray((1,), dtype=np.int64, buffer=self._control.buf)[0] = 0
+            self._ownerPid = os.getpid()
+        generation = self._generation + 1
+        segment = shared_memory.SharedMemory(name=self._segmentName(generation), create=True, size=totalBytes)
+        header = np.ndarray((8,), dtype=np.int64, buffer=segment.buf)
+        header[:] = [packed.values.shape[0], packed.values.shape[1], packed.index.shape[0], len(metadata), 0, 0, 0, 0]
+        values = np.ndarray(packed.values.shape, dtype=np.float64, buffer=segment.buf, offset=HEADER_SIZE)
+        values[:] = packed.values
+        index = np.ndarray(packed.index.shape, dtype=np.int64, buffer=segment.buf, offset=HEADER_SIZE + valuesBytes)
+        index[:] = packed.index
+        metadataOffset = HEADER_SIZE + valuesBytes + indexBytes
+        segment.buf[metadataOffset:metadataOffset + len(metadata)] = metadata
+        # Flip the generation only after the segment is completely written
+        np.ndarray((1,), dtype=np.int64, buffer=self._control.buf)[0] = generation
+        previous = self._segment
+        self._segment = segment
+        self._generation = generation
+        self._packed = self._readPacked(segment)
+        self._fingerprint = fingerprint
+        self._overlay = {}
+        if previous is not None:
+            # Workers still attached to the old generation keep their mapping
+            # until they notice the new generation and re-attach.
+            self._closeSegment(previous, unlink=True)
+        default_logger().debug(f"Published {len(packed)} symbols ({totalBytes} bytes) into shared memory {self._segmentName(generation)}")
+        return len(packed)
+
+    @staticmethod
+    def _readPacked(segment):
+        header = np.ndarray((8,), dtype=np.int64, buffer=segment.buf)
+        rows, cols, indexRows, metadataBytes = [int(x) for x in header[:4]]
+        valuesBytes = _alignedSize(rows * cols * 8)
+        indexBytes = _alignedSize(indexRows * 8)
+        values = np.ndarray((rows, cols), dtype=np.float64, buffer=segment.buf, offset=HEADER_SIZE)
+        values.flags.writeable = False
+        index = np.ndarray((indexRows,), dtype=np.int64, buffer=segment.buf, offset=HEADER_SIZE + valuesBytes)
+        index.flags.writeable = False
+        metadataOffset = HEADER_SIZE + valuesBytes + indexBytes
+        metadata = pickle.loads(bytes(segment.buf[metadataOffset:metadataOffset + metadataBytes]))
+        return PackedStockData.fromMetadata(metadata, values, index)
+
+    def _currentGeneration(self):
+        if self._control is None:
+            try:
+                self._control = _attachSegment(self.prefix)
+            except FileNotFoundError:
+                return 0
+        return int(np.ndarray((1,), dtype=np.int64, buffer=self._control.buf)[0])
+
+    def _ensureAttached(self):
+        if self.isOwner:
+            return self._packed
+        generation = self._currentGeneration()
+        if generation == 0:
+            return None
+        if generation != self._generation or self._packed is None:
+            try:
+                segment = _attachSegment(self._segmentName(generation))
+            except FileNotFoundError:  # pragma: no cover
+                # The parent is publishing a newer generation right now
+                return self._packed
+            previous = self._segment
+            self._packed = None
+            self._segment = segment
+            self._generation = generation
+            self._packed = self._readPacked(segment)
+            self._overlay = {}
+            if previous is not None:
+                self._closeSegment(previous, unlink=False)
+        return self._packed
+
+    @staticmethod
+    def _closeSegment(segment, unlink=False):
+        try:
+            segment.close()
+        except BufferError:
+            # Someone still holds a view into the old snapshot.
+            # The mapping goes away once those views are garbage collected.
+            pass
+        except Exception as e:  # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+        if unlink:
+            try:
+                segment.unlink()
+            except FileNotFoundError:  # pragma: no cover
+                pass
+
+    def release(self):
+        """Releases (and, for the owner, unlinks) all shared memory segments."""
+        self._packed = None
+        if self._segment is not None:
+            self._closeSegment(self._segment, unlink=self.isOwner)
+            self._segment = None
+        if self._control is not None:
+            self._closeSegment(self._control, unlink=self.isOwner)
+            self._control = None
+        self._generation = 0
+        self._fingerprint = None
+        self._overlay = {}
+        self._ownerPid = None
+
+    @property
+    def isOwner(self):
+        # A forked worker inherits this object as-is, but it never owns the segments.
+        return self._ownerPid == os.getpid()
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def packedData(self):
+        """The PackedStockData of the current generation (None if nothing is published)."""
+        return self._ensureAttached()
+
+    def keys(self):
+        packed = self._ensureAttached()
+        keys = [] if packed is None else packed.keys()
+        return keys + [key for key in self._overlay.keys() if packed is None or key not in packed]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        packed = self._ensureAttached()
+        return (0 if packed is None else len(packed)) + len([key for key in self._overlay.keys() if packed is None or key not in packed])
+
+    def __contains__(self, symbol):
+        packed = self._ensureAttached()
+        return symbol in self._overlay or (packed is not None and symbol in packed)
+
+    def __getitem__(self, symbol):
+        value = self.get(symbol)
+        if value is None:
+            raise KeyError(symbol)
+        return value
+
+    def __setitem__(self, symbol, value):
+        # Process-local only: neither the parent nor the other workers see it,
+        # and it's dropped when the next generation is attached.
+        self._overlay[symbol] = value
+
+    def get(self, symbol, default=None):
+        """Returns a split-dict whose data/index are views into shared memory."""
+        if symbol in self._overlay:
+            return self._overlay[symbol]
+        packed = self._ensureAttached()
+        if packed is None or symbol not in packed:
+            return default
+        return packed.toSplitDict(symbol)
+
+    def getDataFrame(self, symbol, descending=False, timezone=None):
+        """
+        Returns a DataFrame backed by the shared memory block (no copies),
+        or a latest-first copy with descending=True. See PackedStockData.toDataFrame.
+        """
+        if symbol in self._overlay:
+            return packStockDict({symbol: self._overlay[symbol]}).toDataFrame(symbol, descending=descending, timezone=timezone)
+        packed = self._ensureAttached()
+        if packed is None or symbol not in packed:
+            return None
+        return packed.toDataFrame(symbol, descending=descending, timezone=timezone)
+
+    def rowCount(self, symbol):
+        packed = self._ensureAttached()
+        return 0 if packed is None else packed.rowCount(symbol)
@@ -0,0 +1,65 @@
+"""
+PKTrailingStops - Single-pass ATR trailing stop recurrence
+
+This module handles:
+- The ATR trailing stop (UT Bot) recurrence over NumPy arrays: every stop
+  depends on the previous one, so it is one sequential pass over the candles
+- JIT compiling that pass with numba when it is installed; a plain Python
+  loop over float lists otherwise (still far cheaper than DataFrame.loc reads
+  and writes per row)
+
+The kernel reproduces ScreeningStatistics.xATRTrailingStop_func applied row
+by row, including how comparisons with NaN fall through to the last branch.
+"""
+
+import numpy as np
+
+from pkscreener import Imports
+
+if Imports["numba"]:
+    from numba import njit
+
+
+def _trailingStops(close, nLoss, stops):
+    for i in range(1, len(close)):
+        previous = stops[i - 1]
+        if close[i] > previous and close[i - 1] > previous:
+            candidate = close[i] - nLoss[i]
+            # max(previous, candidate) the way Python's max treats NaN
+            stops[i] = candidate if candidate > previous else previous
+        elif close[i] < previous and close[i - 1] < previous:
+            candidate = close[i] + nLoss[i]
+            stops[i] = candidate if candidate < previous else previous
+        elif close[i] > previous:
+            stops[i] = close[i] - nLoss[i]
+        else:
+            stops[i] = close[i] + nLoss[i]
+    return stops
+
+
+if Imports["numba"]:
+    try:
+        _trailingStopsCompiled = njit(cache=False, nogil=True)(_trailingStops)
+    except Exception:  # pragma: no cover
+        _trailingStopsCompiled = None
+else:
+    _trailingStopsCompiled = None
+
+
+def atrTrailingStops(close, nLoss, initial=0.0):
+    """
+    ATR trailing stops for close (oldest first) with nLoss (sensitivity * ATR)
+    per candle. stops[0] is initial.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    nLoss = np.asarray(nLoss, dtype=np.float64)
+    if len(close) != len(nLoss):
+        raise ValueError(f"close ({len(close)}) and nLoss ({len(nLoss)}) differ in length")
+    if len(close) == 0:
+        return np.empty(0, dtype=np.float64)
+    if _trailingStopsCompiled is not None:
+        stops = np.empty(len(close), dtype=np.float64)
+        stops[0] = initial
+        return _trailingStopsCompiled(close, nLoss, stops)
+    stops = [float(initial)] * len(close)
+    return np.asarray(_trailingStops(close.tolist(), nLoss.tolist(), stops), dtype=np.float64)
@@ -0,0 +1,125 @@
+"""
+PKUniversePrefilter - Dropping ineligible symbols before the scan tasks are queued
+
+This module handles:
+- A snapshot table (one row per symbol) of what the basic LTP and volume
+  checks of screenStocks read: LTP, previous close, %change, the volume
+  and VolMA that validateVolume looks at, and the 52 week high/low (the
+  latest 250 candles), computed for the whole universe in one vectorized
+  pass over a PackedStockData
+- Turning the configured LTP, %change, volume and stage two gates into a
+  mask of the symbols that would certainly fail them in the workers
+
+Every gate only drops what performBasicLTPChecks/performBasicVolumeChecks
+are certain to reject (missing candles, rounding borderlines and symbols
+without packed data are kept), so prefiltering never changes the results.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Candles validateLTP looks at for the 52 week high/low
+YEARLY_CANDLES = 250
+# Candles of VolMA
+VOLUME_CANDLES = 20
+# Margin for the values the checks round before comparing
+ROUNDING_MARGIN = 0.005 + 1e-9
+
+
+def _column(packed, name):
+    """The column of every row with non-finite values as NaN, plus a NaN sentinel row at the end."""
+    column = np.full(len(packed.values) + 1, np.nan)
+    if name in packed.columns:
+        values = packed.values[:, packed.columns.index(name)]
+        column[:-1] = np.where(np.isfinite(values), values, np.nan)
+    return column
+
+
+def _windowSums(column, starts, lengths):
+    """Sums (NaN as 0) and NaN counts of column[starts:starts+lengths] per symbol."""
+    missing = np.isnan(column[:-1])
+    sums = np.concatenate([[0.0], np.cumsum(np.where(missing, 0.0, column[:-1]))])
+    counts = np.concatenate([[0], np.cumsum(missing)])
+    return sums[starts + lengths] - sums[starts], counts[starts + lengths] - counts[starts]
+
+
+def _windowExtremes(column, starts, ends):
+    """Max and min of column[starts:ends] per (non-empty) window. NaN if the window has a NaN."""
+    if len(starts) == 0:
+        return np.empty(0), np.empty(0)
+    bounds = np.column_stack([starts, ends]).ravel()
+    return np.maximum.reduceat(column, bounds)[::2], np.minimum.reduceat(column, bounds)[::2]
+
+
+def lastRowSnapshot(packed):
+    """
+    One row per packed symbol (ascending candles per symbol, see
+    PackedStockData). volume/VolMA are those of the oldest candle: the
+    workers get the candles latest first and preprocessData reverses them,
+    so that's the first row of processedData that validateVolume reads.
+    VolMA is 0 with fewer than 20 candles (as preprocessData's NaN filled
+    one) and NaN when a candle of its window is missing.
+    """
+    starts = np.asarray(packed.offsets[:-1], dtype=np.int64)
+    ends = np.asarray(packed.offsets[1:], dtype=np.int64)
+    rows = ends - starts
+    close = _column(packed, "close")
+    volume = _column(packed, "volume")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ltp = np.where(rows >= 1, close[ends - 1], np.nan)
+        prevClose = np.where(rows >= 2, close[ends - 2], np.nan)
+        change = np.where(prevClose > 0, (ltp / prevClose - 1) * 100, np.nan)
+        volumeWindow = np.minimum(rows, VOLUME_CANDLES)
+        volumeSums, missingVolumes = _windowSums(volume, starts, volumeWindow)
+        volMA = np.where(rows >= VOLUME_CANDLES, volumeSums / VOLUME_CANDLES, 0.0)
+        volMA = np.where(missingVolumes == 0, volMA, np.nan)
+        firstVolume = np.where((rows >= 1) & (missingVolumes == 0), volume[np.minimum(starts, len(volume) - 1)], np.nan)
+        yearlyHigh, yearlyLow = _windowExtremes(close, np.maximum(starts, ends - YEARLY_CANDLES), ends)
+        _, missingCloses = _windowSums(close, starts, rows)
+    empty = rows == 0
+    return pd.DataFrame(
+        {
+            "LTP": ltp,
+            "PrevClose": prevClose,
+            "%Chng": change,
+            "volume": firstVolume,
+            "VolMA": volMA,
+            "52Wk-H": np.where(empty, np.nan, yearlyHigh),
+            "52Wk-L": np.where(empty, np.nan, yearlyLow),
+            # Candles with a close, an upper bound of what preprocessData keeps
+            "Rows": rows - missingCloses,
+        },
+        index=pd.Index(packed.symbols, name="Stock"),
+    )
+
+
+def ineligibleMask(snapshot, executeOption, minLTP, maxLTP, minChange=0, minVolume=None, volumeRatio=None, stageTwo=False, checkLTP=True):
+    """
+    True for the snapshot rows that the basic checks of screenStocks would
+    reject: outside [minLTP, maxLTP], below minChange, below minVolume
+    (executeOption > 0), below volumeRatio (executeOption 9) or not a stage
+    two stock (stageTwo, executeOption > 0 and not 29). checkLTP False
+    leaves out the gates on the latest candle.
+    """
+    ltp = snapshot["LTP"].to_numpy()
+    rejected = np.zeros(len(snapshot), dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if checkLTP:
+            rejected |= (ltp < minLTP - ROUNDING_MARGIN) | (ltp > maxLTP + ROUNDING_MARGIN)
+            if minChange != 0:
+                # %Chng is compared after formatting it with one decimal
+                rejected |= snapshot["%Chng"].to_numpy() + 0.05 + 1e-9 < minChange
+            if stageTwo and executeOption > 0 and executeOption not in [29]:
+                yearlyLow = snapshot["52Wk-L"].to_numpy()
+                yearlyHigh = snapshot["52Wk-H"].to_numpy()
+                rejected |= ((snapshot["Rows"].to_numpy() > YEARLY_CANDLES)
+                             & (ltp + ROUNDING_MARGIN < 2 * yearlyLow)
+                             & (ltp + ROUNDING_MARGIN < 0.75 * yearlyHigh))
+        if executeOption > 0 and minVolume is not None:
+            volume = snapshot["volume"].to_numpy()
+            volMA = snapshot["VolMA"].to_numpy()
+            known = ~np.isnan(volume) & ~np.isnan(volMA)
+            rejected |= known & (volume < minVolume) & (volMA < minVolume * (1 - 1e-9))
+            if executeOption == 9 and volumeRatio is not None:
+                rejected |= known & ((volMA == 0) | (volume / np.where(volMA == 0, np.nan, volMA) + 0.0051 < volumeRatio))
+    return rejected
@@ -171,6 +171,37 @@ class pktalib:
             # default_logger().debug(e, exc_info=True)
             return talib.SMA(close, timeperiod)
 
+    @classmethod
+    def laggedSMAs(self, close, timeperiod, lags=(0,)):
+        """
+        The last value of SMA(close) as it was lags candles ago, i.e. for every
+        lag n, SMA(close[:len(close)-n]).iloc[-1], from a single cumulative sum
+        instead of one SMA series per lag. close must be oldest first. A value
+        is NaN if fewer than timeperiod candles are available or its window
+        has a NaN.
+
+        Usage:
+            today, tenDaysAgo = pktalib.laggedSMAs(data["close"], 50, lags=(0, 10))
+        """
+        values = np.asarray(close, dtype=float)
+        lags = np.asarray(lags, dtype=np.int64)
+        result = np.full(len(lags), np.nan)
+        finite = np.isfinite(values)
+        if not finite.any():
+            return result
+        # Relative to one of the prices so that the sums stay small and equal
+        # windows give exactly equal means
+        offset = values[finite][0]
+        sums = np.concatenate(([0.0], np.cumsum(np.where(finite, values - offset, 0.0))))
+        missing = np.concatenate(([0], np.cumsum(~finite)))
+        ends = len(values) - lags
+        starts = ends - timeperiod
+        valid = (lags >= 0) & (starts >= 0)
+        ends, starts = ends[valid], starts[valid]
+        means = offset + (sums[ends] - sums[starts]) / timeperiod
+        result[valid] = np.where(missing[ends] - missing[starts] == 0, means, np.nan)
+        return result
+
     @classmethod
     def WMA(self, close, timeperiod):
         try:
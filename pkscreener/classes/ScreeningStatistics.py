@@ -37,13 +37,14 @@ from sys import float_info as sflt
 import pkscreener.classes.Utility as Utility
 from pkscreener import Imports
 from pkscreener.classes.Pktalib import pktalib
+from pkscreener.classes.PKIndicatorCache import PKIndicatorCache
+from pkscreener.classes.PKLorentzianClassifier import PKLorentzianClassifier
+from pkscreener.classes.PKPanelIndicators import INDICATOR_COLUMNS, preprocessedFrames
+from pkscreener.classes.PKTrailingStops import atrTrailingStops
 from PKDevTools.classes.OutputControls import OutputControls
 from PKDevTools.classes import Archiver, log
 from PKNSETools.morningstartools import Stock
 
-if sys.version_info >= (3, 11):
-    import advanced_ta as ata
-
 # from sklearn.preprocessing import StandardScaler
 if Imports["scipy"]:
     from scipy.stats import linregress
@@ -61,6 +62,10 @@ class DownloadDataOnly(Exception):
 class EligibilityConditionNotMet(Exception):
     pass
 
+# Exception for stocks which don't pass the validator of the scan option
+class ValidatorNotMet(EligibilityConditionNotMet):
+    pass
+
 # Exception for stocks which are not newly listed when screening only for Newly Listed
 class NotNewlyListed(Exception):
     pass
@@ -90,6 +95,10 @@ class ScreeningStatistics:
         self.configManager = configManager
         self.default_logger = default_logger
         self.shouldLog = shouldLog
+        # Copies of the screened data made by this instance. Every scan gets
+        # its own instance (see PKScanRunner.prepareToRunScan), so this adds
+        # up the copies of a scan (see StockScreener.screenStocks).
+        self.frameCopies = 0
         self.setupLogger(self.default_logger.level)
 
     def setupLogger(self, log_level):
@@ -103,6 +112,33 @@ class ScreeningStatistics:
             filter=None,
         )
 
+    # Frames handed to the validators (fullData, processedData) are latest
+    # candle first, and no validator re-sorts them. Validators that only read
+    # their data use it as is. The ones that change it work on one of the
+    # copies below (of only the rows they change, where possible), which are
+    # counted in frameCopies.
+    def frameCopy(self, df):
+        self.frameCopies += 1
+        return df.copy()
+
+    def cleanedCopy(self, df):
+        """A copy of df with NaN and +/-inf replaced by 0 (one copy instead of copy, fillna and replace)."""
+        self.frameCopies += 1
+        data = df.fillna(0)
+        data.replace([np.inf, -np.inf], 0, inplace=True)
+        return data
+
+    @staticmethod
+    def risingToLatest(series):
+        """
+        True if no value of the (latest first) series is below that of the
+        candle before it. Missing values are only allowed for the oldest candles.
+        """
+        values = np.asarray(series, dtype=float)
+        missing = np.isnan(values)
+        present = values[~missing]
+        return not missing[:len(present)].any() and bool((present[:-1] >= present[1:]).all())
+
     def calc_relative_strength(self,df:pd.DataFrame):
         if df is None or len(df) <= 1:
             return -1
@@ -241,9 +277,7 @@ class ScreeningStatistics:
         # https://chartink.com/screener/52-week-low-breakout
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         one_week = 5
         recent = data.head(1)["high"].iloc[0]
         full52Week = data.head(50 * one_week)
@@ -257,9 +291,7 @@ class ScreeningStatistics:
     def find52WeekHighLow(self, df, saveDict, screenDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         one_week = 5
         week_52 = one_week * 50  # Considering holidays etc as well of 10 days
         full52Week = data.head(week_52 + 1).tail(week_52+1)
@@ -295,9 +327,7 @@ class ScreeningStatistics:
     def find10DaysLowBreakout(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         one_week = 5
         recent = data.head(1)["low"].iloc[0]
         last1Week = data.head(one_week)
@@ -316,9 +346,7 @@ class ScreeningStatistics:
         if df is None or len(df) == 0:
             return False
         # https://chartink.com/screener/52-week-low-breakout
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         one_week = 5
         recent = data.head(1)["low"].iloc[0]
         # last1Week = data.head(one_week)
@@ -336,9 +364,7 @@ class ScreeningStatistics:
     def findAroonBullishCrossover(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         period = 14
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         aroondf = pktalib.Aroon(data["high"], data["low"], period)
@@ -354,18 +380,16 @@ class ScreeningStatistics:
         #https://chartink.com/screener/stock-crossing-atr
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         recent = data.head(1)
         recentCandleHeight = self.getCandleBodyHeight(recent)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
-        atr = pktalib.ATR(data["high"],data["low"],data["close"], 14)
-        atrCross = recentCandleHeight >= atr.tail(1).iloc[0]
-        bullishRSI = recent["RSI"].iloc[0] >= 55 or recent["RSIi"].iloc[0] >= 55
+        latestATR = pktalib.ATR(data["high"],data["low"],data["close"], 14).tail(1).iloc[0]
         smav7 = pktalib.SMA(data["volume"],timeperiod=7).tail(1).iloc[0]
+        atrCross = recentCandleHeight >= latestATR
+        bullishRSI = recent["RSI"].iloc[0] >= 55 or recent["RSIi"].iloc[0] >= 55
         atrCrossCondition = atrCross and bullishRSI and (smav7 < recent["volume"].iloc[0])
-        saveDict["ATR"] = round(atr.tail(1).iloc[0],1)
+        saveDict["ATR"] = round(latestATR,1)
         screenDict["ATR"] = saveDict["ATR"] #(colorText.GREEN if atrCrossCondition else colorText.FAIL) + str(atr.tail(1).iloc[0]) + colorText.END
         # if self.shouldLog:
         #     self.default_logger.debug(data.head(10))
@@ -374,9 +398,7 @@ class ScreeningStatistics:
     def findATRTrailingStops(self,df,sensitivity=1, atr_period=10, ema_period=1,buySellAll=1,saveDict=None,screenDict=None):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
 
         SENSITIVITY = sensitivity
@@ -387,16 +409,8 @@ class ScreeningStatistics:
         #Drop all rows that have nan, X first depending on the ATR preiod for the moving average
         data = data.dropna()
         data = data.reset_index()
-        # Filling ATRTrailingStop Variable
-        data["ATRTrailingStop"] = [0.0] + [np.nan for i in range(len(data) - 1)]
-        
-        for i in range(1, len(data)):
-            data.loc[i, "ATRTrailingStop"] = self.xATRTrailingStop_func(
-                data.loc[i, "close"],
-                data.loc[i - 1, "close"],
-                data.loc[i - 1, "ATRTrailingStop"],
-                data.loc[i, "nLoss"],
-            )
+        # Filling ATRTrailingStop Variable (xATRTrailingStop_func over all the rows in one pass)
+        data["ATRTrailingStop"] = atrTrailingStops(data["close"].to_numpy(dtype=np.float64), data["nLoss"].to_numpy(dtype=np.float64), initial=0.0)
         data = self.computeBuySellSignals(data,ema_period=ema_period)
         if data is None:
             return False
@@ -837,34 +851,28 @@ class ScreeningStatistics:
         """
         if fullData is None or len(fullData) < 20:
             return False
-        oldestRecordsFirst_df = fullData.head(30).copy()
-        latestRecordsFirst_df = oldestRecordsFirst_df[::-1].tail(30)
-        latestRecordsFirst_df = latestRecordsFirst_df.fillna(0)
-        latestRecordsFirst_df = latestRecordsFirst_df.replace([np.inf, -np.inf], 0)
+        latestRecordsFirst_df = self.cleanedCopy(fullData.head(30)[::-1][["high", "low", "close"]])
+        close = latestRecordsFirst_df["close"]
         # Bollinger bands
-        latestRecordsFirst_df.loc[:,'BBands-U'], latestRecordsFirst_df.loc[:,'BBands-M'], latestRecordsFirst_df.loc[:,'BBands-L'] = pktalib.BBANDS(latestRecordsFirst_df["close"], 20)
+        upperBand, _, lowerBand = [np.asarray(band) for band in pktalib.BBANDS(close, 20)]
         # compute Keltner's channel
-        latestRecordsFirst_df['low_kel'], latestRecordsFirst_df['upp_kel'] = pktalib.KeltnersChannel(latestRecordsFirst_df["high"], latestRecordsFirst_df["low"],latestRecordsFirst_df["close"],20)
+        lowKeltner, upperKeltner = [np.asarray(channel) for channel in pktalib.KeltnersChannel(latestRecordsFirst_df["high"], latestRecordsFirst_df["low"], close, 20)]
         # squeeze indicator
-        def in_squeeze(df):
-            return df['low_kel'] < df['BBands-L'] < df['BBands-U'] < df['upp_kel']
-
-        latestRecordsFirst_df['squeeze'] = latestRecordsFirst_df.apply(in_squeeze, axis=1)
+        squeeze = (lowKeltner < lowerBand) & (lowerBand < upperBand) & (upperBand < upperKeltner)
 
         # Let's review just the previous 3 candles including today (at the end)
-        latestRecordsFirst_df = latestRecordsFirst_df.tail(3)
         # stock is coming out of the squeeze
         saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
-        candle3Sqz = latestRecordsFirst_df.iloc[-3]["squeeze"]
-        candle1Sqz = latestRecordsFirst_df.iloc[-1]["squeeze"]
-        candle2Sqz = latestRecordsFirst_df.iloc[-2]["squeeze"]
+        candle3Sqz = squeeze[-3]
+        candle1Sqz = squeeze[-1]
+        candle2Sqz = squeeze[-2]
         if candle3Sqz and not candle1Sqz:
             # 3rd candle from the most recent one was in squeeze but the most recent one is not.
             if filter not in [1,3,4]: # Buy/Sell/All
                 return False
             # decide which action to take by comparing distances                
-            distance_to_upper = abs(latestRecordsFirst_df['BBands-U'].values[-1] - latestRecordsFirst_df["close"].values[-1])
-            distance_to_lower = abs(latestRecordsFirst_df['BBands-L'].values[-1] - latestRecordsFirst_df["close"].values[-1])
+            distance_to_upper = abs(upperBand[-1] - close.values[-1])
+            distance_to_lower = abs(lowerBand[-1] - close.values[-1])
             
             action = False
             if distance_to_upper < distance_to_lower:
@@ -889,10 +897,8 @@ class ScreeningStatistics:
     def findBreakingoutNow(self, df, fullData, saveDict, screenDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        reversedData = fullData[::-1].copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
+        reversedData = self.frameCopy(fullData[::-1])
         recent = data.head(1)
         recentCandleHeight = self.getCandleBodyHeight(recent)
         if len(data) < 11 or recentCandleHeight <= 0:
@@ -931,9 +937,7 @@ class ScreeningStatistics:
     ):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         recent = data.head(1)
         data = data[1:]
         maxHigh = round(data.describe()["high"]["max"], 2)
@@ -1065,9 +1069,7 @@ class ScreeningStatistics:
     def findBullishAVWAP(self, df, screenDict, saveDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         reversedData = data[::-1]  # Reverse the dataframe so that its the oldest date first
         # Find the anchor point. Find the candle where there's a major dip.
         majorLow = reversedData["low"].min()
@@ -1112,9 +1114,7 @@ class ScreeningStatistics:
     def findBullishIntradayRSIMACD(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         data["RSI12"] = pktalib.RSI(data["close"], 12)
         data["EMA10"] = pktalib.EMA(data["close"], 10)
@@ -1130,27 +1130,15 @@ class ScreeningStatistics:
     def findBuySellSignalsFromATRTrailing(self,df, key_value=1, atr_period=10, ema_period=200,buySellAll=1,saveDict=None,screenDict=None):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
 
         # Calculate ATR and xATRTrailingStop
         xATR = np.array(pktalib.ATR(data["high"], data["low"], data["close"], timeperiod=atr_period))
         nLoss = key_value * xATR
-        src = data["close"]
-        # Initialize arrays
-        xATRTrailingStop = np.zeros(len(data))
-        xATRTrailingStop[0] = src[0] - nLoss[0]
-
-        # Calculate xATRTrailingStop using vectorized operations
-        mask_1 = (src > np.roll(xATRTrailingStop, 1)) & (np.roll(src, 1) > np.roll(xATRTrailingStop, 1))
-        mask_2 = (src < np.roll(xATRTrailingStop, 1)) & (np.roll(src, 1) < np.roll(xATRTrailingStop, 1))
-        mask_3 = src > np.roll(xATRTrailingStop, 1)
-
-        xATRTrailingStop = np.where(mask_1, np.maximum(np.roll(xATRTrailingStop, 1), src - nLoss), xATRTrailingStop)
-        xATRTrailingStop = np.where(mask_2, np.minimum(np.roll(xATRTrailingStop, 1), src + nLoss), xATRTrailingStop)
-        xATRTrailingStop = np.where(mask_3, src - nLoss, xATRTrailingStop)
+        src = data["close"].to_numpy(dtype=np.float64)
+        # Every stop depends on the previous one: one sequential pass
+        xATRTrailingStop = atrTrailingStops(src, nLoss, initial=src[0] - nLoss[0])
 
         mask_buy = (np.roll(src, 1) < xATRTrailingStop) & (src > np.roll(xATRTrailingStop, 1))
         mask_sell = (np.roll(src, 1) > xATRTrailingStop) & (src < np.roll(xATRTrailingStop, 1))
@@ -1217,9 +1205,7 @@ class ScreeningStatistics:
     def findCupAndHandlePattern(self, df, stockName):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
 
         df_point = pd.DataFrame(columns=['StockName', 'DateK', 'DateA', 'DateB', 'DateC', 'DateD', 'Gamma'])
@@ -1429,9 +1415,7 @@ class ScreeningStatistics:
     def findHigherBullishOpens(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         recent = data.head(2)
         if len(recent) < 2:
             return False
@@ -1441,9 +1425,7 @@ class ScreeningStatistics:
     def findHigherOpens(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         recent = data.head(2)
         if len(recent) < 2:
             return False
@@ -1454,9 +1436,7 @@ class ScreeningStatistics:
         #https://chartink.com/screener/deel-momentum-rsi-14-mfi-14-cci-14
         if df is None or len(df) < 2:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         mfis = pktalib.MFI(data["high"],data["low"],data["close"],data["volume"], 14)
         ccis = pktalib.CCI(data["high"],data["low"],data["close"], 14)
@@ -1493,9 +1473,7 @@ class ScreeningStatistics:
     def findIntradayHighCrossover(self, df, afterTimestamp=None):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         diff_df = None
         try:
@@ -1515,9 +1493,7 @@ class ScreeningStatistics:
     def findIntradayOpenSetup(self,df,df_intraday,saveDict,screenDict,buySellAll=1):
         if df is None or len(df) == 0 or df_intraday is None or len(df_intraday) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         previousDay = data.head(1)
         prevDayHigh = previousDay["high"].iloc[0]
         prevDayLow = previousDay["low"].iloc[0]
@@ -1551,12 +1527,9 @@ class ScreeningStatistics:
     def findIntradayShortSellWithPSARVolumeSMA(self, df,df_intraday):
         if df is None or len(df) == 0 or df_intraday is None or len(df_intraday) == 0:
             return False
-        data = df.copy()
-        data_int = df_intraday.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
-        data_int = pd.DataFrame(data_int)["close"].resample('30T', offset='15min').ohlc()
+        data_int = pd.DataFrame(df_intraday)["close"].resample('30T', offset='15min').ohlc()
         # data_int = data_int[::-1]  # Reverse the dataframe so that its the oldest date first
         if len(data_int) < 5: # we need TMA for period 5
             return False
@@ -1581,9 +1554,7 @@ class ScreeningStatistics:
     def findIPOLifetimeFirstDayBullishBreak(self, df):
         if df is None or len(df) == 0 or len(df) >= 220:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data.dropna(axis=0, how="all", inplace=True) # Maybe there was no trade done at these times?
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         return data["high"].iloc[0] >= data["high"].max()
@@ -1591,9 +1562,7 @@ class ScreeningStatistics:
     def findMACDCrossover(self, df, afterTimestamp=None, nthCrossover=1, upDirection=True, minRSI=60):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data.dropna(axis=0, how="all", inplace=True) # Maybe there was no trade done at these times?
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         macdLine, macdSignal, macdHist = pktalib.MACD(data["close"], 12, 26, 9)
@@ -1636,12 +1605,10 @@ class ScreeningStatistics:
     def findNR4Day(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
         # https://chartink.com/screener/nr4-daily-today
-        if data.tail(1)["volume"].iloc[0] <= 50000:
+        if df.tail(1)["volume"].iloc[0] <= 50000:
             return False
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         data["SMA10"] = pktalib.SMA(data["close"], 10)
         data["SMA50"] = pktalib.SMA(data["close"], 50)
@@ -1667,9 +1634,7 @@ class ScreeningStatistics:
     def findPerfectShortSellsFutures(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         data.loc[:,'BBands-U'], data.loc[:,'BBands-M'], data.loc[:,'BBands-L'] = pktalib.BBANDS(data["close"], 20)
         recent = data.tail(4)
@@ -1698,9 +1663,7 @@ class ScreeningStatistics:
     def findPotentialBreakout(self, df, screenDict, saveDict, daysToLookback):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data.head(231)
         recent = data.head(1)
         recentVolume = recent["volume"].iloc[0]
@@ -1757,9 +1720,7 @@ class ScreeningStatistics:
     def findProbableShortSellsFutures(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         recent = data.tail(4)
         recent = recent[::-1]
@@ -1779,8 +1740,7 @@ class ScreeningStatistics:
     def findPSARReversalWithRSI(self, df, screenDict, saveDict,minRSI=50):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data[::-1]
+        data = df[::-1]
         psar = pktalib.psar(data["high"],data["low"])
         if len(psar) < 3:
             return False
@@ -1821,7 +1781,7 @@ class ScreeningStatistics:
     def findReversalMA(self, df, screenDict, saveDict, maLength, percentage=0.02):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
+        data = self.frameCopy(df)
         maRange = [9, 10, 20, 50, 200] if maLength in [9,10,20,50,100] else [9,10,20,50,100,maLength]
         results = []
         hasReversals = False
@@ -1869,15 +1829,8 @@ class ScreeningStatistics:
             return False
         if rsiKey not in df.columns:
             return False
-        data = df.copy()
-        # Ensure data is sorted with latest date first (descending)
-        if not data.empty and hasattr(data.index, 'sort_values'):
-            try:
-                data = data.sort_index(ascending=False)
-            except:
-                pass
-        # Get the 3 most recent rows (latest date first, so head(3) gets newest 3)
-        recent = data.head(3)
+        # The 3 most recent rows (latest date first)
+        recent = df.head(3)
         if len(recent) < 3:
             return False
         # recent.iloc[0] = today (most recent), iloc[1] = yesterday, iloc[2] = day before yesterday
@@ -1896,8 +1849,7 @@ class ScreeningStatistics:
             return False
         if rsiKey not in df.columns:
             return False
-        data = df.copy()
-        data = data[::-1]
+        data = df[::-1]
         maRsi = pktalib.MA(data[rsiKey], timeperiod=maLength)
         data = data[::-1].head(3)
         maRsi = maRsi[::-1].head(3)
@@ -1933,9 +1885,7 @@ class ScreeningStatistics:
     def findShortSellCandidatesForVolumeSMA(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         data.loc[:,'SMAV10'] = pktalib.SMA(data["volume"], 10)
         recent = data.tail(4)
@@ -1956,9 +1906,7 @@ class ScreeningStatistics:
     def findSuperGainersLosers(self, df, percentChangeRequired=15, gainer=True):
         if df is None or len(df) < 2:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         recent = data.tail(2)
         percentChange = round((recent["close"].iloc[1] - recent["close"].iloc[0]) *100/recent["close"].iloc[0],1)
@@ -2065,11 +2013,11 @@ class ScreeningStatistics:
     def findTrend(self, df, screenDict, saveDict, daysToLookback=None, stockName=""):
         if df is None or len(df) == 0:
             return "Unknown"
-        data = df.copy()
         if daysToLookback is None:
             daysToLookback = self.configManager.daysToLookback
-        data = data.head(daysToLookback)
+        data = df.head(daysToLookback)
         data = data[::-1]
+        # set_index returns a new frame of just the looked back candles
         data = data.set_index(np.arange(len(data)))
         data = data.fillna(0)
         data = data.replace([np.inf, -np.inf], 0)
@@ -2153,10 +2101,10 @@ class ScreeningStatistics:
         # period = int("".join(c for c in self.configManager.period if c.isdigit()))
         # if len(data) < period:
         #     return False
-        data = df.copy()
+        data = self.frameCopy(df)
         data = data[::-1]
         data["Number"] = np.arange(len(data)) + 1
-        data_low = data.copy()
+        data_low = self.frameCopy(data)
         points = 30
 
         """ Ignoring the Resitance for long-term purpose
@@ -2231,24 +2179,9 @@ class ScreeningStatistics:
         #     shouldProceed = False
         if df is not None:
             try:
-                data = df.copy()
-                data = data[::-1]
-                today_sma = pktalib.SMA(data["close"], timeperiod=50)
-                sma_minus9 = pktalib.SMA(data.head(len(data)-9)["close"], timeperiod=50)
-                sma_minus14 = pktalib.SMA(data.head(len(data)-14)["close"], timeperiod=50)
-                sma_minus20 = pktalib.SMA(data.head(len(data)-20)["close"], timeperiod=50)
-                today_lma = pktalib.SMA(data["close"], timeperiod=200)
-                lma_minus20 = pktalib.SMA(data.head(len(data)-20)["close"], timeperiod=200)
-                lma_minus80 = pktalib.SMA(data.head(len(data)-80)["close"], timeperiod=200)
-                lma_minus100 = pktalib.SMA(data.head(len(data)-100)["close"], timeperiod=200)
-                today_lma = today_lma.iloc[len(today_lma)-1] if today_lma is not None else 0
-                lma_minus20 = lma_minus20.iloc[len(lma_minus20)-1] if lma_minus20 is not None else 0
-                lma_minus80 = lma_minus80.iloc[len(lma_minus80)-1] if lma_minus80 is not None else 0
-                lma_minus100 = lma_minus100.iloc[len(lma_minus100)-1] if lma_minus100 is not None else 0
-                today_sma = today_sma.iloc[len(today_sma)-1] if today_sma is not None else 0
-                sma_minus9 = sma_minus9.iloc[len(sma_minus9)-1] if sma_minus9 is not None else 0
-                sma_minus14 = sma_minus14.iloc[len(sma_minus14)-1] if sma_minus14 is not None else 0
-                sma_minus20 = sma_minus20.iloc[len(sma_minus20)-1] if sma_minus20 is not None else 0
+                data = df[::-1]
+                today_sma, sma_minus9, sma_minus14, sma_minus20 = pktalib.laggedSMAs(data["close"], timeperiod=50, lags=(0, 9, 14, 20))
+                today_lma, lma_minus20, lma_minus80, lma_minus100 = pktalib.laggedSMAs(data["close"], timeperiod=200, lags=(0, 20, 80, 100))
                 isUptrend = (today_lma > lma_minus20) or (today_lma > lma_minus80) or (today_lma > lma_minus100)
                 isDowntrend = (today_lma < lma_minus20) and (today_lma < lma_minus80) and (today_lma < lma_minus100)
                 is50DMAUptrend = (today_sma > sma_minus9) or (today_sma > sma_minus14) or (today_sma > sma_minus20)
@@ -2559,7 +2492,7 @@ class ScreeningStatistics:
         import warnings
 
         warnings.filterwarnings("ignore")
-        data = df.copy()
+        data = self.frameCopy(df)
         data = data.rename(columns=str.capitalize)
         # df.columns = df.columns.str.title()
         # data.columns = [col.capitalize() for col in data.columns]
@@ -2626,9 +2559,7 @@ class ScreeningStatistics:
     def getTopsAndBottoms(self, df, window=3, numTopsBottoms=6):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data.reset_index(inplace=True)
         data.rename(columns={"index": "Date"}, inplace=True)
         data = data[data["high"]>0]
@@ -2858,54 +2789,75 @@ class ScreeningStatistics:
         return dataframe
     
     # Preprocess the acquired data
-    def preprocessData(self, df, daysToLookback=None):
+    def preprocessData(self, df, daysToLookback=None, symbol=None, timeframe=None, indicators=None, columns=None):
+        """
+        Returns (fullData, trimmedData): df with the indicator columns, latest
+        first. indicators: the values of those columns for exactly the rows of
+        df, if already computed for the whole universe (see PKPanelIndicators).
+        columns: the indicator columns to compute (see PKScanPlan), all if None.
+        """
         assert isinstance(df, pd.DataFrame)
-        data = df.copy()
+        if columns is not None and all(col in columns for col in INDICATOR_COLUMNS):
+            columns = None
+        if symbol is None:
+            return self._preprocessData(df, daysToLookback=daysToLookback, indicators=indicators, columns=columns)
+        # Memoized across the scans (e.g. piped monitor options) of this process
+        cache = PKIndicatorCache.sharedCache()
+        daysToLookback = self.configManager.daysToLookback if daysToLookback is None else daysToLookback
+        cacheKey = cache.keyFor(symbol, df, self.configManager.useEMA, daysToLookback, timeframe)
+        if columns is not None and cacheKey is not None and cacheKey not in cache:
+            # Frames with only some of the indicators are remembered apart from
+            # the complete ones, which serve any columns. One lookup either way,
+            # so a miss is only counted once.
+            cacheKey = cacheKey + (tuple(columns),)
+        frames = cache.get(cacheKey)
+        if frames is None:
+            frames = cache.put(cacheKey, self._preprocessData(df, daysToLookback=daysToLookback, indicators=indicators, columns=columns))
+        if cacheKey is not None:
+            # The cache hands out copies of both frames
+            self.frameCopies += 2
+        return frames
+
+    def _preprocessData(self, df, daysToLookback=None, indicators=None, columns=None):
+        if indicators is not None and len(indicators) == len(df):
+            return preprocessedFrames(df, indicators, self.configManager.daysToLookback if daysToLookback is None else daysToLookback)
+        if columns is None:
+            columns = INDICATOR_COLUMNS
+        # replace returns the (only) copy of df that gets the indicator columns
+        self.frameCopies += 1
+        data = df.replace([np.inf, -np.inf], np.nan)
         try:
-            data = data.replace(np.inf, np.nan).replace(-np.inf, np.nan).dropna(how="all")
+            data = data.dropna(how="all")
             if data.empty:
                 return (data,data)
             # self.default_logger.info(f"Preprocessing data:\n{data.head(1)}\n")
             if daysToLookback is None:
                 daysToLookback = self.configManager.daysToLookback
-            volatility = df["close"].rolling(window=20).std()
-            if self.configManager.useEMA:
-                sma = pktalib.EMA(data["close"], timeperiod=50)
-                lma = pktalib.EMA(data["close"], timeperiod=200)
-                ssma = pktalib.EMA(data["close"], timeperiod=9)
-                ssma20 = pktalib.EMA(data["close"], timeperiod=20)
-                data.insert(len(data.columns), "SMA", sma)
-                data.insert(len(data.columns), "LMA", lma)
-                data.insert(len(data.columns), "SSMA", ssma)
-                data.insert(len(data.columns), "SSMA20", ssma20)
-                data.insert(len(data.columns), "Volatility", volatility)
-            else:
-                sma = pktalib.SMA(data["close"], timeperiod=50)
-                lma = pktalib.SMA(data["close"], timeperiod=200)
-                ssma = pktalib.SMA(data["close"], timeperiod=9)
-                ssma20 = pktalib.SMA(data["close"], timeperiod=20)
-                data.insert(len(data.columns), "SMA", sma)
-                data.insert(len(data.columns), "LMA", lma)
-                data.insert(len(data.columns), "SSMA", ssma)
-                data.insert(len(data.columns), "SSMA20", ssma20)
-                data.insert(len(data.columns), "Volatility", volatility)
-            vol = pktalib.SMA(data["volume"], timeperiod=20)
-            rsi = pktalib.RSI(data["close"], timeperiod=14)
-            data.insert(len(data.columns), "VolMA", vol)
-            data.insert(len(data.columns), "RSI", rsi)
-            cci = pktalib.CCI(data["high"], data["low"], data["close"], timeperiod=14)
-            data.insert(len(data.columns), "CCI", cci)
-            try:
-                fastk, fastd = pktalib.STOCHRSI(
-                    data["close"], timeperiod=14, fastk_period=5, fastd_period=3, fastd_matype=0
-                )
-                data.insert(len(data.columns), "FASTK", fastk)
-                data.insert(len(data.columns), "FASTD", fastd)
-            except KeyboardInterrupt: # pragma: no cover
-                raise KeyboardInterrupt
-            except Exception as e: # pragma: no cover
-                self.default_logger.debug(e, exc_info=True)
-                pass
+            movingAverage = pktalib.EMA if self.configManager.useEMA else pktalib.SMA
+            for col, timeperiod in [("SMA", 50), ("LMA", 200), ("SSMA", 9), ("SSMA20", 20)]:
+                if col in columns:
+                    data.insert(len(data.columns), col, movingAverage(data["close"], timeperiod=timeperiod))
+            if "Volatility" in columns:
+                data.insert(len(data.columns), "Volatility", df["close"].rolling(window=20).std())
+            if "VolMA" in columns:
+                data.insert(len(data.columns), "VolMA", pktalib.SMA(data["volume"], timeperiod=20))
+            if "RSI" in columns:
+                data.insert(len(data.columns), "RSI", pktalib.RSI(data["close"], timeperiod=14))
+            if "CCI" in columns:
+                cci = pktalib.CCI(data["high"], data["low"], data["close"], timeperiod=14)
+                data.insert(len(data.columns), "CCI", cci)
+            if "FASTK" in columns or "FASTD" in columns:
+                try:
+                    fastk, fastd = pktalib.STOCHRSI(
+                        data["close"], timeperiod=14, fastk_period=5, fastd_period=3, fastd_matype=0
+                    )
+                    data.insert(len(data.columns), "FASTK", fastk)
+                    data.insert(len(data.columns), "FASTD", fastd)
+                except KeyboardInterrupt: # pragma: no cover
+                    raise KeyboardInterrupt
+                except Exception as e: # pragma: no cover
+                    self.default_logger.debug(e, exc_info=True)
+                    pass
         except KeyboardInterrupt: # pragma: no cover
             raise KeyboardInterrupt
         except Exception as e: # pragma: no cover
@@ -2923,18 +2875,10 @@ class ScreeningStatistics:
         if df is None or len(df) == 0:
             return False
         # https://chartink.com/screener/15-min-price-volume-breakout
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         # Need at least 20 rows for SMA20 calculation
         if len(data) < 20:
             return False
-        # Ensure data is sorted with oldest date first for SMA calculation
-        if not data.empty and hasattr(data.index, 'sort_values'):
-            try:
-                data = data.sort_index(ascending=True)
-            except:
-                pass
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         data["SMA20"] = pktalib.SMA(data["close"], 20)
         data["SMA20V"] = pktalib.SMA(data["volume"], 20)
@@ -2957,10 +2901,8 @@ class ScreeningStatistics:
     def validateBullishForTomorrow(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
         # https://chartink.com/screener/bullish-for-tomorrow
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         macdLine = pktalib.MACD(data["close"], 12, 26, 9)[0].tail(3)
         macdSignal = pktalib.MACD(data["close"], 12, 26, 9)[1].tail(3)
@@ -2992,9 +2934,7 @@ class ScreeningStatistics:
     def validateCCI(self, df, screenDict, saveDict, minCCI, maxCCI):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         cci = int(data.head(1)["CCI"].iloc[0])
         saveDict["CCI"] = cci
         if (cci >= minCCI and cci <= maxCCI) and "Trend" in saveDict.keys():
@@ -3014,7 +2954,7 @@ class ScreeningStatistics:
     def validateConfluence(self, stock, df, full_df, screenDict, saveDict, percentage=0.1,confFilter=3):
         if df is None or len(df) == 0:
             return False
-        data = df.copy() if confFilter < 4 else full_df.copy()
+        data = df if confFilter < 4 else full_df
         recent = data.head(2)
         if len(recent) < 2:
             return False
@@ -3025,80 +2965,68 @@ class ScreeningStatistics:
         saved = self.findCurrentSavedValue(screenDict,saveDict,"MA-Signal")
         if confFilter == 4:
             maxRecentDays = int(self.configManager.superConfluenceMaxReviewDays)
-            recentCurrentDay = 1
-            isSuperConfluence = False
-            ema_8 = 0
-            ema_21 = 0
-            ema_55 = 0
             reversedData = data[::-1]  # Reverse the dataframe so that it's oldest data first
             emas = self.configManager.superConfluenceEMAPeriods.split(",")
             if len(emas) < 2:
                 emas = [8,21,]
-            ema8CrossedEMA21 = False
-            ema8CrossedEMA55 = False
-            ema21CrossedEMA55 = False
-            emasCrossedSMA200 = False
-            silverCross = False
-            while recentCurrentDay <= maxRecentDays:
-                # 8 ema>21 ema > 55 ema >200 sma each OF THE ema AND THE 200 sma SEPARATED BY LESS THAN 1%(ideally 0.1% TO 0.5%) DURING CONFLUENCE
-                if len(emas) >= 1:
-                    ema_8 = pktalib.EMA(reversedData["close"],int(emas[0])).tail(recentCurrentDay).head(1).iloc[0]
-                    ema_8_prev = pktalib.EMA(reversedData["close"],int(emas[0])).tail(recentCurrentDay+1).head(1).iloc[0]
-                if len(emas) >= 2:
-                    ema_21 = pktalib.EMA(reversedData["close"],int(emas[1])).tail(recentCurrentDay).head(1).iloc[0]
-                    ema_21_prev = pktalib.EMA(reversedData["close"],int(emas[1])).tail(recentCurrentDay+1).head(1).iloc[0]
-                if len(emas) >= 3:
-                    ema_55 = pktalib.EMA(reversedData["close"],int(emas[2])).tail(recentCurrentDay).head(1).iloc[0]
-                    ema_55_prev = pktalib.EMA(reversedData["close"],int(emas[2])).tail(recentCurrentDay+1).head(1).iloc[0]
-                
-                ema8CrossedEMA21 = (ema_8 >= ema_21 and ema_8_prev <= ema_21_prev) or ema8CrossedEMA21
-                ema8CrossedEMA55 = (ema_8 >= ema_55 and ema_8_prev <= ema_55_prev) or ema8CrossedEMA55
-                ema21CrossedEMA55 = (ema_21 >= ema_55 and ema_21_prev <= ema_55_prev) or ema21CrossedEMA55
-                
-                sma_200 = pktalib.SMA(reversedData["close"],200).tail(recentCurrentDay).head(1).iloc[0]
-                # ema9 = pktalib.EMA(reversedData["close"],9).tail(recentCurrentDay).head(1).iloc[0]
-                # smaRange = sma_200 * percentage
-                superConfluenceEnforce200SMA = self.configManager.superConfluenceEnforce200SMA
-                # ema_min = min(ema_8, ema_21, ema_55)
-                ema55_percentage = abs(ema_55 - sma_200) / ema_55
-                emasCrossedSMA200 = ((ema55_percentage <= percentage)) or emasCrossedSMA200 # (sma_200 <= ema_min and sma_200 <= ema_55)
-                if not superConfluenceEnforce200SMA:
-                    emasCrossedSMA200 = True
-                superbConfluence = sum([ema8CrossedEMA21, emasCrossedSMA200]) >= 2 # ema8CrossedEMA55, ema21CrossedEMA55
-                if superbConfluence:
-                    indexDate = PKDateUtilities.dateFromYmdString(str(data.index[recentCurrentDay-1]).split(" ")[0])
-                    dayDate = f"{indexDate.day}/{indexDate.month}"
-                    screenDict["MA-Signal"] = (
-                        saved[0] 
-                        + (colorText.GREEN)
-                        + f"SuperGoldenConf.({dayDate})"
-                        + colorText.END
-                    )
-                    saveDict["MA-Signal"] = saved[1] + f"SuperGoldenConf(-{dayDate})"
-                    screenDict[f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)"] = f"{colorText.GREEN if (ema_8>=ema_21 and ema_8>=ema_55) else (colorText.WARN if (ema_8>=ema_21 or ema_8>=ema_55) else colorText.FAIL)}{round(ema_8,1)}{colorText.END},{colorText.GREEN if ema_21>=ema_55 else colorText.FAIL}{round(ema_21,1)}{colorText.END},{round(ema_55,1)}, {colorText.GREEN if sma_200<= ema_55 and emasCrossedSMA200 else (colorText.WARN if sma_200<= ema_55 else colorText.FAIL)}{round(sma_200,1)} ({round(ema55_percentage*100,1)}%){colorText.END}"
-                    saveDict[f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)"] = f"{round(ema_8,1)},{round(ema_21,1)},{round(ema_55,1)}, {round(sma_200,1)} ({round(ema55_percentage*100,1)}%)"
-                    saveDict[f"SuperConfSort"] = int(f"{indexDate.year:04}{indexDate.month:02}{indexDate.day:02}") #0 if ema_8>=ema_21 and ema_8>=ema_55 and ema_21>=ema_55 and sma_200<=ema_55 else (1 if (ema_8>=ema_21 or ema_8>=ema_55) else (2 if sma_200<=ema_55 else 3))
-                    screenDict[f"SuperConfSort"] = saveDict[f"SuperConfSort"]
-                    return superbConfluence
-                elif ema8CrossedEMA21 and ema8CrossedEMA55 and ema21CrossedEMA55:
-                    indexDate = PKDateUtilities.dateFromYmdString(str(data.index[recentCurrentDay-1]).split(" ")[0])
-                    dayDate = f"{indexDate.day}/{indexDate.month}"
-                    screenDict["MA-Signal"] = (
-                        saved[0] 
-                        + (colorText.WHITE)
-                        + f"SilverCrossConf.({dayDate})"
-                        + colorText.END
-                    )
-                    saveDict["MA-Signal"] = saved[1] + f"SilverCrossConf.({dayDate})"
-                    screenDict[f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)"] = f"{colorText.GREEN if (ema_8>=ema_21 and ema_8>=ema_55) else (colorText.WARN if (ema_8>=ema_21 or ema_8>=ema_55) else colorText.FAIL)}{round(ema_8,1)}{colorText.END},{colorText.GREEN if ema_21>=ema_55 else colorText.FAIL}{round(ema_21,1)}{colorText.END},{round(ema_55,1)}, {colorText.GREEN if sma_200<= ema_55 and emasCrossedSMA200 else (colorText.WARN if sma_200<= ema_55 else colorText.FAIL)}{round(sma_200,1)} ({round(ema55_percentage*100,1)}%){colorText.END}"
-                    saveDict[f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)"] = f"{round(ema_8,1)},{round(ema_21,1)},{round(ema_55,1)}, {round(sma_200,1)} ({round(ema55_percentage*100,1)}%)"
-                    saveDict[f"SuperConfSort"] = int(f"{indexDate.year:04}{indexDate.month:02}{indexDate.day:02}") #0 if ema_8>=ema_21 and ema_8>=ema_55 and ema_21>=ema_55 and sma_200<=ema_55 else (1 if (ema_8>=ema_21 or ema_8>=ema_55) else (2 if sma_200<=ema_55 else 3))
-                    screenDict[f"SuperConfSort"] = saveDict[f"SuperConfSort"]
-                    silverCross = True
-                
-                recentCurrentDay += 1
-            
-            if silverCross:
+            # Each series is computed once. Day d (1 = latest) of the review window
+            # is at position len-d, its previous candle at len-d-1 (both clipped at 0,
+            # like tail(d).head(1) does).
+            closes = reversedData["close"]
+            emaSeries = [np.asarray(pktalib.EMA(closes,int(period)), dtype=float) for period in emas[:3]]
+            while len(emaSeries) < 3:
+                emaSeries.append(np.zeros(len(closes)))
+            sma200Series = np.asarray(pktalib.SMA(closes,200), dtype=float)
+            reviewDays = np.arange(1, maxRecentDays + 1)
+            current = np.maximum(len(closes) - reviewDays, 0)
+            previous = np.maximum(len(closes) - reviewDays - 1, 0)
+
+            def crossedSoFar(fast, slow):
+                # fast crossed over slow on the day or on any later (more recent) day of the window
+                crossed = (fast[current] >= slow[current]) & (fast[previous] <= slow[previous])
+                return np.logical_or.accumulate(crossed)
+
+            ema8Series, ema21Series, ema55Series = emaSeries
+            ema8CrossedEMA21 = crossedSoFar(ema8Series, ema21Series)
+            ema8CrossedEMA55 = crossedSoFar(ema8Series, ema55Series)
+            ema21CrossedEMA55 = crossedSoFar(ema21Series, ema55Series)
+            # 8 ema>21 ema > 55 ema >200 sma each OF THE ema AND THE 200 sma SEPARATED BY LESS THAN 1%(ideally 0.1% TO 0.5%) DURING CONFLUENCE
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ema55Percentages = np.abs(ema55Series[current] - sma200Series[current]) / ema55Series[current]
+            if self.configManager.superConfluenceEnforce200SMA:
+                emasCrossedSMA200 = np.logical_or.accumulate(ema55Percentages <= percentage)
+            else:
+                emasCrossedSMA200 = np.ones(len(reviewDays), dtype=bool)
+            superbConfluence = ema8CrossedEMA21 & emasCrossedSMA200 # ema8CrossedEMA55, ema21CrossedEMA55
+            silverCross = ema8CrossedEMA21 & ema8CrossedEMA55 & ema21CrossedEMA55
+            if superbConfluence.any():
+                # The most recent day with a super confluence
+                day = int(np.argmax(superbConfluence))
+                confText, confColor = "SuperGoldenConf", colorText.GREEN
+            elif silverCross.any():
+                # The oldest day of the window with a silver cross
+                day = len(silverCross) - 1 - int(np.argmax(silverCross[::-1]))
+                confText, confColor = "SilverCrossConf.", colorText.WHITE
+            else:
+                day = None
+            if day is not None:
+                ema_8, ema_21, ema_55 = ema8Series[current[day]], ema21Series[current[day]], ema55Series[current[day]]
+                sma_200 = sma200Series[current[day]]
+                ema55_percentage = ema55Percentages[day]
+                emasCrossedSMA200Day = emasCrossedSMA200[day]
+                indexDate = PKDateUtilities.dateFromYmdString(str(data.index[day]).split(" ")[0])
+                dayDate = f"{indexDate.day}/{indexDate.month}"
+                screenDict["MA-Signal"] = (
+                    saved[0] 
+                    + (confColor)
+                    + f"{confText.rstrip('.')}.({dayDate})"
+                    + colorText.END
+                )
+                saveDict["MA-Signal"] = saved[1] + (f"SuperGoldenConf(-{dayDate})" if superbConfluence.any() else f"SilverCrossConf.({dayDate})")
+                screenDict[f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)"] = f"{colorText.GREEN if (ema_8>=ema_21 and ema_8>=ema_55) else (colorText.WARN if (ema_8>=ema_21 or ema_8>=ema_55) else colorText.FAIL)}{round(ema_8,1)}{colorText.END},{colorText.GREEN if ema_21>=ema_55 else colorText.FAIL}{round(ema_21,1)}{colorText.END},{round(ema_55,1)}, {colorText.GREEN if sma_200<= ema_55 and emasCrossedSMA200Day else (colorText.WARN if sma_200<= ema_55 else colorText.FAIL)}{round(sma_200,1)} ({round(ema55_percentage*100,1)}%){colorText.END}"
+                saveDict[f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)"] = f"{round(ema_8,1)},{round(ema_21,1)},{round(ema_55,1)}, {round(sma_200,1)} ({round(ema55_percentage*100,1)}%)"
+                saveDict[f"SuperConfSort"] = int(f"{indexDate.year:04}{indexDate.month:02}{indexDate.day:02}") #0 if ema_8>=ema_21 and ema_8>=ema_55 and ema_21>=ema_55 and sma_200<=ema_55 else (1 if (ema_8>=ema_21 or ema_8>=ema_55) else (2 if sma_200<=ema_55 else 3))
+                screenDict[f"SuperConfSort"] = saveDict[f"SuperConfSort"]
                 return True
         is20DMACrossover50DMA = (recent["SSMA20"].iloc[0] >= recent["SMA"].iloc[0]) and \
                             (recent["SSMA20"].iloc[1] <= recent["SMA"].iloc[1])
@@ -3170,8 +3098,7 @@ class ScreeningStatistics:
     def findPotentialProfitableEntriesBullishTodayForPDOPDC(self, df, saveDict, screenDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        reversedData = data[::-1]  # Reverse the dataframe
+        reversedData = df[::-1]  # Reverse the dataframe
         recentClose = reversedData["close"].tail(1).head(1).iloc[0]
         yesterdayClose = reversedData["close"].tail(2).head(1).iloc[0]
         recentOpen = reversedData["open"].tail(1).head(1).iloc[0]
@@ -3190,11 +3117,10 @@ class ScreeningStatistics:
     def findPotentialProfitableEntriesFrequentHighsBullishMAs(self, df, full_df, saveDict, screenDict):
         if df is None or len(df) == 0 or full_df is None or len(full_df) == 0:
             return False
-        data = full_df.copy()
         one_week = 5
-        if len(data) < 45 * one_week:
+        if len(full_df) < 45 * one_week:
             return False
-        reversedData = data[::-1]  # Reverse the dataframe
+        reversedData = full_df[::-1]  # Reverse the dataframe
         lma_200 = reversedData["LMA"]
         sma_50 = reversedData["SMA"]
         full52Week = reversedData.tail(50 * one_week)
@@ -3233,8 +3159,7 @@ class ScreeningStatistics:
     def findPotentialProfitableEntriesForFnOTradesAbove50MAAbove200MA5Min(self, df_5min, full_df, saveDict, screenDict):
         if df_5min is None or len(df_5min) == 0 or full_df is None or len(full_df) == 0:
             return False
-        data = full_df.copy()
-        reversedData = data[::-1]  # Reverse the dataframe
+        reversedData = full_df[::-1]  # Reverse the dataframe
         recentClose = reversedData["close"].tail(1).head(1).iloc[0]
         prevClose = reversedData["close"].tail(2).head(1).iloc[0]
         tradingAbove2Percent = (recentClose-prevClose)*100/prevClose > 2
@@ -3253,8 +3178,7 @@ class ScreeningStatistics:
                     'Adj Close': 'last',
                     "volume":'sum'
                 }
-                data_5min = df_5min.copy()
-                reversedData_5min = data_5min[::-1]  # Reverse the dataframe
+                reversedData_5min = df_5min[::-1]  # Reverse the dataframe
                 reversedData_5min = reversedData_5min.resample(f'5T', offset='15min').agg(ohlc_dict)
                 reversedData_5min.dropna(inplace=True)
                 sma200_5min = pktalib.SMA(reversedData_5min["close"],timeperiod=200)
@@ -3266,9 +3190,7 @@ class ScreeningStatistics:
     def validateConsolidation(self, df, screenDict, saveDict, percentage=10):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         hc = data.describe()["close"]["max"]
         lc = data.describe()["close"]["min"]
         if (hc - lc) <= (hc * percentage / 100) and (hc - lc != 0):
@@ -3293,7 +3215,7 @@ class ScreeningStatistics:
     def validateConsolidationContraction(self, df,legsToCheck=2,stockName=None):
         if df is None or len(df) == 0:
             return False,[],0
-        data = df.copy()
+        data = self.frameCopy(df)
         # We can use window =3 because we need at least 3 candles to get the next top or bottom
         # but to better identify the pattern, we'd use window = 5
         tops, bots = self.getTopsAndBottoms(df=data,window=5,numTopsBottoms=3*(legsToCheck if legsToCheck > 0 else 3))
@@ -3369,7 +3291,7 @@ class ScreeningStatistics:
     def validateHigherHighsHigherLowsHigherClose(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
+        data = df
         day0 = data
         day1 = data[1:]
         day2 = data[2:]
@@ -3395,7 +3317,7 @@ class ScreeningStatistics:
         #                 (day1["RSI"].iloc[0] > day2["RSI"].iloc[0]) and \
         #                 (day2["RSI"].iloc[0] > day3["RSI"].iloc[0]) and \
         #                 day3["RSI"].iloc[0] >= 50 and day0["RSI"].iloc[0] >= 65
-        reversedData = data[::-1].copy()
+        reversedData = self.frameCopy(data[::-1])
         reversedData["SUPERT"] = pktalib.supertrend(reversedData, 7, 3)["SUPERT_7_3.0"]
         reversedData["EMA8"] = pktalib.EMA(reversedData["close"], timeperiod=9)
         higherClose = (
@@ -3412,64 +3334,49 @@ class ScreeningStatistics:
     ):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        orgData = data
+        if chartPattern == 1:
+            trendFits = "Up" in saveDict["Trend"] and (
+                "Bull" in saveDict["MA-Signal"] or "Support" in saveDict["MA-Signal"]
+            )
+        else:
+            trendFits = "Down" in saveDict["Trend"] and (
+                "Bear" in saveDict["MA-Signal"] or "Resist" in saveDict["MA-Signal"]
+            )
+        lookbacks = list(range(int(daysToLookback), int(round(daysToLookback * 0.5)) - 1, -1))
+        if len(lookbacks) == 0:
+            return 0
+        if not trendFits or lookbacks[0] == 2:
+            return 0
         saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
-        for i in range(int(daysToLookback), int(round(daysToLookback * 0.5)) - 1, -1):
+        data = df.head(lookbacks[0])
+        high, low = data["high"].to_numpy(), data["low"].to_numpy()
+        # The candle i-1 is the reference (mother) candle of the i most recent
+        # candles if none of them goes beyond its high and low
+        insideBars = ~(
+            (np.fmax.accumulate(high) > high)
+            | (np.fmin.accumulate(low) < low)
+            | (np.fmax.accumulate(data["open"].to_numpy()) > high)
+            | (np.fmin.accumulate(data["close"].to_numpy()) < low)
+        )
+        for i in lookbacks:
             if i == 2:
                 return 0  # Exit if only last 2 candles are left
-            if chartPattern == 1:
-                if "Up" in saveDict["Trend"] and (
-                    "Bull" in saveDict["MA-Signal"]
-                    or "Support" in saveDict["MA-Signal"]
-                ):
-                    data = orgData.head(i)
-                    refCandle = data.tail(1)
-                    if (
-                        (len(data.high[data.high > refCandle.high.item()]) == 0)
-                        and (len(data.low[data.low < refCandle.low.item()]) == 0)
-                        and (len(data.open[data.open > refCandle.high.item()]) == 0)
-                        and (len(data.close[data.close < refCandle.low.item()]) == 0)
-                    ):
-                        screenDict["Pattern"] = (
-                            saved[0]
-                            + colorText.WARN
-                            + ("Inside Bar (%d)" % i)
-                            + colorText.END
-                        )
-                        saveDict["Pattern"] = saved[1] + "Inside Bar (%d)" % i
-                        return i
-                else:
-                    return 0
-            else:
-                if "Down" in saveDict["Trend"] and (
-                    "Bear" in saveDict["MA-Signal"] or "Resist" in saveDict["MA-Signal"]
-                ):
-                    data = orgData.head(i)
-                    refCandle = data.tail(1)
-                    if (
-                        (len(data.high[data.high > refCandle.high.item()]) == 0)
-                        and (len(data.low[data.low < refCandle.low.item()]) == 0)
-                        and (len(data.open[data.open > refCandle.high.item()]) == 0)
-                        and (len(data.close[data.close < refCandle.low.item()]) == 0)
-                    ):
-                        screenDict["Pattern"] = (
-                            saved[0]
-                            + colorText.WARN
-                            + ("Inside Bar (%d)" % i)
-                            + colorText.END
-                        )
-                        saveDict["Pattern"] = saved[1] + "Inside Bar (%d)" % i
-                        return i
-                else:
-                    return 0
+            if i > 0 and insideBars[min(i, len(data)) - 1]:
+                screenDict["Pattern"] = (
+                    saved[0]
+                    + colorText.WARN
+                    + ("Inside Bar (%d)" % i)
+                    + colorText.END
+                )
+                saveDict["Pattern"] = saved[1] + "Inside Bar (%d)" % i
+                return i
         return 0
 
     # Find IPO base
     def validateIpoBase(self, stock, df, screenDict, saveDict, percentage=0.3):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
+        data = df
         listingPrice = data[::-1].head(1)["open"].iloc[0]
         currentPrice = data.head(1)["close"].iloc[0]
         ATH = data.describe()["high"]["max"]
@@ -3507,61 +3414,19 @@ class ScreeningStatistics:
     def validateLorentzian(self, df, screenDict, saveDict, lookFor=3,stock=None):
         if df is None or len(df) < 20:
             return False
-        data = df.copy()
         # lookFor: 1-Buy, 2-Sell, 3-Any
-        data = data[::-1]  # Reverse the dataframe
-        data = data.rename(
-            columns={
-                "open": "open",
-                "close": "close",
-                "high": "high",
-                "low": "low",
-                "volume": "volume",
-            }
-        )
+        data = df[::-1]  # Reverse the dataframe
         try:
-            with SuppressOutput(suppress_stdout=True, suppress_stderr=True):
-                lc = ata.LorentzianClassification(data=data,
-                features=[
-                    ata.LorentzianClassification.Feature("RSI", 14, 2),  # f1
-                    ata.LorentzianClassification.Feature("WT", 10, 11),  # f2
-                    ata.LorentzianClassification.Feature("CCI", 20, 2),  # f3
-                    ata.LorentzianClassification.Feature("ADX", 20, 2),  # f4
-                    ata.LorentzianClassification.Feature("RSI", 9, 2),   # f5
-                    pktalib.MFI(data["high"], data["low"], data["close"], data["volume"], 14) #f6
-                ],
-                settings=ata.LorentzianClassification.Settings(
-                    source=data["close"],
-                    neighborsCount=8,
-                    maxBarsBack=2000,
-                    useDynamicExits=False
-                ),
-                filterSettings=ata.LorentzianClassification.FilterSettings(
-                    useVolatilityFilter=True,
-                    useRegimeFilter=True,
-                    useAdxFilter=False,
-                    regimeThreshold=-0.1,
-                    adxThreshold=20,
-                    kernelFilter = ata.LorentzianClassification.KernelFilter(
-                        useKernelSmoothing = False,
-                        lookbackWindow = 8,
-                        relativeWeight = 8.0,
-                        regressionLevel = 25,
-                        crossoverLag = 2,
-                    )
-                ))
-            # if stock is not None:
-            #     lc.dump(f'{stock}_result.csv')
-            #     lc.plot(f'{stock}_result.jpg')
+            signal = PKLorentzianClassifier.sharedClassifier().lastSignal(stock, data)
             saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
-            if lc.df.iloc[-1]["isNewBuySignal"]:
+            if signal > 0:
                 screenDict["Pattern"] = (
                     saved[0] + colorText.GREEN + "Lorentzian-Buy" + colorText.END
                 )
                 saveDict["Pattern"] = saved[1] + "Lorentzian-Buy"
                 if lookFor != 2: # Not Sell
                     return True
-            elif lc.df.iloc[-1]["isNewSellSignal"]:
+            elif signal < 0:
                 screenDict["Pattern"] = (
                     saved[0] + colorText.FAIL + "Lorentzian-Sell" + colorText.END
                 )
@@ -3571,14 +3436,6 @@ class ScreeningStatistics:
         except KeyboardInterrupt: # pragma: no cover
             raise KeyboardInterrupt
         except Exception as e:  # pragma: no cover
-            # ValueError: operands could not be broadcast together with shapes (20,) (26,)
-            # File "/opt/homebrew/lib/python3.11/site-packages/advanced_ta/LorentzianClassification/Classifier.py", line 186, in __init__
-            # File "/opt/homebrew/lib/python3.11/site-packages/advanced_ta/LorentzianClassification/Classifier.py", line 395, in __classify
-            # File "/opt/homebrew/lib/python3.11/site-packages/pandas/core/ops/common.py", line 76, in new_method
-            # File "/opt/homebrew/lib/python3.11/site-packages/pandas/core/arraylike.py", line 70, in __and__
-            # File "/opt/homebrew/lib/python3.11/site-packages/pandas/core/series.py", line 5810, in _logical_method
-            # File "/opt/homebrew/lib/python3.11/site-packages/pandas/core/ops/array_ops.py", line 456, in logical_op
-            # File "/opt/homebrew/lib/python3.11/site-packages/pandas/core/ops/array_ops.py", line 364, in na_logical_op
             self.default_logger.debug(e, exc_info=True)
             pass
         return False
@@ -3587,7 +3444,7 @@ class ScreeningStatistics:
     def validateLowerHighsLowerLows(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
+        data = df
         day0 = data
         day1 = data[1:]
         day2 = data[2:]
@@ -3614,9 +3471,7 @@ class ScreeningStatistics:
     def validateLowestVolume(self, df, daysForLowestVolume):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         if daysForLowestVolume is None:
             daysForLowestVolume = 30
         if len(data) < daysForLowestVolume:
@@ -3633,20 +3488,12 @@ class ScreeningStatistics:
 
     # Validate LTP within limits
     def validateLTP(self, df, screenDict, saveDict, minLTP=None, maxLTP=None,minChange=0):
-        data = df.copy()
+        data = self.cleanedCopy(df)
         ltpValid = False
         if minLTP is None:
             minLTP = self.configManager.minLTP
         if maxLTP is None:
             maxLTP = self.configManager.maxLTP
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        # Ensure data is sorted with latest date first (in case it wasn't sorted during load)
-        if not data.empty and hasattr(data.index, 'sort_values'):
-            try:
-                data = data.sort_index(ascending=False)
-            except:
-                pass
         recent = data.head(1)
 
         pct_change = (data[::-1]["close"].pct_change() * 100).iloc[-1]
@@ -3731,7 +3578,7 @@ class ScreeningStatistics:
         return ltpValid, verifyStageTwo
 
     def validateLTPForPortfolioCalc(self, df, screenDict, saveDict,requestedPeriod=0):
-        data = df.copy()
+        data = self.frameCopy(df)
         periods = self.configManager.periodsRange
         if requestedPeriod > 0 and requestedPeriod not in periods:
             periods.append(requestedPeriod)
@@ -3787,9 +3634,7 @@ class ScreeningStatistics:
     def validateMACDHistogramBelow0(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         macd = pktalib.MACD(data["close"], 12, 26, 9)[2].tail(1)
         return macd.iloc[:1][0] < 0
@@ -3799,32 +3644,20 @@ class ScreeningStatistics:
     def validateMomentum(self, df, screenDict, saveDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
         try:
-            data = data.head(3)
+            data = df.head(3)
             if len(data) < 3:
                 return False
-            for row in data.iterrows():
-                # All 3 candles should be Green and NOT Circuits
-                yc = row[1]["close"]
-                yo = row[1]["open"]
-                if yc <= yo:
-                    # self.default_logger.info(
-                    #     f'Stock:{saveDict["Stock"]}, is not a momentum-gainer because yesterday-close ({yc}) <= yesterday-open ({yo})'
-                    # )
-                    return False
-            openDesc = data.sort_values(by=["open"], ascending=False)
-            closeDesc = data.sort_values(by=["close"], ascending=False)
-            volDesc = data.sort_values(by=["volume"], ascending=False)
+            # All 3 candles should be Green and NOT Circuits
+            if (data["close"].to_numpy() <= data["open"].to_numpy()).any():
+                return False
             try:
+                # open, close and volume rising from the day before yesterday to today
                 if (
-                    data.equals(openDesc)
-                    and data.equals(closeDesc)
-                    and data.equals(volDesc)
+                    self.risingToLatest(data["open"])
+                    and self.risingToLatest(data["close"])
+                    and self.risingToLatest(data["volume"])
                 ):
-                    # self.default_logger.info(
-                    #     f'Stock:{saveDict["Stock"]}, open,close and volume equal from day before yesterday. A potential momentum-gainer!'
-                    # )
                     to = data["open"].iloc[0]
                     yc = data["close"].iloc[1]
                     yo = data["open"].iloc[1]
@@ -3859,9 +3692,7 @@ class ScreeningStatistics:
     #@measure_time
     # Validate Moving averages and look for buy/sell signals
     def validateMovingAverages(self, df, screenDict, saveDict, maRange=2.5,maLength=0,filters={}):
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         recent = data.head(1)
         maSignals = []
         if str(maLength) in ["0","2","3"]:
@@ -3967,10 +3798,10 @@ class ScreeningStatistics:
     def validateNarrowRange(self, df, screenDict, saveDict, nr=4):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
+        data = df
         saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
         if PKDateUtilities.isTradingTime():
-            rangeData = data.head(nr + 1)[1:]
+            rangeData = self.frameCopy(data.head(nr + 1)[1:])
             now_candle = data.head(1)
             rangeData["Range"] = abs(rangeData["close"] - rangeData["open"])
             recent = rangeData.head(1)
@@ -3998,7 +3829,7 @@ class ScreeningStatistics:
                     return True
             return False
         else:
-            rangeData = data.head(nr)
+            rangeData = self.frameCopy(data.head(nr))
             rangeData.loc[:,'Range'] = abs(rangeData["close"] - rangeData["open"])
             recent = rangeData.head(1)
             if recent["Range"].iloc[0] == rangeData.describe()["Range"]["min"]:
@@ -4013,7 +3844,7 @@ class ScreeningStatistics:
     def validateNewlyListed(self, df, daysToLookback):
         if df is None or len(df) == 0 or len(df) > 220:
             return False
-        data = df.copy()
+        data = df
         if str(daysToLookback).endswith("y"):
             daysToLookback = '220d'
         daysToLookback = int(daysToLookback[:-1])
@@ -4029,8 +3860,7 @@ class ScreeningStatistics:
     def validatePriceActionCrosses(self, full_df, screenDict, saveDict,mas=[], isEMA=False, maDirectionFromBelow=True):
         if full_df is None or len(full_df) == 0:
             return False
-        data = full_df.copy()
-        reversedData = data[::-1]  # Reverse the dataframe so that it's oldest data first
+        reversedData = full_df[::-1]  # Reverse the dataframe so that it's oldest data first
         hasAtleastOneMACross = False
         for ma in mas:
             if len(reversedData) <= int(ma):
@@ -4049,7 +3879,7 @@ class ScreeningStatistics:
         if df is None or len(df) == 0:
             return False
         hasPriceCross = False
-        data = df.copy()
+        data = df
         pp_map = {"1":"PP","2":"S1","3":"S2","4":"S3","5":"R1","6":"R2","7":"R3"}
         if pivotPoint is not None and pivotPoint != "0" and str(pivotPoint).isnumeric():
             ppToCheck = pp_map[str(pivotPoint)]
@@ -4074,9 +3904,7 @@ class ScreeningStatistics:
     def validatePriceRisingByAtLeast2Percent(self, df, screenDict, saveDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         data = data.head(4)
         if len(data) < 4:
             return False
@@ -4106,9 +3934,7 @@ class ScreeningStatistics:
             return False
         if rsiKey not in df.columns:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         rsi = int(data.head(1)[rsiKey].iloc[0])
         saveDict[rsiKey] = rsi
         # https://chartink.com/screener/rsi-screening
@@ -4125,10 +3951,8 @@ class ScreeningStatistics:
     def validateShortTermBullish(self, df, screenDict, saveDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
         # https://chartink.com/screener/short-term-bullish
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         recent = data.head(1)
         fk = 0 if len(data) < 3 else np.round(data["FASTK"].iloc[2], 5)
         # Reverse the dataframe for ichimoku calculations with date in ascending order
@@ -4199,7 +4023,7 @@ class ScreeningStatistics:
     ):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
+        data = self.frameCopy(df)
         try:
             if self.configManager.enableAdditionalVCPEMAFilters:
                 reversedData = data[::-1] 
@@ -4216,8 +4040,8 @@ class ScreeningStatistics:
             data = data.replace([np.inf, -np.inf], 0)
             tops = data[data.tops > 0]
             # bots = data[data.bots > 0]
-            highestTop = round(tops.describe()["high"]["max"], 1)
-            allTimeHigh = max(data["high"])
+            highestTop = round(tops["high"].max(), 1)
+            allTimeHigh = data["high"].max()
             withinATHRange = data["close"].iloc[0] >= (allTimeHigh-allTimeHigh * float(self.configManager.vcpRangePercentageFromTop)/100)
             if not withinATHRange and self.configManager.enableAdditionalVCPFilters:
                 # Last close is not within all time high range
@@ -4226,15 +4050,13 @@ class ScreeningStatistics:
                 tops.tops > (highestTop - (highestTop * percentageFromTop))
             ]
             if filteredTops.equals(tops):  # Tops are in the range
-                lowPoints = []
-                for i in range(len(tops) - 1):
-                    endDate = tops.iloc[i]["Date"]
-                    startDate = tops.iloc[i + 1]["Date"]
-                    lowPoints.append(
-                        data[
-                            (data.Date >= startDate) & (data.Date <= endDate)
-                        ].describe()["low"]["min"]
-                    )
+                # Lowest low between every two consecutive tops
+                dates = data["Date"].to_numpy()
+                lows = data["low"].to_numpy()
+                topDates = tops["Date"].to_numpy()
+                between = (dates[None, :] >= topDates[1:, None]) & (dates[None, :] <= topDates[:-1, None])
+                lowPoints = np.where(between, lows[None, :], np.inf).min(axis=1, initial=np.inf)
+                lowPoints = [low if between[i].any() else np.nan for i, low in enumerate(lowPoints.tolist())]
                 lowPointsOrg = lowPoints
                 lowPoints.sort(reverse=True)
                 lowPointsSorted = lowPoints
@@ -4247,7 +4069,7 @@ class ScreeningStatistics:
                     and ltp > lowPoints[0]
                 ):
                     saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
-                    isTightening, consolidations, deviationScore = self.validateConsolidationContraction(df=df.copy(),legsToCheck=(int(self.configManager.vcpLegsToCheckForConsolidation) if self.configManager.enableAdditionalVCPFilters else 0),stockName=stockName)
+                    isTightening, consolidations, deviationScore = self.validateConsolidationContraction(df=self.frameCopy(df),legsToCheck=(int(self.configManager.vcpLegsToCheckForConsolidation) if self.configManager.enableAdditionalVCPFilters else 0),stockName=stockName)
                     consolidations = [f"{str(x)}%" for x in consolidations]
                     if isTightening:
                         screenDict["Pattern"] = (
@@ -4272,7 +4094,7 @@ class ScreeningStatistics:
     def validateVCPMarkMinervini(self, df:pd.DataFrame, screenDict, saveDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
+        data = df
         ohlc_dict = {
             "open":'first',
             "high":'max',
@@ -4287,19 +4109,16 @@ class ScreeningStatistics:
         w_ema_13 = pktalib.EMA(weeklyData["close"],timeperiod=13).tail(1).iloc[0]
         w_ema_26 = pktalib.EMA(weeklyData["close"],timeperiod=26).tail(1).iloc[0]
         w_sma_50 = pktalib.SMA(weeklyData["close"],timeperiod=50).tail(1).iloc[0]
-        w_sma_40 = pktalib.SMA(weeklyData["close"],timeperiod=40).tail(1).iloc[0]
-        w_sma_40_5w_ago = pktalib.SMA(weeklyData.head(len(weeklyData)-5)["close"],timeperiod=40).tail(1).iloc[0]
+        w_sma_40, w_sma_40_5w_ago, w_sma_40_10w_ago = pktalib.laggedSMAs(weeklyData["close"],timeperiod=40,lags=(0,5,10))
         w_min_50 = min(1.3*weeklyData.tail(50)["low"])
         w_max_50 = max(0.75*weeklyData.tail(50)["high"])
         w_ema_26_20w_ago = pktalib.EMA(weeklyData.head(len(weeklyData)-20)["close"],timeperiod=26).tail(1).iloc[0]
         recent_ema_13_20d_ago = pktalib.EMA(reversedData.head(len(reversedData)-20)["close"],timeperiod=13).tail(1).iloc[0]
-        w_sma_40_5w_ago = pktalib.SMA(weeklyData.head(len(weeklyData)-5)["close"],timeperiod=40).tail(1).iloc[0]
-        w_sma_40_10w_ago = pktalib.SMA(weeklyData.head(len(weeklyData)-10)["close"],timeperiod=40).tail(1).iloc[0]
         recent_sma_50 = pktalib.SMA(reversedData["close"],timeperiod=50).tail(1).iloc[0]
         w_wma_8 = pktalib.WMA(weeklyData["close"],timeperiod=8).tail(1).iloc[0]
         w_sma_8 = pktalib.SMA(weeklyData["close"],timeperiod=8).tail(1).iloc[0]
         numPreviousCandles = 20
-        pullbackData = data.head(numPreviousCandles)
+        pullbackData = self.frameCopy(data.head(numPreviousCandles))
         pullbackData.loc[:,'PullBack'] = pullbackData["close"].lt(pullbackData["open"]) #.shift(periods=1)) #& data["low"].lt(data["low"].shift(periods=1))
         shrinkedVolData = pullbackData[pullbackData["PullBack"] == True].head(numPreviousCandles)
         recentLargestVolume = max(pullbackData[pullbackData["PullBack"] == False].head(3)["volume"])
@@ -4342,9 +4161,7 @@ class ScreeningStatistics:
     ):
         if df is None or len(df) == 0:
             return False, False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.cleanedCopy(df)
         recent = data.head(1)
         # Either the rolling volume of past 20 sessions or today's volume should be > min volume
         hasMinimumVolume = (
@@ -4368,8 +4185,7 @@ class ScreeningStatistics:
         try:
             if df is None or len(df) == 0:
                 return False
-            data = df.copy()
-            data = data.head(2)
+            data = df.head(2)
             if len(data) < 2:
                 return False
             try:
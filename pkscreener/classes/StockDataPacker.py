@@ -0,0 +1,383 @@
+"""
+StockDataPacker - Columnar packing of the per-symbol stock data dictionary
+
+The stock data dictionary maps every symbol to a pandas "split" dictionary
+({"data": [[...]], "columns": [...], "index": [...]}) plus optional extra keys
+such as MF/FII/FairValue. This module flattens such a dictionary into:
+
+- one contiguous float64 block holding the OHLCV rows of all symbols
+- one int64 block holding the candle timestamps as epoch nanoseconds
+- a small symbol index (symbol -> row offsets and column positions)
+
+so that the data can be published once (shared memory, memory-mapped files)
+and sliced per symbol without copies.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from PKDevTools.classes.log import default_logger
+
+
+EXCHANGE_TIMEZONES = {"INDIA": "Asia/Kolkata", "NASDAQ": "America/New_York"}
+
+
+def exchangeTimezone(exchangeName="INDIA"):
+    return EXCHANGE_TIMEZONES.get(exchangeName, EXCHANGE_TIMEZONES["INDIA"])
+
+
+def _utcToWallNanos(nanos, timezone):
+    utc = pd.DatetimeIndex(np.asarray(nanos, dtype=np.int64).view("M8[ns]")).tz_localize("UTC")
+    return np.asarray(utc.tz_convert(timezone).tz_localize(None).asi8, dtype=np.int64)
+
+
+def _wallToDatetimeIndex(nanos, timezone, targetTimezone):
+    wall = pd.DatetimeIndex(np.asarray(nanos, dtype=np.int64).view("M8[ns]"))
+    return wall.tz_localize(timezone, ambiguous="NaT", nonexistent="NaT").tz_convert(targetTimezone)
+
+
+def _parseDatetimes(values, utc=False):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            # Uniformly formatted values (the usual case) take the fast path
+            return pd.to_datetime(values, utc=utc)
+        except (ValueError, TypeError):
+            return pd.to_datetime(values, format="mixed", utc=utc, errors="coerce")
+
+
+def toEpochNanos(indexValues, timezone=None):
+    """
+    Parses a list of index values (mixed formats) and returns them as epoch
+    nanoseconds.
+
+    Without a timezone, tz-aware values are converted to UTC and made naive.
+    That's what StockScreener used to do with pd.to_datetime(utc=True).
+    With a timezone (see exchangeTimezone), tz-aware values are converted to
+    the wall time of that timezone, and naive values are taken as already
+    being in it.
+    """
+    if indexValues is None or len(indexValues) == 0:
+        return np.empty(0, dtype=np.int64)
+    if all(isinstance(value, pd.Timestamp) for value in indexValues):
+        # Already parsed (DataFrame.to_dict("split")). Timestamp.value is the
+        # UTC epoch for tz-aware values and the wall time for naive ones.
+        nanos = np.fromiter((value.value for value in indexValues), dtype=np.int64, count=len(indexValues))
+        if timezone is not None:
+            aware = np.fromiter((value.tzinfo is not None for value in indexValues), dtype=bool, count=len(indexValues))
+            if aware.any():
+                nanos[aware] = _utcToWallNanos(nanos[aware], timezone)
+        return nanos
+    if timezone is not None:
+        try:
+            parsed = _parseDatetimes(list(indexValues))
+            if isinstance(parsed, pd.DatetimeIndex):
+                if parsed.tz is not None:
+                    parsed = parsed.tz_convert(timezone).tz_localize(None)
+                return np.asarray(parsed.asi8, dtype=np.int64)
+        except (ValueError, TypeError):
+            pass
+        # Mixed offsets or a mix of naive and tz-aware values. All of them
+        # are treated as tz-aware below.
+    parsed = _parseDatetimes(list(indexValues), utc=True)
+    nanos = np.asarray(parsed.tz_localize(None).asi8, dtype=np.int64)
+    return nanos if timezone is None else _utcToWallNanos(nanos, timezone)
+
+
+def buildDataFrame(values, columns, indexNanos, intColumns=(), descending=False, indexName=None, copy=False):
+    """
+    Builds an OHLCV DataFrame straight from a float64 block and an int64
+    epoch-ns index, without parsing, re-indexing or sorting. The rows must be
+    in ascending time order; descending=True returns them latest first (as
+    the screening validators expect).
+    """
+    if descending:
+        values = values[::-1]
+        indexNanos = indexNanos[::-1]
+    if copy:
+        values = np.array(values, dtype=np.float64)
+    index = pd.DatetimeIndex(np.array(indexNanos, dtype=np.int64).view("M8[ns]"), name=indexName)
+    if len(intColumns) == 0:
+        return pd.DataFrame(values, columns=columns, index=index, copy=False)
+    # Keep the integer dtype the original rows had (typically volume)
+    return pd.DataFrame(
+        {col: (values[:, pos].astype(np.int64) if col in intColumns else values[:, pos]) for pos, col in enumerate(columns)},
+        index=index,
+        copy=False,
+    )
+
+
+class PackedStockData:
+    """
+    Columnar representation of a stock data dictionary.
+
+    values        : float64 array of shape (totalRows, len(columns))
+    index         : int64 array of shape (totalRows,) with epoch nanoseconds,
+                    ascending within every symbol
+    symbols       : list of symbols in the order they were packed
+    offsets       : int64 array of shape (len(symbols)+1,) with row offsets
+    columns       : union of all numeric columns
+    symbolColumns : symbol -> tuple of positions into columns (original order)
+    intColumns    : symbol -> tuple of column names that held integers (volume)
+    extras        : symbol -> dict of additional keys (MF, FII, FairValue...)
+    fallback      : symbol -> original entry for data that is not numeric
+    timezones     : symbol -> tzinfo of the original (tz-aware) index values
+    exchangeTimezone : timezone whose wall time the index holds (None: UTC)
+    """
+
+    def __init__(self, values, index, symbols, offsets, columns, symbolColumns, intColumns=None, extras=None, fallback=None, timezones=None, exchangeTimezone=None):
+        self.values = values
+        self.index = index
+        self.symbols = list(symbols)
+        self.offsets = offsets
+        self.columns = list(columns)
+        self.symbolColumns = symbolColumns
+        self.intColumns = intColumns if intColumns is not None else {}
+        self.extras = extras if extras is not None else {}
+        self.fallback = fallback if fallback is not None else {}
+        self.timezones = timezones if timezones is not None else {}
+        self.exchangeTimezone = exchangeTimezone
+        self.positions = {symbol: pos for pos, symbol in enumerate(self.symbols)}
+
+    def __len__(self):
+        return len(self.symbols) + len(self.fallback)
+
+    def __contains__(self, symbol):
+        return symbol in self.positions or symbol in self.fallback
+
+    def keys(self):
+        return self.symbols + [symbol for symbol in self.fallback.keys() if symbol not in self.positions]
+
+    def rowCount(self, symbol):
+        if symbol in self.positions:
+            pos = self.positions[symbol]
+            return int(self.offsets[pos + 1] - self.offsets[pos])
+        entry = self.fallback.get(symbol)
+        return 0 if entry is None else len(entry.get("data", []))
+
+    def metadata(self):
+        """Everything except the two large blocks. Small enough to pickle."""
+        return {
+            "symbols": self.symbols,
+            "offsets": self.offsets,
+            "columns": self.columns,
+            "symbolColumns": self.symbolColumns,
+            "intColumns": self.intColumns,
+            "extras": self.extras,
+            "fallback": self.fallback,
+            "timezones": self.timezones,
+            "exchangeTimezone": self.exchangeTimezone,
+        }
+
+    @staticmethod
+    def fromMetadata(metadata, values, index):
+        return PackedStockData(
+            values=values,
+            index=index,
+            symbols=metadata["symbols"],
+            offsets=metadata["offsets"],
+            columns=metadata["columns"],
+            symbolColumns=metadata["symbolColumns"],
+            intColumns=metadata.get("intColumns"),
+            extras=metadata.get("extras"),
+            fallback=metadata.get("fallback"),
+            timezones=metadata.get("timezones"),
+            exchangeTimezone=metadata.get("exchangeTimezone"),
+        )
+
+    def symbolValues(self, symbol):
+        """
+        Returns (values, columns, index) for a symbol. values is a view into
+        the packed block whenever the symbol's columns are a contiguous run of
+        the packed columns (the usual case), and a copy otherwise.
+        """
+        pos = self.positions[symbol]
+        start, end = int(self.offsets[pos]), int(self.offsets[pos + 1])
+        cols = self.symbolColumns[symbol]
+        if len(cols) > 0 and list(cols) == list(range(cols[0], cols[0] + len(cols))):
+            values = self.values[start:end, cols[0]:cols[0] + len(cols)]
+        else:
+            values = self.values[start:end][:, list(cols)]
+        return values, [self.columns[c] for c in cols], self.index[start:end]
+
+    def toSplitDict(self, symbol, asLists=False):
+        """
+        Returns the split dictionary for a symbol. By default data/index are
+        views (ndarray/DatetimeIndex). With asLists=True, the result looks
+        exactly like DataFrame.to_dict("split"): lists of rows and a list of
+        Timestamps in the timezone of the original index.
+        """
+        if symbol not in self.positions:
+            return self.fallback.get(symbol)
+        values, columns, index = self.symbolValues(symbol)
+        datetimeIndex = pd.DatetimeIndex(index.view("M8[ns]"))
+        if asLists:
+            timezone = self.timezones.get(symbol)
+            if timezone is not None:
+                datetimeIndex = _wallToDatetimeIndex(index, self.exchangeTimezone or "UTC", timezone)
+            intColumns = self.intColumns.get(symbol, ())
+            if len(intColumns) > 0:
+                rows = values.astype(object)
+                for pos, col in enumerate(columns):
+                    if col in intColumns:
+                        rows[:, pos] = values[:, pos].astype(np.int64)
+                values = rows
+            splitDict = {"index": list(datetimeIndex), "columns": columns, "data": values.tolist()}
+        else:
+            splitDict = {"data": values, "columns": columns, "index": datetimeIndex}
+        splitDict.update(self.extras.get(symbol, {}))
+        return splitDict
+
+    def toDataFrame(self, symbol, descending=False, timezone=None):
+        """
+        Builds the DataFrame for a symbol from the packed blocks. Nothing is
+        parsed: the index already holds exchange wall times in ascending
+        order. With descending=True, the latest candle comes first and the
+        rows are copied, which is what getRelevantDataForStock hands to the
+        validators. timezone re-targets tz-aware data to another exchange.
+        """
+        if symbol not in self.positions:
+            entry = self.fallback.get(symbol)
+            if entry is None:
+                return None
+            parsedIndex = pd.DatetimeIndex(toEpochNanos(entry.get("index"), timezone or self.exchangeTimezone).view("M8[ns]"))
+            data = pd.DataFrame(entry.get("data"), columns=entry.get("columns"), index=parsedIndex)
+            return data.sort_index(ascending=False).rename_axis("Date") if descending else data
+        values, columns, index = self.symbolValues(symbol)
+        if timezone is not None and timezone != self.exchangeTimezone and symbol in self.timezones:
+            index = _wallToDatetimeIndex(index, self.exchangeTimezone or "UTC", timezone).tz_localize(None).asi8
+        return buildDataFrame(
+            values,
+            columns,
+            index,
+            intColumns=self.intColumns.get(symbol, ()),
+            descending=descending,
+            indexName="Date" if descending else None,
+            copy=descending,
+        )
+
+
+def _asSplitDict(entry):
+    if isinstance(entry, pd.DataFrame):
+        return entry.to_dict("split")
+    return entry
+
+
+def _indexTimezone(indexValues):
+    if len(indexValues) == 0:
+        return None
+    try:
+        return pd.Timestamp(indexValues[-1]).tzinfo
+    except Exception:  # pragma: no cover
+        return None
+
+
+def _sortSymbolRows(values, index, offsets):
+    """Sorts the rows of every symbol whose index is not ascending (in place)."""
+    if len(index) < 2:
+        return
+    descents = np.diff(index) < 0
+    # A drop across two symbols is expected
+    boundaries = offsets[1:-1] - 1
+    descents[boundaries[(boundaries >= 0) & (boundaries < len(descents))]] = False
+    for pos in np.unique(np.searchsorted(offsets, np.flatnonzero(descents), side="right") - 1):
+        start, end = int(offsets[pos]), int(offsets[pos + 1])
+        order = np.argsort(index[start:end], kind="stable")
+        index[start:end] = index[start:end][order]
+        values[start:end] = values[start:end][order]
+
+
+def packStockDict(stockDict, symbols=None, timezone=EXCHANGE_TIMEZONES["INDIA"]):
+    """
+    Packs a {symbol: split-dict} mapping (a plain dict or a multiprocessing
+    manager dict) into a PackedStockData instance. The index is stored as
+    epoch nanoseconds of the exchange wall time (see toEpochNanos), sorted
+    ascending per symbol, so that it never has to be parsed again.
+
+    Entries whose "data" cannot be represented as float64 are kept as-is in
+    the fallback dictionary so that nothing gets lost in the conversion.
+    """
+    if symbols is None:
+        # One round trip for manager dicts instead of one per symbol
+        items = list(stockDict.items())
+    else:
+        items = [(symbol, stockDict.get(symbol)) for symbol in symbols]
+    columns = []
+    columnPositions = {}
+    packedSymbols = []
+    blocks = []
+    blockColumns = []
+    intColumns = {}
+    indexValues = []
+    lengths = []
+    extras = {}
+    fallback = {}
+    timezones = {}
+    for symbol, entry in items:
+        entry = _asSplitDict(entry)
+        if not isinstance(entry, dict) or "data" not in entry or "columns" not in entry:
+            continue
+        rows = entry.get("data")
+        entryColumns = list(entry.get("columns") or [])
+        if len(set(entryColumns)) != len(entryColumns):
+            # Duplicate column names can't be addressed by name. Keep as-is.
+            fallback[symbol] = entry
+            continue
+        entryIndex = entry.get("index")
+        entryIndex = [] if entryIndex is None else list(entryIndex)
+        try:
+            block = np.asarray(rows, dtype=np.float64)
+            if len(rows) == 0:
+                block = block.reshape(0, len(entryColumns))
+            if block.ndim != 2 or block.shape[1] != len(entryColumns) or block.shape[0] != len(entryIndex):
+                raise ValueError(f"Shape mismatch for {symbol}: {block.shape}")
+        except (TypeError, ValueError):
+            fallback[symbol] = entry
+            continue
+        for col in entryColumns:
+            if col not in columnPositions:
+                columnPositions[col] = len(columns)
+                columns.append(col)
+        if block.shape[0] > 0:
+            firstRow = rows[0]
+            integral = tuple(
+                col for pos, col in enumerate(entryColumns)
+                if isinstance(firstRow[pos], (int, np.integer)) and not isinstance(firstRow[pos], bool)
+                and not np.isnan(block[:, pos]).any()
+            )
+            if len(integral) > 0:
+                intColumns[symbol] = integral
+        packedSymbols.append(symbol)
+        blocks.append(block)
+        blockColumns.append(tuple(columnPositions[col] for col in entryColumns))
+        indexValues.extend(entryIndex)
+        lengths.append(len(entryIndex))
+        symbolTimezone = _indexTimezone(entryIndex)
+        if symbolTimezone is not None:
+            timezones[symbol] = symbolTimezone
+        additional = {key: value for key, value in entry.items() if key not in ["data", "columns", "index", "index_names", "column_names"]}
+        if len(additional) > 0:
+            extras[symbol] = additional
+
+    offsets = np.zeros(len(packedSymbols) + 1, dtype=np.int64)
+    if len(lengths) > 0:
+        offsets[1:] = np.cumsum(lengths)
+    totalRows = int(offsets[-1])
+    values = np.full((totalRows, max(len(columns), 1)), np.nan, dtype=np.float64)
+    for pos, block in enumerate(blocks):
+        if block.shape[0] > 0:
+            values[offsets[pos]:offsets[pos + 1], list(blockColumns[pos])] = block
+    # Parsed per symbol: symbols may differ in format and timezone awareness
+    index = np.empty(totalRows, dtype=np.int64)
+    for pos in range(len(packedSymbols)):
+        start, end = int(offsets[pos]), int(offsets[pos + 1])
+        try:
+            index[start:end] = toEpochNanos(indexValues[start:end], timezone)
+        except Exception as e:  # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            index[start:end] = np.iinfo(np.int64).min
+    _sortSymbolRows(values, index, offsets)
+    symbolColumns = {symbol: blockColumns[pos] for pos, symbol in enumerate(packedSymbols)}
+    return PackedStockData(values, index, packedSymbols, offsets, columns, symbolColumns, intColumns, extras, fallback, timezones, timezone)
@@ -0,0 +1,117 @@
+"""
+StockDataSchema - Canonical column layout of the stock data cache
+
+This module handles:
+- The versioned canonical schema of a stock data entry: a "split" dictionary
+  whose columns start with open, high, low, close, volume (lowercase, in that
+  order), followed by any other columns of the source (e.g. Adj Close)
+- Normalizing entries into that schema once, when data is written or an
+  older cache file is read for the first time
+- Migrating a whole stock data dictionary, grouped by column layout so that
+  the column mapping is worked out once per layout and applied with numpy
+
+Once normalized, loading the cache never has to inspect the columns again.
+"""
+
+import numpy as np
+import pandas as pd
+
+from PKDevTools.classes.log import default_logger
+
+# 1: to_dict("split") of whatever the data source returned
+# 2: canonical OHLCV columns first (see OHLCV_COLUMNS)
+SCHEMA_VERSION = 2
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def columnPlan(columns):
+    """
+    Returns (canonicalColumns, sources) for a column layout, where sources[n]
+    lists the positions in the original columns that make up canonical column
+    n, in order of precedence (e.g. "close" before "Close").
+    """
+    sources = {}
+    extras = []
+    for pos, col in enumerate(columns):
+        name = str(col)
+        key = name.lower() if name.lower() in OHLCV_COLUMNS else name
+        if key not in sources:
+            sources[key] = []
+            if key not in OHLCV_COLUMNS:
+                extras.append(key)
+        if name == key:
+            # The exact name wins over a differently cased duplicate
+            sources[key].insert(0, pos)
+        else:
+            sources[key].append(pos)
+    canonical = [col for col in OHLCV_COLUMNS if col in sources] + extras
+    return canonical, [sources[col] for col in canonical]
+
+
+def isCanonical(columns):
+    columns = list(columns)
+    canonical, sources = columnPlan(columns)
+    return canonical == columns and all(len(positions) == 1 for positions in sources)
+
+
+def _normalizeRows(rows, sources):
+    if len(rows) == 0:
+        return []
+    values = np.array(rows, dtype=object)
+    if values.ndim != 2:
+        raise ValueError(f"Unexpected shape of rows: {values.shape}")
+    columns = []
+    for positions in sources:
+        column = values[:, positions[0]]
+        for pos in positions[1:]:
+            missing = pd.isna(column)
+            if not missing.any():
+                break
+            column = np.where(missing, values[:, pos], column)
+        columns.append(column)
+    return np.column_stack(columns).tolist()
+
+
+def normalizeEntry(entry, plan=None):
+    """
+    Returns the entry (a split dictionary or a DataFrame) in the canonical
+    schema. Keys other than data/columns/index (MF, FII, FairValue...) are kept.
+    """
+    if isinstance(entry, pd.DataFrame):
+        entry = entry.to_dict("split")
+    if not isinstance(entry, dict) or "columns" not in entry:
+        return entry
+    canonical, sources = plan if plan is not None else columnPlan(entry["columns"])
+    if canonical == list(entry["columns"]) and all(len(positions) == 1 for positions in sources):
+        return entry
+    normalized = dict(entry)
+    normalized["columns"] = canonical
+    normalized["data"] = _normalizeRows(entry.get("data", []), sources)
+    return normalized
+
+
+def normalizeStockDict(stockDict):
+    """
+    Normalizes all entries of stockDict (in place) into the canonical schema.
+    Returns the number of entries that had to be changed.
+    """
+    plans = {}
+    changed = 0
+    for symbol in list(stockDict.keys()):
+        entry = stockDict.get(symbol)
+        isFrame = isinstance(entry, pd.DataFrame)
+        columns = entry.columns if isFrame else (entry.get("columns") if isinstance(entry, dict) else None)
+        if columns is None:
+            continue
+        layout = tuple(columns)
+        if layout not in plans:
+            plans[layout] = (columnPlan(list(layout)), isCanonical(layout))
+        plan, canonical = plans[layout]
+        if canonical and not isFrame:
+            continue
+        try:
+            stockDict[symbol] = normalizeEntry(entry, plan)
+            changed += 1
+        except Exception as e:  # pragma: no cover
+            default_logger().debug(f"Could not normalize {symbol}: {e}", exc_info=True)
+    return changed
@@ -44,12 +44,25 @@ from PKDevTools.classes.PKDateUtilities import PKDateUtilities
 import pkscreener.classes.ScreeningStatistics as ScreeningStatistics
 from pkscreener import Imports
 from pkscreener.classes.CandlePatterns import CandlePatterns
+from pkscreener.classes.PKFilterChain import INDICATOR_STAGE, RAW_STAGE, VALIDATOR_STAGE, PKFilterChain
+from pkscreener.classes.PKBarAggregator import PKBarAggregator, resampleBars, resampleRule
+from pkscreener.classes.PKPanelIndicators import indicatorStorePrefix, publishedIndicatorValues
+from pkscreener.classes.PKScanBatch import PKScanBatch
+from pkscreener.classes.PKScanPlan import PKScanPlan
+from pkscreener.classes.PKSharedMemoryStore import PKSharedMemoryStore
+from pkscreener.classes.StockDataPacker import exchangeTimezone, toEpochNanos
 from PKDevTools.classes.OutputControls import OutputControls
 
 class StockScreener:
     def __init__(self):
         self.isTradingTime = PKDateUtilities.isTradingTime()
         self.configManager = None
+        # Bars of derived timeframes (e.g. 5m) per stock, kept across scans
+        self.barAggregator = PKBarAggregator()
+        # Indicator stores published by the parent, by name
+        self.indicatorStores = {}
+        # Compiled scan plans by (executeOption, sub-option, monitoring dashboard)
+        self.scanPlans = {}
 
     def setupLogger(self, log_level):
         if log_level > 0:
@@ -63,6 +76,17 @@ class StockScreener:
         )
 
     # @tracelog
+    def screenTask(self, *task):
+        """
+        Processor of the scan tasks queue. task is (PKScanBatch, hostRef) for
+        a batch, answered with the list of its stocks' results, or the
+        screenStocks arguments of a single stock followed by hostRef.
+        """
+        if len(task) == 2 and isinstance(task[0], PKScanBatch):
+            batch, hostRef = task
+            return [self.screenStocks(*item, hostRef=hostRef) for item in batch.items()]
+        return self.screenStocks(*task)
+
     def screenStocks(
         self,
         runOption,
@@ -104,6 +128,7 @@ class StockScreener:
         processedData = None
         fetcher = hostRef.fetcher
         screener = hostRef.screener
+        copiesBefore = screener.frameCopies
         candlePatterns = hostRef.candlePatterns
         printCounter = userArgs.log if (userArgs is not None and userArgs.log is not None) else False
         userArgsLog = printCounter
@@ -153,6 +178,14 @@ class StockScreener:
             else:
                 raise StockDataEmptyException(f"Data is None: {data}")
             
+            filterChain = PKFilterChain.sharedChain()
+            if backtestDuration == 0 and resampleRule(configManager.candleDurationInt, configManager.candleDurationFrequency) is None:
+                # Reject on the last candle before preprocessing (and the Bid/Ask lookup)
+                rawPredicates = [("Volume", lambda: self.performRawVolumeChecks(executeOption, volumeRatio, data, configManager))]
+                if "RUNNER" in os.environ.keys() or not configManager.calculatersiintraday:
+                    # Otherwise fullData gets trimmed to the intraday candles before the LTP checks
+                    rawPredicates.insert(0, ("LTP", lambda: self.performRawLTPChecks(data, configManager, exchangeName)))
+                filterChain.run(RAW_STAGE, rawPredicates)
             bidGreaterThanAsk = False
             bidAskRatio = 0
             if executeOption == 29: # Bid vs Ask 
@@ -214,11 +247,15 @@ class StockScreener:
                 else:
                     raise ScreeningStatistics.EligibilityConditionNotMet("Bid/Ask Eligibility Not met.")
             # hostRef.default_logger.info(f"Will pre-process data:\n{data.tail(10)}")
-            fullData, processedData, data = self.getCleanedDataForDuration(backtestDuration, portfolio, screeningDictionary, saveDictionary, configManager, screener, data)
+            indicators = None
+            if backtestDuration == 0 and resampleRule(configManager.candleDurationInt, configManager.candleDurationFrequency) is None:
+                indicators = self.getPanelIndicators(hostRef.objectDictionaryPrimary, stock, data, configManager, exchangeName)
+            scanPlan = self.getScanPlan(executeOption, reversalOption, respChartPattern, userArgs, hostRef)
+            fullData, processedData, data = self.getCleanedDataForDuration(backtestDuration, portfolio, screeningDictionary, saveDictionary, configManager, screener, data, stock=stock, indicators=indicators, columns=scanPlan.columns)
             if "RUNNER" not in os.environ.keys() and backtestDuration == 0 and configManager.calculatersiintraday:
                 if (intraday_data is not None and not intraday_data.empty):
                     intraday_fullData, intraday_processedData = screener.preprocessData(
-                        intraday_data, daysToLookback=configManager.effectiveDaysToLookback
+                        intraday_data, daysToLookback=configManager.effectiveDaysToLookback, symbol=stock, timeframe="intraday", columns=["RSI"]
                     )
                     # Match the index length and values length
                     fullData = fullData.head(len(intraday_fullData))
@@ -268,10 +305,6 @@ class StockScreener:
                             backtestDuration,
                             runOptionKey
                         )
-            if newlyListedOnly:
-                if not screener.validateNewlyListed(fullData, period):
-                    raise ScreeningStatistics.NotNewlyListed
-
             if processedData.empty:
                 raise StockDataEmptyException("Empty processedData")
             suppressError = (logLevel==logging.NOTSET)
@@ -279,216 +312,63 @@ class StockScreener:
             with SuppressOutput(suppress_stderr=suppressError, suppress_stdout=suppressOut):
                 self.updateStock(stock, screeningDictionary, saveDictionary, executeOption, exchangeName,userArgs)
                 
-                self.performBasicLTPChecks(executeOption, screeningDictionary, saveDictionary, fullData, configManager, screener, exchangeName)
-                hasMinVolumeRatio = self.performBasicVolumeChecks(executeOption, volumeRatio, screeningDictionary, saveDictionary, processedData, configManager, screener)
+                indicatorPredicates = [
+                    ("LTP", lambda: self.performBasicLTPChecks(executeOption, screeningDictionary, saveDictionary, fullData, configManager, screener, exchangeName)),
+                    ("Volume", lambda: self.performBasicVolumeChecks(executeOption, volumeRatio, screeningDictionary, saveDictionary, processedData, configManager, screener)),
+                ]
+                if newlyListedOnly:
+                    indicatorPredicates.append(("NewlyListed", lambda: self.performNewlyListedCheck(screener, fullData, period)))
+                hasMinVolumeRatio = filterChain.run(INDICATOR_STAGE, indicatorPredicates)["Volume"]
                 if bidGreaterThanAsk:
                     if not hasMinVolumeRatio or bidAskRatio < 2:
                         raise ScreeningStatistics.EligibilityConditionNotMet("Bid/Ask Eligibility Not met.")
-                isConfluence = False
                 isInsideBar = 0
                 isMaReversal = 0
                 bullishCount = 0 
                 bearishCount = 0
                 isIpoBase = False
-                isMaSupport = False
-                isLorentzian = False
-                isVCP = False
-                isMinerviniVCP = False
-                isVSA = False
-                isNR = False
-                hasPsarRSIReversal = False
-                hasRisingRSIReversal = False
-                hasRSIMAReversal = False
-                isValidRsi = False
-                isBuyingTrendline = False
                 isMomentum = False
                 mfiStake = 0
                 fairValueDiff = 0
-                consolidationValue = 0
-                isBreaking = False
                 isValidCci = False
-                isVSA = False
-                isCandlePattern = False
-                isLowestVolume = False
-                hasBbandsSqz = False
-                hasMASignalFilter = False
-                priceCrossed = False
 
-                isValidityCheckMet = self.performValidityCheckForExecuteOptions(executeOption,screener,fullData,screeningDictionary,saveDictionary,processedData,configManager,maLength,intraday_data)
-                if not isValidityCheckMet:
-                    return returnLegibleData("Validity Check not met!")
+                validatorPredicates = self.optionValidatorPredicates(executeOption, reversalOption, respChartPattern, maLength,
+                                                                     insideBarToLookback, daysForLowestVolume, minRSI, maxRSI,
+                                                                     hasMinVolumeRatio, stock, hostRef, screener, candlePatterns,
+                                                                     fullData, processedData, screeningDictionary, saveDictionary,
+                                                                     configManager, intraday_data)
+                try:
+                    validatorResults = filterChain.run(VALIDATOR_STAGE, validatorPredicates)
+                except ScreeningStatistics.ValidatorNotMet as e:
+                    # Only the option's validators not being met. Exceptions
+                    # raised by the validators themselves reach the handlers below.
+                    return returnLegibleData(str(e))
+                isValidityCheckMet = True
                 isShortTermBullish = (executeOption == 11 and isValidityCheckMet)
+                isBreaking, isPotentialBreaking = validatorResults.get("Breakout", (False, False))
+                consolidationValue = validatorResults.get("Consolidation", 0)
+                isLowestVolume = validatorResults.get("LowestVolume", False)
+                isValidRsi = validatorResults.get("RSI", False)
+                hasRSIMAReversal = validatorResults.get("RSICrossingMA", False)
+                hasRisingRSIReversal = validatorResults.get("RisingRSI", False)
+                hasPsarRSIReversal = validatorResults.get("PSARReversalWithRSI", False)
+                isNR = validatorResults.get("NarrowRange", False)
+                isVSA = validatorResults.get("VolumeSpreadAnalysis", False)
+                isMaSupport = validatorResults.get("ReversalMA", False)
+                isLorentzian = validatorResults.get("Lorentzian", False)
+                isConfluence = validatorResults.get("Confluence", False)
+                isVCP = validatorResults.get("VCP", False)
+                isBuyingTrendline = validatorResults.get("Trendlines", False)
+                hasBbandsSqz = validatorResults.get("BbandsSqueeze", False)
+                isCandlePattern = validatorResults.get("CandlePattern", False)
+                isMinerviniVCP = validatorResults.get("MinerviniVCP", False)
+                hasMASignalFilter = validatorResults.get("MASignal", False)
+                isPriceRisingByAtLeast2Percent = validatorResults.get("PriceRising", False)
+                priceCrossed = validatorResults.get("PriceCross", False)
                 if newlyListedOnly:
                     isIpoBase = screener.validateIpoBase(
                         stock, fullData, screeningDictionary, saveDictionary
                     )
-                if executeOption in [1,2]:
-                    isBreaking = screener.findBreakoutValue(
-                        processedData,
-                        screeningDictionary,
-                        saveDictionary,
-                        daysToLookback=configManager.daysToLookback,
-                        alreadyBrokenout=(executeOption == 2),
-                    )
-                    if executeOption == 1:
-                        isPotentialBreaking = screener.findPotentialBreakout(
-                            fullData,
-                            screeningDictionary,
-                            saveDictionary,
-                            daysToLookback=configManager.daysToLookback,
-                        )
-                        if not (isBreaking or isPotentialBreaking) or not hasMinVolumeRatio:
-                            return returnLegibleData(f"isBreaking:{isBreaking},isPotentialBreaking:{isPotentialBreaking},hasMinVolumeRatio:{hasMinVolumeRatio}")
-                    elif executeOption == 2:
-                        if not (isBreaking) or not hasMinVolumeRatio:
-                            return returnLegibleData(f"isBreaking:{isBreaking},hasMinVolumeRatio:{hasMinVolumeRatio}")
-                elif executeOption == 3:
-                    consolidationValue = screener.validateConsolidation(
-                        processedData,
-                        screeningDictionary,
-                        saveDictionary,
-                        percentage=configManager.consolidationPercentage,
-                    )
-                    if ((consolidationValue == 0 or consolidationValue > configManager.consolidationPercentage)):
-                        return returnLegibleData(f"consolidationValue:{consolidationValue}")
-                elif executeOption == 4:
-                    isLowestVolume = screener.validateLowestVolume(
-                        processedData, daysForLowestVolume
-                    )
-                    if not isLowestVolume:
-                        return returnLegibleData(f"isLowestVolume:{isLowestVolume}")
-                elif executeOption == 5:
-                    isValidRsi = screener.validateRSI(
-                        processedData, screeningDictionary, saveDictionary, minRSI, maxRSI
-                    )
-                    if not isValidRsi:
-                        return returnLegibleData(f"isValidRsi:{isValidRsi}")
-                elif executeOption == 6:
-                    if reversalOption == 10:
-                        hasRSIMAReversal = screener.findRSICrossingMA(processedData,
-                                                                      screeningDictionary,
-                                                                      saveDictionary,
-                                                                      lookFor=maLength) # 1 =Buy, 2 =Sell, 3 = Any
-                        if not hasRSIMAReversal:
-                            return returnLegibleData(f"hasRSIMAReversal:{hasRSIMAReversal}")
-                    elif reversalOption == 9:
-                        hasRisingRSIReversal = screener.findRisingRSI(processedData)
-                        if not hasRisingRSIReversal:
-                            return returnLegibleData(f"hasRisingRSIReversal:{hasRisingRSIReversal}")
-                    elif reversalOption == 8:
-                        hasPsarRSIReversal = screener.findPSARReversalWithRSI(
-                            processedData,
-                            screeningDictionary,
-                            saveDictionary
-                            # minRSI=maLength if maLength is not None else 40,
-                        )
-                        if not hasPsarRSIReversal:
-                            return returnLegibleData(f"hasPsarRSIReversal:{hasPsarRSIReversal}")
-                    elif reversalOption == 6:
-                        isNR = screener.validateNarrowRange(
-                            processedData,
-                            screeningDictionary,
-                            saveDictionary,
-                            nr=maLength if maLength is not None else 4,
-                        )
-                        if not isNR:
-                            return returnLegibleData(f"isNR:{isNR}")
-                    elif reversalOption == 5:
-                        isVSA = screener.validateVolumeSpreadAnalysis(
-                            processedData, screeningDictionary, saveDictionary
-                        )
-                        if not isVSA:
-                            return returnLegibleData(f"isVSA:{isVSA}")
-                    elif reversalOption == 4 and maLength is not None:
-                        isMaSupport = screener.findReversalMA(
-                            fullData, screeningDictionary, saveDictionary, maLength
-                        )
-                        if not isMaSupport:
-                            return returnLegibleData(f"isMaSupport:{isMaSupport}")
-                    elif reversalOption == 7:
-                        if sys.version_info >= (3, 11):
-                            isLorentzian = screener.validateLorentzian(
-                                fullData,
-                                screeningDictionary,
-                                saveDictionary,
-                                lookFor=maLength, # 1 =Buy, 2 =Sell, 3 = Any
-                                stock=stock,
-                            )
-                            if not isLorentzian:
-                                return returnLegibleData(f"isLorentzian:{isLorentzian}")
-                elif executeOption == 7:
-                    if respChartPattern == 3:
-                        isConfluence = screener.validateConfluence(
-                            stock,
-                            processedData,
-                            fullData,
-                            screeningDictionary,
-                            saveDictionary,
-                            percentage=insideBarToLookback,
-                            confFilter=(maLength if maLength > 0 else 3) # 1 = Conf up, 2 = Conf Down, 3 = all, 4 super confluence (10>20>55 EMA > 200SMA)
-                        )
-                        if not isConfluence:
-                            return returnLegibleData(f"isConfluence:{isConfluence}")
-                    elif respChartPattern == 4:
-                        isVCP = screener.validateVCP(
-                            fullData, screeningDictionary, saveDictionary,stockName=stock
-                        )
-                        if not isVCP:
-                            return returnLegibleData(f"isVCP:{isVCP}")
-                        else:
-                            if hostRef.rs_strange_index > 0:
-                                screener.findRSRating(index_rs_value=hostRef.rs_strange_index,df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
-                            screener.findRVM(df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
-                    elif respChartPattern == 5:
-                        if Imports["scipy"]:
-                            isBuyingTrendline = screener.findTrendlines(
-                                fullData, screeningDictionary, saveDictionary
-                            )
-                            if not isBuyingTrendline:
-                                return returnLegibleData(f"isBuyingTrendline:{isBuyingTrendline}")
-                    elif respChartPattern == 6:
-                        hasBbandsSqz = screener.findBbandsSqueeze(fullData, screeningDictionary, saveDictionary, filter=(maLength if maLength > 0 else 4))
-                        if not hasBbandsSqz:
-                            return returnLegibleData(f"hasBbandsSqz:{hasBbandsSqz}")
-                    elif respChartPattern == 7:
-                        try:
-                            filterPattern = None
-                            if str(maLength) != "0":
-                                from pkscreener.classes.MenuOptions import CANDLESTICK_DICT
-                                filterPattern = CANDLESTICK_DICT[str(maLength)]
-                        except: # pragma: no cover
-                            pass
-                        if "Cup and Handle" in filterPattern:
-                            isCandlePattern,_ = screener.find_cup_and_handle(fullData,saveDictionary,screeningDictionary,int(maLength))
-                        else:
-                            isCandlePattern = candlePatterns.findPattern(
-                                processedData, screeningDictionary, saveDictionary,filterPattern)
-                        if not isCandlePattern:
-                            return returnLegibleData(f"isCandlePattern:{isCandlePattern}")
-                    elif respChartPattern == 8:
-                        isMinerviniVCP = screener.validateVCPMarkMinervini(
-                            fullData, screeningDictionary, saveDictionary
-                        )
-                        if not isMinerviniVCP:
-                            return returnLegibleData(f"isMinerviniVCP:{isMinerviniVCP}")
-                        else:
-                            if hostRef.rs_strange_index > 0:
-                                screener.findRSRating(index_rs_value=hostRef.rs_strange_index,df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
-                            screener.findRVM(df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
-                    elif respChartPattern == 9:
-                        hasMASignalFilter,_, _ = screener.validateMovingAverages(
-                            fullData, screeningDictionary, saveDictionary,maRange=1.25,maLength=maLength
-                        )
-                        if not hasMASignalFilter:
-                            return returnLegibleData(f"hasMASignalFilter:{hasMASignalFilter}")
-                elif executeOption == 10:
-                    isPriceRisingByAtLeast2Percent = (
-                        screener.validatePriceRisingByAtLeast2Percent(
-                            processedData, screeningDictionary, saveDictionary
-                        )
-                    )
-                    if not isPriceRisingByAtLeast2Percent:
-                        return returnLegibleData(f"isPriceRisingByAtLeast2Percent:{isPriceRisingByAtLeast2Percent}")
                 # Must-run, but only at the end
                 try:
                     if executeOption != 7 or (executeOption == 7 and respChartPattern != 7):
@@ -569,19 +449,6 @@ class StockScreener:
                             )
                     if isInsideBar ==0:
                         return returnLegibleData(f"isInsideBar:{isInsideBar}")
-                if executeOption == 40:
-                    priceCrossed = screener.validatePriceActionCrosses(full_df=fullData,
-                                                                  screenDict=screeningDictionary,
-                                                                  saveDict=saveDictionary,
-                                                                  mas=insideBarToLookback,
-                                                                  isEMA=respChartPattern,
-                                                                  maDirectionFromBelow=reversalOption)
-                if executeOption == 41:
-                    priceCrossed = screener.validatePriceActionCrossesForPivotPoint(df=processedData.head(2),
-                                                                  screenDict=screeningDictionary,
-                                                                  saveDict=saveDictionary,
-                                                                  pivotPoint=respChartPattern,
-                                                                  crossDirectionFromBelow=reversalOption)
                 if not (isLorentzian or (isInsideBar !=0) or isBuyingTrendline or isIpoBase or isNR or isVCP or isVSA or isMinerviniVCP):
                     isMomentum = screener.validateMomentum(
                         processedData, screeningDictionary, saveDictionary
@@ -721,7 +588,7 @@ class StockScreener:
                         return (
                             screeningDictionary,
                             saveDictionary,
-                            data,
+                            self.resultData(data, menuOption, userArgs),
                             stock,
                             backtestDuration,
                             runOptionKey
@@ -819,8 +686,259 @@ class StockScreener:
                     )
                     + colorText.END
                 )
+        finally:
+            # Regressions in the number of copies of the stock's data show up here
+            hostRef.default_logger.debug(f"DataFrame copies for {stock}: {screener.frameCopies - copiesBefore} ({screener.frameCopies} in this scan)")
         return None
 
+    def optionValidatorPredicates(self, executeOption, reversalOption, respChartPattern, maLength,
+                                  insideBarToLookback, daysForLowestVolume, minRSI, maxRSI,
+                                  hasMinVolumeRatio, stock, hostRef, screener, candlePatterns,
+                                  fullData, processedData, screeningDictionary, saveDictionary,
+                                  configManager, intraday_data=None):
+        """
+        The validators of the scan option as (name, predicate) pairs for the
+        validator stage of the PKFilterChain. Each predicate returns what the
+        validator found and raises ValidatorNotMet (handled like the inline
+        checks always were) if the stock doesn't pass it.
+        """
+        def required(value, message):
+            if not value:
+                raise ScreeningStatistics.ValidatorNotMet(message)
+            return value
+
+        def withRSAndRVM(value):
+            if hostRef.rs_strange_index > 0:
+                screener.findRSRating(index_rs_value=hostRef.rs_strange_index,df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
+            screener.findRVM(df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
+            return value
+
+        def breakout():
+            isBreaking = screener.findBreakoutValue(
+                processedData,
+                screeningDictionary,
+                saveDictionary,
+                daysToLookback=configManager.daysToLookback,
+                alreadyBrokenout=(executeOption == 2),
+            )
+            if executeOption == 1:
+                isPotentialBreaking = screener.findPotentialBreakout(
+                    fullData,
+                    screeningDictionary,
+                    saveDictionary,
+                    daysToLookback=configManager.daysToLookback,
+                )
+                if not (isBreaking or isPotentialBreaking) or not hasMinVolumeRatio:
+                    raise ScreeningStatistics.ValidatorNotMet(f"isBreaking:{isBreaking},isPotentialBreaking:{isPotentialBreaking},hasMinVolumeRatio:{hasMinVolumeRatio}")
+                return isBreaking, isPotentialBreaking
+            if not (isBreaking) or not hasMinVolumeRatio:
+                raise ScreeningStatistics.ValidatorNotMet(f"isBreaking:{isBreaking},hasMinVolumeRatio:{hasMinVolumeRatio}")
+            return isBreaking, False
+
+        def consolidation():
+            consolidationValue = screener.validateConsolidation(
+                processedData,
+                screeningDictionary,
+                saveDictionary,
+                percentage=configManager.consolidationPercentage,
+            )
+            if ((consolidationValue == 0 or consolidationValue > configManager.consolidationPercentage)):
+                raise ScreeningStatistics.ValidatorNotMet(f"consolidationValue:{consolidationValue}")
+            return consolidationValue
+
+        def lowestVolume():
+            isLowestVolume = screener.validateLowestVolume(
+                processedData, daysForLowestVolume
+            )
+            return required(isLowestVolume, f"isLowestVolume:{isLowestVolume}")
+
+        def rsi():
+            isValidRsi = screener.validateRSI(
+                processedData, screeningDictionary, saveDictionary, minRSI, maxRSI
+            )
+            return required(isValidRsi, f"isValidRsi:{isValidRsi}")
+
+        def candlePattern():
+            filterPattern = None
+            try:
+                if str(maLength) != "0":
+                    from pkscreener.classes.MenuOptions import CANDLESTICK_DICT
+                    filterPattern = CANDLESTICK_DICT[str(maLength)]
+            except: # pragma: no cover
+                pass
+            if "Cup and Handle" in filterPattern:
+                isCandlePattern,_ = screener.find_cup_and_handle(fullData,saveDictionary,screeningDictionary,int(maLength))
+            else:
+                isCandlePattern = candlePatterns.findPattern(
+                    processedData, screeningDictionary, saveDictionary,filterPattern)
+            return required(isCandlePattern, f"isCandlePattern:{isCandlePattern}")
+
+        def priceCross():
+            if executeOption == 40:
+                priceCrossed = screener.validatePriceActionCrosses(full_df=fullData,
+                                                              screenDict=screeningDictionary,
+                                                              saveDict=saveDictionary,
+                                                              mas=insideBarToLookback,
+                                                              isEMA=respChartPattern,
+                                                              maDirectionFromBelow=reversalOption)
+            else:
+                priceCrossed = screener.validatePriceActionCrossesForPivotPoint(df=processedData.head(2),
+                                                              screenDict=screeningDictionary,
+                                                              saveDict=saveDictionary,
+                                                              pivotPoint=respChartPattern,
+                                                              crossDirectionFromBelow=reversalOption)
+            if not priceCrossed:
+                # Stocks that don't cross were never legible data for the backtests
+                raise ScreeningStatistics.EligibilityConditionNotMet(f"priceCrossed:{priceCrossed}")
+            return priceCrossed
+
+        def rsiCrossingMA():
+            hasRSIMAReversal = screener.findRSICrossingMA(processedData,
+                                                          screeningDictionary,
+                                                          saveDictionary,
+                                                          lookFor=maLength) # 1 =Buy, 2 =Sell, 3 = Any
+            return required(hasRSIMAReversal, f"hasRSIMAReversal:{hasRSIMAReversal}")
+
+        def risingRSI():
+            hasRisingRSIReversal = screener.findRisingRSI(processedData)
+            return required(hasRisingRSIReversal, f"hasRisingRSIReversal:{hasRisingRSIReversal}")
+
+        def psarReversalWithRSI():
+            hasPsarRSIReversal = screener.findPSARReversalWithRSI(
+                processedData,
+                screeningDictionary,
+                saveDictionary
+                # minRSI=maLength if maLength is not None else 40,
+            )
+            return required(hasPsarRSIReversal, f"hasPsarRSIReversal:{hasPsarRSIReversal}")
+
+        def narrowRange():
+            isNR = screener.validateNarrowRange(
+                processedData,
+                screeningDictionary,
+                saveDictionary,
+                nr=maLength if maLength is not None else 4,
+            )
+            return required(isNR, f"isNR:{isNR}")
+
+        def volumeSpreadAnalysis():
+            isVSA = screener.validateVolumeSpreadAnalysis(
+                processedData, screeningDictionary, saveDictionary
+            )
+            return required(isVSA, f"isVSA:{isVSA}")
+
+        def reversalMA():
+            isMaSupport = screener.findReversalMA(
+                fullData, screeningDictionary, saveDictionary, maLength
+            )
+            return required(isMaSupport, f"isMaSupport:{isMaSupport}")
+
+        def lorentzian():
+            isLorentzian = screener.validateLorentzian(
+                fullData,
+                screeningDictionary,
+                saveDictionary,
+                lookFor=maLength, # 1 =Buy, 2 =Sell, 3 = Any
+                stock=stock,
+            )
+            return required(isLorentzian, f"isLorentzian:{isLorentzian}")
+
+        def confluence():
+            isConfluence = screener.validateConfluence(
+                stock,
+                processedData,
+                fullData,
+                screeningDictionary,
+                saveDictionary,
+                percentage=insideBarToLookback,
+                confFilter=(maLength if maLength > 0 else 3) # 1 = Conf up, 2 = Conf Down, 3 = all, 4 super confluence (10>20>55 EMA > 200SMA)
+            )
+            return required(isConfluence, f"isConfluence:{isConfluence}")
+
+        def vcp():
+            isVCP = screener.validateVCP(
+                fullData, screeningDictionary, saveDictionary,stockName=stock
+            )
+            return withRSAndRVM(required(isVCP, f"isVCP:{isVCP}"))
+
+        def trendlines():
+            isBuyingTrendline = screener.findTrendlines(
+                fullData, screeningDictionary, saveDictionary
+            )
+            return required(isBuyingTrendline, f"isBuyingTrendline:{isBuyingTrendline}")
+
+        def bbandsSqueeze():
+            hasBbandsSqz = screener.findBbandsSqueeze(fullData, screeningDictionary, saveDictionary, filter=(maLength if maLength > 0 else 4))
+            return required(hasBbandsSqz, f"hasBbandsSqz:{hasBbandsSqz}")
+
+        def minerviniVCP():
+            isMinerviniVCP = screener.validateVCPMarkMinervini(
+                fullData, screeningDictionary, saveDictionary
+            )
+            return withRSAndRVM(required(isMinerviniVCP, f"isMinerviniVCP:{isMinerviniVCP}"))
+
+        def maSignal():
+            hasMASignalFilter,_, _ = screener.validateMovingAverages(
+                fullData, screeningDictionary, saveDictionary,maRange=1.25,maLength=maLength
+            )
+            return required(hasMASignalFilter, f"hasMASignalFilter:{hasMASignalFilter}")
+
+        def priceRising():
+            isPriceRisingByAtLeast2Percent = (
+                screener.validatePriceRisingByAtLeast2Percent(
+                    processedData, screeningDictionary, saveDictionary
+                )
+            )
+            return required(isPriceRisingByAtLeast2Percent, f"isPriceRisingByAtLeast2Percent:{isPriceRisingByAtLeast2Percent}")
+
+        # Cheapest first. The filter chain re-ranks them once it has timings.
+        predicates = []
+        if executeOption in [1,2]:
+            predicates.append(("Breakout", breakout))
+        elif executeOption == 3:
+            predicates.append(("Consolidation", consolidation))
+        elif executeOption == 4:
+            predicates.append(("LowestVolume", lowestVolume))
+        elif executeOption == 5:
+            predicates.append(("RSI", rsi))
+        elif executeOption == 6:
+            if reversalOption == 10:
+                predicates.append(("RSICrossingMA", rsiCrossingMA))
+            elif reversalOption == 9:
+                predicates.append(("RisingRSI", risingRSI))
+            elif reversalOption == 8:
+                predicates.append(("PSARReversalWithRSI", psarReversalWithRSI))
+            elif reversalOption == 6:
+                predicates.append(("NarrowRange", narrowRange))
+            elif reversalOption == 5:
+                predicates.append(("VolumeSpreadAnalysis", volumeSpreadAnalysis))
+            elif reversalOption == 4 and maLength is not None:
+                predicates.append(("ReversalMA", reversalMA))
+            elif reversalOption == 7 and sys.version_info >= (3, 11):
+                predicates.append(("Lorentzian", lorentzian))
+        elif executeOption == 7:
+            if respChartPattern == 3:
+                predicates.append(("Confluence", confluence))
+            elif respChartPattern == 4:
+                predicates.append(("VCP", vcp))
+            elif respChartPattern == 5 and Imports["scipy"]:
+                predicates.append(("Trendlines", trendlines))
+            elif respChartPattern == 6:
+                predicates.append(("BbandsSqueeze", bbandsSqueeze))
+            elif respChartPattern == 7:
+                predicates.append(("CandlePattern", candlePattern))
+            elif respChartPattern == 8:
+                predicates.append(("MinerviniVCP", minerviniVCP))
+            elif respChartPattern == 9:
+                predicates.append(("MASignal", maSignal))
+        elif executeOption == 10:
+            predicates.append(("PriceRising", priceRising))
+        elif executeOption in [40,41]:
+            predicates.append(("PriceCross", priceCross))
+        else:
+            predicates.append((f"ValidityCheck-{executeOption}", lambda: self.performValidityCheck(executeOption,screener,fullData,screeningDictionary,saveDictionary,processedData,configManager,maLength,intraday_data) or True))
+        return predicates
+
     def performValidityCheckForExecuteOptions(self,executeOption,screener,fullData,screeningDictionary,saveDictionary,processedData,configManager,subMenuOption=3,intraday_data=None):
         isValid = True
         if executeOption not in [11,12,13,14,15,16,17,18,19,20,23,24,25,27,28,30,31,32,33,34,35,36,37,38,39,42,43,44,45,46,47]:
@@ -902,6 +1020,66 @@ class StockScreener:
             isValid = screener.findAllSellSignals(fullData, screeningDictionary, saveDictionary)
         return isValid        
                     
+    def performValidityCheck(self, *args, **kwargs):
+        """performValidityCheckForExecuteOptions, raising ValidatorNotMet if the check isn't met."""
+        if not self.performValidityCheckForExecuteOptions(*args, **kwargs):
+            raise ScreeningStatistics.ValidatorNotMet("Validity Check not met!")
+
+    def performNewlyListedCheck(self, screener, fullData, period):
+        if not screener.validateNewlyListed(fullData, period):
+            raise ScreeningStatistics.NotNewlyListed
+
+    def performRawLTPChecks(self, data, configManager, exchangeName):
+        """
+        The LTP range (and minimum change) check of performBasicLTPChecks on
+        the latest candle of the raw data. Candles it can't judge the same way
+        validateLTP would are left to performBasicLTPChecks.
+        """
+        if data.index.is_monotonic_decreasing:
+            closes = data["close"].head(2)[::-1]
+        elif data.index.is_monotonic_increasing:
+            closes = data["close"].tail(2)
+        else:
+            return
+        ltp = closes.iloc[-1]
+        if not np.isfinite(ltp):
+            return
+        ltp = round(ltp, 2)
+        minLTP = configManager.minLTP if exchangeName == "INDIA" else configManager.minLTP/80
+        if ltp < minLTP or ltp > configManager.maxLTP:
+            raise ScreeningStatistics.LTPNotInConfiguredRange
+        if configManager.minimumChangePercentage != 0 and len(closes) == 2 and np.isfinite(closes.iloc[0]) and closes.iloc[0] > 0:
+            pct_change = (closes.pct_change() * 100).iloc[-1]
+            if float("%.1f" % pct_change) < configManager.minimumChangePercentage:
+                raise ScreeningStatistics.LTPNotInConfiguredRange
+
+    def performRawVolumeChecks(self, executeOption, volumeRatio, data, configManager):
+        """
+        The minimum volume (and, for option 9, volume ratio) check of
+        performBasicVolumeChecks on the raw data, with the mean of the last 20
+        rows standing in for VolMA. validateVolume reads the first row of
+        processedData, which is the last row of the data preprocessData got
+        (preprocessData reverses it). Only rejects what
+        performBasicVolumeChecks is certain to reject.
+        """
+        if executeOption <= 0:
+            return
+        volumes = data["volume"].tail(20).to_numpy(dtype=float, na_value=np.nan)
+        if len(volumes) == 0 or not np.isfinite(volumes).all():
+            return
+        minVolume = configManager.minVolume / (
+                    100 if configManager.isIntradayConfig() else 1
+                )
+        volume = volumes[-1]
+        # VolMA is 0 (NaN filled) with fewer than 20 candles
+        volMA = volumes.mean() if len(volumes) == 20 else 0
+        # Leave the rounding borderline cases to performBasicVolumeChecks
+        hasMinVolQty = volume >= minVolume or volMA >= minVolume * (1 - 1e-9)
+        if not hasMinVolQty:
+            raise ScreeningStatistics.NotEnoughVolumeAsPerConfig(f"hasMinVolQty:{hasMinVolQty},executeOption:{executeOption}")
+        if executeOption == 9 and (volMA == 0 or volume / volMA + 0.0051 < volumeRatio):
+            raise ScreeningStatistics.NotEnoughVolumeAsPerConfig(f"executeOption:{executeOption},volumeRatio:{volumeRatio}")
+
     def performBasicVolumeChecks(self, executeOption, volumeRatio, screeningDictionary, saveDictionary, processedData, configManager, screener):
         minVolume = configManager.minVolume / (
                     100 if configManager.isIntradayConfig() else 1
@@ -940,26 +1118,74 @@ class StockScreener:
                 ) if not doNotAnchorText else stock
         saveDictionary["Stock"] = stock
 
-    def getCleanedDataForDuration(self, backtestDuration, portfolio, screeningDictionary, saveDictionary, configManager, screener, data):
+    def getPanelIndicators(self, objectDictionary, stock, data, configManager, exchangeName="INDIA"):
+        """
+        The indicator values of stock that the parent computed for the whole
+        universe (see PKScanRunner.publishIndicatorStore), or None if there
+        are none for exactly these candles.
+        """
+        if not isinstance(objectDictionary, PKSharedMemoryStore) or data is None:
+            return None
+        try:
+            prefix = indicatorStorePrefix(objectDictionary.prefix, configManager.useEMA)
+            if prefix not in self.indicatorStores:
+                self.indicatorStores[prefix] = PKSharedMemoryStore(prefix=prefix)
+            indicators = self.indicatorStores[prefix].getDataFrame(stock, descending=True, timezone=exchangeTimezone(exchangeName))
+            return publishedIndicatorValues(indicators, data)
+        except Exception as e: # pragma: no cover
+            log.default_logger().debug(e, exc_info=True)
+            return None
+
+    def getScanPlan(self, executeOption, reversalOption, respChartPattern, userArgs=None, hostRef=None):
+        """The (memoized) PKScanPlan of the scan option: which indicators preprocessData has to compute."""
+        monitoringDashboard = userArgs is not None and userArgs.monitor is not None and "~" in userArgs.monitor
+        subOption = reversalOption if executeOption == 6 else (respChartPattern if executeOption == 7 else None)
+        planKey = (executeOption, subOption, monitoringDashboard)
+        scanPlans = getattr(self, "scanPlans", None)
+        if scanPlans is None:
+            scanPlans = self.scanPlans = {}
+        scanPlan = scanPlans.get(planKey)
+        if scanPlan is None:
+            scanPlan = scanPlans[planKey] = PKScanPlan.compile(executeOption, subOption, monitoringDashboard=monitoringDashboard)
+            if hostRef is not None:
+                hostRef.default_logger.debug(scanPlan.report())
+        return scanPlan
+
+    def resultData(self, data, menuOption, userArgs=None):
+        """
+        The candles to send back with a result. Backtests (menuOption B) get
+        the whole window. Other scans only need the timestamps runScanners
+        reads (the first, the latest and the last backtestdaysago+1 candles),
+        so they get a frame of just those rows and no columns.
+        """
+        if menuOption in ["B"] or data is None or len(data) == 0:
+            return data
+        daysAgo = 0
+        if userArgs is not None and userArgs.backtestdaysago is not None:
+            try:
+                daysAgo = max(0, int(userArgs.backtestdaysago))
+            except ValueError: # pragma: no cover
+                daysAgo = 0
+        positions = {0}
+        positions.update(range(max(0, len(data) - 1 - daysAgo), len(data)))
+        try:
+            positions.add(int(np.argmax(data.index)))
+        except Exception: # pragma: no cover
+            pass
+        return data.iloc[sorted(positions), :0]
+
+    def getCleanedDataForDuration(self, backtestDuration, portfolio, screeningDictionary, saveDictionary, configManager, screener, data, stock=None, indicators=None, columns=None):
         fullData = None
         processedData = None
-        ohlc_dict = {
-            "open":'first',
-            "high":'max',
-            "low":'min',
-            "close":'last',
-            'Adj Close': 'last',
-            "volume":'sum'
-        }
-        candleDuration = self.configManager.candleDurationInt
-        candleDurationFrequency = self.configManager.candleDurationFrequency
-        durationFrequency = "T" if candleDurationFrequency=="m" else ("H" if candleDurationFrequency=="h" else ("M" if candleDurationFrequency=="mo" else ("W" if candleDurationFrequency=="wk" else "T")))
-        if int(candleDuration) >= 1 and (candleDurationFrequency in ["m","h","mo","wk"]):
-            data = data.resample(f'{candleDuration}{durationFrequency}', offset='15min').agg(ohlc_dict)
-            data = data[data["high"]>0] # resampling can introduce 0 value rows for non-market hours
+        rule = resampleRule(self.configManager.candleDurationInt, self.configManager.candleDurationFrequency)
+        if rule is not None:
+            # Materialized per stock and only updated with the new candles across scans
+            barAggregator = getattr(self, "barAggregator", None)
+            data = barAggregator.bars(stock, data, rule) if barAggregator is not None and stock is not None else resampleBars(data, rule)
+        timeframe = rule if rule is not None else configManager.duration
         if backtestDuration == 0:
             fullData, processedData = screener.preprocessData(
-                    data, daysToLookback=configManager.effectiveDaysToLookback
+                    data, daysToLookback=configManager.effectiveDaysToLookback, symbol=stock, timeframe=timeframe, indicators=indicators, columns=columns
                 )
             if processedData.empty:
                 raise StockDataEmptyException(f"Empty processedData with data length ({len(data)})")
@@ -988,7 +1214,7 @@ class StockScreener:
                         )
                     # data has the last row from inputData at the top.
                 fullData, processedData = screener.preprocessData(
-                        inputData, daysToLookback=configManager.daysToLookback
+                        inputData, daysToLookback=configManager.daysToLookback, symbol=stock, timeframe=timeframe, columns=columns
                     )
                 
         return fullData,processedData,data
@@ -1014,6 +1240,7 @@ class StockScreener:
         except: pass
         # #endregion
         data = None
+        indexNormalized = False
         hostDataLength = 0 if hostData is None else (0 if "data" not in hostData.keys() else len(hostData["data"]))
         start = None
         lastTradingDate = PKDateUtilities.tradingDate().strftime("%Y-%m-%d")
@@ -1086,66 +1313,18 @@ class StockScreener:
         else:
             self.printProcessingCounter(totalSymbols, stock, printCounter, hostRef)
             # data = hostData
-            try:
-                columns = hostData["columns"]
-                # Parse index to datetime before creating DataFrame to ensure proper date handling
-                index_data = hostData["index"]
-                if index_data and len(index_data) > 0:
-                    # Try to parse index as datetime with multiple format support
-                    try:
-                        parsed_index = pd.to_datetime(index_data, format='mixed', utc=True, errors='coerce')
-                        # Convert to tz-naive for consistency
-                        if hasattr(parsed_index, 'tz') and parsed_index.tz is not None:
-                            parsed_index = parsed_index.tz_localize(None)
-                    except:
-                        # Fallback: try without format specification
-                        try:
-                            parsed_index = pd.to_datetime(index_data, errors='coerce')
-                            if hasattr(parsed_index, 'tz') and parsed_index.tz is not None:
-                                parsed_index = parsed_index.tz_localize(None)
-                        except:
-                            # Last resort: use as-is
-                            parsed_index = index_data
-                else:
-                    parsed_index = index_data
-                
-                data = pd.DataFrame(
-                        hostData["data"], columns=columns, index=parsed_index
-                    )
-            except (ValueError, AssertionError) as e: # pragma: no cover
-                # 9 columns passed, passed data had 11 columns
-                # 10 columns passed, passed data had 11 columns
-                excLookingFor = " columns passed, passed data had "
-                if excLookingFor in str(e):
-                    e_diff = str(e).replace(excLookingFor,",").replace(" columns","").split(",")
-                    num_diff = int(e_diff[1]) - int(e_diff[0])
-                    while (num_diff > 0):
-                        columns.append(f"temp{num_diff}")
-                        num_diff -= 1
-                    # Use parsed index here too
-                    data = pd.DataFrame(
-                            hostData["data"], columns=columns, index=parsed_index
-                        )
-                else:
-                    hostRef.default_logger.debug(e, exc_info=True)
-                pass
-        if "Datetime" in data.columns: # for intraday data, the column name is Datetime
+            if isinstance(objectDictionary, PKSharedMemoryStore):
+                # Pre-parsed epoch-ns index in exchange time, already latest first.
+                data = objectDictionary.getDataFrame(stock, descending=True, timezone=exchangeTimezone(exchangeName))
+                indexNormalized = data is not None
+            else:
+                data = self.dataFrameFromHostData(hostData, hostRef, exchangeName)
+        if not indexNormalized and "Datetime" in data.columns: # for intraday data, the column name is Datetime
             with pd.option_context('mode.chained_assignment', None):
                 data["Date"] = data["Datetime"]
         try:
-            data.reset_index(inplace=True)
-            if "Datetime" in data.columns and "Date" not in data.columns:
-                data.rename(columns={"Datetime": "Date"}, inplace=True)
-            else:
-                data.rename(columns={"index": "Date"}, inplace=True)
-            data.set_index("Date", inplace=True)
-            # Ensure index is datetime and tz-naive
-            data.index = pd.to_datetime(data.index, format='mixed', utc=True, errors='coerce')
-            if hasattr(data.index, 'tz') and data.index.tz is not None:
-                data.index = data.index.tz_localize(None)
-            # Sort by index in descending order to ensure latest date is at the beginning (index[0])
-            # This is the expected format for validation functions like validate15MinutePriceVolumeBreakout
-            data = data.sort_index(ascending=False)
+            if not indexNormalized:
+                data = self.normalizeDataFrameIndex(data)
             # #region agent log
             import json
             log_path = '/Users/praveen.jha1/Downloads/codes/PKScreener-main/.cursor/debug.log'
@@ -1179,6 +1358,53 @@ class StockScreener:
                     hostData = objectDictionary.get(stock)
         return data
 
+    def normalizeDataFrameIndex(self, data):
+        data.reset_index(inplace=True)
+        if "Datetime" in data.columns and "Date" not in data.columns:
+            data.rename(columns={"Datetime": "Date"}, inplace=True)
+        else:
+            data.rename(columns={"index": "Date"}, inplace=True)
+        data.set_index("Date", inplace=True)
+        # Ensure index is datetime and tz-naive
+        data.index = pd.to_datetime(data.index, format='mixed', utc=True, errors='coerce')
+        if hasattr(data.index, 'tz') and data.index.tz is not None:
+            data.index = data.index.tz_localize(None)
+        # Sort by index in descending order to ensure latest date is at the beginning (index[0])
+        # This is the expected format for validation functions like validate15MinutePriceVolumeBreakout
+        return data.sort_index(ascending=False)
+
+    def dataFrameFromHostData(self, hostData, hostRef, exchangeName="INDIA"):
+        data = None
+        try:
+            columns = hostData["columns"]
+            # Parse index to datetime before creating DataFrame to ensure proper date handling
+            index_data = hostData["index"]
+            if index_data and len(index_data) > 0:
+                # Try to parse index as datetime with multiple format support
+                try:
+                    # Exchange wall time, tz-naive
+                    parsed_index = pd.DatetimeIndex(toEpochNanos(index_data, exchangeTimezone(exchangeName)).view("M8[ns]"))
+                except:
+                    # Fallback: try without format specification
+                    try:
+                        parsed_index = pd.to_datetime(index_data, errors='coerce')
+                        if hasattr(parsed_index, 'tz') and parsed_index.tz is not None:
+                            parsed_index = parsed_index.tz_localize(None)
+                    except:
+                        # Last resort: use as-is
+                        parsed_index = index_data
+            else:
+                parsed_index = index_data
+            
+            # The cache is in the canonical schema (see StockDataSchema),
+            # so the columns always match the rows.
+            data = pd.DataFrame(
+                    hostData["data"], columns=columns, index=parsed_index
+                )
+        except (ValueError, AssertionError) as e: # pragma: no cover
+            hostRef.default_logger.debug(e, exc_info=True)
+        return data
+
     def determineBasicConfigs(self, stock, newlyListedOnly, volumeRatio, logLevel, hostRef, configManager, screener, userArgsLog):
         if userArgsLog:
             self.setupLoggers(hostRef, screener, logLevel, stock, userArgsLog=True)
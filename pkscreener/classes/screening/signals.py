@@ -38,6 +38,8 @@ import pandas as pd
 from PKDevTools.classes.ColorText import colorText
 from PKDevTools.classes.log import default_logger
 
+from pkscreener.classes.PKTrailingStops import atrTrailingStops
+
 
 class SignalStrength(Enum):
     """Signal strength levels."""
@@ -288,11 +290,10 @@ class TradingSignals:
                 return 0.5, None
             
             close = df['close'].iloc[-1]
-            current_atr = atr.iloc[-1] if hasattr(atr, 'iloc') else atr[-1]
             
-            # Calculate ATR trailing stop
+            # Calculate ATR trailing stop (the full recurrence, latest value)
             key_value = 2
-            trailing_stop = close - (key_value * current_atr)
+            trailing_stop = atrTrailingStops(df['close'].to_numpy(dtype=np.float64), key_value * np.asarray(atr, dtype=np.float64))[-1]
             
             # Check if price is above trailing stop
             if close > trailing_stop * 1.02:  # 2% above trailing stop
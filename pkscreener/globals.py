@@ -1224,7 +1224,7 @@ def main(userArgs=None,optionalFinalOutcome_df=None):
         if userPassedArgs.pipedmenus is not None:
             return addOrRunPipedMenus()
         
-        loadedStockData = loadedStockData and stockDictPrimary is not None and len(stockDictPrimary) > 0
+        loadedStockData = loadedStockData and stockDictPrimary is not None and len(stockDictPrimary) > 0 and AssetsManager.PKAssetsManager.hasLoadedUniverse(stockDictPrimary, listStockCodes)
         if (menuOption in ["X", "B", "G", "S", "F"] and not loadedStockData) or (
             # not downloadOnly
             # and not PKDateUtilities.isTradingTime()
@@ -1299,7 +1299,7 @@ def main(userArgs=None,optionalFinalOutcome_df=None):
                         listStockCodes.remove("^NSEI")
                     items = PKScanRunner.addScansWithDefaultParams(userPassedArgs, testing, testBuild, newlyListedOnly, downloadOnly, backtestPeriod, listStockCodes, menuOption,exchangeName,executeOption, volumeRatio, items, daysInPast,runOption=f"{userPassedArgs.options} =>{runOptionName} => {menuChoiceHierarchy}")
                 else:
-                    PKScanRunner.addStocksToItemList(userPassedArgs, testing, testBuild, newlyListedOnly, downloadOnly, minRSI, maxRSI, insideBarToLookback, respChartPattern, daysForLowestVolume, backtestPeriod, reversalOption, maLength, listStockCodes, menuOption,exchangeName,executeOption, volumeRatio, items, daysInPast,runOption=f"{userPassedArgs.options} =>{runOptionName} => {menuChoiceHierarchy}")
+                    PKScanRunner.addStocksToItemList(userPassedArgs, testing, testBuild, newlyListedOnly, downloadOnly, minRSI, maxRSI, insideBarToLookback, respChartPattern, daysForLowestVolume, backtestPeriod, reversalOption, maLength, listStockCodes, menuOption,exchangeName,executeOption, volumeRatio, items, daysInPast,runOption=f"{userPassedArgs.options} =>{runOptionName} => {menuChoiceHierarchy}",stockDict=stockDictPrimary)
                 if savedStocksCount > 0:
                     progressbar.text(
                         colorText.GREEN
@@ -445,3 +445,94 @@ def test_findPattern_bearish_engulfing(candle_patterns):
         assert candle_patterns.findPattern(df, dict, saveDict) is True
     assert dict["Pattern"] == "\033[31mBearish Engulfing\033[0m"
     assert saveDict["Pattern"] == "Bearish Engulfing"
+
+
+from pkscreener.classes.CandlePatterns import PATTERN_BITS, PATTERN_FUNCTIONS, cupAndHandleSignals, patternMasks
+
+
+def randomCandles(seed, candles=120):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, candles))
+    open = close + rng.normal(0, 1, candles)
+    # Plenty of small bodies for the dojis, hammers and stars
+    open[::3] = close[::3] + rng.normal(0, 0.05, len(close[::3]))
+    high = np.maximum(open, close) + np.abs(rng.normal(0, 0.7, candles))
+    low = np.minimum(open, close) - np.abs(rng.normal(0, 0.7, candles))
+    return pd.DataFrame({"open": open, "high": high, "low": low, "close": close},
+                        index=pd.date_range("2023-01-01", periods=candles))
+
+
+def seriesPatternMask(processedData):
+    # One pktalib call per pattern on the Series of the last 4 candles, as findPattern used to do
+    data = processedData.head(4)[::-1]
+    mask = 0
+    for bit, (function, direction, _, _, _) in enumerate(PATTERN_BITS):
+        if function == "CDLCUPANDHANDLE":
+            signal = 1 if Pktalib.pktalib.CDLCUPANDHANDLE(processedData["open"], processedData["high"], processedData["low"], processedData["close"]) else 0
+        else:
+            signal = getattr(Pktalib.pktalib, function)(data["open"], data["high"], data["low"], data["close"]).tail(1).item()
+        if (direction == 0 and signal != 0) or (direction > 0 and signal > 0) or (direction < 0 and signal < 0):
+            mask |= 1 << bit
+    return mask
+
+
+def test_patternMask_matches_pattern_by_pattern(candle_patterns):
+    found = 0
+    for seed in range(10):
+        df = randomCandles(seed)
+        for end in range(8, len(df)):
+            processedData = df.iloc[:end][::-1].head(22)
+            mask = candle_patterns.patternMask(processedData)
+            assert mask == seriesPatternMask(processedData)
+            found += mask != 0
+    assert found > 0
+
+
+def test_patternMasks_window_matches_patternMask(candle_patterns):
+    frames = [randomCandles(seed, candles=60 + seed) for seed in range(5)]
+    width = max(len(df) for df in frames)
+    panels = {col: np.full((len(frames), width), np.nan) for col in ["open", "high", "low", "close"]}
+    for row, df in enumerate(frames):
+        for col in panels:
+            panels[col][row, :len(df)] = df[col].to_numpy()
+    masks = patternMasks(panels["open"], panels["high"], panels["low"], panels["close"], window=4, lengths=[len(df) for df in frames])
+    for row, df in enumerate(frames):
+        assert (masks[row, len(df):] == 0).all()
+        for end in range(8, len(df) + 1):
+            assert masks[row, end - 1] == candle_patterns.patternMask(df.iloc[:end][::-1].head(22))
+
+
+def test_patternMasks_full_history_matches_talib():
+    df = randomCandles(3, candles=300)
+    masks = patternMasks(df["open"], df["high"], df["low"], df["close"])[0]
+    for bit, (function, direction, _, _, _) in enumerate(PATTERN_BITS):
+        if function == "CDLCUPANDHANDLE":
+            continue
+        signal = np.asarray(getattr(Pktalib.pktalib, function)(df["open"], df["high"], df["low"], df["close"]))
+        expected = signal != 0 if direction == 0 else (signal > 0 if direction > 0 else signal < 0)
+        assert np.array_equal((masks & (1 << bit)) != 0, expected), function
+    assert len(PATTERN_FUNCTIONS) == 22
+
+
+def test_cupAndHandleSignals():
+    high = randomCandles(5, candles=400)["high"].to_numpy()
+    signals = cupAndHandleSignals(high)
+    expected = [1 if Pktalib.pktalib.CDLCUPANDHANDLE(None, pd.Series(high[:end][::-1]), None, None) else 0 for end in range(1, len(high) + 1)]
+    assert signals.tolist() == expected
+    assert sum(expected) > 0
+
+
+def test_renderPatterns_and_filter(candle_patterns):
+    bits = {saveLabel: 1 << bit for bit, (_, _, _, saveLabel, _) in enumerate(PATTERN_BITS)}
+    mask = bits["Doji"] | bits["Inverted Hammer"] | bits["Bearish Marubozu"]
+    dict = {"Pattern": "Existing"}
+    saveDict = {"Pattern": "Existing"}
+    candle_patterns.renderPatterns(mask, dict, saveDict)
+    assert dict["Pattern"] == "Existing, \033[32mDoji\033[0m, \033[31mBearish Marubozu\033[0m, \033[32mInverted Hammer\033[0m"
+    assert saveDict["Pattern"] == "Existing, Doji, Bearish Marubozu, Inverted Hammer"
+    assert mask & candle_patterns.patternBits("Hammer")
+    assert not mask & candle_patterns.patternBits("Morning Star")
+    assert candle_patterns.patternBits("Hammer") == bits["Hammer"] | bits["Inverted Hammer"]
+    with patch.object(CandlePatterns, "patternMask", return_value=bits["Inverted Hammer"]):
+        assert candle_patterns.findPattern(prepData(), {}, {}, "Hammer")
+        assert not candle_patterns.findPattern(prepData(), {}, {}, "Shooting Star")
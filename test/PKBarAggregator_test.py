@@ -0,0 +1,105 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pkscreener.classes.PKBarAggregator import PKBarAggregator, resampleBars, resampleRule
+
+
+def _minuteCandles(days=3, start="2024-01-02"):
+    frames = []
+    for day in pd.bdate_range(start, periods=days):
+        index = pd.date_range(day + pd.Timedelta("09:15:00"), day + pd.Timedelta("15:29:00"), freq="1min", tz="Asia/Kolkata")
+        frames.append(pd.DataFrame(index=index))
+    index = pd.DatetimeIndex(pd.concat(frames).index)
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 0.2, len(index)))
+    return pd.DataFrame({
+        "open": close + rng.normal(0, 0.1, len(index)),
+        "high": close + 0.5,
+        "low": close - 0.5,
+        "close": close,
+        "volume": rng.integers(100, 1000, len(index)).astype(float),
+    }, index=index)
+
+
+def test_resampleRule():
+    assert resampleRule(5, "m") == "5T"
+    assert resampleRule(1, "h") == "1H"
+    assert resampleRule(1, "wk") == "1W"
+    assert resampleRule(1, "mo") == "1M"
+    assert resampleRule(1, "d") is None
+    assert resampleRule(0, "m") is None
+
+
+def test_incremental_bars_match_full_resample():
+    candles = _minuteCandles()
+    for rule in ["5T", "15T", "1H"]:
+        aggregator = PKBarAggregator()
+        # Starts in the middle of a bar and grows by odd sized chunks
+        for end in [403, 404, 411, 700, 701, 1020, len(candles)]:
+            bars = aggregator.bars("SBIN", candles.iloc[:end], rule)
+            pd.testing.assert_frame_equal(bars, resampleBars(candles.iloc[:end], rule), check_freq=False)
+
+
+def test_unchanged_data_returns_materialized_bars():
+    candles = _minuteCandles(days=1)
+    aggregator = PKBarAggregator()
+    bars = aggregator.bars("SBIN", candles, "5T")
+    pd.testing.assert_frame_equal(aggregator.bars("SBIN", candles.copy(), "5T"), bars)
+    assert len(aggregator) == 1
+
+
+def test_forming_candle_updated_in_place():
+    candles = _minuteCandles(days=1)
+    aggregator = PKBarAggregator()
+    aggregator.bars("SBIN", candles, "5T")
+    updated = candles.copy()
+    updated.iloc[-1, updated.columns.get_loc("high")] = 1001.0
+    updated.iloc[-1, updated.columns.get_loc("close")] = 1000.0
+    bars = aggregator.bars("SBIN", updated, "5T")
+    pd.testing.assert_frame_equal(bars, resampleBars(updated, "5T"), check_freq=False)
+    assert bars["high"].iloc[-1] == 1001.0 and bars["close"].iloc[-1] == 1000.0
+
+
+def test_descending_input_and_changed_history():
+    candles = _minuteCandles(days=2)
+    aggregator = PKBarAggregator()
+    bars = aggregator.bars("SBIN", candles[::-1], "15T")
+    pd.testing.assert_frame_equal(bars, resampleBars(candles, "15T"), check_freq=False)
+    # A backtest slice (fewer rows at the end) is aggregated from scratch
+    sliced = candles.iloc[:-100]
+    pd.testing.assert_frame_equal(aggregator.bars("SBIN", sliced[::-1], "15T"), resampleBars(sliced, "15T"), check_freq=False)
+    # So is a changed first candle
+    shifted = candles.iloc[10:]
+    pd.testing.assert_frame_equal(aggregator.bars("SBIN", shifted, "15T"), resampleBars(shifted, "15T"), check_freq=False)
+
+
+def test_entries_are_bounded():
+    candles = _minuteCandles(days=1)
+    aggregator = PKBarAggregator(maxEntries=2)
+    for symbol in ["A", "B", "C"]:
+        aggregator.bars(symbol, candles, "5T")
+    assert len(aggregator) == 2
@@ -0,0 +1,156 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+
+import os
+import pickle
+
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock, patch
+
+from pkscreener.classes import PKCacheMetadata
+from pkscreener.classes.AssetsManager import PKAssetsManager
+
+
+def splitDict(rows, end="2025-01-10"):
+    index = pd.date_range(end=end, periods=rows, freq="D", tz="Asia/Kolkata")
+    df = pd.DataFrame({"open": range(rows), "close": range(rows)}, index=index)
+    return df.to_dict("split")
+
+
+@pytest.fixture
+def stockDict():
+    return {"SBIN": splitDict(30), "TCS": splitDict(25, end="2025-01-12"), "INFY": splitDict(5)}
+
+
+class TestPKCacheMetadata:
+    def test_build_metadata(self, stockDict):
+        metadata = PKCacheMetadata.buildCacheMetadata(stockDict, contentHash="abc")
+        assert metadata["symbols"] == ["SBIN", "TCS", "INFY"]
+        assert metadata["rowCounts"] == {"SBIN": 30, "TCS": 25, "INFY": 5}
+        assert metadata["lastCandle"].startswith("2025-01-12")
+        assert metadata["contentHash"] == "abc"
+        assert PKCacheMetadata.medianRowCount(metadata) == 25
+        assert PKCacheMetadata.missingSymbols(metadata, ["TCS", "HDFC"]) == ["HDFC"]
+
+    def test_freshness_is_that_of_the_requested_symbols(self, stockDict):
+        metadata = PKCacheMetadata.buildCacheMetadata(stockDict)
+        assert metadata["lastCandles"]["TCS"].startswith("2025-01-12")
+        # One fresh symbol doesn't make the others look current
+        assert PKCacheMetadata.lastCandleOf(metadata, ["SBIN", "TCS", "INFY"]) == metadata["lastCandles"]["SBIN"]
+        assert PKCacheMetadata.lastCandleOf(metadata, ["TCS"]) == metadata["lastCandles"]["TCS"]
+        assert PKCacheMetadata.lastCandleOf(metadata, ["HDFC"]) is None
+        del metadata["lastCandles"]
+        assert PKCacheMetadata.lastCandleOf(metadata, ["SBIN"]) is None
+
+    def test_metadata_follows_the_cache_file(self, tmp_path, stockDict):
+        cacheFile = os.path.join(tmp_path, "stock_data_10012025.pkl")
+        with open(cacheFile, "wb") as f:
+            writer = PKCacheMetadata.HashingWriter(f)
+            pickle.dump(stockDict, writer, protocol=pickle.HIGHEST_PROTOCOL)
+        PKCacheMetadata.writeCacheMetadata(cacheFile, stockDict, contentHash=writer.hexdigest())
+        assert os.path.exists(os.path.join(tmp_path, "stock_data_10012025.meta.json"))
+        metadata = PKCacheMetadata.readCacheMetadata(cacheFile, verifyHash=True)
+        assert metadata["contentHash"] == PKCacheMetadata.fileHash(cacheFile)
+        # Any change to the cache file invalidates the record
+        with open(cacheFile, "ab") as f:
+            f.write(b"x")
+        assert PKCacheMetadata.readCacheMetadata(cacheFile) is None
+        assert PKCacheMetadata.readCacheMetadata(os.path.join(tmp_path, "missing.pkl")) is None
+
+    def test_save_stock_data_writes_metadata(self, tmp_path, stockDict):
+        configManager = MagicMock()
+        configManager.isIntradayConfig.return_value = False
+        with patch("pkscreener.classes.AssetsManager.PKAssetsManager.afterMarketStockDataExists", return_value=(False, "stock_data_10012025.pkl")), \
+                patch("PKDevTools.classes.Archiver.get_user_data_dir", return_value=str(tmp_path)):
+            cacheFile = PKAssetsManager.saveStockData(stockDict, configManager, 0, forceSave=True)
+        metadata = PKCacheMetadata.readCacheMetadata(cacheFile, verifyHash=True)
+        assert metadata is not None and metadata["rowCounts"]["SBIN"] == 30
+
+    def test_freshness_check_reads_only_metadata(self, tmp_path, stockDict):
+        cacheFile = os.path.join(tmp_path, "stock_data_10012025.pkl")
+        with open(cacheFile, "wb") as f:
+            pickle.dump(stockDict, f)
+        PKCacheMetadata.writeCacheMetadata(cacheFile, stockDict)
+        configManager = MagicMock()
+        configManager.isIntradayConfig.return_value = False
+        configManager.baseIndex = "^NSEI"
+        with patch("pkscreener.classes.AssetsManager.PKAssetsManager.afterMarketStockDataExists", return_value=(True, "stock_data_10012025.pkl")), \
+                patch("PKDevTools.classes.Archiver.get_user_data_dir", return_value=str(tmp_path)), \
+                patch("PKDevTools.classes.PKDateUtilities.PKDateUtilities.isTradingTime", return_value=False), \
+                patch("pkscreener.classes.AssetsManager.PKAssetsManager.readCachedStockData") as mockRead, \
+                patch("pkscreener.classes.AssetsManager.PKAssetsManager.is_data_fresh", return_value=(True, None, 0)) as mockFresh, \
+                patch("pkscreener.classes.AssetsManager.PKAssetsManager.loadDataFromLocalPickle", return_value=(stockDict, True)) as mockLoad:
+            PKAssetsManager.loadStockData({}, configManager, stockCodes=["SBIN"])
+        mockRead.assert_not_called()
+        # The last candle of the requested symbol, not that of the freshest one (TCS)
+        assert mockFresh.call_args[0][0]["index"][0].startswith("2025-01-10")
+        mockLoad.assert_called_once()
+
+    def test_missing_symbols_make_the_cache_stale(self, tmp_path, stockDict):
+        cacheFile = os.path.join(tmp_path, "stock_data_10012025.pkl")
+        with open(cacheFile, "wb") as f:
+            pickle.dump(stockDict, f)
+        PKCacheMetadata.writeCacheMetadata(cacheFile, stockDict)
+        configManager = MagicMock()
+        configManager.isIntradayConfig.return_value = False
+        configManager.baseIndex = "^NSEI"
+        with patch("pkscreener.classes.AssetsManager.PKAssetsManager.afterMarketStockDataExists", return_value=(True, "stock_data_10012025.pkl")), \
+                patch("PKDevTools.classes.Archiver.get_user_data_dir", return_value=str(tmp_path)), \
+                patch("PKDevTools.classes.PKDateUtilities.PKDateUtilities.isTradingTime", return_value=False), \
+                patch("pkscreener.classes.AssetsManager.PKAssetsManager.is_data_fresh", return_value=(True, None, 0)), \
+                patch("pkscreener.classes.AssetsManager.PKAssetsManager.download_fresh_pkl_from_github", return_value=(False, None, 0)) as mockGithub, \
+                patch("pkscreener.classes.AssetsManager.PKAssetsManager.loadDataFromLocalPickle", return_value=(stockDict, True)):
+            PKAssetsManager.loadStockData({}, configManager, stockCodes=["SBIN"])
+            mockGithub.assert_not_called()
+            PKAssetsManager.loadStockData({}, configManager, stockCodes=["SBIN", "HDFC"])
+            mockGithub.assert_called_once()
+
+    def test_appended_candles_update_counts_and_freshness(self, tmp_path, stockDict):
+        from pkscreener.classes import PKCandleLog
+        cacheFile = os.path.join(tmp_path, "stock_data_10012025.pkl")
+        with open(cacheFile, "wb") as f:
+            pickle.dump(stockDict, f)
+        PKCacheMetadata.writeCacheMetadata(cacheFile, stockDict)
+        # SBIN: the 10th is corrected and the 11th added; then the 11th updated again
+        appends = [{"SBIN": splitDict(2, end="2025-01-11"), "HDFC": splitDict(3, end="2025-01-11")},
+                   {"SBIN": splitDict(1, end="2025-01-11")}]
+        for candles in appends:
+            PKCandleLog.appendCandles(cacheFile, candles)
+            metadata = PKCacheMetadata.recordAppendedCandles(cacheFile, candles)
+        merged = PKAssetsManager.readCachedStockData(cacheFile)
+        assert metadata["rowCounts"] == {symbol: len(entry["index"]) for symbol, entry in merged.items()}
+        assert metadata["rowCounts"]["SBIN"] == 31 and metadata["rowCounts"]["HDFC"] == 3
+        assert metadata["lastCandles"]["SBIN"].startswith("2025-01-11")
+        configManager = MagicMock()
+        configManager.isIntradayConfig.return_value = False
+        configManager.baseIndex = "^NSEI"
+        with patch("pkscreener.classes.AssetsManager.PKAssetsManager.afterMarketStockDataExists", return_value=(True, "stock_data_10012025.pkl")), \
+                patch("PKDevTools.classes.Archiver.get_user_data_dir", return_value=str(tmp_path)), \
+                patch("PKDevTools.classes.PKDateUtilities.PKDateUtilities.isTradingTime", return_value=False), \
+                patch("pkscreener.classes.AssetsManager.PKAssetsManager.is_data_fresh", return_value=(True, None, 0)) as mockFresh, \
+                patch("pkscreener.classes.AssetsManager.PKAssetsManager.loadDataFromLocalPickle", return_value=(merged, True)):
+            PKAssetsManager.loadStockData({}, configManager, stockCodes=["SBIN"])
+        assert mockFresh.call_args[0][0]["index"][0].startswith("2025-01-11")
@@ -0,0 +1,163 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+
+
+import os
+
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock, patch
+
+from pkscreener.classes import PKCacheMetadata, PKCandleLog
+from pkscreener.classes.AssetsManager import PKAssetsManager
+
+
+def splitDict(rows, end="2025-01-10"):
+    index = pd.date_range(end=end, periods=rows, freq="D")
+    df = pd.DataFrame({"open": [float(x) for x in range(rows)], "close": [float(x) for x in range(rows)]}, index=index)
+    return df.to_dict("split")
+
+
+def candle(timestamp, close, columns=("open", "close")):
+    return {"columns": list(columns), "index": [timestamp], "data": [[close if col == "close" else 1.0 for col in columns]]}
+
+
+@pytest.fixture
+def cacheFile(tmp_path):
+    cacheFile = os.path.join(tmp_path, "stock_data_10012025.pkl")
+    PKAssetsManager.writeStockDataFiles({"SBIN": splitDict(30), "TCS": splitDict(25)}, cacheFile)
+    return cacheFile
+
+
+class TestPKCandleLog:
+    def test_merge_appends_and_replaces_by_day(self):
+        entry = splitDict(3)
+        merged = PKCandleLog.mergeCandles(entry, candle("2025-01-11 09:20:00", 50.0))
+        assert merged["index"][-1] == "2025-01-11 09:20:00" and len(merged["index"]) == 4
+        # The same trading day at a later time replaces the candle
+        merged = PKCandleLog.mergeCandles(merged, candle("2025-01-11 15:30:00", 55.0))
+        assert len(merged["index"]) == 4 and merged["data"][-1] == [1.0, 55.0]
+        # An older day replaces that day's row and keeps the order
+        merged = PKCandleLog.mergeCandles(merged, candle("2025-01-09", 7.0))
+        assert len(merged["index"]) == 4 and merged["data"][1] == [1.0, 7.0]
+        assert len(entry["index"]) == 3
+
+    def test_merge_by_timestamp_and_columns(self):
+        entry = splitDict(2)
+        merged = PKCandleLog.mergeCandles(entry, candle("2025-01-10 10:00:00", 9.0, columns=("close",)), daily=False)
+        assert len(merged["index"]) == 3 and merged["data"][-1][1] == 9.0
+        assert pd.isna(merged["data"][-1][0])
+        merged = PKCandleLog.mergeCandles(None, candle("2025-01-10", 9.0))
+        assert merged["data"] == [[1.0, 9.0]]
+
+    def test_append_and_read_later_records_win(self, tmp_path):
+        cacheFile = os.path.join(tmp_path, "stock_data_10012025.pkl")
+        assert PKCandleLog.readCandleLog(cacheFile) == (True, {})
+        assert PKCandleLog.appendCandles(cacheFile, {"SBIN": candle("2025-01-11 10:00:00", 1.0)}) == 1
+        assert PKCandleLog.appendCandles(cacheFile, {"SBIN": candle("2025-01-11 15:30:00", 2.0), "TCS": candle("2025-01-11", 3.0)}) == 2
+        assert PKCandleLog.appendCandles(cacheFile, {}) == 0
+        daily, candles = PKCandleLog.readCandleLog(cacheFile)
+        assert daily
+        assert candles["SBIN"]["index"] == ["2025-01-11 15:30:00"]
+        assert candles["TCS"]["data"] == [[1.0, 3.0]]
+        _, candles = PKCandleLog.readCandleLog(cacheFile, symbols=["TCS"])
+        assert list(candles.keys()) == ["TCS"]
+        assert PKCandleLog.clearCandleLog(cacheFile)
+        assert PKCandleLog.candleLogSize(cacheFile) == 0
+
+    def test_incomplete_record_is_ignored(self, tmp_path):
+        cacheFile = os.path.join(tmp_path, "stock_data_10012025.pkl")
+        PKCandleLog.appendCandles(cacheFile, {"SBIN": candle("2025-01-11", 1.0)})
+        with open(PKCandleLog.candleLogFilePath(cacheFile), "ab") as f:
+            f.write(PKCandleLog.RECORD_HEADER.pack(1000) + b"partial")
+        assert list(PKCandleLog.readCandleLog(cacheFile)[1].keys()) == ["SBIN"]
+        # The next append drops the incomplete record
+        PKCandleLog.appendCandles(cacheFile, {"TCS": candle("2025-01-11", 2.0)})
+        assert sorted(PKCandleLog.readCandleLog(cacheFile)[1].keys()) == ["SBIN", "TCS"]
+
+    def test_cache_reads_merge_the_log(self, cacheFile):
+        PKCandleLog.appendCandles(cacheFile, {"SBIN": candle("2025-01-11", 99.0), "HDFC": candle("2025-01-11", 5.0)})
+        stockData = PKAssetsManager.readCachedStockData(cacheFile)
+        assert len(stockData["SBIN"]["index"]) == 31 and stockData["SBIN"]["data"][-1] == [1.0, 99.0]
+        assert "HDFC" in stockData and len(stockData["TCS"]["index"]) == 25
+        sample = PKAssetsManager.readCachedStockData(cacheFile, sampleOnly=True)
+        assert list(sample.keys()) == ["SBIN"] and len(sample["SBIN"]["index"]) == 31
+
+    def test_append_compact_and_metadata(self, cacheFile):
+        configManager = MagicMock()
+        configManager.isIntradayConfig.return_value = False
+        cacheBytes = os.path.getsize(cacheFile)
+        with patch("pkscreener.classes.AssetsManager.PKAssetsManager.stockDataCacheFilePath", return_value=cacheFile):
+            assert PKAssetsManager.appendStockData({"SBIN": candle("2025-01-11 15:30:00", 42.0)}, configManager)
+            assert os.path.getsize(cacheFile) == cacheBytes
+            assert PKCandleLog.candleLogSize(cacheFile) > 0
+            metadata = PKCacheMetadata.readCacheMetadata(cacheFile)
+            assert metadata["lastCandle"] == "2025-01-11 15:30:00"
+            assert PKAssetsManager.compactStockData(configManager) == 2
+            assert PKAssetsManager.compactStockData(configManager) == 0
+        assert PKCandleLog.candleLogSize(cacheFile) == 0
+        stockData = PKAssetsManager.readCachedStockData(cacheFile)
+        assert stockData["SBIN"]["data"][-1] == [1.0, 42.0]
+        assert PKCacheMetadata.readCacheMetadata(cacheFile, verifyHash=True)["rowCounts"]["SBIN"] == 31
+
+    def test_append_without_cache_or_beyond_ratio(self, tmp_path, cacheFile):
+        configManager = MagicMock()
+        configManager.isIntradayConfig.return_value = False
+        with patch("pkscreener.classes.AssetsManager.PKAssetsManager.stockDataCacheFilePath", return_value=os.path.join(tmp_path, "missing.pkl")):
+            assert not PKAssetsManager.appendStockData({"SBIN": candle("2025-01-11", 1.0)}, configManager)
+        with patch("pkscreener.classes.AssetsManager.PKAssetsManager.stockDataCacheFilePath", return_value=cacheFile), \
+                patch.object(PKAssetsManager, "CANDLE_LOG_COMPACTION_RATIO", 0):
+            assert PKAssetsManager.appendStockData({"SBIN": candle("2025-01-11", 1.0)}, configManager)
+        # Compacted right away
+        assert PKCandleLog.candleLogSize(cacheFile) == 0
+        assert len(PKAssetsManager.readCachedStockData(cacheFile)["SBIN"]["index"]) == 31
+
+    def test_fresh_ticks_report_updated_candles(self):
+        stockDict = {"SBIN": splitDict(3)}
+        ticks = {"1": {"trading_symbol": "SBIN", "ohlcv": {"open": 1, "high": 2, "low": 1, "close": 2, "volume": 10}, "last_update": "2025-01-11T15:30:00"}}
+        response = MagicMock(status_code=200)
+        response.json.return_value = ticks
+        updatedCandles = {}
+        with patch("requests.get", return_value=response):
+            PKAssetsManager._apply_fresh_ticks_to_data(stockDict, updatedCandles=updatedCandles)
+        assert list(updatedCandles.keys()) == ["SBIN"]
+        assert updatedCandles["SBIN"]["data"] == [stockDict["SBIN"]["data"][-1]]
+        assert updatedCandles["SBIN"]["index"] == [stockDict["SBIN"]["index"][-1]]
+
+    def test_candle_log_is_fetched_from_where_downloads_publish_it(self, tmp_path):
+        published = os.path.join(tmp_path, "published.log")
+        PKCandleLog.appendCandles(published, {"SBIN": candle("2025-01-11", 5.0)})
+        with open(PKCandleLog.candleLogFilePath(published), "rb") as f:
+            content = f.read()
+        found = MagicMock(status_code=200, content=content)
+        with patch("requests.get", side_effect=[MagicMock(status_code=404, content=b"")] * 2) as mockGet, \
+                patch("PKDevTools.classes.Archiver.get_user_data_dir", return_value=str(tmp_path)):
+            assert not PKAssetsManager.downloadCandleLogFromServer("stock_data_10012025.pkl")
+        assert [call[0][0].split("/")[-2] for call in mockGet.call_args_list] == ["actions-data-download", "Data"]
+        with patch("requests.get", return_value=found) as mockGet, \
+                patch("PKDevTools.classes.Archiver.get_user_data_dir", return_value=str(tmp_path)):
+            assert PKAssetsManager.downloadCandleLogFromServer("stock_data_10012025.pkl")
+        assert mockGet.call_args[0][0].endswith("/actions-data-download/stock_data_10012025.candles.log")
+        assert os.path.exists(os.path.join(tmp_path, "stock_data_10012025.candles.log"))
@@ -0,0 +1,126 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+
+
+import functools
+import os
+import pickle
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pkscreener.classes import PKChunkedCache
+
+
+def sampleStockDict(symbolCount=30, rows=50, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=rows, freq="B", tz="Asia/Kolkata")
+    stockDict = {}
+    for n in range(symbolCount):
+        df = pd.DataFrame(rng.random((rows, 4)) * 100, columns=["open", "high", "low", "close"], index=index)
+        df["volume"] = rng.integers(0, 100000, rows)
+        stockDict[f"SYM{n:04d}"] = df.to_dict("split")
+    return stockDict
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    """A local stand-in for raw.githubusercontent.com serving tmp_path."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(tmp_path)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestPKChunkedCache:
+    def test_file_paths(self):
+        assert PKChunkedCache.manifestFilePath("stock_data_01012024.pkl") == "stock_data_01012024.manifest.json"
+        assert PKChunkedCache.chunkFilePath("stock_data_01012024.pkl", 3) == "stock_data_01012024.c003.pkz"
+
+    def test_write_and_read_roundtrip(self, tmp_path):
+        stockDict = sampleStockDict()
+        cacheFile = os.path.join(tmp_path, "stock_data_01012024.pkl")
+        manifest = PKChunkedCache.writeChunkedCache(stockDict, cacheFile, symbolsPerChunk=8)
+        assert manifest["codec"] == PKChunkedCache.defaultCodec()
+        assert len(manifest["chunks"]) == 4
+        assert manifest["cache"]["rowCounts"]["SYM0000"] == 50
+        assert PKChunkedCache.readChunkedCache(cacheFile) == stockDict
+
+    def test_reads_only_chunks_of_requested_symbols(self, tmp_path):
+        stockDict = sampleStockDict()
+        cacheFile = os.path.join(tmp_path, "stock_data_01012024.pkl")
+        manifest = PKChunkedCache.writeChunkedCache(stockDict, cacheFile, symbolsPerChunk=8)
+        assert [chunk["file"] for chunk in PKChunkedCache.chunksFor(manifest, ["SYM0009"])] == ["stock_data_01012024.c001.pkz"]
+        # A symbol outside of the requested chunks can't be read, even if corrupted
+        os.remove(os.path.join(tmp_path, "stock_data_01012024.c003.pkz"))
+        assert PKChunkedCache.readChunkedCache(cacheFile, symbols=["SYM0009", "SYM0001"]) == {
+            "SYM0001": stockDict["SYM0001"], "SYM0009": stockDict["SYM0009"]}
+
+    def test_rejects_corrupt_chunks(self, tmp_path):
+        cacheFile = os.path.join(tmp_path, "stock_data_01012024.pkl")
+        PKChunkedCache.writeChunkedCache(sampleStockDict(), cacheFile, symbolsPerChunk=8)
+        chunkPath = PKChunkedCache.chunkFilePath(cacheFile, 1)
+        with open(chunkPath, "r+b") as f:
+            f.seek(10)
+            f.write(b"\x00\xff")
+        with pytest.raises(PKChunkedCache.ChunkedCacheError):
+            PKChunkedCache.readChunkedCache(cacheFile)
+
+    def test_download_from_server(self, tmp_path, server):
+        stockDict = sampleStockDict()
+        PKChunkedCache.writeChunkedCache(stockDict, os.path.join(tmp_path, "stock_data_01012024.pkl"), symbolsPerChunk=8)
+        manifest, downloaded = PKChunkedCache.downloadChunkedCache(server, "stock_data_01012024.pkl", maxWorkers=4)
+        assert len(manifest["chunks"]) == 4
+        assert downloaded == stockDict
+        assert list(downloaded.keys()) == sorted(stockDict.keys())
+        assert PKChunkedCache.downloadChunkedCache(server, "stock_data_02012024.pkl") == (None, None)
+
+    def test_download_fails_on_missing_chunk(self, tmp_path, server):
+        cacheFile = os.path.join(tmp_path, "stock_data_01012024.pkl")
+        PKChunkedCache.writeChunkedCache(sampleStockDict(), cacheFile, symbolsPerChunk=8)
+        os.remove(PKChunkedCache.chunkFilePath(cacheFile, 2))
+        with pytest.raises(PKChunkedCache.ChunkedCacheError):
+            PKChunkedCache.downloadChunkedCache(server, "stock_data_01012024.pkl")
+
+    def test_chunked_copy_is_smaller_than_the_pickle(self, tmp_path, server):
+        stockDict = sampleStockDict(symbolCount=200, rows=250, seed=3)
+        cacheFile = os.path.join(tmp_path, "stock_data_01012024.pkl")
+        with open(cacheFile, "wb") as f:
+            pickle.dump(stockDict, f, protocol=pickle.HIGHEST_PROTOCOL)
+        manifest = PKChunkedCache.writeChunkedCache(stockDict, cacheFile, symbolsPerChunk=25)
+        _, chunked = PKChunkedCache.downloadChunkedCache(server, "stock_data_01012024.pkl")
+        chunkedBytes = sum(chunk["bytes"] for chunk in manifest["chunks"])
+        assert chunked == stockDict
+        assert chunkedBytes < os.path.getsize(cacheFile)
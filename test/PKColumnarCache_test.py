@@ -0,0 +1,147 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock, patch
+
+from PKDevTools.classes import Archiver
+
+from pkscreener.classes import PKColumnarCache
+from pkscreener.classes.AssetsManager import PKAssetsManager
+
+
+def sampleSplitDict(rows=10, seed=0, tz="Asia/Kolkata"):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=rows, freq="B", tz=tz)
+    df = pd.DataFrame(rng.random((rows, 4)) * 100, columns=["open", "high", "low", "close"], index=index)
+    df["volume"] = rng.integers(0, 100000, rows)
+    return df.to_dict("split")
+
+
+@pytest.fixture
+def stockDict():
+    splitDict = sampleSplitDict(12, seed=1)
+    splitDict["FairValue"] = 101.5
+    return {"SBIN": splitDict, "TCS": sampleSplitDict(5, seed=2, tz=None)}
+
+
+@pytest.fixture
+def pickleFile(tmp_path, stockDict):
+    path = os.path.join(tmp_path, "stock_data_01012024.pkl")
+    with open(path, "wb") as f:
+        pickle.dump(stockDict, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+class TestPKColumnarCache:
+    def test_columnarFilePath(self):
+        assert PKColumnarCache.columnarFilePath("/a/stock_data_01012024.pkl") == "/a/stock_data_01012024.pkc"
+
+    def test_write_and_read_roundtrip(self, tmp_path, stockDict):
+        path = os.path.join(tmp_path, "data.pkc")
+        assert PKColumnarCache.writeColumnarCache(stockDict, path) == 2
+        loaded = PKColumnarCache.readColumnarCache(path)
+        assert list(loaded.keys()) == ["SBIN", "TCS"]
+        for symbol in stockDict.keys():
+            assert loaded[symbol]["index"] == stockDict[symbol]["index"]
+            assert loaded[symbol]["columns"] == stockDict[symbol]["columns"]
+            assert loaded[symbol]["data"] == stockDict[symbol]["data"]
+            assert isinstance(loaded[symbol]["data"][0][4], int)
+        assert loaded["SBIN"]["FairValue"] == 101.5
+        assert list(PKColumnarCache.readColumnarCache(path, symbols=["TCS", "INFY"]).keys()) == ["TCS"]
+
+    def test_open_is_memory_mapped_and_column_major(self, tmp_path, stockDict):
+        path = os.path.join(tmp_path, "data.pkc")
+        PKColumnarCache.writeColumnarCache(stockDict, path)
+        packed = PKColumnarCache.openColumnarCache(path)
+        assert isinstance(packed.values, np.memmap)
+        assert packed.values.flags.f_contiguous
+        assert not packed.values.flags.writeable
+        df = packed.toDataFrame("SBIN")
+        assert df["close"].tolist() == [row[3] for row in stockDict["SBIN"]["data"]]
+
+    def test_rejects_unknown_files(self, tmp_path):
+        path = os.path.join(tmp_path, "data.pkc")
+        with open(path, "wb") as f:
+            f.write(b"not a columnar file at all")
+        with pytest.raises(PKColumnarCache.ColumnarCacheError):
+            PKColumnarCache.openColumnarCache(path)
+
+    def test_convert_and_staleness(self, pickleFile):
+        assert not PKColumnarCache.isColumnarCacheCurrent(pickleFile)
+        columnarPath = PKColumnarCache.convertPickleToColumnar(pickleFile)
+        assert columnarPath == PKColumnarCache.columnarFilePath(pickleFile)
+        assert PKColumnarCache.isColumnarCacheCurrent(pickleFile)
+        # A newer pickle (e.g. a fresh download) makes the columnar copy stale
+        later = os.path.getmtime(columnarPath) + 10
+        os.utime(pickleFile, (later, later))
+        assert not PKColumnarCache.isColumnarCacheCurrent(pickleFile)
+        assert PKColumnarCache.convertPickleToColumnar(pickleFile + ".missing") is None
+
+    def test_assets_manager_prefers_columnar(self, pickleFile, stockDict):
+        # First read goes through the pickle and creates the columnar copy
+        assert PKAssetsManager.readCachedStockData(pickleFile) == stockDict
+        assert PKColumnarCache.isColumnarCacheCurrent(pickleFile)
+        with open(pickleFile, "wb") as f:
+            f.write(b"")
+        os.utime(pickleFile, (0, 0))
+        assert PKAssetsManager.readCachedStockData(pickleFile) == stockDict
+        sample = PKAssetsManager.readCachedStockData(pickleFile, sampleOnly=True)
+        assert list(sample.keys()) == ["SBIN"]
+
+    def test_assets_manager_reads_only_requested_universe(self, pickleFile, stockDict):
+        symbols = PKAssetsManager.cacheSymbolsFor(["TCS"], ".NS")
+        assert symbols == {"TCS", "TCS.NS"}
+        # Pickle fallback (first read) and columnar file return the same subset
+        assert PKAssetsManager.readCachedStockData(pickleFile, symbols=symbols) == {"TCS": stockDict["TCS"]}
+        assert PKAssetsManager.readCachedStockData(pickleFile, symbols=symbols) == {"TCS": stockDict["TCS"]}
+        assert PKAssetsManager.cacheSymbolsFor([]) is None
+
+    def test_assets_manager_has_loaded_universe(self, stockDict):
+        assert PKAssetsManager.hasLoadedUniverse(stockDict, ["SBIN", "TCS"])
+        assert not PKAssetsManager.hasLoadedUniverse(stockDict, ["SBIN", "INFY"])
+        assert not PKAssetsManager.hasLoadedUniverse(stockDict, [])
+        assert not PKAssetsManager.hasLoadedUniverse(None, ["SBIN"])
+
+    def test_partially_loaded_universe_is_merged_into_the_cache(self, monkeypatch, pickleFile, stockDict):
+        configManager = MagicMock()
+        configManager.isIntradayConfig.return_value = False
+        monkeypatch.setattr(PKAssetsManager, "afterMarketStockDataExists", lambda intraday: (True, os.path.basename(pickleFile)))
+        monkeypatch.setattr(Archiver, "get_user_data_dir", lambda: os.path.dirname(pickleFile))
+        partial = PKAssetsManager.readCachedStockData(pickleFile, symbols={"TCS"})
+        updatedTCS = sampleSplitDict(6, seed=3, tz=None)
+        partial["TCS"] = updatedTCS
+        partial["INFY"] = updatedTCS
+        PKAssetsManager.saveStockData(partial, configManager, loadCount=0, forceSave=True)
+        saved = PKAssetsManager.readCachedStockData(pickleFile)
+        assert sorted(saved.keys()) == ["INFY", "SBIN", "TCS"]
+        assert saved["SBIN"] == stockDict["SBIN"] and saved["TCS"] == updatedTCS
+        # The dict that was passed in isn't changed
+        assert sorted(partial.keys()) == ["INFY", "TCS"]
@@ -0,0 +1,137 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pkscreener.classes.ScreeningStatistics as ScreeningStatistics
+from pkscreener.classes import ConfigManager
+from unittest.mock import MagicMock
+
+from pkscreener.classes.PKFilterChain import INDICATOR_STAGE, RAW_STAGE, VALIDATOR_STAGE, PKFilterChain
+from pkscreener.classes.StockScreener import StockScreener
+
+
+def _reject():
+    raise ScreeningStatistics.LTPNotInConfiguredRange
+
+
+def _candles(close, volume, rows=30):
+    # Latest first, as screenStocks gets them
+    index = pd.date_range("2023-01-02", periods=rows, freq="B")[::-1]
+    return pd.DataFrame({"close": np.full(rows, float(close)), "volume": np.full(rows, float(volume))}, index=index)
+
+
+def test_run_counts_eliminations_and_returns_results():
+    chain = PKFilterChain()
+    assert chain.run(RAW_STAGE, [("A", lambda: 1), ("B", lambda: None)]) == {"A": 1, "B": None}
+    with pytest.raises(ScreeningStatistics.LTPNotInConfiguredRange):
+        chain.run(RAW_STAGE, [("A", lambda: 1), ("B", _reject)])
+    stats = chain.stats()[RAW_STAGE]
+    assert stats["symbols"] == 2 and stats["eliminated"] == 1
+    assert stats["predicates"]["B"]["evaluated"] == 2 and stats["predicates"]["B"]["eliminated"] == 1
+    assert chain.stats()[INDICATOR_STAGE]["symbols"] == 0
+
+
+def test_selective_predicates_move_to_the_front():
+    chain = PKFilterChain()
+    calls = []
+    slow = ("Slow", lambda: calls.append("Slow") or sum(range(20000)))
+    selective = ("Selective", lambda: calls.append("Selective") or _reject())
+    for _ in range(5):
+        with pytest.raises(ScreeningStatistics.LTPNotInConfiguredRange):
+            chain.run(INDICATOR_STAGE, [slow, selective])
+    # Once measured, the cheap predicate that always eliminates runs alone
+    calls.clear()
+    with pytest.raises(ScreeningStatistics.LTPNotInConfiguredRange):
+        chain.run(INDICATOR_STAGE, [slow, selective])
+    assert calls == ["Selective"]
+
+
+def test_raw_checks_reject_on_the_last_candle():
+    configManager = ConfigManager.tools()
+    configManager.minLTP, configManager.maxLTP = 20, 50000
+    configManager.minimumChangePercentage = 0
+    configManager.minVolume = 10000
+    screener = StockScreener()
+    screener.performRawLTPChecks(_candles(100, 0), configManager, "INDIA")
+    with pytest.raises(ScreeningStatistics.LTPNotInConfiguredRange):
+        screener.performRawLTPChecks(_candles(5, 0), configManager, "INDIA")
+    # Candles it can't judge are left to the full check
+    screener.performRawLTPChecks(_candles(np.nan, 0), configManager, "INDIA")
+    configManager.minimumChangePercentage = 1
+    risingToday = _candles(100, 0)
+    risingToday.iloc[0, 0] = 110
+    fallingToday = _candles(100, 0)
+    fallingToday.iloc[1, 0] = 110
+    # The latest candle is found in either order
+    for candles in [risingToday, risingToday[::-1]]:
+        screener.performRawLTPChecks(candles, configManager, "INDIA")
+    for candles in [fallingToday, fallingToday[::-1]]:
+        with pytest.raises(ScreeningStatistics.LTPNotInConfiguredRange):
+            screener.performRawLTPChecks(candles, configManager, "INDIA")
+    configManager.minimumChangePercentage = 0
+    screener.performRawVolumeChecks(1, 2.5, _candles(100, 10000 * (100 if configManager.isIntradayConfig() else 1)), configManager)
+    with pytest.raises(ScreeningStatistics.NotEnoughVolumeAsPerConfig):
+        screener.performRawVolumeChecks(1, 2.5, _candles(100, 1), configManager)
+    screener.performRawVolumeChecks(0, 2.5, _candles(100, 1), configManager)
+    # Volume gainers need the ratio too: a flat volume has a ratio of 1
+    with pytest.raises(ScreeningStatistics.NotEnoughVolumeAsPerConfig):
+        screener.performRawVolumeChecks(9, 2.5, _candles(100, 10**9), configManager)
+
+
+def _validatorPredicates(executeOption, reversalOption=0, respChartPattern=0, maLength=0, screener=None):
+    return StockScreener().optionValidatorPredicates(executeOption, reversalOption, respChartPattern, maLength,
+                                                     0, 5, 0, 100, True, "SBIN", MagicMock(rs_strange_index=0),
+                                                     screener or MagicMock(), MagicMock(), MagicMock(), MagicMock(),
+                                                     {}, {}, ConfigManager.tools())
+
+
+def test_each_option_stages_its_own_validator():
+    assert [name for name, _ in _validatorPredicates(4)] == ["LowestVolume"]
+    assert [name for name, _ in _validatorPredicates(6, reversalOption=6)] == ["NarrowRange"]
+    assert [name for name, _ in _validatorPredicates(7, respChartPattern=6)] == ["BbandsSqueeze"]
+    assert [name for name, _ in _validatorPredicates(7, respChartPattern=9)] == ["MASignal"]
+    assert [name for name, _ in _validatorPredicates(40)] == ["PriceCross"]
+    assert [name for name, _ in _validatorPredicates(12)] == ["ValidityCheck-12"]
+
+
+def test_validators_not_met_are_told_apart_from_their_own_exceptions():
+    screener = MagicMock()
+    screener.validateLowestVolume.return_value = True
+    screener.findBbandsSqueeze.return_value = False
+    screener.validateMovingAverages.side_effect = ScreeningStatistics.EligibilityConditionNotMet("from the validator")
+    screener.validatePriceActionCrosses.return_value = False
+    chain = PKFilterChain()
+    assert chain.run(VALIDATOR_STAGE, _validatorPredicates(4, screener=screener)) == {"LowestVolume": True}
+    # screenStocks hands only ValidatorNotMet to returnLegibleData
+    with pytest.raises(ScreeningStatistics.ValidatorNotMet, match="hasBbandsSqz:False"):
+        chain.run(VALIDATOR_STAGE, _validatorPredicates(7, respChartPattern=6, screener=screener))
+    # while exceptions raised by a validator itself still reach its outer handler
+    for predicates in [_validatorPredicates(7, respChartPattern=9, screener=screener), _validatorPredicates(40, screener=screener)]:
+        with pytest.raises(ScreeningStatistics.EligibilityConditionNotMet) as raised:
+            chain.run(VALIDATOR_STAGE, predicates)
+        assert not isinstance(raised.value, ScreeningStatistics.ValidatorNotMet)
+    assert chain.stats()[VALIDATOR_STAGE]["eliminated"] == 3
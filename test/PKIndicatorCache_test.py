@@ -0,0 +1,103 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from pkscreener.classes import ConfigManager
+from pkscreener.classes.PKIndicatorCache import PKIndicatorCache, dataFingerprint
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+
+
+def _candles(rows=300):
+    index = pd.date_range("2023-01-02", periods=rows, freq="B")
+    close = 100 + np.cumsum(np.random.default_rng(3).normal(0, 1, rows))
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": np.full(rows, 1000.0)}, index=index)
+
+
+def _screener():
+    configManager = ConfigManager.tools()
+    configManager.useEMA = False
+    return ScreeningStatistics(configManager, logging.getLogger("test"))
+
+
+def test_fingerprint_tracks_the_forming_candle():
+    data = _candles()
+    changed = data.copy()
+    changed.iloc[-1, changed.columns.get_loc("close")] += 1
+    assert dataFingerprint(data) == dataFingerprint(data.copy())
+    assert dataFingerprint(data) != dataFingerprint(changed)
+    assert dataFingerprint(data) != dataFingerprint(data.head(-1))
+    assert dataFingerprint(None) is None
+
+
+def test_fingerprint_tracks_corrections_in_the_history():
+    data = _candles()
+    for column in ["open", "high", "low", "close", "volume"]:
+        corrected = data.copy()
+        corrected.iloc[150, corrected.columns.get_loc(column)] += 1
+        assert dataFingerprint(data) != dataFingerprint(corrected)
+    reindexed = data.copy()
+    reindexed.index = reindexed.index.where(reindexed.index != reindexed.index[150], reindexed.index[150] + pd.Timedelta(hours=1))
+    assert dataFingerprint(data) != dataFingerprint(reindexed)
+
+
+def test_preprocessData_is_memoized_per_symbol():
+    PKIndicatorCache._shared = PKIndicatorCache()
+    screener = _screener()
+    data = _candles()
+    expected = screener.preprocessData(data, daysToLookback=22)
+    first = screener.preprocessData(data, daysToLookback=22, symbol="SBIN", timeframe="1d")
+    second = screener.preprocessData(data.copy(), daysToLookback=22, symbol="SBIN", timeframe="1d")
+    cache = PKIndicatorCache.sharedCache()
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    for frames in [first, second]:
+        pd.testing.assert_frame_equal(frames[0], expected[0])
+        pd.testing.assert_frame_equal(frames[1], expected[1])
+    # Callers get copies: adding a column doesn't change the cached frames
+    second[1].insert(len(second[1].columns), "RSIi", 1.0)
+    assert "RSIi" not in screener.preprocessData(data, daysToLookback=22, symbol="SBIN", timeframe="1d")[1].columns
+    # Other parameters are separate entries
+    screener.preprocessData(data, daysToLookback=10, symbol="SBIN", timeframe="1d")
+    screener.configManager.useEMA = True
+    screener.preprocessData(data, daysToLookback=22, symbol="SBIN", timeframe="1d")
+    assert len(cache) == 3
+    PKIndicatorCache._shared = None
+
+
+def test_lru_eviction_under_memory_budget():
+    frame = _candles(100)
+    frameBytes = int(frame.memory_usage(index=True).sum())
+    cache = PKIndicatorCache(memoryBudgetBytes=frameBytes * 4 + 1)
+    for symbol in ["A", "B"]:
+        cache.put(cache.keyFor(symbol, frame, False, 22), (frame, frame))
+    assert cache.get(cache.keyFor("A", frame, False, 22)) is not None
+    cache.put(cache.keyFor("C", frame, False, 22), (frame, frame))
+    # B was the least recently used
+    assert cache.keyFor("B", frame, False, 22) not in cache
+    assert cache.keyFor("A", frame, False, 22) in cache
+    assert cache.stats()["evictions"] == 1
+    assert cache.sizeBytes <= cache.memoryBudgetBytes
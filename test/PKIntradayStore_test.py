@@ -0,0 +1,99 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pkscreener.classes.PKIntradayStore import PKIntradayStore
+from pkscreener.classes.PKMarketOpenCloseAnalyser import PKMarketOpenCloseAnalyser
+
+
+def sessionCandles(day, minutes=30, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(f"{day} 09:15", periods=minutes, freq="min", tz="Asia/Kolkata")
+    df = pd.DataFrame(rng.random((minutes, 4)) * 100, columns=["open", "high", "low", "close"], index=index)
+    df["volume"] = rng.integers(1, 1000, minutes)
+    return df
+
+
+@pytest.fixture
+def intradayDict():
+    stockDict = {}
+    for n, symbol in enumerate(["SBIN", "TCS"]):
+        df = pd.concat([sessionCandles("2024-01-01", seed=n), sessionCandles("2024-01-02", seed=n + 10)])
+        stockDict[symbol] = df.to_dict("split")
+    return stockDict
+
+
+class TestPKIntradayStore:
+    def test_sessions(self, intradayDict):
+        store = PKIntradayStore.fromStockDict(intradayDict)
+        assert sorted(store.keys()) == ["SBIN", "TCS"]
+        assert store.sessionDays("SBIN") == [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-02")]
+        _, starts = store.sessions("SBIN")
+        assert starts.tolist() == [0, 30]
+
+    def test_session_window_is_a_view(self, intradayDict):
+        store = PKIntradayStore.fromStockDict(intradayDict)
+        assert store.sessionWindow("SBIN", "2024-01-02 09:30:00+05:30") == (30, 46)
+        # A naive time is in exchange time already; a UTC time is converted
+        assert store.sessionWindow("SBIN", pd.Timestamp("2024-01-02 04:00:00", tz="UTC")) == (30, 46)
+        assert store.sessionWindow("SBIN", "2024-01-02 09:30:00", maxCandles=5) == (30, 35)
+        values, columns, index = store.candlesUpTo("TCS", "2024-01-01 09:20:00+05:30")
+        assert columns == ["open", "high", "low", "close", "volume"]
+        assert len(values) == 6 and np.shares_memory(values, store.packed.values)
+        expected = pd.DataFrame(**intradayDict["TCS"]).head(6)
+        assert values[:, 3].tolist() == expected["close"].tolist()
+        assert pd.DatetimeIndex(index.view("M8[ns]")).tolist() == expected.index.tz_localize(None).tolist()
+
+    def test_windows_outside_sessions(self, intradayDict):
+        store = PKIntradayStore.fromStockDict(intradayDict)
+        assert store.sessionWindow("SBIN", "2024-01-03 09:30:00+05:30") == (0, 0)
+        assert store.sessionWindow("SBIN", "2024-01-02 09:00:00+05:30") == (30, 30)
+        assert store.windowUpTo("SBIN", "2024-01-02 09:00:00+05:30") == (0, 30)
+        assert store.windowUpTo("SBIN", "2024-01-02 09:00:00+05:30", maxCandles=10) == (0, 10)
+
+    def test_morning_candle_for_slice_window(self, intradayDict):
+        result = PKMarketOpenCloseAnalyser.getIntradayCandleFromMorning(
+            stockDictInt=intradayDict, sliceWindowDatetime="2024-01-02 09:20:00.000000+05:30")
+        morning = pd.DataFrame(**intradayDict["SBIN"]).iloc[30:36]
+        candle = dict(zip(result["SBIN"]["columns"], result["SBIN"]["data"][0]))
+        assert result["SBIN"]["index"] == [pd.Timestamp("2024-01-02 09:20:00")]
+        assert candle["open"] == morning["open"].iloc[0]
+        assert candle["close"] == morning["close"].iloc[-1]
+        assert candle["high"] == morning["high"].max()
+        assert candle["low"] == morning["low"].min()
+        assert candle["volume"] == morning["volume"].sum()
+
+    def test_getIntradayStore_repacks_updated_candles(self, intradayDict):
+        PKMarketOpenCloseAnalyser.intradayStore = None
+        store = PKMarketOpenCloseAnalyser.getIntradayStore(intradayDict)
+        assert PKMarketOpenCloseAnalyser.getIntradayStore(intradayDict) is store
+        # The forming candle of the first symbol is updated in place
+        intradayDict["SBIN"]["data"][-1][3] = 999.0
+        assert PKMarketOpenCloseAnalyser.getIntradayStore(intradayDict) is not store
+        PKMarketOpenCloseAnalyser.intradayStore = None
@@ -0,0 +1,155 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from pkscreener.classes import PKLorentzianClassifier as lorentzian
+from pkscreener.classes.PKLorentzianClassifier import PKLorentzianClassifier, lorentzianSignal
+from pkscreener.classes.Pktalib import pktalib
+
+try:
+    import advanced_ta as ata
+except Exception:  # pragma: no cover
+    ata = None
+
+
+def candles(count, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, count)))
+    openPrice = close * (1 + rng.normal(0, 0.005, count))
+    high = np.maximum(openPrice, close) * (1 + np.abs(rng.normal(0, 0.01, count)))
+    low = np.minimum(openPrice, close) * (1 - np.abs(rng.normal(0, 0.01, count)))
+    if seed % 5 == 0:
+        # Some candles without any range
+        flat = rng.random(count) < 0.05
+        high[flat] = low[flat] = openPrice[flat] = close[flat]
+    return pd.DataFrame({
+        "open": openPrice,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": rng.integers(1000, 100000, count).astype(float),
+    }, index=pd.date_range("2015-01-01", periods=count, freq="B"))
+
+
+def mfi(data):
+    return pktalib.MFI(data["high"], data["low"], data["close"], data["volume"], 14)
+
+
+def referenceClassification(data, maxBarsBack=2000):
+    Classification = ata.LorentzianClassification
+    return Classification(
+        data=data,
+        features=[
+            Classification.Feature("RSI", 14, 2),
+            Classification.Feature("WT", 10, 11),
+            Classification.Feature("CCI", 20, 2),
+            Classification.Feature("ADX", 20, 2),
+            Classification.Feature("RSI", 9, 2),
+            mfi(data),
+        ],
+        settings=Classification.Settings(source=data["close"], neighborsCount=8, maxBarsBack=maxBarsBack, useDynamicExits=False),
+        filterSettings=Classification.FilterSettings(
+            useVolatilityFilter=True, useRegimeFilter=True, useAdxFilter=False, regimeThreshold=-0.1, adxThreshold=20,
+            kernelFilter=Classification.KernelFilter(useKernelSmoothing=False, lookbackWindow=8, relativeWeight=8.0,
+                                                     regressionLevel=25, crossoverLag=2)))
+
+
+def labelsOf(data):
+    close = data["close"].to_numpy()
+    closeBefore = np.concatenate((np.full(4, np.nan), close[:-4]))
+    with np.errstate(invalid="ignore"):
+        return np.where(closeBefore < close, -1, np.where(closeBefore > close, 1, 0))
+
+
+@unittest.skipIf(ata is None or sys.version_info < (3, 11), "advanced_ta is not available")
+class TestLorentzianParity(unittest.TestCase):
+    # (candles, seed): seeds 334 and 390 end with a new buy, 341 and 484 with a new sell signal
+    FIXTURES = [(250, 334), (250, 341), (250, 390), (400, 484), (250, 335), (400, 490), (300, 5), (120, 8)]
+
+    def test_signals_match_reference(self):
+        for count, seed in self.FIXTURES:
+            data = candles(count, seed)
+            last = referenceClassification(data).df.iloc[-1]
+            expected = 1 if last["isNewBuySignal"] else (-1 if last["isNewSellSignal"] else 0)
+            self.assertEqual(lorentzianSignal(data, extraFeature=mfi(data)), expected, (count, seed))
+
+    def test_predictions_match_reference(self):
+        for (count, seed), maxBarsBack in zip(self.FIXTURES[:3] + [(300, 5)], [2000, 2000, 100, 150]):
+            data = candles(count, seed)
+            high, low, close = [data[col].to_numpy() for col in ["high", "low", "close"]]
+            features = lorentzian.lorentzianFeatures(high, low, close, mfi(data))
+            predictions = lorentzian.lorentzianPredictions(features, labelsOf(data), maxBarsBack=maxBarsBack)
+            expected = referenceClassification(data, maxBarsBack=maxBarsBack).df["prediction"].to_numpy().astype(int)
+            np.testing.assert_array_equal(predictions, expected)
+
+    def test_too_few_candles_fail_like_reference(self):
+        data = candles(30, 1)
+        with self.assertRaises(Exception):
+            referenceClassification(data)
+        with self.assertRaises(Exception):
+            lorentzianSignal(data, extraFeature=mfi(data))
+
+
+class TestPKLorentzianClassifier(unittest.TestCase):
+
+    def test_signals_of_known_fixtures(self):
+        classifier = PKLorentzianClassifier()
+        self.assertEqual(classifier.lastSignal("BUY", candles(250, 334)), 1)
+        self.assertEqual(classifier.lastSignal("SELL", candles(250, 341)), -1)
+        self.assertEqual(classifier.lastSignal("NONE", candles(250, 335)), 0)
+
+    def test_remembers_signal_per_symbol_and_candles(self):
+        classifier = PKLorentzianClassifier(maxEntries=2)
+        data = candles(250, 334)
+        with patch.object(lorentzian, "lorentzianSignal", return_value=1) as classify:
+            self.assertEqual(classifier.lastSignal("SBIN", data), 1)
+            self.assertEqual(classifier.lastSignal("SBIN", data.copy()), 1)
+            self.assertEqual(classify.call_count, 1)
+            # The forming candle changed
+            changed = data.copy()
+            changed.iloc[-1, changed.columns.get_loc("close")] += 1
+            classifier.lastSignal("SBIN", changed)
+            self.assertEqual(classify.call_count, 2)
+            classifier.lastSignal("TCS", data)
+            self.assertEqual(len(classifier), 2)
+            # Without a symbol nothing is remembered
+            classifier.lastSignal(None, data)
+            classifier.lastSignal(None, data)
+            self.assertEqual(classify.call_count, 5)
+        classifier.clear()
+        self.assertEqual(len(classifier), 0)
+
+    def test_shared_classifier(self):
+        self.assertIs(PKLorentzianClassifier.sharedClassifier(), PKLorentzianClassifier.sharedClassifier())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import logging
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pkscreener.classes import ConfigManager
+from pkscreener.classes.PKPanelIndicators import (
+    INDICATOR_COLUMNS, PKIndicatorPanel, indicatorStorePrefix, packIndicators, publishedIndicatorValues)
+from pkscreener.classes.PKScanRunner import PKScanRunner
+from pkscreener.classes.PKSharedMemoryStore import PKSharedMemoryStore
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+from pkscreener.classes.StockDataPacker import packStockDict
+from pkscreener.classes.StockScreener import StockScreener
+
+
+def sampleFrames(symbolCount=40, maxRows=400, seed=1):
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for i in range(symbolCount):
+        rows = int(rng.integers(5, maxRows))
+        # Latest first, like getRelevantDataForStock returns them
+        index = pd.date_range("2022-01-03", periods=rows, freq="B")[::-1]
+        close = 100 + np.cumsum(rng.normal(0, 1, rows))
+        if i == 3:
+            close[:] = 50.0
+        frames[f"S{i}"] = pd.DataFrame({
+            "open": close,
+            "high": close + rng.random(rows),
+            "low": close - rng.random(rows),
+            "close": close,
+            "volume": rng.integers(1, 1000, rows),
+        }, index=index)
+    return frames
+
+
+def screener(useEMA=False):
+    configManager = ConfigManager.tools()
+    configManager.useEMA = useEMA
+    return ScreeningStatistics(configManager, logging.getLogger("test"))
+
+
+@pytest.mark.parametrize("useEMA", [False, True])
+def test_panel_matches_preprocessData(useEMA):
+    frames = sampleFrames()
+    frames["BAD"] = frames["S1"].copy()
+    frames["BAD"].iloc[2, frames["BAD"].columns.get_loc("close")] = np.nan
+    panel = PKIndicatorPanel.fromFrames(frames).compute(useEMA=useEMA)
+    assert "BAD" not in panel and len(panel) == len(frames) - 1
+    statistics = screener(useEMA)
+    for symbol in panel.symbols:
+        expected = statistics.preprocessData(frames[symbol], daysToLookback=22)
+        actual = panel.preprocessedFrames(symbol, frames[symbol], daysToLookback=22)
+        for expectedFrame, actualFrame in zip(expected, actual):
+            assert list(actualFrame.columns) == list(expectedFrame.columns)
+            pd.testing.assert_frame_equal(actualFrame, expectedFrame, rtol=1e-8, atol=1e-7)
+
+
+def test_preprocessData_uses_given_indicators():
+    frames = sampleFrames(symbolCount=2, maxRows=300)
+    statistics = screener()
+    panel = PKIndicatorPanel.fromFrames(frames).compute()
+    data = frames["S0"]
+    fullData, trimmed = statistics.preprocessData(data, daysToLookback=10, indicators=np.ones((len(data), len(INDICATOR_COLUMNS))))
+    assert (fullData["RSI"] == 1).all() and len(trimmed) == 10
+    expected = statistics.preprocessData(data, daysToLookback=10)
+    pd.testing.assert_frame_equal(statistics.preprocessData(data, daysToLookback=10, indicators=panel.indicatorValues("S0"))[0], expected[0], rtol=1e-8, atol=1e-7)
+
+
+def test_packed_indicators_match_worker_frames():
+    frames = sampleFrames(symbolCount=5)
+    packed = packStockDict({symbol: frame.to_dict("split") for symbol, frame in frames.items()})
+    indicators = packIndicators(packed, useEMA=False)
+    statistics = screener()
+    for symbol in frames.keys():
+        data = packed.toDataFrame(symbol, descending=True)
+        values = publishedIndicatorValues(indicators.toDataFrame(symbol, descending=True), data)
+        assert values is not None
+        pd.testing.assert_frame_equal(statistics.preprocessData(data, 22, indicators=values)[0],
+                                      statistics.preprocessData(data, 22)[0], rtol=1e-8, atol=1e-7)
+    # Other candles (e.g. a fresh fetch in the worker) don't use them
+    data = packed.toDataFrame("S0", descending=True)
+    changed = data.copy()
+    changed.iloc[0, changed.columns.get_loc("close")] += 1
+    assert publishedIndicatorValues(indicators.toDataFrame("S0", descending=True), changed) is None
+    assert publishedIndicatorValues(indicators.toDataFrame("S0", descending=True), data.iloc[1:]) is None
+
+
+def test_workers_slice_published_indicators():
+    frames = sampleFrames(symbolCount=3)
+    dataStore = PKSharedMemoryStore()
+    savedStore, savedGeneration = PKScanRunner.sharedStoreIndicators, PKScanRunner.indicatorStoreGeneration
+    PKScanRunner.sharedStoreIndicators, PKScanRunner.indicatorStoreGeneration = None, 0
+    try:
+        dataStore.publish({symbol: frame.to_dict("split") for symbol, frame in frames.items()})
+        PKScanRunner.publishIndicatorStore(dataStore)
+        indicatorStore = PKScanRunner.sharedStoreIndicators
+        assert indicatorStore.prefix == indicatorStorePrefix(dataStore.prefix, PKScanRunner.configManager.useEMA)
+        # Nothing to do for the same generation
+        PKScanRunner.publishIndicatorStore(dataStore)
+        assert indicatorStore.generation == 1
+        stockScreener = StockScreener()
+        configManager = MagicMock(useEMA=PKScanRunner.configManager.useEMA)
+        data = dataStore.getDataFrame("S1", descending=True, timezone="Asia/Kolkata")
+        values = stockScreener.getPanelIndicators(dataStore, "S1", data, configManager)
+        assert values is not None and values.shape == (len(data), len(INDICATOR_COLUMNS))
+        assert stockScreener.getPanelIndicators({"S1": {}}, "S1", data, configManager) is None
+        configManager.useEMA = not configManager.useEMA
+        assert stockScreener.getPanelIndicators(dataStore, "S1", data, configManager) is None
+    finally:
+        if PKScanRunner.sharedStoreIndicators is not None:
+            PKScanRunner.sharedStoreIndicators.release()
+        PKScanRunner.sharedStoreIndicators, PKScanRunner.indicatorStoreGeneration = savedStore, savedGeneration
+        dataStore.release()
@@ -0,0 +1,68 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import pickle
+from argparse import Namespace
+
+from pkscreener.classes.PKScanBatch import MAX_CHUNK_SIZE, PKScanBatch, chunkSizeFor
+
+
+def _items(stocks, runOption="X:12:9", userArgs=None):
+    userArgs = userArgs if userArgs is not None else Namespace(options=runOption, monitor=None, log=False)
+    return [
+        (runOption, "X", "INDIA", 9, None, None, None, 0, 100, None, None, len(stocks), True,
+         stock, False, False, 2.5, False, userArgs, 0, 22, 0, True, None)
+        for stock in stocks
+    ]
+
+
+def test_chunk_size_follows_the_universe():
+    assert chunkSizeFor(0, 8) == 1
+    assert chunkSizeFor(10, 8) == 1
+    assert chunkSizeFor(320, 8) == 10
+    assert chunkSizeFor(100000, 8) == MAX_CHUNK_SIZE
+
+
+def test_batches_rebuild_the_items():
+    stocks = [f"S{i}" for i in range(10)]
+    items = _items(stocks) + _items(["OTHER"], runOption="X:12:7")
+    tasks = PKScanBatch.batchItems(items + [(1, 2, 3)], chunkSize=4)
+    # 4 + 4 + 2 stocks of the first context, 1 of the second, and the odd item as-is
+    assert [len(task[0]) for task in tasks[:-1]] == [4, 4, 2, 1]
+    assert tasks[-1] == (1, 2, 3)
+    assert tasks[0][0].contextId == tasks[2][0].contextId != tasks[3][0].contextId
+    rebuilt = [item for task in tasks[:-1] for item in pickle.loads(pickle.dumps(task[0])).items()]
+    assert [item[13] for item in rebuilt] == stocks + ["OTHER"]
+    assert rebuilt[0][:13] == items[0][:13] and rebuilt[0][14:18] == items[0][14:18]
+    assert vars(rebuilt[0][18]) == vars(items[0][18])
+
+
+def test_batches_pickle_far_less_than_the_items():
+    stocks = [f"STOCK{i}" for i in range(2000)]
+    items = _items(stocks)
+    tasks = PKScanBatch.batchItems(items, chunkSize=chunkSizeFor(len(items), 8))
+    itemBytes = sum(len(pickle.dumps(item)) for item in items)
+    taskBytes = sum(len(pickle.dumps(task)) for task in tasks)
+    assert len(tasks) == 32
+    assert taskBytes * 5 < itemBytes
@@ -0,0 +1,95 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from pkscreener.classes import ConfigManager
+from pkscreener.classes.PKPanelIndicators import INDICATOR_COLUMNS
+from pkscreener.classes.PKScanPlan import PKScanPlan
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+
+
+def _candles(rows=300):
+    index = pd.date_range("2023-01-02", periods=rows, freq="B")
+    close = 100 + np.cumsum(np.random.default_rng(5).normal(0, 1, rows))
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": np.full(rows, 1000.0)}, index=index)
+
+
+def test_volume_gainers_on_the_dashboard_skip_unused_indicators():
+    plan = PKScanPlan.compile(9, monitoringDashboard=True)
+    assert plan.columns == ["SMA", "LMA", "VolMA", "RSI"]
+    assert plan.skippedColumns == ["SSMA", "SSMA20", "Volatility", "CCI", "FASTK", "FASTD"]
+    assert "validateVolume" in plan.validators and "validateCCI" not in plan.validators
+    assert "skips SSMA" in plan.report()
+
+
+def test_sub_options_and_unmapped_options():
+    assert "SSMA20" in PKScanPlan.compile(7, 3).columns
+    assert "SSMA20" not in PKScanPlan.compile(7, 1).columns
+    # Unmapped or unparsable options compute every indicator
+    for plan in [PKScanPlan.compile(22), PKScanPlan.compile("Z"), PKScanPlan.compile(6, 99)]:
+        assert plan.columns is None and plan.skippedColumns == []
+        assert "isn't mapped" in plan.report()
+    assert PKScanPlan.compileRunOption("X:12:9:2.5:>|X:0:31:").columns == PKScanPlan.compile(9).columns
+    assert PKScanPlan.compileRunOption("X:12:7:3:0.008:4").option == "7:3"
+    assert PKScanPlan.compileRunOption("X").columns is None
+
+
+def test_preprocessData_computes_only_the_planned_columns():
+    configManager = ConfigManager.tools()
+    configManager.useEMA = False
+    screener = ScreeningStatistics(configManager, logging.getLogger("test"))
+    data = _candles()
+    expected = screener.preprocessData(data, daysToLookback=22)
+    plan = PKScanPlan.compile(9, monitoringDashboard=True)
+    fullData, processedData = screener.preprocessData(data, daysToLookback=22, columns=plan.columns)
+    for col in INDICATOR_COLUMNS:
+        assert (col in fullData.columns) == (col in plan.columns)
+    pd.testing.assert_frame_equal(fullData, expected[0][fullData.columns])
+    pd.testing.assert_frame_equal(processedData, expected[1][processedData.columns])
+
+
+def test_partial_columns_are_looked_up_once():
+    from pkscreener.classes.PKIndicatorCache import PKIndicatorCache
+    configManager = ConfigManager.tools()
+    configManager.useEMA = False
+    screener = ScreeningStatistics(configManager, logging.getLogger("test"))
+    cache = PKIndicatorCache.sharedCache()
+    cache.clear()
+    data = _candles()
+    columns = PKScanPlan.compile(9, monitoringDashboard=True).columns
+    misses, hits = cache.misses, cache.hits
+    screener.preprocessData(data, daysToLookback=22, symbol="SBIN", columns=columns)
+    assert (cache.misses - misses, cache.hits - hits) == (1, 0)
+    screener.preprocessData(data, daysToLookback=22, symbol="SBIN", columns=columns)
+    assert (cache.misses - misses, cache.hits - hits) == (1, 1)
+    # Complete frames serve any columns
+    screener.preprocessData(data, daysToLookback=22, symbol="TCS")
+    fullData, _ = screener.preprocessData(data, daysToLookback=22, symbol="TCS", columns=columns)
+    assert (cache.misses - misses, cache.hits - hits) == (2, 2)
+    assert all(col in fullData.columns for col in INDICATOR_COLUMNS)
+    cache.clear()
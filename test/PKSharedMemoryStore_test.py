@@ -0,0 +1,222 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pkscreener.classes.PKSharedMemoryStore import PKSharedMemoryStore
+from pkscreener.classes.StockDataPacker import buildDataFrame, packStockDict, toEpochNanos
+
+
+def sampleSplitDict(rows=10, start="2024-01-01", seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=rows, freq="D")
+    df = pd.DataFrame({
+        "Open": rng.random(rows) * 100,
+        "High": rng.random(rows) * 100,
+        "Low": rng.random(rows) * 100,
+        "Close": rng.random(rows) * 100,
+        "Volume": np.arange(rows, dtype=np.int64) * 1000,
+    }, index=index)
+    splitDict = df.to_dict("split")
+    splitDict["index"] = [str(x) for x in splitDict["index"]]
+    return splitDict
+
+
+def legacyDataFrame(splitDict):
+    # Mirrors StockScreener.getRelevantDataForStock for split dictionaries
+    parsedIndex = pd.to_datetime(splitDict["index"], format="mixed", utc=True, errors="coerce").tz_localize(None)
+    return pd.DataFrame(splitDict["data"], columns=splitDict["columns"], index=parsedIndex)
+
+
+def readFromChildProcess(store, symbol, resultQueue):
+    df = store.getDataFrame(symbol)
+    resultQueue.put((len(store), df.shape, str(df["Volume"].dtype), float(df["Close"].iloc[-1])))
+
+
+@pytest.fixture
+def stockDict():
+    splitDict = sampleSplitDict(12, seed=1)
+    splitDict["MF"] = 123
+    return {"SBIN": splitDict, "TCS": sampleSplitDict(5, start="2024-02-01", seed=2)}
+
+
+@pytest.fixture
+def store():
+    store = PKSharedMemoryStore()
+    yield store
+    store.release()
+
+
+class TestStockDataPacker:
+    def test_toEpochNanos_matches_mixed_parsing(self):
+        values = ["2024-01-01 00:00:00+05:30", "2024-01-02"]
+        expected = pd.to_datetime(values, format="mixed", utc=True).tz_localize(None).asi8
+        assert list(toEpochNanos(values)) == list(expected)
+        assert len(toEpochNanos([])) == 0
+
+    def test_pack_roundtrip(self, stockDict):
+        packed = packStockDict(stockDict)
+        assert packed.keys() == ["SBIN", "TCS"]
+        assert packed.rowCount("SBIN") == 12 and packed.rowCount("TCS") == 5
+        for symbol in stockDict.keys():
+            pd.testing.assert_frame_equal(packed.toDataFrame(symbol), legacyDataFrame(stockDict[symbol]))
+        assert packed.toSplitDict("SBIN")["MF"] == 123
+
+    def test_pack_keeps_non_numeric_entries(self):
+        entry = {"data": [["x", 1.0]], "columns": ["Name", "Close"], "index": ["2024-01-01"]}
+        packed = packStockDict({"ODD": entry, "SBIN": sampleSplitDict(3)})
+        assert "ODD" in packed and "ODD" in packed.fallback
+        assert packed.toDataFrame("ODD")["Name"].iloc[0] == "x"
+        assert packed.toDataFrame("MISSING") is None
+
+    def test_pack_handles_different_columns(self):
+        other = sampleSplitDict(4, seed=3)
+        other["columns"] = ["Close", "Open", "High", "Low", "Volume"]
+        packed = packStockDict({"SBIN": sampleSplitDict(3), "TCS": other})
+        pd.testing.assert_frame_equal(packed.toDataFrame("TCS"), legacyDataFrame(other))
+
+
+    def test_index_is_normalized_to_exchange_time(self):
+        index = pd.date_range("2024-01-01", periods=3, freq="D", tz="Asia/Kolkata")
+        splitDict = pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=index).to_dict("split")
+        strings = dict(splitDict, index=[str(x) for x in splitDict["index"]])
+        naive = dict(splitDict, index=["2024-01-01", "2024-01-02", "2024-01-03"])
+        packed = packStockDict({"TS": splitDict, "STR": strings, "NAIVE": naive})
+        expected = pd.date_range("2024-01-01", periods=3, freq="D").asi8.tolist()
+        for symbol in ["TS", "STR", "NAIVE"]:
+            assert packed.toDataFrame(symbol).index.asi8.tolist() == expected
+        # The original timezone comes back in the split dictionary
+        assert packed.toSplitDict("TS", asLists=True)["index"] == splitDict["index"]
+        assert packed.toSplitDict("NAIVE", asLists=True)["index"][0] == pd.Timestamp("2024-01-01")
+        # Legacy behaviour without an exchange timezone
+        assert toEpochNanos(strings["index"])[0] == pd.Timestamp("2023-12-31 18:30").value
+
+    def test_rows_are_sorted_and_built_latest_first(self):
+        shuffled = sampleSplitDict(6, seed=7)
+        order = [3, 0, 5, 1, 4, 2]
+        shuffled = dict(shuffled, data=[shuffled["data"][i] for i in order], index=[shuffled["index"][i] for i in order])
+        packed = packStockDict({"A": sampleSplitDict(4), "B": shuffled})
+        assert packed.toDataFrame("B").index.is_monotonic_increasing
+        screening = packed.toDataFrame("B", descending=True)
+        legacy = legacyDataFrame(shuffled).rename_axis("Date").sort_index(ascending=False)
+        pd.testing.assert_frame_equal(screening, legacy)
+        assert screening["Close"].values.flags.writeable
+
+    def test_buildDataFrame(self):
+        values = np.arange(6, dtype=np.float64).reshape(3, 2)
+        nanos = pd.date_range("2024-01-01", periods=3, freq="D").asi8
+        df = buildDataFrame(values, ["Close", "Volume"], nanos, intColumns=("Volume",), descending=True, indexName="Date")
+        assert df.index[0] == pd.Timestamp("2024-01-03") and df.index.name == "Date"
+        assert df["Volume"].tolist() == [5, 3, 1] and str(df["Volume"].dtype) == "int64"
+
+
+class TestPKSharedMemoryStore:
+    def test_publish_and_read(self, store, stockDict):
+        assert store.publish(stockDict) == 2
+        assert store.isOwner
+        assert len(store) == 2 and "SBIN" in store and "INFY" not in store
+        df = store.getDataFrame("SBIN")
+        pd.testing.assert_frame_equal(df, legacyDataFrame(stockDict["SBIN"]))
+        assert not df["Close"].values.flags.writeable
+        splitDict = store.get("SBIN")
+        assert splitDict["MF"] == 123
+        assert store.get("INFY") is None and store.getDataFrame("INFY") is None
+        with pytest.raises(KeyError):
+            store["INFY"]
+
+    def test_publish_skips_unchanged_data(self, store, stockDict):
+        store.publish(stockDict)
+        store.publish(stockDict)
+        assert store.generation == 1
+        store.publish(stockDict, force=True)
+        assert store.generation == 2
+
+    def test_publish_picks_up_in_place_updates(self, store, stockDict):
+        store.publish(stockDict)
+        # The forming candle of the last symbol is updated in place
+        stockDict["INFY"] = sampleSplitDict(5, seed=9)
+        store.publish(stockDict)
+        assert store.generation == 2
+        stockDict["INFY"]["data"][-1][3] = 999.0
+        store.publish(stockDict)
+        assert store.generation == 3
+        assert store.getDataFrame("INFY")["Close"].iloc[-1] == 999.0
+        # A change to any other symbol
+        stockDict["SBIN"]["data"][-1][3] = 111.0
+        store.publish(stockDict)
+        assert store.generation == 4
+        assert store.getDataFrame("SBIN")["Close"].iloc[-1] == 111.0
+
+    def test_fingerprint_of_non_dicts_forces_a_publish(self, stockDict):
+        # Manager dict proxies aren't dicts: signing them would cost a round trip per symbol
+        class ManagerLikeDict:
+            def __init__(self, data):
+                self.data = data
+            def keys(self):
+                return self.data.keys()
+        assert PKSharedMemoryStore.fingerprint(stockDict) == PKSharedMemoryStore.fingerprint(dict(stockDict))
+        assert PKSharedMemoryStore.fingerprint(ManagerLikeDict(stockDict)) is None
+
+    def test_overlay_writes_stay_local(self, store, stockDict):
+        store.publish(stockDict)
+        store["INFY"] = sampleSplitDict(3, seed=4)
+        assert "INFY" in store and len(store) == 3
+        pd.testing.assert_frame_equal(store.getDataFrame("INFY"), legacyDataFrame(store["INFY"]))
+
+    @pytest.mark.parametrize("method", ["fork", "spawn"])
+    def test_child_process_reads_latest_generation(self, store, stockDict, method):
+        store.publish(stockDict)
+        stockDict["INFY"] = sampleSplitDict(7, seed=5)
+        store.publish(stockDict)
+        context = multiprocessing.get_context(method)
+        resultQueue = context.Queue()
+        process = context.Process(target=readFromChildProcess, args=(store, "INFY", resultQueue))
+        process.start()
+        result = resultQueue.get(timeout=60)
+        process.join(timeout=60)
+        assert result[0] == 3
+        assert result[1] == (7, 5)
+        assert result[2] == "int64"
+        assert result[3] == stockDict["INFY"]["data"][-1][3]
+
+    def test_worker_reattaches_after_republish(self, store, stockDict):
+        store.publish(stockDict)
+        worker = PKSharedMemoryStore(prefix=store.prefix)
+        assert len(worker) == 2 and not worker.isOwner
+        stockDict["INFY"] = sampleSplitDict(7, seed=5)
+        store.publish(stockDict)
+        assert len(worker) == 3 and worker.generation == 2
+        worker.release()
+
+    def test_release_unlinks_segments(self, stockDict):
+        store = PKSharedMemoryStore()
+        store.publish(stockDict)
+        prefix = store.prefix
+        store.release()
+        assert len(PKSharedMemoryStore(prefix=prefix)) == 0
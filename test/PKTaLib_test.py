@@ -98,6 +98,24 @@ class TestPktalib(unittest.TestCase):
         self.assertTrue(np.all(np.isfinite(result)))
         self.assertTrue(len(result) > 0)
 
+    def test_laggedSMAs(self):
+        close = self.large_df["close"]
+        lags = (0, 1, 20, 800, 951, 1000)
+        result = pktalib.laggedSMAs(close, timeperiod=50, lags=lags)
+        expected = [pktalib.SMA(close.head(len(close) - lag), timeperiod=50).iloc[-1] for lag in lags[:-2]]
+        np.testing.assert_allclose(result[:-2], expected, rtol=1e-9)
+        # Fewer than 50 candles left
+        self.assertTrue(np.isnan(result[-2]))
+        self.assertTrue(np.isnan(result[-1]))
+
+    def test_laggedSMAs_nan_window(self):
+        close = pd.Series([1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 7.0])
+        result = pktalib.laggedSMAs(close, timeperiod=3, lags=(0, 2, 3))
+        np.testing.assert_allclose(result[:1], [6.0])
+        self.assertTrue(np.isnan(result[1]))
+        self.assertTrue(np.isnan(result[2]))
+        self.assertTrue(np.isnan(pktalib.laggedSMAs(pd.Series([np.nan] * 5), timeperiod=3)[0]))
+
     def test_WMA(self):
         result = pktalib.WMA(self.df["close"], timeperiod=3)
         self.assertEqual(len(result), len(self.df))
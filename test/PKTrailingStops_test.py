@@ -0,0 +1,79 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import logging
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pkscreener.classes import ConfigManager
+from pkscreener.classes import PKTrailingStops
+from pkscreener.classes.PKTrailingStops import atrTrailingStops
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+
+
+def statistics():
+    return ScreeningStatistics(ConfigManager.tools(), logging.getLogger("test"))
+
+
+def loopStops(screener, close, nLoss, initial):
+    # The row by row loop findATRTrailingStops used to run
+    stops = [initial]
+    for i in range(1, len(close)):
+        stops.append(screener.xATRTrailingStop_func(close[i], close[i - 1], stops[i - 1], nLoss[i]))
+    return np.array(stops, dtype=float)
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_kernel_matches_the_row_by_row_loop(compiled):
+    screener = statistics()
+    rng = np.random.default_rng(11)
+    close = 100 + np.cumsum(rng.normal(0, 2, 500))
+    # Flat stretches produce ties with the previous stop
+    close[200:220] = close[199]
+    nLoss = np.abs(rng.normal(2, 1, 500))
+    nLoss[:10] = np.nan
+    with patch.object(PKTrailingStops, "_trailingStopsCompiled", PKTrailingStops._trailingStopsCompiled if compiled else None):
+        for initial in [0.0, np.nan, close[0] - 2]:
+            np.testing.assert_array_equal(atrTrailingStops(close, nLoss, initial=initial), loopStops(screener, close, nLoss, initial))
+    assert len(atrTrailingStops([], [])) == 0
+    with pytest.raises(ValueError):
+        atrTrailingStops([1.0, 2.0], [1.0])
+
+
+def test_findATRTrailingStops_uses_the_kernel():
+    rng = np.random.default_rng(3)
+    rows = 300
+    close = 100 + np.cumsum(rng.normal(0, 1, rows))
+    df = pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1000},
+                      index=pd.date_range("2023-01-02", periods=rows, freq="B")[::-1])
+    screener = statistics()
+    saveDict, screenDict = {}, {}
+    with patch("pkscreener.classes.ScreeningStatistics.atrTrailingStops", wraps=atrTrailingStops) as kernel:
+        screener.findATRTrailingStops(df, sensitivity=1, atr_period=10, ema_period=1, buySellAll=3, saveDict=saveDict, screenDict=screenDict)
+        screener.findBuySellSignalsFromATRTrailing(df, key_value=1, atr_period=10, ema_period=200, buySellAll=1, saveDict={}, screenDict={})
+    assert kernel.call_count == 2
+    assert saveDict["B/S"] in ["Buy", "Sell", "NA"]
@@ -0,0 +1,72 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pkscreener.classes.PKUniversePrefilter import ineligibleMask, lastRowSnapshot
+from pkscreener.classes.StockDataPacker import packStockDict
+
+
+def _entry(closes, volumes):
+    index = pd.date_range("2023-01-02", periods=len(closes), freq="B")
+    frame = pd.DataFrame({"open": closes, "high": closes, "low": closes, "close": closes, "volume": volumes}, index=index)
+    return frame.to_dict("split")
+
+
+def _universe():
+    rows = 300
+    rising = np.linspace(100, 400, rows)
+    return packStockDict({
+        "RISING": _entry(rising, np.full(rows, 5e5)),
+        "PENNY": _entry(np.full(rows, 2.0), np.full(rows, 5e5)),
+        "ILLIQUID": _entry(np.full(rows, 100.0), np.full(rows, 10.0)),
+        "FALLEN": _entry(np.concatenate([np.full(rows - 1, 1000.0), [100.0]]), np.full(rows, 5e5)),
+        "GAPPY": _entry(np.full(rows, 100.0), np.concatenate([[np.nan], np.full(rows - 1, 10.0)])),
+        "NEW": _entry(np.full(5, 100.0), np.full(5, 10.0)),
+    })
+
+
+def test_snapshot_reads_the_last_rows():
+    snapshot = lastRowSnapshot(_universe())
+    assert snapshot.loc["RISING", "LTP"] == 400
+    assert snapshot.loc["RISING", "52Wk-H"] == 400
+    assert round(snapshot.loc["RISING", "52Wk-L"], 6) == round(np.linspace(100, 400, 300)[50], 6)
+    assert round(snapshot.loc["FALLEN", "%Chng"], 6) == -90
+    assert snapshot.loc["RISING", "VolMA"] == 5e5
+    # Fewer candles than VolMA needs, and a missing volume in its window
+    assert snapshot.loc["NEW", "VolMA"] == 0 and snapshot.loc["NEW", "Rows"] == 5
+    assert np.isnan(snapshot.loc["GAPPY", "volume"]) and np.isnan(snapshot.loc["GAPPY", "VolMA"])
+
+
+def test_ineligible_mask_only_drops_certain_rejections():
+    snapshot = lastRowSnapshot(_universe())
+    dropped = lambda mask: sorted(snapshot.index[mask])
+    assert dropped(ineligibleMask(snapshot, 0, minLTP=20, maxLTP=50000, minVolume=1000)) == ["PENNY"]
+    assert dropped(ineligibleMask(snapshot, 1, minLTP=20, maxLTP=50000, minVolume=1000)) == ["ILLIQUID", "NEW", "PENNY"]
+    assert dropped(ineligibleMask(snapshot, 1, minLTP=20, maxLTP=50000, minVolume=1000, stageTwo=True)) == ["FALLEN", "ILLIQUID", "NEW", "PENNY"]
+    # Flat volumes have a ratio of 1
+    assert "RISING" in dropped(ineligibleMask(snapshot, 9, minLTP=20, maxLTP=50000, minVolume=1000, volumeRatio=2.5))
+    assert dropped(ineligibleMask(snapshot, 1, minLTP=20, maxLTP=50000, minChange=-50, checkLTP=False)) == []
+    assert dropped(ineligibleMask(snapshot, 1, minLTP=20, maxLTP=50000, minChange=-50)) == ["FALLEN", "PENNY"]
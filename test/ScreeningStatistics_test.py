@@ -2168,10 +2168,8 @@ def test_validateLorentzian_buy_signal(tools_instance):
     # Call the validateLorentzian function with the sample DataFrame and lookFor=1 (Buy)
     screenDict = {}
     saveDict = {}
-    mock_lc = MagicMock()
-    with patch("advanced_ta.LorentzianClassification") as mock_lc:
-        mock_lc.return_value = mock_lc
-        mock_lc.df = pd.DataFrame([{"isNewSellSignal":False,"isNewBuySignal":True}])
+    with patch("pkscreener.classes.ScreeningStatistics.PKLorentzianClassifier.sharedClassifier") as mock_lc:
+        mock_lc.return_value.lastSignal.return_value = 1
         result = tools_instance.validateLorentzian(df, screenDict, saveDict, lookFor=1)
         # Assert that the function returns True and sets the appropriate screenDict and saveDict values
         assert result == True
@@ -2190,17 +2188,15 @@ def test_validateLorentzian_sell_signal(tools_instance):
     # Call the validateLorentzian function with the sample DataFrame and lookFor=2 (Sell)
     screenDict = {}
     saveDict = {}
-    mock_lc = MagicMock()
-    with patch("advanced_ta.LorentzianClassification") as mock_lc:
-        mock_lc.return_value = mock_lc
-        mock_lc.df = pd.DataFrame([{"isNewSellSignal":True,"isNewBuySignal":False}])
+    with patch("pkscreener.classes.ScreeningStatistics.PKLorentzianClassifier.sharedClassifier") as mock_lc:
+        mock_lc.return_value.lastSignal.return_value = -1
         result = tools_instance.validateLorentzian(df, screenDict, saveDict, lookFor=2)
         # Assert that the function returns True and sets the appropriate screenDict and saveDict values
         assert result == True
         assert screenDict["Pattern"] == (colorText.FAIL + "Lorentzian-Sell" + colorText.END)
         assert saveDict["Pattern"] == "Lorentzian-Sell"
         assert tools_instance.validateLorentzian(df, screenDict, saveDict, lookFor=1) == False
-        mock_lc.df = pd.DataFrame([{"isNewSellSignal":False,"isNewBuySignal":False}])
+        mock_lc.return_value.lastSignal.return_value = 0
         assert tools_instance.validateLorentzian(df, screenDict, saveDict, lookFor=1) == False
 
 def test_validateLorentzian_no_signal(tools_instance):
@@ -4028,6 +4024,71 @@ class TestPreprocessData(unittest.TestCase):
             pass  # Some methods may raise exceptions for empty input
 
 
+class TestFrameCopies(unittest.TestCase):
+    """Test the counted copies of the screening data."""
+
+    def setUp(self):
+        self.mock_config = create_mock_config()
+        self.stats = ScreeningStatistics(self.mock_config, dl())
+        dates = pd.date_range(start="2023-01-01", periods=300, freq='D')[::-1]
+        close = 100 + np.cumsum(np.random.default_rng(5).normal(0, 1, 300))
+        self.df = pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                                'volume': np.full(300, 100000.0)}, index=dates)
+        self.df.iloc[3, 0] = np.nan
+        self.df.iloc[4, 1] = np.inf
+
+    def test_cleanedCopy(self):
+        original = self.df.copy()
+        data = self.stats.cleanedCopy(self.df)
+        self.assertEqual(self.stats.frameCopies, 1)
+        self.assertEqual(data.iloc[3, 0], 0)
+        self.assertEqual(data.iloc[4, 1], 0)
+        pd.testing.assert_frame_equal(self.df, original)
+
+    def test_validators_leave_their_input_alone(self):
+        original = self.df.copy()
+        self.stats.findTrend(self.df, {}, {}, daysToLookback=22)
+        self.stats.findUptrend(self.df, {}, {"LTP": 100}, False, "SBIN", refreshMFAndFV=False)
+        self.stats.findATRTrailingStops(self.df, saveDict={}, screenDict={})
+        pd.testing.assert_frame_equal(self.df, original)
+        # findTrend and findUptrend only read their data
+        self.assertEqual(self.stats.frameCopies, 1)
+
+    def test_copies_are_counted_per_instance(self):
+        other = ScreeningStatistics(self.mock_config, dl())
+        self.stats.frameCopy(self.df)
+        self.stats.cleanedCopy(self.df)
+        self.assertEqual(self.stats.frameCopies, 2)
+        self.assertEqual(other.frameCopies, 0)
+
+    def test_reading_validators_take_read_only_frames(self):
+        df = self.df.fillna(0).replace([np.inf, -np.inf], 0)
+        for col in ["RSI", "RSIi", "SMA", "LMA", "VolMA"]:
+            df[col] = df["close"]
+        values = df.to_numpy(dtype=float)
+        values.flags.writeable = False
+        data = pd.DataFrame(values, index=df.index, columns=df.columns, copy=False)
+        self.stats.findPSARReversalWithRSI(data, {}, {})
+        self.stats.findRisingRSI(data)
+        self.stats.findRSICrossingMA(data, {}, {}, lookFor=3)
+        self.stats.findPotentialProfitableEntriesBullishTodayForPDOPDC(data, {}, {})
+        self.stats.findPotentialProfitableEntriesFrequentHighsBullishMAs(data, data, {}, {})
+        self.stats.validateIpoBase("SBIN", data, {}, {})
+        self.stats.validateLowerHighsLowerLows(data)
+        self.stats.validateNewlyListed(data.head(100), "220d")
+        self.stats.validatePriceActionCrosses(data, {}, {}, mas=[50, 200])
+        self.stats.validatePriceActionCrossesForPivotPoint(data, {}, {})
+        self.stats.validateVolumeSpreadAnalysis(data, {}, {})
+        self.stats.validateMomentum(data, {}, {})
+        self.assertEqual(self.stats.frameCopies, 0)
+
+    def test_rising_to_latest(self):
+        self.assertTrue(ScreeningStatistics.risingToLatest([3, 2, 2]))
+        self.assertFalse(ScreeningStatistics.risingToLatest([2, 3, 1]))
+        self.assertTrue(ScreeningStatistics.risingToLatest([3, 2, np.nan]))
+        self.assertFalse(ScreeningStatistics.risingToLatest([3, np.nan, 2]))
+
+
 class TestValidationMethods(unittest.TestCase):
     """Test various validation methods."""
 
@@ -5456,6 +5517,40 @@ class TestValidateConfluenceCoverage(unittest.TestCase):
         result = self.stats.validateConfluence("TEST", df, full_df, screenDict, saveDict, percentage=0.1, confFilter=3)
 
 
+    def test_super_confluence_golden_cross(self):
+        """Test super confluence finds the day the short EMA crossed over."""
+        self.mock_config.superConfluenceEMAPeriods = "8,21,55"
+        self.mock_config.superConfluenceMaxReviewDays = 5
+        self.mock_config.superConfluenceEnforce200SMA = False
+        # Latest first: a long decline followed by 3 strongly rising days
+        close_prices = np.concatenate([np.linspace(200, 100, 250), [110, 125, 145]])[::-1]
+        dates = pd.date_range(start="2023-01-01", periods=len(close_prices), freq='D')[::-1]
+        df = pd.DataFrame({'open': close_prices, 'high': close_prices, 'low': close_prices,
+                           'close': close_prices, 'volume': [100000] * len(close_prices)}, index=dates)
+        screenDict = {}
+        saveDict = {}
+        result = self.stats.validateConfluence("TEST", df, df.copy(), screenDict, saveDict, percentage=0.1, confFilter=4)
+        self.assertTrue(result)
+        self.assertIn("SuperGoldenConf", saveDict["MA-Signal"])
+        self.assertIn(str(saveDict["SuperConfSort"]), [date.strftime("%Y%m%d") for date in dates[:5]])
+
+    def test_super_confluence_none(self):
+        """Test super confluence without any crossover in the review window."""
+        self.mock_config.superConfluenceEMAPeriods = "8,21,55"
+        self.mock_config.superConfluenceMaxReviewDays = 5
+        self.mock_config.superConfluenceEnforce200SMA = True
+        close_prices = np.linspace(200, 100, 250)
+        dates = pd.date_range(start="2023-01-01", periods=len(close_prices), freq='D')[::-1]
+        df = pd.DataFrame({'open': close_prices, 'high': close_prices, 'low': close_prices,
+                           'close': close_prices, 'volume': [100000] * len(close_prices),
+                           'SMA': close_prices + 3, 'LMA': close_prices + 6, 'SSMA20': close_prices + 2}, index=dates)
+        screenDict = {}
+        saveDict = {}
+        result = self.stats.validateConfluence("TEST", df, df.copy(), screenDict, saveDict, percentage=0.1, confFilter=4)
+        self.assertFalse(result)
+        self.assertNotIn("SuperConfSort", saveDict)
+
+
 class TestValidateIpoBaseCoverage(unittest.TestCase):
     """More tests for validateIpoBase."""
     
@@ -0,0 +1,262 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+from PKDevTools.classes.ColorText import colorText
+from PKDevTools.classes.log import default_logger as dl
+
+from pkscreener.classes.Pktalib import pktalib
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+
+# The row-wise implementations the vectorized validators replaced. They are
+# kept here as the reference for the outputs and the benchmarks.
+
+
+def rowwiseBbandsSqueeze(self, fullData, screenDict, saveDict, filter=4):
+    if fullData is None or len(fullData) < 20:
+        return False
+    oldestRecordsFirst_df = fullData.head(30).copy()
+    latestRecordsFirst_df = oldestRecordsFirst_df[::-1].tail(30)
+    latestRecordsFirst_df = latestRecordsFirst_df.fillna(0)
+    latestRecordsFirst_df = latestRecordsFirst_df.replace([np.inf, -np.inf], 0)
+    latestRecordsFirst_df.loc[:, 'BBands-U'], latestRecordsFirst_df.loc[:, 'BBands-M'], latestRecordsFirst_df.loc[:, 'BBands-L'] = pktalib.BBANDS(latestRecordsFirst_df["close"], 20)
+    latestRecordsFirst_df['low_kel'], latestRecordsFirst_df['upp_kel'] = pktalib.KeltnersChannel(latestRecordsFirst_df["high"], latestRecordsFirst_df["low"], latestRecordsFirst_df["close"], 20)
+
+    def in_squeeze(df):
+        return df['low_kel'] < df['BBands-L'] < df['BBands-U'] < df['upp_kel']
+
+    latestRecordsFirst_df['squeeze'] = latestRecordsFirst_df.apply(in_squeeze, axis=1)
+    latestRecordsFirst_df = latestRecordsFirst_df.tail(3)
+    saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
+    candle3Sqz = latestRecordsFirst_df.iloc[-3]["squeeze"]
+    candle1Sqz = latestRecordsFirst_df.iloc[-1]["squeeze"]
+    candle2Sqz = latestRecordsFirst_df.iloc[-2]["squeeze"]
+    if candle3Sqz and not candle1Sqz:
+        if filter not in [1, 3, 4]:
+            return False
+        distance_to_upper = abs(latestRecordsFirst_df['BBands-U'].values[-1] - latestRecordsFirst_df["close"].values[-1])
+        distance_to_lower = abs(latestRecordsFirst_df['BBands-L'].values[-1] - latestRecordsFirst_df["close"].values[-1])
+        action = False
+        if distance_to_upper < distance_to_lower:
+            if filter not in [1, 4]:
+                return False
+            action = True
+        elif filter not in [3, 4]:
+            return False
+        screenDict["Pattern"] = saved[0] + (colorText.GREEN if action else colorText.FAIL) + f"BBands-SQZ-{'Buy' if action else 'Sell'}" + colorText.END
+        saveDict["Pattern"] = saved[1] + f"TTM-SQZ-{'Buy' if action else 'Sell'}"
+        return True
+    elif candle3Sqz and candle2Sqz and candle1Sqz:
+        if filter not in [2, 4]:
+            return False
+        screenDict["Pattern"] = f'{saved[0]}{colorText.WARN}TTM-SQZ{colorText.END}'
+        saveDict["Pattern"] = f'{saved[1]}TTM-SQZ'
+        return True
+    return False
+
+
+def rowwiseMomentum(self, df, screenDict, saveDict):
+    if df is None or len(df) == 0:
+        return False
+    data = df.copy().head(3)
+    if len(data) < 3:
+        return False
+    for row in data.iterrows():
+        if row[1]["close"] <= row[1]["open"]:
+            return False
+    openDesc = data.sort_values(by=["open"], ascending=False)
+    closeDesc = data.sort_values(by=["close"], ascending=False)
+    volDesc = data.sort_values(by=["volume"], ascending=False)
+    if data.equals(openDesc) and data.equals(closeDesc) and data.equals(volDesc):
+        to = data["open"].iloc[0]
+        yc = data["close"].iloc[1]
+        yo = data["open"].iloc[1]
+        dyc = data["close"].iloc[2]
+        if (to >= yc) and (yo >= dyc):
+            saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
+            screenDict["Pattern"] = saved[0] + colorText.GREEN + "Momentum Gainer" + colorText.END
+            saveDict["Pattern"] = saved[1] + "Momentum Gainer"
+            return True
+    return False
+
+
+def rowwiseInsideBar(self, df, screenDict, saveDict, chartPattern=1, daysToLookback=5):
+    if df is None or len(df) == 0:
+        return False
+    orgData = df.copy()
+    saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
+    for i in range(int(daysToLookback), int(round(daysToLookback * 0.5)) - 1, -1):
+        if i == 2:
+            return 0
+        if chartPattern == 1:
+            trendFits = "Up" in saveDict["Trend"] and ("Bull" in saveDict["MA-Signal"] or "Support" in saveDict["MA-Signal"])
+        else:
+            trendFits = "Down" in saveDict["Trend"] and ("Bear" in saveDict["MA-Signal"] or "Resist" in saveDict["MA-Signal"])
+        if not trendFits:
+            return 0
+        data = orgData.head(i)
+        refCandle = data.tail(1)
+        if (
+            (len(data.high[data.high > refCandle.high.item()]) == 0)
+            and (len(data.low[data.low < refCandle.low.item()]) == 0)
+            and (len(data.open[data.open > refCandle.high.item()]) == 0)
+            and (len(data.close[data.close < refCandle.low.item()]) == 0)
+        ):
+            screenDict["Pattern"] = saved[0] + colorText.WARN + ("Inside Bar (%d)" % i) + colorText.END
+            saveDict["Pattern"] = saved[1] + "Inside Bar (%d)" % i
+            return i
+    return 0
+
+
+def rowwiseVCP(self, df, screenDict, saveDict, stockName=None, window=3, percentageFromTop=3):
+    if df is None or len(df) == 0:
+        return False
+    data = df.copy()
+    percentageFromTop /= 100
+    data.reset_index(inplace=True)
+    data.rename(columns={"index": "Date"}, inplace=True)
+    data["tops"] = (data["high"].iloc[list(pktalib.argrelextrema(np.array(data["high"]), np.greater_equal, order=window)[0])].head(4))
+    data["bots"] = (data["low"].iloc[list(pktalib.argrelextrema(np.array(data["low"]), np.less_equal, order=window)[0])].head(4))
+    data = data.fillna(0)
+    data = data.replace([np.inf, -np.inf], 0)
+    tops = data[data.tops > 0]
+    highestTop = round(tops.describe()["high"]["max"], 1)
+    allTimeHigh = max(data["high"])
+    withinATHRange = data["close"].iloc[0] >= (allTimeHigh - allTimeHigh * float(self.configManager.vcpRangePercentageFromTop) / 100)
+    if not withinATHRange and self.configManager.enableAdditionalVCPFilters:
+        return False
+    filteredTops = tops[tops.tops > (highestTop - (highestTop * percentageFromTop))]
+    if filteredTops.equals(tops):
+        lowPoints = []
+        for i in range(len(tops) - 1):
+            endDate = tops.iloc[i]["Date"]
+            startDate = tops.iloc[i + 1]["Date"]
+            lowPoints.append(data[(data.Date >= startDate) & (data.Date <= endDate)].describe()["low"]["min"])
+        lowPointsOrg = lowPoints
+        lowPoints.sort(reverse=True)
+        lowPointsSorted = lowPoints
+        if data.empty or len(lowPoints) < 1:
+            return False
+        ltp = data.head(1)["close"].iloc[0]
+        if lowPointsOrg == lowPointsSorted and ltp < highestTop and ltp > lowPoints[0]:
+            saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
+            isTightening, consolidations, deviationScore = self.validateConsolidationContraction(df=df.copy(), legsToCheck=0, stockName=stockName)
+            consolidations = [f"{str(x)}%" for x in consolidations]
+            if isTightening:
+                screenDict["Pattern"] = saved[0] + colorText.GREEN + f"VCP (BO: {highestTop}, Cons.:{','.join(consolidations)})" + colorText.END
+                saveDict["Pattern"] = saved[1] + f"VCP (BO: {highestTop}, Cons.:{','.join(consolidations)})"
+                screenDict["deviationScore"] = deviationScore
+                saveDict["deviationScore"] = deviationScore
+                return True
+            return False
+    return False
+
+
+def latestFirstCandles(count, seed, volatility=0.02):
+    """Candles with the latest one first, as the validators get them."""
+    rng = np.random.default_rng(seed)
+    scale = np.linspace(1, 0.2, count) if seed % 3 == 0 else np.ones(count)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility, count) * scale))
+    openPrice = close * (1 + rng.normal(0, volatility / 4, count))
+    high = np.maximum(openPrice, close) * (1 + np.abs(rng.normal(0, volatility / 2, count)))
+    low = np.minimum(openPrice, close) * (1 - np.abs(rng.normal(0, volatility / 2, count)))
+    volume = rng.integers(1000, 100000, count).astype(float)
+    data = pd.DataFrame({"open": openPrice, "high": high, "low": low, "close": close, "volume": volume},
+                        index=pd.date_range("2005-01-03", periods=count, freq="B"))
+    return data[::-1]
+
+
+@pytest.fixture
+def screener():
+    configManager = MagicMock()
+    configManager.enableAdditionalVCPEMAFilters = False
+    configManager.enableAdditionalVCPFilters = False
+    configManager.vcpRangePercentageFromTop = 20
+    configManager.vcpLegsToCheckForConsolidation = 3
+    return ScreeningStatistics(configManager, dl())
+
+
+def outcome(function, *args, **kwargs):
+    screenDict, saveDict = {"Pattern": "Pre"}, {"Pattern": "Pre", "Trend": kwargs.pop("trend", ""), "MA-Signal": kwargs.pop("maSignal", "")}
+    return function(*args, screenDict, saveDict, **kwargs), screenDict, saveDict
+
+
+def test_bbands_squeeze_matches_rowwise(screener):
+    results = set()
+    for seed in range(60):
+        data = latestFirstCandles(60, seed, volatility=0.002 if seed % 2 else 0.02)
+        for filter in [1, 2, 3, 4]:
+            expected = outcome(lambda *args: rowwiseBbandsSqueeze(screener, *args, filter=filter), data)
+            assert outcome(screener.findBbandsSqueeze, data, filter=filter) == expected, (seed, filter)
+            results.add(expected[2]["Pattern"])
+    assert len(results) > 1
+
+
+def test_momentum_matches_rowwise(screener):
+    gainer = pd.DataFrame({"open": [104.0, 102.0, 100.0], "close": [106.0, 104.0, 101.0], "high": [107.0, 105.0, 102.0],
+                           "low": [103.0, 101.0, 99.0], "volume": [3000.0, 2000.0, 1000.0]},
+                          index=pd.date_range("2024-01-01", periods=3, freq="D")[::-1])
+    variants = [gainer, gainer.assign(volume=[3000.0, 3000.0, 1000.0]), gainer.assign(volume=[2000.0, 3000.0, 1000.0]),
+                gainer.assign(open=[103.0, 102.0, 100.0]), gainer.assign(close=[106.0, 101.0, 101.5]),
+                gainer.assign(volume=[3000.0, np.nan, 1000.0]), gainer.assign(volume=[3000.0, 2000.0, np.nan]), gainer.head(2)]
+    variants += [latestFirstCandles(10, seed) for seed in range(40)]
+    for data in variants:
+        assert outcome(screener.validateMomentum, data) == outcome(lambda *args: rowwiseMomentum(screener, *args), data)
+    assert outcome(screener.validateMomentum, gainer)[0]
+
+
+def test_inside_bar_matches_rowwise(screener):
+    found = set()
+    fixtures = [latestFirstCandles(30, seed, volatility=0.01) for seed in range(60)]
+    for motherCandle in range(2, 12):
+        # A wide candle with the more recent candles inside its range
+        data = latestFirstCandles(30, motherCandle, volatility=0.002).copy()
+        data.iloc[motherCandle, data.columns.get_loc("high")] = data["high"].iloc[:motherCandle].max() * 1.05
+        data.iloc[motherCandle, data.columns.get_loc("low")] = data["low"].iloc[:motherCandle].min() * 0.95
+        fixtures.append(data)
+    for seed, data in enumerate(fixtures):
+        for chartPattern, trend, maSignal in [(1, "Strong Up", "Bullish"), (1, "Up", "Support"), (2, "Down", "Bearish"),
+                                              (1, "Down", "Bullish"), (2, "Up", "Resist")]:
+            for daysToLookback in [3, 5, 7, 12]:
+                kwargs = dict(chartPattern=chartPattern, daysToLookback=daysToLookback, trend=trend, maSignal=maSignal)
+                expected = outcome(lambda *args, **kw: rowwiseInsideBar(screener, *args, **kw), data, **dict(kwargs))
+                assert outcome(screener.validateInsideBar, data, **dict(kwargs)) == expected, (seed, kwargs)
+                found.add(expected[0])
+    assert len(found) > 2
+
+
+def test_vcp_matches_rowwise(screener):
+    found = set()
+    for seed in range(60):
+        data = latestFirstCandles(120, seed, volatility=0.015)
+        for window in [3, 5]:
+            expected = outcome(lambda *args, **kw: rowwiseVCP(screener, *args, **kw), data, window=window, percentageFromTop=10)
+            assert outcome(screener.validateVCP, data, window=window, percentageFromTop=10) == expected, (seed, window)
+            found.add(expected[0])
+    assert found == {True, False}
@@ -0,0 +1,90 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from pkscreener.classes import PKCacheMetadata, PKColumnarCache
+from pkscreener.classes.AssetsManager import PKAssetsManager
+from pkscreener.classes.StockDataSchema import (
+    OHLCV_COLUMNS,
+    SCHEMA_VERSION,
+    columnPlan,
+    isCanonical,
+    normalizeEntry,
+    normalizeStockDict,
+)
+
+
+def legacyEntry():
+    return {
+        "columns": ["Open", "open", "High", "Low", "Close", "Volume", "Adj Close"],
+        "index": ["2025-01-09", "2025-01-10"],
+        "data": [[1.0, None, 2.0, 0.5, 1.5, 10, 1.4], [2.0, 2.2, 3.0, 1.0, 2.0, 20, 1.9]],
+        "MF": 5,
+    }
+
+
+class TestStockDataSchema:
+    def test_column_plan(self):
+        canonical, sources = columnPlan(["Close", "Date", "close", "Open"])
+        assert canonical == ["open", "close", "Date"]
+        # The lowercase column takes precedence over the capitalized one
+        assert sources == [[3], [2, 0], [1]]
+        assert isCanonical(OHLCV_COLUMNS + ["Adj Close"])
+        assert not isCanonical(["Open", "High", "Low", "Close", "Volume"])
+        assert not isCanonical(["close", "open"])
+
+    def test_normalize_entry_merges_case_duplicates(self):
+        entry = normalizeEntry(legacyEntry())
+        assert entry["columns"] == OHLCV_COLUMNS + ["Adj Close"]
+        assert entry["data"] == [[1.0, 2.0, 0.5, 1.5, 10, 1.4], [2.2, 3.0, 1.0, 2.0, 20, 1.9]]
+        assert entry["index"] == ["2025-01-09", "2025-01-10"] and entry["MF"] == 5
+        canonical = {"columns": OHLCV_COLUMNS, "index": [], "data": []}
+        assert normalizeEntry(canonical) is canonical
+
+    def test_normalize_stock_dict(self):
+        frame = pd.DataFrame({"Close": [3.0, np.nan], "close": [np.nan, 4.0], "volume": [1, 2]})
+        stockDict = {"A": legacyEntry(), "B": frame, "C": {"columns": OHLCV_COLUMNS, "index": [], "data": []}, "D": None}
+        assert normalizeStockDict(stockDict) == 2
+        assert stockDict["B"]["columns"] == ["close", "volume"]
+        assert stockDict["B"]["data"] == [[3.0, 1], [4.0, 2]]
+        assert normalizeStockDict(stockDict) == 0
+
+    def test_old_cache_is_migrated_once(self, tmp_path):
+        cacheFile = os.path.join(tmp_path, "stock_data_10012025.pkl")
+        with open(cacheFile, "wb") as f:
+            pickle.dump({"SBIN": legacyEntry()}, f)
+        stockData = PKAssetsManager.readCachedStockData(cacheFile)
+        assert stockData["SBIN"]["columns"] == OHLCV_COLUMNS + ["Adj Close"]
+        with open(cacheFile, "rb") as f:
+            assert pickle.load(f)["SBIN"]["columns"] == OHLCV_COLUMNS + ["Adj Close"]
+        assert PKCacheMetadata.readCacheMetadata(cacheFile)["schemaVersion"] == SCHEMA_VERSION
+        assert PKColumnarCache.isColumnarCacheCurrent(cacheFile)
+        assert PKAssetsManager.readCachedStockData(cacheFile)["SBIN"]["data"][0][:5] == [1.0, 2.0, 0.5, 1.5, 10]
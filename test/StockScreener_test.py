@@ -180,3 +180,26 @@ def test_screenStocks(stock_consumer):
                 assert called_values[executeOption]
             else:
                 assert result is None
+
+def test_resultData_keeps_the_whole_window_for_backtests(stock_consumer):
+    data = pd.DataFrame({"close": [3.0, 2.0, 1.0]}, index=pd.to_datetime(["2024-01-03", "2024-01-02", "2024-01-01"]))
+    assert stock_consumer.resultData(data, "B") is data
+
+def test_resultData_keeps_only_the_timestamps_runScanners_reads(stock_consumer):
+    index = pd.date_range("2024-01-01", periods=30, freq="D")[::-1]
+    data = pd.DataFrame({"open": range(30), "close": range(30), "volume": range(30)}, index=index)
+    data.index.name = "Date"
+    for daysAgo in [None, 0, 3]:
+        userArgs = MagicMock()
+        userArgs.backtestdaysago = daysAgo
+        lean = stock_consumer.resultData(data, "X", userArgs)
+        assert len(lean.columns) == 0
+        assert len(lean) <= 2 + (daysAgo or 0) + 1
+        assert lean.index[0] == data.index[0]
+        assert lean.index.max() == data.index.max()
+        assert lean.index.name == "Date"
+        for k in range((daysAgo or 0) + 1):
+            assert lean.index[-1 - k] == data.index[-1 - k]
+        dated = lean.copy().reset_index()
+        assert dated["Date"].iloc[0] == data.reset_index()["Date"].iloc[0]
+    assert stock_consumer.resultData(data.head(0), "X") is not None
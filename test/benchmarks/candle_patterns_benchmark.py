@@ -0,0 +1,76 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+"""
+Candle patterns detected into one bitmask (CandlePatterns.patternMask) vs.
+one pktalib call per pattern, as findPattern used to do. Not collected by
+pytest; run it by hand:
+
+    python test/benchmarks/candle_patterns_benchmark.py [--candles 120] [--seeds 5]
+
+Every stock is a 22 candle latest-first slice of random candles, like
+the processedData findPattern gets.
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+warnings.simplefilter("ignore", DeprecationWarning)
+warnings.simplefilter("ignore", FutureWarning)
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pkscreener.classes.CandlePatterns import CandlePatterns
+from CandlePatterns_test import randomCandles, seriesPatternMask
+
+
+def timed(function, slices):
+    start = time.perf_counter()
+    masks = [function(processedData) for processedData in slices]
+    return masks, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candles", type=int, default=120)
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+    slices = []
+    for seed in range(args.seeds):
+        df = randomCandles(seed, candles=args.candles)
+        slices.extend(df.iloc[:end][::-1].head(22) for end in range(22, len(df)))
+    byPattern, byPatternTime = timed(seriesPatternMask, slices)
+    masked, maskedTime = timed(CandlePatterns().patternMask, slices)
+    assert masked == byPattern
+    print(f"Candle patterns of {len(slices)} stocks:")
+    print(f"pattern by pattern: {byPatternTime * 1000:.1f}ms")
+    print(f"bitmask           : {maskedTime * 1000:.1f}ms, {byPatternTime / maskedTime:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+"""
+Pickle vs. chunked download of the stock data cache: size, wall time and
+peak RSS. Not collected by pytest; run it by hand:
+
+    python test/benchmarks/chunked_cache_benchmark.py [--symbols 200] [--rows 250]
+
+Each download runs in a fresh interpreter so that its peak RSS isn't
+shared with the other one. Importing pkscreener alone peaks higher than
+either download, so on Linux the RSS is also sampled during the download
+and reported as the growth over the RSS before it.
+"""
+
+import argparse
+import functools
+import json
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pkscreener.classes import PKChunkedCache
+from PKChunkedCache_test import QuietHandler, sampleStockDict
+
+CACHE_FILE = "stock_data_01012024.pkl"
+
+
+def maxRSSBytes():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    maxRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxRSS if sys.platform == "darwin" else maxRSS * 1024
+
+
+def currentRSSBytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+class RSSSampler(threading.Thread):
+    """Keeps the highest RSS seen until stopped."""
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = currentRSSBytes()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(0.001):
+            self.peak = max(self.peak, currentRSSBytes())
+
+    def stop(self):
+        self.done.set()
+        self.join()
+        return max(self.peak, currentRSSBytes())
+
+
+def download(variant, server):
+    """Runs in the child: downloads the cache once and reports its timing and RSS."""
+    import requests
+    rssBefore = currentRSSBytes()
+    sampler = RSSSampler() if rssBefore is not None else None
+    if sampler is not None:
+        sampler.start()
+    start = time.perf_counter()
+    if variant == "pickle":
+        stockDict = pickle.loads(requests.get(f"{server}/{CACHE_FILE}", timeout=60).content)
+    else:
+        _, stockDict = PKChunkedCache.downloadChunkedCache(server, CACHE_FILE)
+    elapsed = time.perf_counter() - start
+    rssGrowth = (sampler.stop() - rssBefore) if sampler is not None else None
+    print(json.dumps({"symbols": len(stockDict), "seconds": elapsed, "rssGrowth": rssGrowth, "maxRSS": maxRSSBytes()}))
+
+
+def measure(variant, server):
+    output = subprocess.run([sys.executable, __file__, "--download", variant, "--server", server],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=250)
+    parser.add_argument("--symbolsPerChunk", type=int, default=25)
+    parser.add_argument("--download", choices=["pickle", "chunked"], help=argparse.SUPPRESS)
+    parser.add_argument("--server", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.download:
+        download(args.download, args.server)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        stockDict = sampleStockDict(symbolCount=args.symbols, rows=args.rows, seed=3)
+        cacheFile = os.path.join(directory, CACHE_FILE)
+        with open(cacheFile, "wb") as f:
+            pickle.dump(stockDict, f, protocol=pickle.HIGHEST_PROTOCOL)
+        manifest = PKChunkedCache.writeChunkedCache(stockDict, cacheFile, symbolsPerChunk=args.symbolsPerChunk)
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=directory))
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        server = f"http://127.0.0.1:{httpd.server_address[1]}"
+        try:
+            results = {variant: measure(variant, server) for variant in ["pickle", "chunked"]}
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+        sizes = {"pickle": os.path.getsize(cacheFile),
+                 "chunked": sum(chunk["bytes"] for chunk in manifest["chunks"])}
+    print(f"{args.symbols} symbols x {args.rows} rows, {len(manifest['chunks'])} chunks ({manifest['codec']})")
+    for variant, result in results.items():
+        growth = "n/a" if result["rssGrowth"] is None else f"+{result['rssGrowth'] / 2**20:.1f} MiB"
+        print(f"{variant:8}: {sizes[variant]:>10} bytes, {result['seconds']:.3f}s, "
+              f"peak RSS {result['maxRSS'] / 2**20:.1f} MiB, during the download {growth}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+"""
+The indicators of the whole universe in one pass (PKIndicatorPanel) vs.
+preprocessData stock by stock, on one core. Not collected by pytest; run
+it by hand:
+
+    python test/benchmarks/panel_indicators_benchmark.py [--symbols 300] [--rows 250]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pkscreener.classes.PKPanelIndicators import PKIndicatorPanel
+from PKPanelIndicators_test import screener
+
+
+def universe(symbols, rows, seed=5):
+    rng = np.random.default_rng(seed)
+    # Latest first, like getRelevantDataForStock returns them
+    index = pd.date_range("2023-01-02", periods=rows, freq="B")[::-1]
+    frames = {}
+    for i in range(symbols):
+        close = 100 + np.cumsum(rng.normal(0, 1, rows))
+        frames[f"S{i}"] = pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                                        "volume": rng.integers(1, 1000, rows)}, index=index)
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--rows", type=int, default=250)
+    parser.add_argument("--useEMA", action="store_true")
+    args = parser.parse_args()
+    frames = universe(args.symbols, args.rows)
+    statistics = screener(useEMA=args.useEMA)
+    start = time.perf_counter()
+    for data in frames.values():
+        statistics.preprocessData(data, daysToLookback=22)
+    perSymbolTime = time.perf_counter() - start
+    start = time.perf_counter()
+    panel = PKIndicatorPanel.fromFrames(frames).compute()
+    panelComputeTime = time.perf_counter() - start
+    for symbol, data in frames.items():
+        panel.preprocessedFrames(symbol, data, daysToLookback=22)
+    panelTime = time.perf_counter() - start
+    print(f"{args.symbols} symbols x {args.rows} rows")
+    print(f"per symbol: {perSymbolTime:.3f}s")
+    print(f"panel     : {panelTime:.3f}s ({panelComputeTime:.3f}s computing, the rest building the frames), "
+          f"{perSymbolTime / panelTime:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
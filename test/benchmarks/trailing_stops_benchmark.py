@@ -0,0 +1,91 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+"""
+The single-pass ATR trailing stop kernel vs. the row by row DataFrame loop
+findATRTrailingStops used to run. Not collected by pytest; run it by hand:
+
+    python test/benchmarks/trailing_stops_benchmark.py [--candles 2500]
+
+The kernel is timed with numba (when it is installed, after one call to
+compile it) and with its plain Python fallback.
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pkscreener.classes import PKTrailingStops
+from pkscreener.classes.PKTrailingStops import atrTrailingStops
+from PKTrailingStops_test import statistics
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def dataFrameLoop(screener, close, nLoss):
+    data = pd.DataFrame({"close": close, "nLoss": nLoss, "ATRTrailingStop": [0.0] + [np.nan] * (len(close) - 1)})
+    for i in range(1, len(data)):
+        data.loc[i, "ATRTrailingStop"] = screener.xATRTrailingStop_func(
+            data.loc[i, "close"], data.loc[i - 1, "close"], data.loc[i - 1, "ATRTrailingStop"], data.loc[i, "nLoss"])
+    return data["ATRTrailingStop"].to_numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candles", type=int, default=2500)
+    args = parser.parse_args()
+    rng = np.random.default_rng(5)
+    close = 100 + np.cumsum(rng.normal(0, 1, args.candles))
+    nLoss = np.abs(rng.normal(2, 0.5, args.candles))
+    expected, loopTime = timed(dataFrameLoop, statistics(), close, nLoss)
+    print(f"{args.candles} candles")
+    print(f"DataFrame loop: {loopTime * 1000:.2f}ms")
+    with patch.object(PKTrailingStops, "_trailingStopsCompiled", None):
+        stops, fallbackTime = timed(atrTrailingStops, close, nLoss)
+    np.testing.assert_array_equal(stops, expected)
+    print(f"kernel (Python): {fallbackTime * 1000:.2f}ms, {loopTime / fallbackTime:.0f}x")
+    if PKTrailingStops._trailingStopsCompiled is not None:
+        _, compileTime = timed(atrTrailingStops, close, nLoss)
+        stops, compiledTime = timed(atrTrailingStops, close, nLoss)
+        np.testing.assert_array_equal(stops, expected)
+        print(f"kernel (numba) : {compiledTime * 1000:.2f}ms, {loopTime / compiledTime:.0f}x "
+              f"(the first call took {compileTime:.2f}s to compile)")
+    else:
+        print("kernel (numba) : numba is not installed")
+
+
+if __name__ == "__main__":
+    main()
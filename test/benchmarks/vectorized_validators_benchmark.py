@@ -0,0 +1,96 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+"""
+The vectorized squeeze, momentum, inside bar and VCP validators vs. the
+row-wise versions they replaced, on one core. Not collected by pytest;
+run it by hand:
+
+    python test/benchmarks/vectorized_validators_benchmark.py [--candles 250 1000 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from PKDevTools.classes.log import default_logger as dl
+
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+from ScreeningStatistics_vectorized_test import (
+    latestFirstCandles, rowwiseBbandsSqueeze, rowwiseInsideBar, rowwiseMomentum, rowwiseVCP)
+
+
+def screener():
+    configManager = MagicMock()
+    configManager.enableAdditionalVCPEMAFilters = False
+    configManager.enableAdditionalVCPFilters = False
+    configManager.vcpRangePercentageFromTop = 20
+    configManager.vcpLegsToCheckForConsolidation = 3
+    return ScreeningStatistics(configManager, dl())
+
+
+def bestOf(function, *args, repeat=5, number=10, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function(*args, {"Pattern": ""}, {"Pattern": "", "Trend": "Up", "MA-Signal": "Bullish"}, **kwargs)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def timings(statistics, candles):
+    data = latestFirstCandles(candles, 7, volatility=0.015).copy()
+    # Three green candles rising on rising volume
+    data.iloc[:3, [data.columns.get_loc(col) for col in ["open", "close", "volume"]]] = [[104.0, 106.0, 3000.0], [102.0, 104.0, 2000.0], [100.0, 101.0, 1000.0]]
+    return {
+        "findBbandsSqueeze": (bestOf(lambda *args: rowwiseBbandsSqueeze(statistics, *args), data),
+                              bestOf(statistics.findBbandsSqueeze, data)),
+        "validateMomentum": (bestOf(lambda *args: rowwiseMomentum(statistics, *args), data),
+                             bestOf(statistics.validateMomentum, data)),
+        "validateInsideBar": (bestOf(lambda *args, **kw: rowwiseInsideBar(statistics, *args, **kw), data, daysToLookback=12),
+                              bestOf(statistics.validateInsideBar, data, daysToLookback=12)),
+        "validateVCP": (bestOf(lambda *args: rowwiseVCP(statistics, *args), data),
+                        bestOf(statistics.validateVCP, data)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candles", type=int, nargs="+", default=[250, 1000, 5000])
+    args = parser.parse_args()
+    statistics = screener()
+    for candles in args.candles:
+        print(f"{candles} candles:")
+        for name, (rowwise, vectorized) in timings(statistics, candles).items():
+            print(f"  {name:18}: {rowwise * 1000:8.2f}ms row-wise -> {vectorized * 1000:8.2f}ms, {rowwise / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
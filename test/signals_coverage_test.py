@@ -370,6 +370,8 @@ class TestAnalyzeATRTrailing:
         
         signals = TradingSignals(config_manager)
         
+        # The trailing stop follows the trend, so the price needs to trend up
+        stock_data = stock_data.assign(close=np.linspace(80.0, 100.0, len(stock_data)))
         mock_pktalib = MagicMock()
         mock_pktalib.ATR.return_value = pd.Series([1.0] * len(stock_data))  # Low ATR
         